@@ -0,0 +1,399 @@
+"""
+Bedrock Batch Page Scanner - Offline Phase 1 page classification via batch inference.
+
+Reprocessing the whole corpus through synchronous invoke_model calls runs into
+per-minute quotas for hours. This module runs Phase 1 of the holistic analysis
+as a Bedrock model-invocation (batch) job instead:
+
+1. Render every page of every book and write the vision requests as JSONL
+2. Upload the JSONL to an S3 input prefix and submit a batch job
+3. Poll until the job finishes
+4. Read the output JSONL back into per-book PageInfo lists
+
+The resulting pages are handed to HolisticPageAnalyzer.analyze_book(pages=...),
+which then finishes Phases 2-5 without any further vision calls.
+
+Identical page requests (e.g. the same page in two editions of a book) are
+written once and their result is fanned out to every page that asked for it.
+
+The job service is pluggable: BedrockBatchJobService talks to AWS, and
+LocalBatchJobService reads and writes the same JSONL layout on local disk
+for tests and offline runs.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from app.services.holistic_page_analyzer import HolisticPageAnalyzer, PageInfo
+from app.services.replan import NoVisionClient
+from app.utils.s3_transfer import create_s3_client
+from app.utils.single_flight import request_key
+
+logger = logging.getLogger(__name__)
+
+# Bedrock batch job states (see GetModelInvocationJob)
+JOB_DONE_STATES = ('Completed', 'PartiallyCompleted')
+JOB_FAILED_STATES = ('Failed', 'Stopped', 'Expired')
+
+# Bedrock caps a single input file at 1 GB; stay well below it
+DEFAULT_MAX_FILE_BYTES = 512 * 1024 * 1024
+
+
+@dataclass
+class BatchBook:
+    """A book queued for batch page classification."""
+    book_id: str
+    pdf_path: str
+    toc_entries: List[Dict] = field(default_factory=list)
+
+
+@dataclass
+class BatchJobSummary:
+    """Outcome of a batch page-classification run."""
+    job_id: str
+    status: str
+    records_submitted: int
+    records_succeeded: int
+    records_failed: int
+    duplicates_collapsed: int = 0
+    input_files: List[str] = field(default_factory=list)
+
+
+def _split_uri(s3_uri: str) -> Tuple[str, str]:
+    """Split s3://bucket/key into (bucket, key)."""
+    if not s3_uri.startswith('s3://'):
+        raise ValueError(f"Not an S3 URI: {s3_uri}")
+    bucket, _, key = s3_uri[5:].partition('/')
+    return bucket, key
+
+
+class BedrockBatchJobService:
+    """Runs model-invocation jobs on Amazon Bedrock with JSONL in S3."""
+
+    def __init__(self, role_arn: str, s3_client=None, bedrock_client=None,
+                 region_name: str = 'us-east-1'):
+        """
+        Initialize batch job service.
+
+        Args:
+            role_arn: IAM service role Bedrock assumes to read/write the S3 prefixes
+            s3_client: Boto3 S3 client (optional, will create if not provided)
+            bedrock_client: Boto3 Bedrock control-plane client (optional)
+            region_name: Region for created clients
+        """
+        import boto3
+
+        self.role_arn = role_arn
+        self.s3 = s3_client or create_s3_client(region_name=region_name)
+        self.bedrock = bedrock_client or boto3.client('bedrock', region_name=region_name)
+
+    def upload_input(self, local_path: str, input_uri: str) -> str:
+        """Upload a local JSONL shard under the input prefix. Returns its S3 URI."""
+        bucket, prefix = _split_uri(input_uri)
+        key = prefix.rstrip('/') + '/' + os.path.basename(local_path)
+        self.s3.upload_file(local_path, bucket, key)
+        return f"s3://{bucket}/{key}"
+
+    def submit_job(self, job_name: str, model_id: str, input_uri: str, output_uri: str) -> str:
+        """Submit a batch job over every JSONL file under input_uri. Returns the job ARN."""
+        response = self.bedrock.create_model_invocation_job(
+            jobName=job_name,
+            roleArn=self.role_arn,
+            modelId=model_id,
+            inputDataConfig={'s3InputDataConfig': {
+                's3Uri': input_uri.rstrip('/') + '/',
+                's3InputFormat': 'JSONL'
+            }},
+            outputDataConfig={'s3OutputDataConfig': {'s3Uri': output_uri.rstrip('/') + '/'}}
+        )
+        return response['jobArn']
+
+    def get_job_status(self, job_id: str) -> str:
+        """Return the job state (Submitted, InProgress, Completed, Failed, ...)."""
+        response = self.bedrock.get_model_invocation_job(jobIdentifier=job_id)
+        return response['status']
+
+    def read_output(self, job_id: str, output_uri: str) -> Iterator[Dict]:
+        """Yield output records from every *.jsonl.out file the job wrote."""
+        bucket, prefix = _split_uri(output_uri)
+        # Bedrock writes to {output_prefix}/{job_id}/ where job_id is the ARN suffix
+        job_prefix = prefix.rstrip('/') + '/' + job_id.split('/')[-1] + '/'
+
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=job_prefix):
+            for obj in page.get('Contents', []):
+                if not obj['Key'].endswith('.jsonl.out'):
+                    continue
+                body = self.s3.get_object(Bucket=bucket, Key=obj['Key'])['Body']
+                for line in body.iter_lines():
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class LocalBatchJobService:
+    """
+    Local stand-in for BedrockBatchJobService.
+
+    Input and output "URIs" are local directories. Jobs run synchronously on
+    submit: every input record is passed to `responder`, which returns the
+    model response body (or raises to record a per-record error). The output
+    layout matches Bedrock's: {output_dir}/{job_id}/{input_file}.out.
+    """
+
+    def __init__(self, responder: Callable[[Dict], Dict]):
+        """
+        Initialize local job service.
+
+        Args:
+            responder: Callable mapping a modelInput dict to a response body dict
+        """
+        self.responder = responder
+        self.jobs: Dict[str, str] = {}
+        logger.info("LocalBatchJobService initialized")
+
+    def upload_input(self, local_path: str, input_uri: str) -> str:
+        dest = Path(input_uri) / os.path.basename(local_path)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(local_path, dest)
+        return str(dest)
+
+    def submit_job(self, job_name: str, model_id: str, input_uri: str, output_uri: str) -> str:
+        job_id = f"{job_name}-{uuid.uuid4().hex[:8]}"
+        job_dir = Path(output_uri) / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+
+        failed = 0
+        for input_file in sorted(Path(input_uri).glob('*.jsonl')):
+            with open(input_file) as src, open(job_dir / f"{input_file.name}.out", 'w') as dst:
+                for line in src:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    try:
+                        record['modelOutput'] = self.responder(record['modelInput'])
+                    except Exception as e:
+                        record['error'] = {'errorMessage': str(e)}
+                        failed += 1
+                    dst.write(json.dumps(record) + '\n')
+
+        self.jobs[job_id] = 'PartiallyCompleted' if failed else 'Completed'
+        return job_id
+
+    def get_job_status(self, job_id: str) -> str:
+        return self.jobs.get(job_id, 'Failed')
+
+    def read_output(self, job_id: str, output_uri: str) -> Iterator[Dict]:
+        for out_file in sorted((Path(output_uri) / job_id).glob('*.jsonl.out')):
+            with open(out_file) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class BedrockBatchPageScanner:
+    """Runs Phase 1 page classification for many books as one batch job."""
+
+    def __init__(self, job_service, analyzer: Optional[HolisticPageAnalyzer] = None,
+                 poll_interval: float = 60.0, timeout: float = 24 * 3600,
+                 max_file_bytes: int = DEFAULT_MAX_FILE_BYTES):
+        """
+        Initialize batch page scanner.
+
+        Args:
+            job_service: BedrockBatchJobService or LocalBatchJobService
+            analyzer: Analyzer used to build request bodies and parse responses
+                (default: one with no runtime client; the batch job makes the calls)
+            poll_interval: Seconds between job status checks
+            timeout: Give up waiting after this many seconds
+            max_file_bytes: Start a new JSONL shard once a file reaches this size
+        """
+        self.job_service = job_service
+        self.analyzer = analyzer or HolisticPageAnalyzer(bedrock_client=NoVisionClient())
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_file_bytes = max_file_bytes
+
+    def write_requests(self, books: List[BatchBook],
+                       work_dir: str) -> Tuple[List[str], Dict[str, List[Tuple[str, int]]]]:
+        """
+        Render every page and write the batch input JSONL shards.
+
+        Identical request bodies are written once; the manifest lists every
+        (book_id, pdf_page) that shares the record.
+
+        Args:
+            books: Books to classify
+            work_dir: Local directory for the shard files
+
+        Returns:
+            (shard_paths, manifest) where manifest maps recordId -> [(book_id, pdf_page), ...]
+        """
+        import fitz
+
+        manifest: Dict[str, List[Tuple[str, int]]] = {}
+        record_by_key: Dict[str, str] = {}
+        shard_paths: List[str] = []
+        out = None
+        written = 0
+
+        def next_shard():
+            path = os.path.join(work_dir, f"pages_{len(shard_paths):04d}.jsonl")
+            shard_paths.append(path)
+            return open(path, 'w')
+
+        try:
+            for book in books:
+                sorted_toc = sorted(book.toc_entries, key=lambda x: x.get('page_number', 999))
+                toc_titles = [t['song_title'] for t in sorted_toc]
+
+                doc = fitz.open(book.pdf_path)
+                try:
+                    bodies = self.analyzer.build_page_requests(doc, toc_titles)
+                finally:
+                    doc.close()
+
+                for idx, body in enumerate(bodies):
+                    body_json = json.dumps(body)
+                    key = request_key(self.analyzer.VISION_MODEL_ID, body_json)
+                    if key in record_by_key:
+                        manifest[record_by_key[key]].append((book.book_id, idx + 1))
+                        continue
+
+                    # Bedrock expects 11-character alphanumeric record IDs
+                    record_id = f"{len(manifest):011d}"
+                    record_by_key[key] = record_id
+                    manifest[record_id] = [(book.book_id, idx + 1)]
+
+                    line = f'{{"recordId": "{record_id}", "modelInput": {body_json}}}\n'
+                    if out is None or written + len(line) > self.max_file_bytes:
+                        if out is not None:
+                            out.close()
+                        out = next_shard()
+                        written = 0
+                    out.write(line)
+                    written += len(line)
+
+                logger.info(f"  Queued {len(bodies)} pages for {book.book_id}")
+        finally:
+            if out is not None:
+                out.close()
+
+        return shard_paths, manifest
+
+    def ingest_output(self, records: Iterator[Dict], manifest: Dict[str, List[Tuple[str, int]]],
+                      page_counts: Dict[str, int]) -> Tuple[Dict[str, List[PageInfo]], int]:
+        """
+        Turn batch output records into per-book PageInfo lists.
+
+        Pages with no output (or a per-record error) become content_type='error',
+        matching what the synchronous scanner records on failure.
+
+        Returns:
+            (pages_by_book, succeeded_record_count)
+        """
+        pages_by_book: Dict[str, List[Optional[PageInfo]]] = {
+            book_id: [None] * count for book_id, count in page_counts.items()
+        }
+        succeeded = 0
+
+        for record in records:
+            locations = manifest.get(record.get('recordId'))
+            if not locations:
+                continue
+
+            if 'modelOutput' not in record:
+                logger.warning(f"Batch record {record.get('recordId')} failed: {record.get('error')}")
+                continue
+
+            try:
+                page_info = self.analyzer.page_from_model_output(record['modelOutput'])
+            except (KeyError, IndexError, TypeError) as e:
+                logger.warning(f"Unreadable output for record {record.get('recordId')}: {e}")
+                continue
+
+            for book_id, pdf_page in locations:
+                pages_by_book[book_id][pdf_page - 1] = replace(page_info, pdf_page=pdf_page)
+            succeeded += 1
+
+        result = {}
+        for book_id, pages in pages_by_book.items():
+            result[book_id] = [
+                p if p is not None else PageInfo(pdf_page=i + 1, content_type='error', confidence=0.0)
+                for i, p in enumerate(pages)
+            ]
+        return result, succeeded
+
+    def run(self, books: List[BatchBook], job_name: str, input_uri: str,
+            output_uri: str) -> Tuple[Dict[str, List[PageInfo]], BatchJobSummary]:
+        """
+        Classify every page of every book with a single batch job.
+
+        Args:
+            books: Books to classify
+            job_name: Batch job name (unique per submission)
+            input_uri: Input prefix (s3://bucket/prefix/ or a local dir for the stand-in)
+            output_uri: Output prefix (s3://bucket/prefix/ or a local dir)
+
+        Returns:
+            (pages_by_book, summary)
+        """
+        work_dir = tempfile.mkdtemp(prefix='bedrock_batch_')
+        try:
+            logger.info(f"Writing batch requests for {len(books)} books...")
+            shard_paths, manifest = self.write_requests(books, work_dir)
+            input_files = [self.job_service.upload_input(p, input_uri) for p in shard_paths]
+            page_total = sum(len(locations) for locations in manifest.values())
+            logger.info(f"  {len(manifest)} records in {len(input_files)} input files "
+                        f"({page_total - len(manifest)} duplicate pages collapsed)")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        job_id = self.job_service.submit_job(
+            job_name, self.analyzer.VISION_MODEL_ID, input_uri, output_uri
+        )
+        logger.info(f"Submitted batch job {job_id}")
+
+        status = self.wait_for_job(job_id)
+        if status not in JOB_DONE_STATES:
+            raise RuntimeError(f"Batch job {job_id} ended with status {status}")
+
+        page_counts = Counter(
+            book_id for locations in manifest.values() for book_id, _ in locations
+        )
+        pages_by_book, succeeded = self.ingest_output(
+            self.job_service.read_output(job_id, output_uri), manifest, page_counts
+        )
+
+        summary = BatchJobSummary(
+            job_id=job_id,
+            status=status,
+            records_submitted=len(manifest),
+            records_succeeded=succeeded,
+            records_failed=len(manifest) - succeeded,
+            duplicates_collapsed=page_total - len(manifest),
+            input_files=input_files
+        )
+        logger.info(f"Batch job {status}: {summary.records_succeeded}/{summary.records_submitted} records, "
+                    f"{summary.duplicates_collapsed} duplicate pages collapsed")
+        return pages_by_book, summary
+
+    def wait_for_job(self, job_id: str) -> str:
+        """Poll until the job reaches a terminal state. Returns the final status."""
+        start = time.time()
+        while True:
+            status = self.job_service.get_job_status(job_id)
+            if status in JOB_DONE_STATES or status in JOB_FAILED_STATES:
+                return status
+            if time.time() - start > self.timeout:
+                raise TimeoutError(f"Batch job {job_id} still {status} after {self.timeout:.0f}s")
+            logger.info(f"  Batch job {job_id}: {status}")
+            time.sleep(self.poll_interval)
@@ -11,9 +11,9 @@ This module provides:
 import json
 from typing import List, Optional, Dict
 import logging
-import boto3
 from botocore.exceptions import ClientError
 from app.models import TOCEntry, TOCParseResult
+from app.utils.bedrock_router import get_bedrock_client
 
 logger = logging.getLogger(__name__)
 
@@ -85,7 +85,7 @@ class BedrockParserService:
             self.bedrock = MockBedrock()
             logger.info("BedrockParserService initialized in local mode")
         else:
-            self.bedrock_runtime = boto3.client('bedrock-runtime')
+            self.bedrock_runtime = get_bedrock_client()
             logger.info(f"BedrockParserService initialized with model {model_id}")
     
     def bedrock_vision_parse(self, toc_images: List, book_metadata: Optional[Dict] = None) -> TOCParseResult:
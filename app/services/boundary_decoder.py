@@ -0,0 +1,327 @@
+"""
+Boundary Decoder - Global song segmentation over per-page classifications.
+
+The greedy boundary passes in HolisticPageAnalyzer (direct match, offset
+fallback, toc_only placement, detected-only inclusion, duplicate merging) each
+look at one piece of evidence at a time. This decoder instead scores every
+monotone assignment of pages to TOC songs at once and picks the best one:
+
+    states:       front matter, then each TOC song in TOC order
+    transitions:  stay in the current song, or start the next one
+                  (skipping up to `max_skip` songs at a penalty)
+    emissions:    page content type, detected title vs. song title,
+                  printed page number vs. the song's TOC page range,
+                  and distance of a start page from TOC page + offset
+
+Viterbi gives the segmentation and forward-backward gives, for each song, the
+posterior probability that it starts on the decoded page. Both passes are
+O(pages x songs). Only songs whose start posterior is low are worth a vision
+probe; confirmed probes are fed back as evidence and the book is decoded once
+more.
+
+Scores are hand-set log-potentials (a linear-chain model), not trained
+probabilities; DecoderConfig holds them so they can be tuned with re-plan.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+NEG_INF = float('-inf')
+
+
+@dataclass
+class DecoderConfig:
+    """Log-potentials and limits for the boundary decoder."""
+    # Content type of a song's first page
+    start_class: Dict[str, float] = field(default_factory=lambda: {
+        'song_start': 2.0, 'song_continuation': -2.0, 'error': 0.0,
+    })
+    start_class_default: float = -1.0
+    # Content type of a page inside a song
+    continue_class: Dict[str, float] = field(default_factory=lambda: {
+        'song_start': -2.0, 'song_continuation': 0.5, 'error': 0.0,
+    })
+    continue_class_default: float = 0.0
+    # Content type of a front-matter page (before the first song)
+    front_class: Dict[str, float] = field(default_factory=lambda: {
+        'song_start': -2.0, 'song_continuation': -1.0, 'toc': 1.0, 'cover': 1.0,
+    })
+    front_class_default: float = 0.0
+    title_match: float = 4.0          # detected title matches this song
+    title_other: float = -3.0         # detected title matches a different TOC song
+    repeated_title: float = 0.0       # song_start page repeating the current song's title
+    printed_inside: float = 0.5       # printed page falls in this song's TOC range
+    printed_outside: float = -1.0
+    location_weight: float = 0.5      # per page of distance from TOC page + offset
+    location_cap: int = 10
+    skip_penalty: float = -4.0        # TOC song with no pages of its own
+    shared_page_skip_penalty: float = -0.5  # ...when it shares a TOC page with a neighbour
+    max_skip: int = 3
+    probe_threshold: float = 0.6      # start posterior below this is worth a vision probe
+    probe_candidates: int = 2
+
+
+@dataclass
+class DecodedStart:
+    """Decoded first page of one TOC song."""
+    toc_index: int
+    pdf_page: int       # 1-indexed
+    posterior: float
+    title_matched: bool
+    probed: bool = False
+
+
+@dataclass
+class DecodeResult:
+    """Decoder output for one book."""
+    starts: List[DecodedStart]
+    skipped: List[int]  # TOC indices with no pages of their own
+    score: float
+    probes: int = 0
+
+
+def _logsumexp(values: List[float]) -> float:
+    m = max(values)
+    if m == NEG_INF:
+        return NEG_INF
+    return m + math.log(sum(math.exp(v - m) for v in values))
+
+
+class BoundaryDecoder:
+    """Decode song start pages from Phase 1 page results and the TOC."""
+
+    def __init__(self, titles_match: Callable[[str, str], bool],
+                 config: Optional[DecoderConfig] = None):
+        """
+        Args:
+            titles_match: Fuzzy title comparison (the analyzer's _titles_match)
+            config: Scoring parameters (default: DecoderConfig())
+        """
+        self.titles_match = titles_match
+        self.config = config or DecoderConfig()
+
+    def decode(self, pages: List, toc_entries: List[Dict], offset: int,
+               offset_confidence: float,
+               probe: Optional[Callable[[int, str], bool]] = None) -> DecodeResult:
+        """
+        Find the most likely start page of every TOC song.
+
+        Args:
+            pages: Phase 1 PageInfo list, in PDF order. Pages confirmed by a
+                probe are updated in place to song_start with the song title.
+            toc_entries: TOC entries sorted by page_number
+            offset: PDF page minus printed page
+            offset_confidence: Confidence in offset (0 disables the location prior)
+            probe: Optional callable (page_idx, title) -> bool asking whether
+                the page is the start of the song; only called for songs whose
+                start posterior is below config.probe_threshold
+
+        Returns:
+            DecodeResult with starts in TOC order
+        """
+        result, posteriors = self._decode_once(pages, toc_entries, offset, offset_confidence)
+        if probe is None:
+            return result
+
+        cfg = self.config
+        probes = 0
+        confirmed: Set[int] = set()
+        for start in result.starts:
+            if start.posterior >= cfg.probe_threshold:
+                continue
+            title = toc_entries[start.toc_index]['song_title']
+            ranked = sorted(range(len(pages)), key=lambda i: -posteriors[start.toc_index][i])
+            for page_idx in ranked[:cfg.probe_candidates]:
+                probes += 1
+                if probe(page_idx, title):
+                    pages[page_idx].content_type = 'song_start'
+                    pages[page_idx].detected_title = title
+                    confirmed.add(start.toc_index)
+                    break
+
+        if confirmed:
+            result, _ = self._decode_once(pages, toc_entries, offset, offset_confidence)
+            for start in result.starts:
+                start.probed = start.toc_index in confirmed
+        result.probes = probes
+        return result
+
+    def _decode_once(self, pages, toc_entries, offset,
+                     offset_confidence) -> Tuple[DecodeResult, List[List[float]]]:
+        start, cont, front, skip_prefix = self._emissions(pages, toc_entries, offset, offset_confidence)
+        path, score = self._viterbi(start, cont, front, skip_prefix)
+        posteriors = self._start_posteriors(start, cont, front, skip_prefix)
+
+        starts = []
+        seen = set()
+        prev_state = 0
+        for i, state in enumerate(path):
+            if state != prev_state:
+                k = state - 1
+                seen.add(k)
+                page = pages[i]
+                starts.append(DecodedStart(
+                    toc_index=k,
+                    pdf_page=i + 1,
+                    posterior=posteriors[k][i],
+                    title_matched=bool(page.detected_title)
+                    and self.titles_match(toc_entries[k]['song_title'], page.detected_title),
+                ))
+            prev_state = state
+
+        skipped = [k for k in range(len(toc_entries)) if k not in seen]
+        return DecodeResult(starts=starts, skipped=skipped, score=score), posteriors
+
+    def _emissions(self, pages, toc_entries, offset, offset_confidence):
+        """Precompute start/continue/front scores and skip-penalty prefix sums."""
+        cfg = self.config
+        n, k_count = len(pages), len(toc_entries)
+        toc_pages = [t.get('page_number') for t in toc_entries]
+        titles = [t['song_title'] for t in toc_entries]
+
+        # TOC songs each detected title matches
+        title_hits = []
+        for page in pages:
+            if page.detected_title:
+                title_hits.append({k for k in range(k_count) if self.titles_match(titles[k], page.detected_title)})
+            else:
+                title_hits.append(set())
+
+        # Printed-page range [lo, hi) of each song from the TOC
+        ranges = []
+        for k, lo in enumerate(toc_pages):
+            if lo is None:
+                ranges.append(None)
+                continue
+            later = [p for p in toc_pages[k + 1:] if p is not None and p > lo]
+            ranges.append((lo, min(later) if later else math.inf))
+
+        location_weight = cfg.location_weight * offset_confidence
+
+        start = [[0.0] * k_count for _ in range(n)]
+        cont = [[0.0] * k_count for _ in range(n)]
+        front = [0.0] * n
+        for i, page in enumerate(pages):
+            ct = page.content_type
+            hits = title_hits[i]
+            base_start = cfg.start_class.get(ct, cfg.start_class_default)
+            base_cont = cfg.continue_class.get(ct, cfg.continue_class_default)
+            front[i] = cfg.front_class.get(ct, cfg.front_class_default) + (cfg.title_other if hits else 0.0)
+
+            for k in range(k_count):
+                printed = 0.0
+                if page.printed_page is not None and ranges[k] is not None:
+                    lo, hi = ranges[k]
+                    printed = cfg.printed_inside if lo <= page.printed_page < hi else cfg.printed_outside
+
+                s = base_start + printed
+                if k in hits:
+                    s += cfg.title_match
+                elif hits:
+                    s += cfg.title_other
+                if location_weight and toc_pages[k] is not None:
+                    distance = abs(i + 1 - (toc_pages[k] + offset))
+                    s -= location_weight * min(distance, cfg.location_cap)
+                start[i][k] = s
+
+                if ct == 'song_start' and k in hits:
+                    c = cfg.repeated_title
+                else:
+                    c = base_cont + (cfg.title_other if hits else 0.0)
+                cont[i][k] = c + printed
+
+        # skip_prefix[s] = total penalty for skipping songs 0..s-1
+        skip_prefix = [0.0]
+        for k in range(k_count):
+            shared = toc_pages[k] is not None and (
+                (k > 0 and toc_pages[k - 1] == toc_pages[k])
+                or (k + 1 < k_count and toc_pages[k + 1] == toc_pages[k])
+            )
+            skip_prefix.append(skip_prefix[-1] + (cfg.shared_page_skip_penalty if shared else cfg.skip_penalty))
+
+        return start, cont, front, skip_prefix
+
+    def _sources(self, b: int) -> range:
+        """States that may transition into song state b by starting it."""
+        return range(max(0, b - 1 - self.config.max_skip), b)
+
+    def _stay(self, i, b, cont, front) -> float:
+        return front[i] if b == 0 else cont[i][b - 1]
+
+    def _viterbi(self, start, cont, front, skip_prefix) -> Tuple[List[int], float]:
+        """Best state per page (0 = front matter, k + 1 = TOC song k)."""
+        n, states = len(front), len(skip_prefix)
+        delta = [NEG_INF] * states
+        delta[0] = front[0]
+        for b in range(1, min(states, self.config.max_skip + 2)):
+            delta[b] = start[0][b - 1] + skip_prefix[b - 1]
+
+        backptr = [[0] * states for _ in range(n)]
+        for i in range(1, n):
+            new = [NEG_INF] * states
+            for b in range(states):
+                best, arg = delta[b] + self._stay(i, b, cont, front), b
+                if b > 0:
+                    for a in self._sources(b):
+                        cand = delta[a] + skip_prefix[b - 1] - skip_prefix[a] + start[i][b - 1]
+                        if cand > best:
+                            best, arg = cand, a
+                new[b] = best
+                backptr[i][b] = arg
+            delta = new
+
+        total = skip_prefix[-1]
+        final = [delta[b] + total - skip_prefix[b] for b in range(states)]
+        state = max(range(states), key=lambda b: final[b])
+        score = final[state]
+
+        path = [0] * n
+        for i in range(n - 1, -1, -1):
+            path[i] = state
+            state = backptr[i][state]
+        return path, score
+
+    def _start_posteriors(self, start, cont, front, skip_prefix) -> List[List[float]]:
+        """posteriors[k][i] = P(TOC song k starts on page i) via forward-backward."""
+        n, states = len(front), len(skip_prefix)
+        total = skip_prefix[-1]
+
+        alpha = [[NEG_INF] * states for _ in range(n)]
+        alpha[0][0] = front[0]
+        for b in range(1, min(states, self.config.max_skip + 2)):
+            alpha[0][b] = start[0][b - 1] + skip_prefix[b - 1]
+        for i in range(1, n):
+            prev = alpha[i - 1]
+            for b in range(states):
+                terms = [prev[b] + self._stay(i, b, cont, front)]
+                if b > 0:
+                    terms.extend(prev[a] + skip_prefix[b - 1] - skip_prefix[a] + start[i][b - 1]
+                                 for a in self._sources(b))
+                alpha[i][b] = _logsumexp(terms)
+
+        beta = [[NEG_INF] * states for _ in range(n)]
+        beta[n - 1] = [total - skip_prefix[b] for b in range(states)]
+        for i in range(n - 2, -1, -1):
+            nxt = beta[i + 1]
+            for a in range(states):
+                terms = [nxt[a] + self._stay(i + 1, a, cont, front)]
+                for b in range(a + 1, min(states, a + self.config.max_skip + 2)):
+                    terms.append(skip_prefix[b - 1] - skip_prefix[a] + start[i + 1][b - 1] + nxt[b])
+                beta[i][a] = _logsumexp(terms)
+
+        log_z = _logsumexp([alpha[n - 1][b] + beta[n - 1][b] for b in range(states)])
+
+        posteriors = [[0.0] * n for _ in range(states - 1)]
+        for b in range(1, states):
+            k = b - 1
+            if b <= self.config.max_skip + 1:
+                posteriors[k][0] = math.exp(start[0][k] + skip_prefix[k] + beta[0][b] - log_z)
+            for i in range(1, n):
+                entering = _logsumexp([alpha[i - 1][a] + skip_prefix[k] - skip_prefix[a] + start[i][k]
+                                       for a in self._sources(b)])
+                posteriors[k][i] = math.exp(entering + beta[i][b] - log_z) if entering > NEG_INF else 0.0
+        return posteriors
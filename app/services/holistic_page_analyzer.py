@@ -3,6 +3,7 @@ Holistic Page Analyzer - Improved page analysis with multi-phase approach.
 
 Strategy:
 1. Phase 1: Full Page Scan - Analyze EVERY page for content type and titles
+   (or, in sparse mode, only the pages around TOC-predicted boundaries)
 2. Phase 2: TOC Matching - Match TOC entries to detected song starts
 3. Phase 3: Offset Fallback - Use calculated offset for unmatched songs
 4. Phase 4: Boundary Assignment - Assign all pages to songs sequentially
@@ -16,13 +17,17 @@ import json
 import base64
 import re
 import time
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Callable
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
 from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 
+from app.services.boundary_decoder import BoundaryDecoder, DecoderConfig
+from app.utils.single_flight import get_default_group, request_key
+from app.utils.vision_scheduler import PRIORITY_PROBE, PRIORITY_SCAN
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,7 +51,7 @@ class SongBoundary:
     start_pdf_page: int  # Actual PDF page (1-indexed)
     end_pdf_page: int  # Actual PDF page (1-indexed)
     page_count: int
-    match_method: str  # 'direct_match', 'offset_fallback', 'toc_only'
+    match_method: str  # 'direct_match', 'offset_fallback', 'toc_only', 'detected_only', 'decoded'
     confidence: float
     artist: str = ''
 
@@ -66,6 +71,8 @@ class AnalysisResult:
     songs: List[SongBoundary]
     analysis_timestamp: str
     warnings: List[str] = field(default_factory=list)
+    scan_mode: str = 'full'
+    pages_classified: Optional[int] = None  # Phase 1 vision calls (None = pages supplied)
 
 
 class HolisticPageAnalyzer:
@@ -76,24 +83,55 @@ class HolisticPageAnalyzer:
     # Model for vision analysis
     VISION_MODEL_ID = 'us.anthropic.claude-3-5-sonnet-20241022-v2:0'
 
-    def __init__(self, bedrock_client=None, max_workers: int = 1):
+    BOUNDARY_MODES = ('greedy', 'decoder')
+    SCAN_MODES = ('full', 'sparse')
+
+    # Sparse scanning: TOC entries sampled to establish the offset, the smallest
+    # TOC worth sampling, and the share of unconfirmed starts that aborts to a full scan
+    SPARSE_SAMPLE_SIZE = 5
+    SPARSE_MIN_TOC_ENTRIES = 4
+    SPARSE_MAX_UNCONFIRMED = 0.3
+
+    def __init__(self, bedrock_client=None, max_workers: int = 1, single_flight=None,
+                 boundary_mode: str = 'greedy', decoder_config: Optional[DecoderConfig] = None,
+                 scan_mode: str = 'full', scheduler=None):
         """
         Initialize analyzer.
 
         Args:
             bedrock_client: Boto3 Bedrock runtime client (optional, will create if not provided)
             max_workers: Number of parallel Bedrock vision calls (1=sequential, 4-8 recommended)
+            single_flight: SingleFlight group that collapses identical concurrent vision
+                requests (default: the process-wide group, shared across books)
+            boundary_mode: 'greedy' (match/fallback passes) or 'decoder' (global
+                sequence decoding, see boundary_decoder.py)
+            decoder_config: Scoring parameters for the decoder
+            scan_mode: 'full' (classify every page) or 'sparse' (classify pages
+                around TOC-predicted boundaries, see sparse_scan)
+            scheduler: VisionScheduler shared across books. When given, vision
+                calls go through its queue and max_workers is not used.
         """
+        if boundary_mode not in self.BOUNDARY_MODES:
+            raise ValueError(f"boundary_mode must be one of {self.BOUNDARY_MODES}, got {boundary_mode!r}")
+        if scan_mode not in self.SCAN_MODES:
+            raise ValueError(f"scan_mode must be one of {self.SCAN_MODES}, got {scan_mode!r}")
+        self.scan_mode = scan_mode
         self.max_workers = max_workers
+        self.boundary_mode = boundary_mode
+        self.decoder_config = decoder_config
+        self.single_flight = single_flight or get_default_group()
+        self.scheduler = scheduler
+        self._book_key = 'default'
         self.bedrock = bedrock_client
         if not self.bedrock:
-            import boto3
-            self.bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+            from app.utils.bedrock_router import get_bedrock_client
+            self.bedrock = get_bedrock_client()
 
         logger.info(f"HolisticPageAnalyzer initialized (max_workers={max_workers})")
 
     def analyze_book(self, pdf_path: str, book_id: str, source_pdf_uri: str,
-                     toc_entries: List[Dict], artist: str = '') -> AnalysisResult:
+                     toc_entries: List[Dict], artist: str = '',
+                     pages: Optional[List[PageInfo]] = None) -> AnalysisResult:
         """
         Perform holistic page analysis on a songbook.
 
@@ -103,6 +141,9 @@ class HolisticPageAnalyzer:
             source_pdf_uri: S3 URI of source
             toc_entries: List of TOC entries with song_title and page_number
             artist: Book-level artist name
+            pages: Pre-computed Phase 1 results (e.g. from a Bedrock batch job).
+                When given, the page scan is skipped and Phases 2-5 run without
+                any further vision calls.
 
         Returns:
             AnalysisResult with complete analysis
@@ -110,22 +151,72 @@ class HolisticPageAnalyzer:
         import fitz
 
         logger.info(f"Starting holistic analysis for {book_id}")
+        self._book_key = book_id
         logger.info(f"  TOC entries: {len(toc_entries)}")
 
         doc = fitz.open(pdf_path)
-        total_pages = len(doc)
+        try:
+            scan_mode, pages_classified = 'full', None
+            if pages is None:
+                # ============================================
+                # PHASE 1: Full (or Sparse) Page Scan
+                # ============================================
+                sorted_toc = sorted(toc_entries, key=lambda x: x.get('page_number', 999))
+                toc_titles = [t['song_title'] for t in sorted_toc]
+                if self.scan_mode == 'sparse' and len(sorted_toc) >= self.SPARSE_MIN_TOC_ENTRIES:
+                    logger.info(f"Phase 1: Sparse TOC-guided scan of {len(doc)} pages...")
+                    titles_hint = self._build_titles_hint(toc_titles)
+                    pages, scan_stats = self.sparse_scan(
+                        lambda indices: self._classify_pages(doc, indices, titles_hint),
+                        len(doc), sorted_toc
+                    )
+                    scan_mode = 'sparse' if not scan_stats['full_scan'] else 'sparse_escalated'
+                    pages_classified = sum(scan_stats.values())
+                    logger.info(f"  Classified {pages_classified}/{len(doc)} pages {scan_stats}")
+                else:
+                    logger.info(f"Phase 1: Scanning all {len(doc)} pages...")
+                    pages = self._scan_all_pages(doc, toc_titles)
+                    pages_classified = len(doc)
+                verify_doc = doc
+            else:
+                logger.info(f"Phase 1: Using {len(pages)} pre-computed page results")
+                verify_doc = None
+
+            result = self.plan_book(pages, toc_entries, len(doc), book_id,
+                                    source_pdf_uri, artist, doc=verify_doc)
+            result.scan_mode = scan_mode
+            result.pages_classified = pages_classified
+            return result
+        finally:
+            doc.close()
+
+    def plan_book(self, pages: List[PageInfo], toc_entries: List[Dict], total_pages: int,
+                  book_id: str, source_pdf_uri: str, artist: str = '',
+                  doc=None) -> AnalysisResult:
+        """
+        Run the decision phases (2-5) over Phase 1 page results.
+
+        Args:
+            pages: Per-page results from Phase 1 (modified in place by Phase 5)
+            toc_entries: List of TOC entries with song_title and page_number
+            total_pages: Number of pages in the source PDF
+            book_id: Book identifier
+            source_pdf_uri: S3 URI of source
+            artist: Book-level artist name
+            doc: Open PDF document. Only needed for the vision-verified offset
+                fallback; when None, unmatched TOC entries go straight to
+                offset-calculated placement and no vision calls are made.
+
+        Returns:
+            AnalysisResult with complete analysis
+        """
         warnings = []
+        self._book_key = book_id
 
         # Sort TOC by page number
         sorted_toc = sorted(toc_entries, key=lambda x: x.get('page_number', 999))
         toc_titles = [t['song_title'] for t in sorted_toc]
 
-        # ============================================
-        # PHASE 1: Full Page Scan
-        # ============================================
-        logger.info(f"Phase 1: Scanning all {total_pages} pages...")
-        pages = self._scan_all_pages(doc, toc_titles)
-
         # Count detected song starts
         song_starts = [p for p in pages if p.content_type == 'song_start']
         logger.info(f"  Detected {len(song_starts)} song_start pages")
@@ -148,8 +239,13 @@ class HolisticPageAnalyzer:
         offset, offset_confidence = self._calculate_offset(matches)
         logger.info(f"  Calculated offset: {offset} (confidence: {offset_confidence:.2f})")
 
+        if self.boundary_mode == 'decoder' and sorted_toc and pages:
+            matches, offset, offset_confidence = self._decode_boundaries(
+                pages, sorted_toc, offset, offset_confidence, doc, toc_titles, warnings)
+            unmatched_toc, unmatched_starts = [], []
+
         # Try to match remaining TOC entries using offset
-        if unmatched_toc and offset_confidence > 0:
+        if unmatched_toc and offset_confidence > 0 and doc is not None:
             fallback_matches = self._offset_fallback_matching(
                 doc, pages, unmatched_toc, offset, toc_titles
             )
@@ -236,8 +332,6 @@ class HolisticPageAnalyzer:
         logger.info("Phase 5: Finalizing page classifications...")
         self._finalize_page_classifications(pages, songs)
 
-        doc.close()
-
         result = AnalysisResult(
             book_id=book_id,
             source_pdf_uri=source_pdf_uri,
@@ -261,52 +355,156 @@ class HolisticPageAnalyzer:
         Phase 1: Scan every page to detect content type and titles.
         Uses parallel Bedrock calls when max_workers > 1.
         """
-        total = len(doc)
+        titles_hint = self._build_titles_hint(toc_titles)
+        classified = self._classify_pages(doc, list(range(len(doc))), titles_hint)
+        return [classified[i] for i in range(len(doc))]
 
-        # Build hint string for vision model
-        titles_hint = ', '.join(toc_titles[:15])
-        if len(toc_titles) > 15:
-            titles_hint += '...'
+    def sparse_scan(self, classify: Callable[[List[int]], Dict[int, PageInfo]], total_pages: int,
+                    sorted_toc: List[Dict]) -> Tuple[List[PageInfo], Dict[str, int]]:
+        """
+        Phase 1 (sparse): classify only the pages that decide song boundaries.
+
+        1. Classify the TOC page of a sample of entries (first, middle, last and
+           evenly spaced). Printed page numbers and matching titles on those
+           pages establish the offset.
+        2. Classify each predicted start (TOC page + offset) and its neighbours.
+        3. For songs whose start is not confirmed there, classify every page
+           between the nearest confirmed starts on either side.
+
+        Pages never classified are filled in as song_continuation with zero
+        confidence ('unknown' before the first start), so songs missing from
+        the TOC inside an unscanned run are not detected. Falls back to a full
+        scan when no offset is established or too many starts are unconfirmed.
 
+        Args:
+            classify: Callable taking 0-indexed pages and returning {index: PageInfo}
+                (one vision call per page)
+            total_pages: Number of pages in the PDF
+            sorted_toc: TOC entries sorted by page_number
+
+        Returns:
+            (pages, stats) where stats counts pages classified per stage:
+            sample, boundary, escalated and full_scan
+        """
+        classified: Dict[int, PageInfo] = {}
+        stats = {'sample': 0, 'boundary': 0, 'escalated': 0, 'full_scan': 0}
+
+        def run(indices, stage):
+            todo = sorted({i for i in indices if 0 <= i < total_pages and i not in classified})
+            if todo:
+                classified.update(classify(todo))
+                stats[stage] += len(todo)
+
+        entries = [t for t in sorted_toc if t.get('page_number') is not None]
+
+        # Step 1: sample predicted starts at offset 0 and read the offset off them
+        run([t['page_number'] - 1 for t in self._sample_toc_entries(entries)], 'sample')
+        offsets = []
+        for idx, page in classified.items():
+            if page.printed_page is not None:
+                offsets.append(page.pdf_page - page.printed_page)
+            if page.content_type == 'song_start' and page.detected_title:
+                offsets.extend(page.pdf_page - t['page_number'] for t in entries
+                               if self._titles_match(t['song_title'], page.detected_title))
+        offset_counts = Counter(offsets).most_common(1)
+        if not offset_counts or offset_counts[0][1] < 2:
+            logger.info("  Sparse scan: no consistent offset in sample, scanning all pages")
+            run(range(total_pages), 'full_scan')
+            return [classified[i] for i in range(total_pages)], stats
+        offset = offset_counts[0][0]
+        logger.info(f"  Sparse scan: offset {offset} from {offset_counts[0][1]}/{len(offsets)} observations")
+
+        # Step 2: predicted starts and their neighbours
+        predicted = [t['page_number'] + offset - 1 for t in entries]
+        run([i + d for i in predicted for d in (-1, 0, 1)], 'boundary')
+
+        # Step 3: confirm each start, escalate the rest
+        confirmed: Dict[int, int] = {}
+        for k, (entry, pred) in enumerate(zip(entries, predicted)):
+            candidates = [i for i in (pred, pred - 1, pred + 1)
+                          if i in classified and classified[i].content_type == 'song_start']
+            titled = [i for i in candidates if classified[i].detected_title
+                      and self._titles_match(entry['song_title'], classified[i].detected_title)]
+            untitled = [i for i in candidates if not classified[i].detected_title]
+            if titled or untitled:
+                confirmed[k] = (titled or untitled)[0]
+
+        unconfirmed = [k for k in range(len(entries)) if k not in confirmed]
+        if len(unconfirmed) > self.SPARSE_MAX_UNCONFIRMED * len(entries):
+            logger.info(f"  Sparse scan: {len(unconfirmed)}/{len(entries)} starts unconfirmed, scanning all pages")
+            run(range(total_pages), 'full_scan')
+            return [classified[i] for i in range(total_pages)], stats
+
+        for k in unconfirmed:
+            before = [confirmed[j] for j in range(k - 1, -1, -1) if j in confirmed][:1]
+            after = [confirmed[j] for j in range(k + 1, len(entries)) if j in confirmed][:1]
+            lo = before[0] + 1 if before else 0
+            hi = after[0] if after else total_pages
+            run(range(lo, hi), 'escalated')
+
+        # Fill unclassified pages from the boundary structure
+        first_start = min(confirmed.values(), default=0)
+        pages = []
+        for i in range(total_pages):
+            if i in classified:
+                pages.append(classified[i])
+            else:
+                pages.append(PageInfo(
+                    pdf_page=i + 1,
+                    content_type='unknown' if i < first_start else 'song_continuation',
+                    confidence=0.0
+                ))
+        return pages, stats
+
+    def _sample_toc_entries(self, entries: List[Dict]) -> List[Dict]:
+        """Pick first, middle, last and evenly spaced entries (as PageMapperService.sample_entries)."""
+        if len(entries) <= self.SPARSE_SAMPLE_SIZE:
+            return list(entries)
+        step = (len(entries) - 1) / (self.SPARSE_SAMPLE_SIZE - 1)
+        picks = {round(i * step) for i in range(self.SPARSE_SAMPLE_SIZE)} | {len(entries) // 2}
+        return [entries[i] for i in sorted(picks)]
+
+    def _classify_pages(self, doc, indices: List[int], titles_hint: str) -> Dict[int, PageInfo]:
+        """
+        Classify the given pages (0-indexed) with one vision call each.
+
+        Returns:
+            Dict of page index -> PageInfo
+        """
+        if self.scheduler is not None:
+            return self._scan_pages_scheduled(doc, indices, titles_hint)
         if self.max_workers <= 1:
-            return self._scan_all_pages_sequential(doc, total, titles_hint)
+            return self._scan_pages_sequential(doc, indices, titles_hint)
         else:
-            return self._scan_all_pages_parallel(doc, total, titles_hint)
+            return self._scan_pages_parallel(doc, indices, titles_hint)
 
-    def _scan_all_pages_sequential(self, doc, total: int, titles_hint: str) -> List[PageInfo]:
+    def _scan_pages_sequential(self, doc, indices: List[int], titles_hint: str) -> Dict[int, PageInfo]:
         """Original sequential scanning."""
-        pages = []
-        for i in range(total):
+        pages = {}
+        total = len(indices)
+        for n, i in enumerate(indices, 1):
             pdf_page = i + 1
             try:
                 page_info = self._analyze_single_page(doc, i, titles_hint)
                 page_info.pdf_page = pdf_page
-                pages.append(page_info)
-                if pdf_page % 10 == 0:
-                    logger.info(f"    Scanned page {pdf_page}/{total}")
+                pages[i] = page_info
+                if n % 10 == 0:
+                    logger.info(f"    Scanned page {n}/{total}")
             except Exception as e:
                 logger.error(f"Error scanning page {pdf_page}: {e}")
-                pages.append(PageInfo(pdf_page=pdf_page, content_type='error', confidence=0.0))
+                pages[i] = PageInfo(pdf_page=pdf_page, content_type='error', confidence=0.0)
         return pages
 
-    def _scan_all_pages_parallel(self, doc, total: int, titles_hint: str) -> List[PageInfo]:
+    def _scan_pages_parallel(self, doc, indices: List[int], titles_hint: str) -> Dict[int, PageInfo]:
         """Parallel scanning: pre-render images (main thread), then vision calls (thread pool)."""
         import time
 
+        total = len(indices)
         logger.info(f"    Pre-rendering {total} page images...")
         render_start = time.time()
 
         # Pre-render all pages to base64 images in the main thread (PyMuPDF not thread-safe)
-        page_images = []
-        for i in range(total):
-            page = doc[i]
-            pix = page.get_pixmap(dpi=72)
-            img_bytes = pix.tobytes("png")
-            # Reduce DPI if too large for Bedrock
-            if len(img_bytes) > 4 * 1024 * 1024:
-                pix = page.get_pixmap(dpi=50)
-                img_bytes = pix.tobytes("png")
-            page_images.append(base64.b64encode(img_bytes).decode('utf-8'))
+        page_images = {i: self._render_page_b64(doc[i]) for i in indices}
 
         render_time = time.time() - render_start
         logger.info(f"    Pre-rendered {total} pages in {render_time:.1f}s")
@@ -316,14 +514,14 @@ class HolisticPageAnalyzer:
 
         # Send vision calls in parallel
         logger.info(f"    Scanning with {self.max_workers} parallel workers...")
-        pages = [None] * total
+        pages = {}
         completed = 0
         scan_start = time.time()
 
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             # Submit all vision calls
             future_to_idx = {}
-            for i in range(total):
+            for i in indices:
                 future = executor.submit(self._vision_call_worker, page_images[i], prompt)
                 future_to_idx[future] = i
 
@@ -350,6 +548,85 @@ class HolisticPageAnalyzer:
         logger.info(f"    Parallel scan complete: {total} pages in {scan_time:.1f}s ({rate:.1f} pages/sec)")
         return pages
 
+    def _scan_pages_scheduled(self, doc, indices: List[int], titles_hint: str) -> Dict[int, PageInfo]:
+        """
+        Queue one vision task per page on the shared scheduler and wait for them.
+
+        Pages are rendered here (PyMuPDF is not thread-safe) and submitted as
+        they render, so workers start on this book while the rest renders.
+        """
+        total = len(indices)
+        prompt = self._build_page_prompt(titles_hint)
+        scan_start = time.time()
+        futures = {}
+        for i in indices:
+            futures[self.scheduler.submit(self._book_key, self._vision_call_worker,
+                                          self._render_page_b64(doc[i]), prompt,
+                                          priority=PRIORITY_SCAN)] = i
+        logger.info(f"    Queued {total} pages on the shared vision scheduler")
+
+        pages = {}
+        for completed, future in enumerate(as_completed(futures), 1):
+            idx = futures[future]
+            pdf_page = idx + 1
+            try:
+                page_info = future.result()
+                page_info.pdf_page = pdf_page
+                pages[idx] = page_info
+            except Exception as e:
+                logger.error(f"Error scanning page {pdf_page}: {e}")
+                pages[idx] = PageInfo(pdf_page=pdf_page, content_type='error', confidence=0.0)
+            if completed % 10 == 0:
+                elapsed = time.time() - scan_start
+                rate = completed / elapsed if elapsed > 0 else 0
+                logger.info(f"    Scanned {completed}/{total} pages ({rate:.1f} pages/sec)")
+
+        scan_time = time.time() - scan_start
+        rate = total / scan_time if scan_time > 0 else 0
+        logger.info(f"    Scheduled scan complete: {total} pages in {scan_time:.1f}s ({rate:.1f} pages/sec)")
+        return pages
+
+    def build_page_requests(self, doc, toc_titles: List[str]) -> List[Dict]:
+        """
+        Build the Phase 1 vision request body for every page, without sending it.
+
+        Used by offline (batch inference) mode; the bodies are identical to the
+        ones the synchronous scanner sends.
+
+        Args:
+            doc: Open PDF document
+            toc_titles: TOC song titles (in page order) for the prompt hint
+
+        Returns:
+            List of request bodies, one per page in PDF order
+        """
+        prompt = self._build_page_prompt(self._build_titles_hint(toc_titles))
+        return [
+            self._build_vision_request(self._render_page_b64(doc[i]), prompt)
+            for i in range(len(doc))
+        ]
+
+    def page_from_model_output(self, model_output: Dict) -> PageInfo:
+        """Parse a raw Bedrock response body (as stored by batch jobs) into PageInfo."""
+        return self._parse_page_response(model_output['content'][0]['text'])
+
+    def _build_titles_hint(self, toc_titles: List[str]) -> str:
+        """Build the song-title hint string for the vision prompt."""
+        titles_hint = ', '.join(toc_titles[:15])
+        if len(toc_titles) > 15:
+            titles_hint += '...'
+        return titles_hint
+
+    def _render_page_b64(self, page) -> str:
+        """Render a page as base64 PNG (72 DPI, dropping to 50 DPI if over 4MB)."""
+        pix = page.get_pixmap(dpi=72)
+        img_bytes = pix.tobytes("png")
+        # Reduce DPI if too large for Bedrock
+        if len(img_bytes) > 4 * 1024 * 1024:
+            pix = page.get_pixmap(dpi=50)
+            img_bytes = pix.tobytes("png")
+        return base64.b64encode(img_bytes).decode('utf-8')
+
     def _build_page_prompt(self, titles_hint: str) -> str:
         """Build the vision prompt for page analysis."""
         return f"""Analyze this sheet music page and respond with JSON only.
@@ -407,15 +684,7 @@ Respond with ONLY valid JSON:
         page = doc[page_idx]
 
         # Render page as image (72 DPI to stay under size limits)
-        pix = page.get_pixmap(dpi=72)
-        img_bytes = pix.tobytes("png")
-
-        # Check image size - reduce DPI if too large
-        if len(img_bytes) > 4 * 1024 * 1024:  # 4MB
-            pix = page.get_pixmap(dpi=50)
-            img_bytes = pix.tobytes("png")
-
-        image_b64 = base64.b64encode(img_bytes).decode('utf-8')
+        image_b64 = self._render_page_b64(page)
         prompt = self._build_page_prompt(titles_hint)
 
         try:
@@ -434,8 +703,26 @@ Respond with ONLY valid JSON:
             )
 
     def _call_vision(self, image_b64: str, prompt: str) -> str:
-        """Call Bedrock vision API."""
-        request_body = {
+        """Call Bedrock vision API.
+
+        Identical requests already in flight (same page image and prompt) share
+        that call's result instead of being sent again.
+        """
+        body = json.dumps(self._build_vision_request(image_b64, prompt))
+
+        def invoke():
+            response = self.bedrock.invoke_model(
+                modelId=self.VISION_MODEL_ID,
+                body=body
+            )
+            response_body = json.loads(response['body'].read())
+            return response_body['content'][0]['text']
+
+        return self.single_flight.do(request_key(self.VISION_MODEL_ID, body), invoke)
+
+    def _build_vision_request(self, image_b64: str, prompt: str) -> Dict:
+        """Build the Anthropic messages request body for a single-image vision call."""
+        return {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 300,
             "temperature": 0,
@@ -455,14 +742,6 @@ Respond with ONLY valid JSON:
             }]
         }
 
-        response = self.bedrock.invoke_model(
-            modelId=self.VISION_MODEL_ID,
-            body=json.dumps(request_body)
-        )
-
-        response_body = json.loads(response['body'].read())
-        return response_body['content'][0]['text']
-
     def _parse_page_response(self, response: str) -> PageInfo:
         """Parse vision response into PageInfo."""
         try:
@@ -524,6 +803,84 @@ Respond with ONLY valid JSON:
 
         return matches, unmatched_toc, unmatched_starts
 
+    def _decode_boundaries(self, pages: List[PageInfo], sorted_toc: List[Dict], offset: int,
+                           offset_confidence: float, doc, toc_titles: List[str],
+                           warnings: List[str]) -> Tuple[List[Dict], int, float]:
+        """
+        Phases 3/3b (decoder mode): decode all song starts in one pass.
+
+        Vision probes are only made for songs whose start posterior is low,
+        and only when the document is available. Titled song_start pages that
+        match no TOC entry are included as detected_only songs, as in Phase 3b.
+
+        Returns:
+            (matches in the same form as the greedy passes, offset, offset
+            confidence). With no title matches the offset is re-estimated from
+            printed page numbers, and the caller must report that one.
+        """
+        if not offset_confidence:
+            offset, offset_confidence = self._offset_from_printed_pages(pages)
+            logger.info(f"  Offset from printed pages: {offset} (confidence: {offset_confidence:.2f})")
+
+        probe = None
+        if doc is not None:
+            titles_hint = ', '.join(toc_titles[:10])
+
+            def probe(page_idx, title):
+                return self._verify_song_at_page(doc, page_idx, title, titles_hint)
+
+        decoder = BoundaryDecoder(self._titles_match, self.decoder_config)
+        decoded = decoder.decode(pages, sorted_toc, offset, offset_confidence, probe=probe)
+        logger.info(f"  Decoded {len(decoded.starts)} song starts "
+                    f"({decoded.probes} vision probes, {len(decoded.skipped)} TOC songs skipped)")
+
+        matches = []
+        for start in decoded.starts:
+            if start.title_matched and not start.probed:
+                method = 'direct_match'
+            elif start.probed:
+                method = 'offset_fallback'
+            elif pages[start.pdf_page - 1].content_type == 'song_start':
+                method = 'decoded'
+            else:
+                method = 'toc_only'
+                warnings.append(f"Song '{sorted_toc[start.toc_index]['song_title']}' "
+                                f"not directly verified, using decoded position")
+            matches.append({
+                'toc_entry': sorted_toc[start.toc_index],
+                'pdf_page': start.pdf_page,
+                'method': method,
+                'confidence': round(start.posterior, 3)
+            })
+
+        for toc_index in decoded.skipped:
+            warnings.append(f"Song '{sorted_toc[toc_index]['song_title']}' "
+                            f"not found in page sequence, omitted")
+
+        decoded_pages = {m['pdf_page'] for m in matches}
+        for page in pages:
+            if (page.content_type != 'song_start' or not page.detected_title
+                    or page.pdf_page in decoded_pages
+                    or any(self._titles_match(t, page.detected_title) for t in toc_titles)):
+                continue
+            matches.append({
+                'toc_entry': {'song_title': page.detected_title, 'page_number': page.pdf_page},
+                'pdf_page': page.pdf_page,
+                'method': 'detected_only',
+                'confidence': page.confidence
+            })
+            warnings.append(f"Song '{page.detected_title}' detected but not in TOC - included from page scan")
+
+        return matches, offset, offset_confidence
+
+    def _offset_from_printed_pages(self, pages: List[PageInfo]) -> Tuple[int, float]:
+        """Estimate the page offset from printed page numbers when no titles matched."""
+        offsets = [p.pdf_page - p.printed_page for p in pages if p.printed_page is not None]
+        if not offsets:
+            return 0, 0.0
+        most_common, count = Counter(offsets).most_common(1)[0]
+        return most_common, count / len(offsets)
+
     def _calculate_offset(self, matches: List[Dict]) -> Tuple[int, float]:
         """
         Calculate page offset from matches.
@@ -634,7 +991,11 @@ When in doubt, answer YES - we'll verify later.
 Answer with ONLY "YES" or "NO"."""
 
         try:
-            response = self._call_vision(image_b64, prompt)
+            if self.scheduler is not None:
+                response = self.scheduler.call(self._book_key, self._call_vision, image_b64, prompt,
+                                               priority=PRIORITY_PROBE)
+            else:
+                response = self._call_vision(image_b64, prompt)
             answer = response.strip().upper()
             return answer.startswith('YES')
         except Exception as e:
@@ -753,6 +1114,65 @@ Answer with ONLY "YES" or "NO"."""
 
         return False
 
+    def pages_from_dicts(self, page_dicts: List[Dict]) -> List[PageInfo]:
+        """
+        Rebuild Phase 1 results from the `pages` list of a stored page_analysis.json.
+
+        Stored pages have been rewritten by Phase 5, so where the raw vision
+        response was kept it is re-parsed to recover the original classification.
+        """
+        pages = []
+        for d in page_dicts:
+            raw = d.get('raw_response')
+            if raw:
+                page = self._parse_page_response(raw)
+                page.pdf_page = d['pdf_page']
+            else:
+                page = PageInfo(
+                    pdf_page=d['pdf_page'],
+                    printed_page=d.get('printed_page'),
+                    content_type=d.get('content_type', 'unknown'),
+                    detected_title=d.get('detected_title'),
+                    has_music_notation=d.get('has_music_notation', False),
+                    confidence=d.get('confidence', 0.0),
+                )
+            pages.append(page)
+        return pages
+
+    def to_page_mapping(self, result: AnalysisResult) -> Dict[str, Any]:
+        """Build the page_mapping.json artifact (kept for compatibility)."""
+        return {
+            'book_id': result.book_id,
+            'offset': result.calculated_offset,
+            'confidence': result.offset_confidence,
+            'samples_verified': result.matched_song_count,
+            'song_locations': [
+                {
+                    'song_title': song.title,
+                    'printed_page': song.toc_page or song.start_pdf_page,
+                    'pdf_index': song.start_pdf_page - 1,
+                    'artist': song.artist
+                }
+                for song in result.songs
+            ],
+            'mapping_method': 'holistic_analysis'
+        }
+
+    def to_verified_songs(self, result: AnalysisResult) -> Dict[str, Any]:
+        """Build the verified_songs.json artifact consumed by the PDF splitter."""
+        return {
+            'book_id': result.book_id,
+            'verified_songs': [
+                {
+                    'song_title': song.title,
+                    'start_page': song.start_pdf_page - 1,  # Convert 1-indexed to 0-indexed
+                    'end_page': song.end_pdf_page,           # 1-indexed inclusive == 0-indexed exclusive
+                    'artist': song.artist
+                }
+                for song in result.songs
+            ]
+        }
+
     def to_dict(self, result: AnalysisResult) -> Dict[str, Any]:
         """Convert AnalysisResult to dictionary for JSON serialization."""
         return {
@@ -771,6 +1191,8 @@ Answer with ONLY "YES" or "NO"."""
             },
             'analysis_timestamp': result.analysis_timestamp,
             'warnings': result.warnings,
+            'scan_mode': result.scan_mode,
+            'pages_classified': result.pages_classified,
             'pages': [asdict(p) for p in result.pages],
             'songs': [
                 {
@@ -44,8 +44,8 @@ class ImprovedPageMapperService:
         """Initialize the improved page mapper."""
         self.bedrock_runtime = None
         try:
-            import boto3
-            self.bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-east-1')
+            from app.utils.bedrock_router import get_bedrock_client
+            self.bedrock_runtime = get_bedrock_client()
             logger.info("ImprovedPageMapperService initialized with Bedrock")
         except Exception as e:
             logger.error(f"Could not initialize Bedrock: {e}")
@@ -0,0 +1,250 @@
+"""
+Incremental re-split - Regenerates only the song PDFs a boundary edit changed.
+
+After a boundary fix, most songs in a book keep the same title, artist and
+page range. Instead of deleting and re-extracting every song, the old
+output_files.json entries are matched against the new verified_songs list:
+matching songs keep their existing PDF, songs that are new or whose range,
+title or artist changed are re-extracted and uploaded, and only outputs no
+longer referenced are deleted.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+import fitz  # PyMuPDF
+
+from app.services.pdf_splitter import SaveProfile, get_save_profile, serialize_pdf
+from app.utils.s3_transfer import S3TransferQueue
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SplitPlan:
+    """What an incremental re-split has to do."""
+    keep: Dict[int, Dict] = field(default_factory=dict)  # new song index -> reused output entry
+    regenerate: List[int] = field(default_factory=list)  # new song indices to extract
+    obsolete: List[Dict] = field(default_factory=list)   # old output entries no longer used
+
+
+@dataclass
+class ResplitResult:
+    """Outcome of an incremental re-split."""
+    output_files: List[Dict]
+    kept: int = 0
+    regenerated: int = 0
+    deleted: int = 0
+    skipped: List[str] = field(default_factory=list)  # songs with no pages in the source
+
+
+def _song_key(title: str, artist: str, start: int, end: int) -> Tuple[str, str, int, int]:
+    return (title, artist, int(start), int(end))
+
+
+def _s3_key(artist: str, book: str, filename: str) -> str:
+    return f'v3/{artist}/{book}/{filename}'
+
+
+def plan_incremental_split(old_output_files: List[Dict], new_songs: List[Dict],
+                           default_artist: str) -> SplitPlan:
+    """
+    Match new verified songs to existing outputs.
+
+    A song can reuse an output only if its title, artist and page range are
+    all unchanged. Repeated identical songs are matched one-to-one.
+
+    Args:
+        old_output_files: Entries from the current output_files.json
+        new_songs: New verified_songs list
+        default_artist: Book artist for songs without their own
+
+    Returns:
+        SplitPlan
+    """
+    available = defaultdict(list)
+    for entry in old_output_files:
+        start, end = entry['page_range']
+        key = _song_key(entry['song_title'], entry.get('artist', default_artist), start, end)
+        available[key].append(entry)
+
+    plan = SplitPlan()
+    for idx, song in enumerate(new_songs):
+        key = _song_key(song['song_title'], song.get('artist', default_artist),
+                        song['start_page'], song['end_page'])
+        if available.get(key):
+            plan.keep[idx] = available[key].pop(0)
+        else:
+            plan.regenerate.append(idx)
+
+    plan.obsolete = [entry for entries in available.values() for entry in entries]
+    return plan
+
+
+class IncrementalSplitter:
+    """Apply a SplitPlan to local output files and (optionally) S3."""
+
+    def __init__(self, output_dir: Path, output_bucket: str, s3_client=None,
+                 save_profile: str = 'none'):
+        """
+        Args:
+            output_dir: Local output root (SheetMusic_Output); songs live in {artist}/{book}/
+            output_bucket: S3 output bucket; songs live under v3/{artist}/{book}/
+            s3_client: boto3 S3 client, or None to update local files only
+            save_profile: Output PDF save profile (see pdf_splitter.SAVE_PROFILES)
+        """
+        self.output_dir = Path(output_dir)
+        self.output_bucket = output_bucket
+        self.s3 = s3_client
+        self.save_profile: SaveProfile = get_save_profile(save_profile)
+
+    def _output_uri(self, artist: str, book: str, filename: str) -> str:
+        return f's3://{self.output_bucket}/{_s3_key(artist, book, filename)}'
+
+    def planned_uploads(self, artist: str, book: str, old_output_files: List[Dict],
+                        new_songs: List[Dict], filename_fn: Callable[[str, str], str]) -> List[str]:
+        """
+        Output URIs resplit() would upload for the same arguments.
+
+        Lets a caller record them before uploading, so objects left behind
+        by an interrupted re-split can be found and removed later.
+
+        Returns:
+            S3 URIs of the songs to regenerate (songs with no pages included)
+        """
+        plan = plan_incremental_split(old_output_files, new_songs, artist)
+        return [self._output_uri(artist, book, filename_fn(new_songs[idx]['song_title'],
+                                                           new_songs[idx].get('artist', artist)))
+                for idx in plan.regenerate]
+
+    def delete_unused(self, artist: str, book: str, output_uris: List[str],
+                      current: List[Dict]) -> int:
+        """
+        Delete outputs (local file and S3 object) no current entry points to.
+
+        Args:
+            artist: Book artist (folder name)
+            book: Book name (folder name)
+            output_uris: Candidate output URIs, e.g. uploads of an interrupted re-split
+            current: Entries of the output_files.json list now in effect
+
+        Returns:
+            Number of outputs deleted
+        """
+        return self._delete_obsolete([{'output_uri': uri} for uri in output_uris], current,
+                                     self.output_dir / artist / book)
+
+    def resplit(self, artist: str, book: str, source_pdf: Path, old_output_files: List[Dict],
+                new_songs: List[Dict], filename_fn: Callable[[str, str], str]) -> ResplitResult:
+        """
+        Bring a book's song PDFs in line with a new verified_songs list.
+
+        Args:
+            artist: Book artist (folder name)
+            book: Book name (folder name)
+            source_pdf: Source book PDF
+            old_output_files: Entries from the current output_files.json
+            new_songs: New verified_songs list
+            filename_fn: (song_title, song_artist) -> output file name
+
+        Returns:
+            ResplitResult whose output_files replace the output_files.json list
+        """
+        plan = plan_incremental_split(old_output_files, new_songs, artist)
+        local_dir = self.output_dir / artist / book
+        local_dir.mkdir(parents=True, exist_ok=True)
+        result = ResplitResult(output_files=[])
+
+        doc: Optional[fitz.Document] = None
+        uploads = S3TransferQueue(self.s3) if self.s3 else None
+        try:
+            for idx, song in enumerate(new_songs):
+                song_artist = song.get('artist', artist)
+
+                if idx in plan.keep:
+                    entry = plan.keep[idx]
+                    local_path = local_dir / entry['output_uri'].rsplit('/', 1)[-1]
+                    if not local_path.exists():
+                        # Restore a missing local copy; S3 already has it
+                        if doc is None:
+                            doc = fitz.open(str(source_pdf))
+                        self._extract(doc, song, local_path)
+                    result.output_files.append(entry)
+                    result.kept += 1
+                    continue
+
+                filename = filename_fn(song['song_title'], song_artist)
+                local_path = local_dir / filename
+                if doc is None:
+                    doc = fitz.open(str(source_pdf))
+                file_size = self._extract(doc, song, local_path)
+                if file_size is None:
+                    logger.info(f'Skipping "{song["song_title"]}" '
+                                f'[{song["start_page"]}-{song["end_page"]}]: 0 pages')
+                    result.skipped.append(song['song_title'])
+                    continue
+
+                if uploads:
+                    uploads.upload_file(str(local_path), self.output_bucket,
+                                        _s3_key(artist, book, filename))
+                result.output_files.append({
+                    'song_title': song['song_title'],
+                    'artist': song_artist,
+                    'output_uri': self._output_uri(artist, book, filename),
+                    'file_size_bytes': file_size,
+                    'page_range': [song['start_page'], song['end_page']],
+                })
+                result.regenerated += 1
+        finally:
+            if doc is not None:
+                doc.close()
+            if uploads:
+                uploads.close()
+
+        failed = [r.key for r in (uploads.results if uploads else []) if not r.ok]
+        if failed:
+            raise RuntimeError(f"{len(failed)} song uploads failed: {', '.join(failed[:5])}")
+
+        result.deleted = self._delete_obsolete(plan.obsolete, result.output_files, local_dir)
+        logger.info(f"Re-split {artist} / {book}: {result.kept} kept, "
+                    f"{result.regenerated} regenerated, {result.deleted} deleted")
+        return result
+
+    def _extract(self, doc: fitz.Document, song: Dict, local_path: Path) -> Optional[int]:
+        """Extract one song to a local file; returns its size, or None if it has no pages."""
+        start = song['start_page']
+        end = min(song['end_page'], len(doc))
+        if end - start <= 0:
+            return None
+        song_doc = fitz.open()
+        try:
+            song_doc.insert_pdf(doc, from_page=start, to_page=end - 1)
+            serialize_pdf(song_doc, self.save_profile, str(local_path))
+        finally:
+            song_doc.close()
+        return local_path.stat().st_size
+
+    def _delete_obsolete(self, obsolete: List[Dict], current: List[Dict], local_dir: Path) -> int:
+        """Delete outputs no current entry points to (overwritten files are left alone)."""
+        in_use = {entry['output_uri'] for entry in current}
+        prefix = f's3://{self.output_bucket}/'
+        stale = [entry['output_uri'] for entry in obsolete if entry['output_uri'] not in in_use]
+
+        keys = []
+        for uri in stale:
+            local_path = local_dir / uri.rsplit('/', 1)[-1]
+            if local_path.exists():
+                local_path.unlink()
+            if uri.startswith(prefix):
+                keys.append(uri[len(prefix):])
+
+        if self.s3 and keys:
+            for i in range(0, len(keys), 1000):
+                self.s3.delete_objects(
+                    Bucket=self.output_bucket,
+                    Delete={'Objects': [{'Key': k} for k in keys[i:i + 1000]]}
+                )
+        return len(stale)
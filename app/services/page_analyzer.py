@@ -21,6 +21,7 @@ import logging
 import fitz  # PyMuPDF
 import boto3
 from botocore.exceptions import ClientError
+from app.utils.bedrock_router import get_bedrock_client
 
 logger = logging.getLogger(__name__)
 
@@ -98,7 +99,7 @@ class PageAnalyzerService:
         self.model_id = model_id or self.VISION_MODEL_ID
 
         if not local_mode:
-            self.bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+            self.bedrock = get_bedrock_client()
 
         logger.info(f"PageAnalyzerService initialized (local_mode={local_mode}, model={self.model_id})")
 
@@ -43,8 +43,8 @@ class PageMapperService:
         
         if use_vision:
             try:
-                import boto3
-                self.bedrock_runtime = boto3.client('bedrock-runtime', region_name='us-east-1')
+                from app.utils.bedrock_router import get_bedrock_client
+                self.bedrock_runtime = get_bedrock_client()
                 logger.info("PageMapperService initialized with vision support")
             except Exception as e:
                 logger.error(f"CRITICAL: Could not initialize Bedrock client: {e}")
@@ -6,25 +6,145 @@ This module provides functions for:
 - Creating individual song PDF files
 - Writing PDFs to S3 or local filesystem
 - Preserving vector content and fonts
+- Splitting large books across worker processes
+- Size-optimizing output PDFs with selectable save profiles
+- Choosing the split engine (PyMuPDF or qpdf) per book
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import tempfile
 import logging
 import fitz  # PyMuPDF
 from app.models import PageRange, OutputFile
 from app.utils.sanitization import generate_output_filename, generate_output_path
 from app.utils.artist_resolution import resolve_artist
 from app.utils.s3_utils import S3Utils
+from app.utils.s3_transfer import S3TransferQueue
+from app.services.split_backends import PyMuPDFBackend, SplitBackend, get_split_backend
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class SaveProfile:
+    """
+    Options applied when a song PDF is serialized.
+    
+    Attributes:
+        name: Profile name
+        garbage: Unused-object removal (1), plus xref compaction (2), plus
+            duplicate-object merging (3), plus duplicate-stream merging (4)
+        deflate: Compress uncompressed streams, including images and fonts
+        clean: Clean and sanitize content streams
+        use_objstms: Pack objects into compressed object streams
+        linear: Linearize for fast web view (skipped if MuPDF lacks support)
+        image_dpi: Downsample images above ~1.3x this resolution to it (lossy)
+        image_quality: JPEG quality for rewritten images (0 = MuPDF default)
+    """
+    name: str
+    garbage: int = 0
+    deflate: bool = False
+    clean: bool = False
+    use_objstms: bool = False
+    linear: bool = False
+    image_dpi: Optional[int] = None
+    image_quality: int = 0
+    
+    def save_options(self) -> Dict[str, Any]:
+        """Keyword arguments for fitz.Document.save / tobytes."""
+        return {
+            'garbage': self.garbage,
+            'deflate': self.deflate,
+            'deflate_images': self.deflate,
+            'deflate_fonts': self.deflate,
+            'clean': self.clean,
+            'use_objstms': self.use_objstms,
+            'linear': self.linear,
+        }
+    
+    def prepare(self, pdf_doc: fitz.Document) -> None:
+        """Apply in-document rewrites (image downsampling) before saving."""
+        if self.image_dpi:
+            pdf_doc.rewrite_images(
+                dpi_threshold=int(self.image_dpi * 1.3),
+                dpi_target=self.image_dpi,
+                quality=self.image_quality,
+            )
+
+
+SAVE_PROFILES = {
+    # What insert_pdf produced, unchanged (current output)
+    'none': SaveProfile('none'),
+    # Lossless: drop unused objects, merge duplicates, compress streams
+    'compact': SaveProfile('compact', garbage=3, deflate=True),
+    # Lossless, smallest: also merge duplicate streams and use object streams
+    'max': SaveProfile('max', garbage=4, deflate=True, clean=True, use_objstms=True),
+    # Lossless and linearized for progressive loading
+    'web': SaveProfile('web', garbage=3, deflate=True, linear=True),
+    # Lossy: 'max' plus scanned images downsampled to 150 DPI for tablets
+    'mobile': SaveProfile('mobile', garbage=4, deflate=True, use_objstms=True,
+                          image_dpi=150, image_quality=75),
+}
+
+
+def get_save_profile(profile: Union[str, SaveProfile]) -> SaveProfile:
+    """Look up a save profile by name (SaveProfile instances pass through)."""
+    if isinstance(profile, SaveProfile):
+        return profile
+    try:
+        return SAVE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown save profile {profile!r}; choose from {sorted(SAVE_PROFILES)}")
+
+
+def serialize_pdf(pdf_doc: fitz.Document, profile: SaveProfile,
+                  path: Optional[str] = None) -> Optional[bytes]:
+    """
+    Apply a save profile and serialize a document once.
+    
+    Args:
+        pdf_doc: Document to serialize (modified in place by image rewriting)
+        profile: Save profile
+        path: Write to this file instead of returning bytes
+    
+    Returns:
+        The PDF bytes, or None when written to path
+    """
+    profile.prepare(pdf_doc)
+    options = profile.save_options()
+    try:
+        if path:
+            pdf_doc.save(path, **options)
+            return None
+        return pdf_doc.tobytes(**options)
+    except Exception as e:
+        if not options['linear'] or 'linear' not in str(e).lower():
+            raise
+        # Newer MuPDF releases dropped linearization; save without it
+        logger.debug(f"Linearization unavailable, saving without it: {e}")
+        options['linear'] = False
+        if path:
+            pdf_doc.save(path, **options)
+            return None
+        return pdf_doc.tobytes(**options)
+
+
 class PDFSplitterService:
     """Service for splitting PDFs into individual song files."""
     
+    # Songs estimated above this size are saved to a temp file and uploaded with
+    # upload_file (multipart) instead of being serialized into memory
+    STREAM_THRESHOLD_BYTES = 16 * 1024 * 1024
+    
     def __init__(self, output_bucket: str = 'output-bucket',
-                 local_mode: bool = False, local_output_path: Optional[str] = None):
+                 local_mode: bool = False, local_output_path: Optional[str] = None,
+                 save_profile: Union[str, SaveProfile] = 'none',
+                 split_backend: str = 'pymupdf'):
         """
         Initialize PDF splitter service.
         
@@ -32,15 +152,26 @@ class PDFSplitterService:
             output_bucket: S3 bucket for output files
             local_mode: If True, write to local filesystem
             local_output_path: Base path for local output
+            save_profile: Name in SAVE_PROFILES or a SaveProfile (default: 'none',
+                output exactly as extracted)
+            split_backend: 'pymupdf' (default) or 'qpdf' (see split_backends)
         """
         self.output_bucket = output_bucket
         self.local_mode = local_mode
+        self.local_output_path = local_output_path
+        self.save_profile = get_save_profile(save_profile)
+        self.split_backend = split_backend
+        self.backend = get_split_backend(split_backend)
+        self.backend.check_profile(self.save_profile)
         self.s3_utils = S3Utils(local_mode=local_mode, local_base_path=local_output_path)
-        logger.info(f"PDFSplitterService initialized (local_mode={local_mode})")
+        # While splitting in S3 mode, in-memory songs are uploaded concurrently through this queue
+        self._uploads: Optional[S3TransferQueue] = None
+        logger.info(f"PDFSplitterService initialized (local_mode={local_mode}, "
+                    f"save_profile={self.save_profile.name}, backend={split_backend})")
     
     def split_pdf(self, pdf_path: str, page_ranges: List[PageRange],
                   book_artist: str, book_name: str,
-                  various_artists: bool = False) -> List[OutputFile]:
+                  various_artists: bool = False, workers: int = 1) -> List[OutputFile]:
         """
         Split PDF into individual song files.
         
@@ -50,41 +181,117 @@ class PDFSplitterService:
             book_artist: Artist name from book metadata
             book_name: Book name
             various_artists: Whether this is a Various Artists compilation
+            workers: Worker processes (1 = split in this process). Each worker
+                opens its own copy of the source PDF and handles a contiguous
+                shard of songs.
         
         Returns:
-            List of OutputFile with S3 URIs or local paths
+            List of OutputFile with S3 URIs or local paths, in page_ranges order
         """
-        logger.info(f"Splitting PDF into {len(page_ranges)} songs")
+        logger.info(f"Splitting PDF into {len(page_ranges)} songs (workers={workers})")
         
-        output_files = []
+        indexed_ranges = list(enumerate(page_ranges))
+        if workers > 1 and len(page_ranges) > 1:
+            results = self._split_parallel(pdf_path, indexed_ranges, book_artist,
+                                           book_name, various_artists, workers)
+        else:
+            results = self._split_indexed(pdf_path, indexed_ranges, book_artist,
+                                          book_name, various_artists)
+        
+        output_files = [f for _, f in sorted(results, key=lambda r: r[0]) if f]
+        logger.info(f"Successfully extracted {len(output_files)}/{len(page_ranges)} songs")
+        return output_files
+    
+    def _split_indexed(self, pdf_path: str, indexed_ranges: List[Tuple[int, PageRange]],
+                       book_artist: str, book_name: str,
+                       various_artists: bool) -> List[Tuple[int, Optional[OutputFile]]]:
+        """Split the given (index, PageRange) pairs from one open copy of the source."""
+        results = []
+        backend = self.backend
         
         try:
-            source_doc = fitz.open(pdf_path)
-            
-            for page_range in page_ranges:
+            source_doc = backend.open(pdf_path)
+        except Exception as e:
+            if backend.name == 'pymupdf':
+                logger.error(f"Error opening source PDF: {e}")
+                return []
+            # PyMuPDF repairs files qpdf refuses to parse
+            logger.warning(f"{backend.name} could not open source PDF ({e}); using pymupdf")
+            backend = PyMuPDFBackend()
+            try:
+                source_doc = backend.open(pdf_path)
+            except Exception as e:
+                logger.error(f"Error opening source PDF: {e}")
+                return []
+        
+        try:
+            # Average source bytes per page, for choosing in-memory vs. streamed upload
+            bytes_per_page = os.path.getsize(pdf_path) // max(1, backend.page_count(source_doc))
+        except OSError:
+            bytes_per_page = 0
+        
+        if not self.local_mode:
+            self._uploads = S3TransferQueue(self.s3_utils.s3_client)
+        try:
+            for idx, page_range in indexed_ranges:
                 try:
                     output_file = self._extract_and_save_song(
-                        source_doc, page_range, book_artist, book_name, various_artists
+                        source_doc, page_range, book_artist, book_name, various_artists,
+                        backend, bytes_per_page
                     )
-                    if output_file:
-                        output_files.append(output_file)
+                    results.append((idx, output_file))
                 except Exception as e:
                     logger.error(f"Error extracting '{page_range.song_title}': {e}")
                     # Continue processing remaining songs
-            
-            source_doc.close()
-            
-        except Exception as e:
-            logger.error(f"Error opening source PDF: {e}")
-            return []
+        finally:
+            backend.close(source_doc)
+            if self._uploads is not None:
+                uploads, self._uploads = self._uploads, None
+                uploads.close()
+                failed = {f"s3://{r.bucket}/{r.key}" for r in uploads.results if not r.ok}
+                if failed:
+                    logger.error(f"{len(failed)} song uploads failed")
+                    results = [(idx, f) for idx, f in results if not (f and f.output_uri in failed)]
         
-        logger.info(f"Successfully extracted {len(output_files)}/{len(page_ranges)} songs")
-        return output_files
+        return results
+    
+    def _split_parallel(self, pdf_path: str, indexed_ranges: List[Tuple[int, PageRange]],
+                        book_artist: str, book_name: str, various_artists: bool,
+                        workers: int) -> List[Tuple[int, Optional[OutputFile]]]:
+        """Shard songs across worker processes; a failed shard loses only its own songs."""
+        config = {
+            'output_bucket': self.output_bucket,
+            'local_mode': self.local_mode,
+            'local_output_path': self.local_output_path,
+            'save_profile': self.save_profile,
+            'split_backend': self.split_backend,
+        }
+        shards = shard_page_ranges(indexed_ranges, workers * 2)
+        results = []
+        
+        # spawn, not fork: the parent may hold boto3 clients and logging locks
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                (shard, executor.submit(_split_shard, config, pdf_path, shard,
+                                        book_artist, book_name, various_artists))
+                for shard in shards
+            ]
+            for shard, future in futures:
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    titles = ', '.join(pr.song_title for _, pr in shard)
+                    logger.error(f"Split worker failed for [{titles}]: {e}")
+        
+        return results
     
-    def _extract_and_save_song(self, source_doc: fitz.Document, page_range: PageRange,
-                               book_artist: str, book_name: str,
-                               various_artists: bool) -> Optional[OutputFile]:
-        """Extract a single song and save to output."""
+    def _extract_and_save_song(self, source_doc: Any, page_range: PageRange,
+                               book_artist: str, book_name: str, various_artists: bool,
+                               backend: Optional[SplitBackend] = None,
+                               bytes_per_page: int = 0) -> Optional[OutputFile]:
+        """Extract a single song with the split backend and save to output."""
+        backend = backend or self.backend
         # Resolve artist (use song-level artist for Various Artists)
         resolved_artist = resolve_artist(
             book_artist=book_artist,
@@ -93,9 +300,7 @@ class PDFSplitterService:
         )
         
         # Extract pages
-        song_doc = self.extract_page_range(
-            source_doc, page_range.start_page, page_range.end_page
-        )
+        song_doc = backend.extract(source_doc, page_range.start_page, page_range.end_page)
         
         if not song_doc:
             return None
@@ -109,13 +314,14 @@ class PDFSplitterService:
             song_artist=page_range.artist
         )
         
-        # Write to S3 or local filesystem
-        output_uri = self.write_to_s3(song_doc, output_path)
-        
-        # Get file size
-        file_size = len(song_doc.tobytes())
-        
-        song_doc.close()
+        # Write to S3 or local filesystem (serialized once; size comes from that write)
+        pages = max(1, page_range.end_page - page_range.start_page)
+        try:
+            output_uri, file_size = self._save_song(
+                song_doc, output_path, bytes_per_page * pages, backend
+            )
+        finally:
+            backend.close(song_doc)
         
         logger.info(f"Extracted '{page_range.song_title}' to {output_uri}")
         
@@ -166,19 +372,96 @@ class PDFSplitterService:
         Returns:
             S3 URI or local path
         """
+        output_uri, _ = self._save_song(pdf_doc, s3_key, backend=PyMuPDFBackend())
+        return output_uri
+    
+    def _save_song(self, pdf_doc: Any, s3_key: str, estimated_bytes: int = 0,
+                   backend: Optional[SplitBackend] = None) -> Tuple[str, int]:
+        """
+        Serialize a PDF exactly once (with the service's save profile) and write it out.
+        
+        Local mode saves straight to the destination file. In S3 mode, small
+        documents are serialized to memory and put in one request; documents
+        estimated at STREAM_THRESHOLD_BYTES or more are saved to a temp file
+        and uploaded with upload_file, which streams in multipart chunks.
+        During split_pdf, small documents are queued on the transfer queue
+        and uploaded concurrently while later songs are extracted.
+        
+        Args:
+            pdf_doc: Song document (handle of the split backend)
+            s3_key: S3 key or relative path
+            estimated_bytes: Expected serialized size (0 if unknown)
+            backend: Backend that produced pdf_doc (default: the service's)
+        
+        Returns:
+            (S3 URI or local path, size in bytes)
+        """
+        backend = backend or self.backend
         try:
-            # Convert PDF to bytes
-            pdf_bytes = pdf_doc.tobytes()
+            if self.local_mode:
+                dest_path = self.s3_utils.local_output_path(s3_key)
+                dest_path.parent.mkdir(parents=True, exist_ok=True)
+                backend.serialize(pdf_doc, self.save_profile, str(dest_path))
+                file_size = dest_path.stat().st_size
+                logger.info(f"Wrote {file_size} bytes to {dest_path}")
+                return str(dest_path), file_size
             
-            # Write using S3Utils (handles local mode)
-            output_uri = self.s3_utils.write_bytes(
-                data=pdf_bytes,
-                bucket=self.output_bucket,
-                key=s3_key
-            )
+            if estimated_bytes < self.STREAM_THRESHOLD_BYTES:
+                pdf_bytes = backend.serialize(pdf_doc, self.save_profile)
+                if self._uploads is not None:
+                    self._uploads.put_bytes(pdf_bytes, self.output_bucket, s3_key)
+                    return f"s3://{self.output_bucket}/{s3_key}", len(pdf_bytes)
+                output_uri = self.s3_utils.write_bytes(
+                    data=pdf_bytes,
+                    bucket=self.output_bucket,
+                    key=s3_key
+                )
+                return output_uri, len(pdf_bytes)
             
-            return output_uri
+            with tempfile.TemporaryDirectory() as temp_dir:
+                temp_path = os.path.join(temp_dir, 'song.pdf')
+                backend.serialize(pdf_doc, self.save_profile, temp_path)
+                file_size = os.path.getsize(temp_path)
+                output_uri = self.s3_utils.upload_file(temp_path, self.output_bucket, s3_key)
+            return output_uri, file_size
             
         except Exception as e:
             logger.error(f"Error writing PDF: {e}")
             raise
+
+
+def shard_page_ranges(indexed_ranges: List[Tuple[int, PageRange]],
+                      num_shards: int) -> List[List[Tuple[int, PageRange]]]:
+    """
+    Cut songs into contiguous shards of roughly equal page count.
+
+    Contiguous shards keep each worker reading one region of the source PDF.
+
+    Args:
+        indexed_ranges: (index, PageRange) pairs in book order
+        num_shards: Maximum number of shards
+
+    Returns:
+        Non-empty shards, in book order
+    """
+    total_pages = sum(max(1, pr.end_page - pr.start_page) for _, pr in indexed_ranges)
+    target = total_pages / max(1, num_shards)
+
+    shards, current, pages = [], [], 0
+    for item in indexed_ranges:
+        current.append(item)
+        pages += max(1, item[1].end_page - item[1].start_page)
+        if pages >= target and len(shards) < num_shards - 1:
+            shards.append(current)
+            current, pages = [], 0
+    if current:
+        shards.append(current)
+    return shards
+
+
+def _split_shard(config: Dict[str, Any], pdf_path: str,
+                 indexed_ranges: List[Tuple[int, PageRange]], book_artist: str,
+                 book_name: str, various_artists: bool) -> List[Tuple[int, Optional[OutputFile]]]:
+    """Worker-process entry point: split one shard with its own service and document."""
+    service = PDFSplitterService(**config)
+    return service._split_indexed(pdf_path, indexed_ranges, book_artist, book_name, various_artists)
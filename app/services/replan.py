@@ -0,0 +1,197 @@
+"""
+Re-plan Service - Reruns the decision phases (2-5) from stored artifacts.
+
+Tuning the matching, offset and boundary heuristics of HolisticPageAnalyzer
+normally means re-running page analysis, which pays for every page again.
+This module instead rebuilds the Phase 1 page list from a stored
+page_analysis.json, reruns Phases 2-5 with no vision calls, and diffs the
+new verified_songs.json and page_mapping.json against the old ones.
+"""
+
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from app.services.holistic_page_analyzer import HolisticPageAnalyzer
+from app.utils.page_table import load_page_analysis
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplanResult:
+    """New artifacts and diff for one re-planned book."""
+    artist: str
+    book_name: str
+    verified_songs: Dict[str, Any]
+    page_mapping: Dict[str, Any]
+    diff: Dict[str, Any]
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return self.diff['changed']
+
+
+class NoVisionClient:
+    """
+    Bedrock runtime stand-in for re-planning.
+
+    Phases 2-5 run without the document, so no vision call is ever made;
+    this saves each analyzer from creating a real client it never uses.
+    """
+
+    def invoke_model(self, **kwargs):
+        raise RuntimeError("re-planning makes no vision calls")
+
+
+def _song_key_counts(songs: List[Dict]) -> Dict[Tuple[str, int], Dict]:
+    """Key songs by (title, occurrence) so repeated titles (arrangements) stay distinct."""
+    seen = defaultdict(int)
+    keyed = {}
+    for song in songs:
+        title = song['song_title']
+        keyed[(title, seen[title])] = song
+        seen[title] += 1
+    return keyed
+
+
+def diff_verified_songs(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare two verified_songs.json documents.
+
+    Returns:
+        Dict with counts and lists of added, removed and moved songs
+        (moved = same title, different page range)
+    """
+    old_songs = _song_key_counts(old.get('verified_songs', []))
+    new_songs = _song_key_counts(new.get('verified_songs', []))
+
+    added = [new_songs[k] for k in new_songs if k not in old_songs]
+    removed = [old_songs[k] for k in old_songs if k not in new_songs]
+    moved = []
+    unchanged = 0
+    for key in old_songs.keys() & new_songs.keys():
+        o, n = old_songs[key], new_songs[key]
+        if (o['start_page'], o['end_page']) == (n['start_page'], n['end_page']):
+            unchanged += 1
+        else:
+            moved.append({
+                'song_title': n['song_title'],
+                'old_range': [o['start_page'], o['end_page']],
+                'new_range': [n['start_page'], n['end_page']],
+            })
+
+    return {
+        'old_count': len(old_songs),
+        'new_count': len(new_songs),
+        'unchanged': unchanged,
+        'added': added,
+        'removed': removed,
+        'moved': sorted(moved, key=lambda m: m['new_range'][0]),
+        'changed': bool(added or removed or moved),
+    }
+
+
+def diff_page_mapping(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare two page_mapping.json documents.
+
+    Returns:
+        Dict with the old and new offset and the songs whose location
+        (printed page / PDF index) moved, was added or was removed
+    """
+    old_locs = _song_key_counts(old.get('song_locations', []))
+    new_locs = _song_key_counts(new.get('song_locations', []))
+
+    def where(loc: Dict) -> List[Any]:
+        return [loc.get('printed_page'), loc.get('pdf_index')]
+
+    moved = [
+        {'song_title': new_locs[k]['song_title'], 'old': where(old_locs[k]), 'new': where(new_locs[k])}
+        for k in old_locs.keys() & new_locs.keys()
+        if where(old_locs[k]) != where(new_locs[k])
+    ]
+    added = [new_locs[k]['song_title'] for k in new_locs if k not in old_locs]
+    removed = [old_locs[k]['song_title'] for k in old_locs if k not in new_locs]
+    offset_changed = old.get('offset') != new.get('offset')
+
+    return {
+        'old_offset': old.get('offset'),
+        'new_offset': new.get('offset'),
+        'offset_changed': offset_changed,
+        'moved': sorted(moved, key=lambda m: m['new'][1] if m['new'][1] is not None else -1),
+        'added': added,
+        'removed': removed,
+        'changed': bool(offset_changed or moved or added or removed),
+    }
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def replan_book(book_dir: Path, analyzer: Optional[HolisticPageAnalyzer] = None) -> ReplanResult:
+    """
+    Rerun Phases 2-5 for one book from its artifact directory.
+
+    Args:
+        book_dir: SheetMusic_Artifacts/{Artist}/{Book} directory
+        analyzer: Analyzer whose heuristics to apply (default: a fresh one
+            with a NoVisionClient)
+
+    Returns:
+        ReplanResult with the new verified_songs / page_mapping and the diff
+        (the page_mapping diff is under diff['page_mapping'])
+
+    Raises:
+        FileNotFoundError: If page_analysis.json or toc_parse.json is missing
+    """
+    book_dir = Path(book_dir)
+    pa_path = book_dir / 'page_analysis.json'
+    # Raw responses let pages_from_dicts recover the original Phase 1 classification
+    page_analysis = load_page_analysis(pa_path, with_raw=True) if pa_path.exists() else None
+    toc_parse = _read_json(book_dir / 'toc_parse.json')
+    if page_analysis is None or toc_parse is None:
+        raise FileNotFoundError(f"{book_dir} needs page_analysis.json and toc_parse.json")
+    old_verified = _read_json(book_dir / 'verified_songs.json') or {'verified_songs': []}
+    old_mapping = _read_json(book_dir / 'page_mapping.json') or {}
+
+    analyzer = analyzer or HolisticPageAnalyzer(bedrock_client=NoVisionClient())
+
+    # Keep the book-level artist and any per-song artist fixes from the old run
+    old_songs = old_verified.get('verified_songs', [])
+    old_artists = {s['song_title']: s.get('artist') for s in old_songs if s.get('artist')}
+    artist = old_songs[0].get('artist', '') if old_songs else ''
+    artist = artist or book_dir.parent.name
+
+    pages = analyzer.pages_from_dicts(page_analysis.get('pages', []))
+    total_pages = page_analysis.get('total_pages') or len(pages)
+    book_id = page_analysis.get('book_id') or old_verified.get('book_id', '')
+
+    result = analyzer.plan_book(
+        pages, toc_parse.get('entries', []), total_pages, book_id,
+        page_analysis.get('source_pdf_uri', ''), artist
+    )
+    for song in result.songs:
+        song.artist = old_artists.get(song.title, song.artist)
+
+    verified_songs = analyzer.to_verified_songs(result)
+    page_mapping = analyzer.to_page_mapping(result)
+    diff = diff_verified_songs(old_verified, verified_songs)
+    diff['page_mapping'] = diff_page_mapping(old_mapping, page_mapping)
+    diff['changed'] = diff['changed'] or diff['page_mapping']['changed']
+    return ReplanResult(
+        artist=book_dir.parent.name,
+        book_name=book_dir.name,
+        verified_songs=verified_songs,
+        page_mapping=page_mapping,
+        diff=diff,
+        warnings=result.warnings,
+    )
@@ -0,0 +1,223 @@
+"""
+Split backends - Engines that cut page ranges out of a source PDF.
+
+PDFSplitterService delegates the actual page copying and serialization to a
+backend so the engine can be chosen per book:
+
+- 'pymupdf': fitz insert_pdf + save (default; most tolerant of damaged files)
+- 'qpdf': qpdf via pikepdf - the source is parsed once and every song is
+  written from that parse. Without pikepdf, falls back to the qpdf command
+  line (installed in the ECS image), which re-reads the source per song.
+
+A backend works on opaque handles: open() returns a source, extract() returns
+a song, serialize() writes a song to a path or returns its bytes.
+"""
+
+from typing import Any, Dict, List, Optional
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import logging
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+
+class SplitBackend:
+    """Base class for split backends."""
+
+    name = ''
+
+    def open(self, pdf_path: str) -> Any:
+        """Open (parse) a source PDF."""
+        raise NotImplementedError
+
+    def page_count(self, source: Any) -> int:
+        """Number of pages in an open source."""
+        raise NotImplementedError
+
+    def extract(self, source: Any, start: int, end: int) -> Optional[Any]:
+        """
+        Copy pages [start, end) into a new song document.
+
+        Returns:
+            Song handle, or None if the range holds no pages
+        """
+        raise NotImplementedError
+
+    def serialize(self, song: Any, profile, path: Optional[str] = None) -> Optional[bytes]:
+        """Write a song with a SaveProfile; returns bytes unless path is given."""
+        raise NotImplementedError
+
+    def close(self, handle: Any) -> None:
+        """Release a source or song handle."""
+        close = getattr(handle, 'close', None)
+        if close:
+            close()
+
+    def check_profile(self, profile) -> None:
+        """Raise ValueError if the backend cannot honour a save profile."""
+
+
+class PyMuPDFBackend(SplitBackend):
+    """fitz insert_pdf per song; save profiles are applied by serialize_pdf."""
+
+    name = 'pymupdf'
+
+    def open(self, pdf_path: str) -> fitz.Document:
+        return fitz.open(pdf_path)
+
+    def page_count(self, source: fitz.Document) -> int:
+        return len(source)
+
+    def extract(self, source: fitz.Document, start: int, end: int) -> Optional[fitz.Document]:
+        song = fitz.open()
+        song.insert_pdf(source, from_page=start, to_page=end - 1)
+        return song
+
+    def serialize(self, song: fitz.Document, profile, path: Optional[str] = None) -> Optional[bytes]:
+        from app.services.pdf_splitter import serialize_pdf
+        return serialize_pdf(song, profile, path)
+
+
+class _QPDFProfileMixin:
+    """SaveProfile checks shared by the qpdf backends."""
+
+    def check_profile(self, profile) -> None:
+        # qpdf copies objects as-is; image downsampling needs MuPDF
+        if profile.image_dpi:
+            raise ValueError(f"Save profile '{profile.name}' rewrites images and "
+                             f"needs the pymupdf backend")
+
+
+class PikePDFBackend(_QPDFProfileMixin, SplitBackend):
+    """
+    qpdf through pikepdf: one parse of the source, pages shared into each song.
+
+    qpdf only writes objects reachable from the song's pages, so unused
+    objects are always dropped; 'deflate' maps to compress_streams,
+    'use_objstms' to generated object streams and 'linear' to linearize.
+    """
+
+    name = 'qpdf'
+
+    def __init__(self):
+        import pikepdf
+        self._pikepdf = pikepdf
+
+    def open(self, pdf_path: str):
+        return self._pikepdf.open(pdf_path)
+
+    def page_count(self, source) -> int:
+        return len(source.pages)
+
+    def extract(self, source, start: int, end: int):
+        end = min(end, len(source.pages))
+        if end <= start:
+            return None
+        song = self._pikepdf.new()
+        song.pages.extend(source.pages[start:end])
+        return song
+
+    def serialize(self, song, profile, path: Optional[str] = None) -> Optional[bytes]:
+        mode = self._pikepdf.ObjectStreamMode
+        options = {
+            'compress_streams': profile.deflate,
+            'object_stream_mode': mode.generate if profile.use_objstms else mode.preserve,
+            'linearize': profile.linear,
+        }
+        if path:
+            song.save(path, **options)
+            return None
+        buffer = io.BytesIO()
+        song.save(buffer, **options)
+        return buffer.getvalue()
+
+
+class _QPDFRange:
+    """A page range still to be written by the qpdf CLI."""
+
+    def __init__(self, pdf_path: str, start: int, end: int):
+        self.pdf_path = pdf_path
+        self.start = start
+        self.end = end
+
+
+class QPDFCLIBackend(_QPDFProfileMixin, SplitBackend):
+    """qpdf command line, one invocation per song (used when pikepdf is missing)."""
+
+    name = 'qpdf'
+
+    def __init__(self, qpdf_path: Optional[str] = None):
+        self.qpdf = qpdf_path or shutil.which('qpdf')
+        if not self.qpdf:
+            raise RuntimeError("qpdf executable not found on PATH")
+        self._page_counts: Dict[str, int] = {}
+
+    def _run(self, args: List[str]) -> str:
+        proc = subprocess.run([self.qpdf, *args], capture_output=True, text=True)
+        # Exit code 3 means success with warnings (common on damaged files)
+        if proc.returncode not in (0, 3):
+            raise RuntimeError(f"qpdf failed ({proc.returncode}): {proc.stderr.strip()}")
+        return proc.stdout
+
+    def open(self, pdf_path: str) -> str:
+        self._page_counts[pdf_path] = int(self._run(['--show-npages', pdf_path]).strip())
+        return pdf_path
+
+    def page_count(self, source: str) -> int:
+        return self._page_counts[source]
+
+    def extract(self, source: str, start: int, end: int) -> Optional[_QPDFRange]:
+        end = min(end, self._page_counts[source])
+        if end <= start:
+            return None
+        return _QPDFRange(source, start, end)
+
+    def serialize(self, song: _QPDFRange, profile, path: Optional[str] = None) -> Optional[bytes]:
+        if path is None:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                temp_path = os.path.join(temp_dir, 'song.pdf')
+                self.serialize(song, profile, temp_path)
+                with open(temp_path, 'rb') as f:
+                    return f.read()
+
+        args = ['--empty', f"--compress-streams={'y' if profile.deflate else 'n'}"]
+        if profile.use_objstms:
+            args.append('--object-streams=generate')
+        if profile.linear:
+            args.append('--linearize')
+        args += ['--pages', song.pdf_path, f'{song.start + 1}-{song.end}', '--', path]
+        self._run(args)
+        return None
+
+    def close(self, handle: Any) -> None:
+        if isinstance(handle, str):
+            self._page_counts.pop(handle, None)
+
+
+SPLIT_BACKENDS = ('pymupdf', 'qpdf')
+
+
+def get_split_backend(name: str) -> SplitBackend:
+    """
+    Create a split backend by name.
+
+    Args:
+        name: 'pymupdf' or 'qpdf' (pikepdf if importable, else the qpdf CLI)
+
+    Returns:
+        SplitBackend instance
+    """
+    if name == 'pymupdf':
+        return PyMuPDFBackend()
+    if name == 'qpdf':
+        try:
+            return PikePDFBackend()
+        except ImportError:
+            logger.info("pikepdf not installed; using the qpdf command line")
+            return QPDFCLIBackend()
+    raise ValueError(f"Unknown split backend {name!r}; choose from {list(SPLIT_BACKENDS)}")
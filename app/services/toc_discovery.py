@@ -16,6 +16,7 @@ import fitz  # PyMuPDF
 import boto3
 from botocore.exceptions import ClientError
 from app.models import TOCDiscoveryResult
+from app.utils.bedrock_router import get_bedrock_client
 
 logger = logging.getLogger(__name__)
 
@@ -261,7 +262,6 @@ class TOCDiscoveryService:
             Confidence score 0.0-1.0
         """
         try:
-            import boto3
             import base64
             import json
             
@@ -278,7 +278,7 @@ class TOCDiscoveryService:
                 # Return high score for page 1, low for others
                 return 0.95 if page_num == 1 else 0.1
             
-            bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+            bedrock = get_bedrock_client()
             
             prompt = """Analyze this page image and determine if it is a Table of Contents (TOC) for a music book.
 
@@ -0,0 +1,172 @@
+"""
+Virtual song PDFs - Song PDFs built on request from the source book.
+
+Review and verification tools need a song's PDF, but a boundary edit changes
+which pages that is. Instead of reading materialized files from
+SheetMusic_Output (which must be re-extracted after every edit), the store
+builds a song PDF from the source book and a verified_songs.json page range
+when it is asked for, and caches the result by (source hash, range). An edited
+range is simply a new cache key; nothing is written to the output folders
+until the book is published.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import hashlib
+import os
+import threading
+import logging
+
+import fitz  # PyMuPDF
+
+from app.services.pdf_splitter import SaveProfile, get_save_profile, serialize_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: Union[str, Path], chunk_size: int = 1024 * 1024) -> str:
+    """Hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class VirtualSongStore:
+    """Builds and caches song PDFs from source page ranges."""
+
+    def __init__(self, cache_dir: Optional[Path] = None,
+                 max_cache_bytes: int = 256 * 1024 * 1024, max_open_sources: int = 4,
+                 save_profile: Union[str, SaveProfile] = 'none'):
+        """
+        Args:
+            cache_dir: Optional on-disk cache ({cache_dir}/{source hash}/{start}-{end}.pdf),
+                shared across processes and runs
+            max_cache_bytes: In-memory cache budget
+            max_open_sources: Source books kept open between requests
+            save_profile: Save profile for built PDFs (see pdf_splitter.SAVE_PROFILES)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_cache_bytes = max_cache_bytes
+        self.max_open_sources = max_open_sources
+        self.save_profile = get_save_profile(save_profile)
+
+        self._lock = threading.Lock()
+        self._hashes: Dict[Tuple[str, int, int], str] = {}  # (path, size, mtime_ns) -> hash
+        self._sources: 'OrderedDict[str, fitz.Document]' = OrderedDict()
+        self._cache: 'OrderedDict[Tuple[str, int, int], bytes]' = OrderedDict()
+        self._cache_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def source_hash(self, source_pdf: Union[str, Path]) -> str:
+        """Content hash of a source PDF (re-hashed only when its size or mtime changes)."""
+        path = str(source_pdf)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(key)
+        if cached:
+            return cached
+        digest = file_sha256(path)
+        with self._lock:
+            self._hashes[key] = digest
+        return digest
+
+    def song_pdf(self, source_pdf: Union[str, Path], start: int, end: int) -> bytes:
+        """
+        Get the PDF for pages [start, end) of a source book.
+
+        Args:
+            source_pdf: Source book PDF
+            start: First page (0-indexed, inclusive)
+            end: End page (exclusive)
+
+        Returns:
+            PDF bytes
+
+        Raises:
+            ValueError: If the range holds no pages
+        """
+        source_hash = self.source_hash(source_pdf)
+        key = (source_hash, int(start), int(end))
+
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        disk_path = self._disk_path(key)
+        if disk_path and disk_path.exists():
+            data = disk_path.read_bytes()
+        else:
+            data = self._build(source_pdf, source_hash, start, end)
+            if disk_path:
+                disk_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = disk_path.with_suffix(f'.{os.getpid()}.tmp')
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, disk_path)
+
+        self._remember(key, data)
+        return data
+
+    def open_song(self, source_pdf: Union[str, Path], start: int, end: int) -> fitz.Document:
+        """Open the song PDF for pages [start, end) as a document (caller closes it)."""
+        return fitz.open(stream=self.song_pdf(source_pdf, start, end), filetype='pdf')
+
+    def close(self) -> None:
+        """Close open source books and drop the in-memory cache."""
+        with self._lock:
+            for doc in self._sources.values():
+                doc.close()
+            self._sources.clear()
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def _disk_path(self, key: Tuple[str, int, int]) -> Optional[Path]:
+        if not self.cache_dir:
+            return None
+        source_hash, start, end = key
+        return self.cache_dir / source_hash / f'{start}-{end}.pdf'
+
+    def _build(self, source_pdf: Union[str, Path], source_hash: str, start: int, end: int) -> bytes:
+        with self._lock:
+            source = self._sources.get(source_hash)
+            if source is None:
+                source = fitz.open(str(source_pdf))
+                self._sources[source_hash] = source
+                while len(self._sources) > self.max_open_sources:
+                    _, oldest = self._sources.popitem(last=False)
+                    oldest.close()
+            else:
+                self._sources.move_to_end(source_hash)
+
+            end = min(end, len(source))
+            if end <= start:
+                raise ValueError(f"Page range [{start}, {end}) is empty for {source_pdf}")
+            song = fitz.open()
+            try:
+                song.insert_pdf(source, from_page=start, to_page=end - 1)
+                data = serialize_pdf(song, self.save_profile)
+            finally:
+                song.close()
+
+        logger.debug(f"Built virtual song [{start}-{end}) of {Path(source_pdf).name}: {len(data)} bytes")
+        return data
+
+    def _remember(self, key: Tuple[str, int, int], data: bytes) -> None:
+        if len(data) > self.max_cache_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = data
+            self._cache_bytes += len(data)
+            while self._cache_bytes > self.max_cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
@@ -0,0 +1,102 @@
+"""
+Atomic, locked writes for cache files shared by threads and processes.
+
+Caches under .cache/ (sync manifests, inventories, ledger snapshots, page
+counts) are rewritten by whichever run touched them last, and batch runs
+now do that from several threads and processes at once. Two things keep
+them intact:
+
+- write_json_gz writes to a uniquely named temp file in the target
+  directory and renames it into place, so readers see the old or the new
+  file, never a partial one, and concurrent writers never share a temp file
+- path_lock serializes read-merge-write sequences on one path: a lock per
+  path within the process, plus an flock on "<path>.lock" across processes
+  (POSIX only; elsewhere the in-process lock alone applies)
+
+    with path_lock(manifest_path):
+        manifest = load(manifest_path)
+        manifest.update(mine)
+        write_json_gz(manifest_path, manifest.to_dict())
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+import gzip
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class _PathLock:
+    """Re-entrant in-process lock plus the flock held while it is taken."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+
+
+_locks: Dict[str, _PathLock] = {}
+_locks_guard = threading.Lock()
+
+
+@contextmanager
+def path_lock(path: Union[str, Path]) -> Iterator[None]:
+    """
+    Hold an exclusive lock on path for the duration of the block.
+
+    Re-entrant within a thread: nested blocks on the same path (a locked
+    merge calling a locking save) take the file lock only once.
+    """
+    key = os.path.abspath(path)
+    with _locks_guard:
+        entry = _locks.setdefault(key, _PathLock())
+
+    with entry.lock:
+        if entry.depth == 0 and fcntl is not None:
+            os.makedirs(os.path.dirname(key), exist_ok=True)
+            entry.handle = open(key + '.lock', 'a')
+            fcntl.flock(entry.handle.fileno(), fcntl.LOCK_EX)
+        entry.depth += 1
+        try:
+            yield
+        finally:
+            entry.depth -= 1
+            if entry.depth == 0 and entry.handle is not None:
+                fcntl.flock(entry.handle.fileno(), fcntl.LOCK_UN)
+                entry.handle.close()
+                entry.handle = None
+
+
+def write_json_gz(path: Union[str, Path], data: Any,
+                  separators: Optional[Tuple[str, str]] = (',', ':')) -> None:
+    """
+    Atomically replace path with data as gzipped JSON.
+
+    Args:
+        path: Destination file (parent directories are created)
+        data: JSON-serializable value
+        separators: Passed to json.dump (default: compact)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path_lock(path):
+        tmp = tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name + '.',
+                                          suffix='.tmp', delete=False)
+        try:
+            with tmp, gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                json.dump(data, f, separators=separators)
+            os.replace(tmp.name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp.name)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,283 @@
+"""
+Makespan-aware ordering of batch work.
+
+Books started in path order leave a long tail whenever a large book happens
+to start last: every other slot is idle while it finishes. The planner
+estimates each book's run time from its page count (or file size) and the
+per-page durations of past runs in the ledger, then orders the batch
+longest-processing-time first (LPT). With slots taking the next book as they
+free up, LPT keeps the predicted makespan within 4/3 of optimal and puts the
+small books at the end, where they fill the gaps.
+
+    model = CostModel.fit(ledger_items, page_counts)
+    estimates = [model.estimate(artist, book, pages, size_mb) for ...]
+    plan = plan_batch(estimates, slots=4)
+    plan.order          # estimates in start order
+    plan.makespan_sec   # predicted wall time
+
+Estimates are rough by design: history reflects the worker settings of the
+runs that produced it, and the cost constants are list prices per call.
+"""
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import gzip
+import heapq
+import json
+import os
+import logging
+
+from app.utils.atomic_file import path_lock, write_json_gz
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('lpt', 'path')
+
+# Fallbacks when the ledger has no usable history
+DEFAULT_FIXED_SEC = 90.0        # TOC discovery + parser, download, sync
+DEFAULT_SEC_PER_PAGE = 0.8      # page analysis at the batch's default workers
+DEFAULT_SPLIT_SEC_PER_PAGE = 0.03
+DEFAULT_PAGES_PER_MB = 8.0
+
+# Per-call cost estimates (USD): a 72 DPI page image plus prompt is ~1,600
+# input tokens; responses are short JSON. Claude 3.5 Sonnet: $3 / $15 per M.
+VISION_INPUT_TOKENS = 1600
+VISION_OUTPUT_TOKENS = 60
+INPUT_USD_PER_M = 3.0
+OUTPUT_USD_PER_M = 15.0
+TEXTRACT_USD_PER_PAGE = 0.0015
+TOC_DISCOVERY_MAX_PAGES = 20
+
+
+def vision_call_usd() -> float:
+    """Estimated cost of one page classification call."""
+    return (VISION_INPUT_TOKENS * INPUT_USD_PER_M + VISION_OUTPUT_TOKENS * OUTPUT_USD_PER_M) / 1e6
+
+
+def _num(value: Any) -> Optional[float]:
+    """Ledger numbers arrive as Decimal (boto3), int/float or DynamoDB JSON."""
+    if isinstance(value, dict) and 'N' in value:
+        value = value['N']
+    if isinstance(value, (int, float, Decimal, str)):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _str(value: Any) -> Optional[str]:
+    if isinstance(value, dict) and 'S' in value:
+        return value['S']
+    return value if isinstance(value, str) else None
+
+
+def _steps(item: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    steps = item.get('steps') or {}
+    if 'M' in steps:
+        steps = {k: v.get('M', {}) for k, v in steps['M'].items()}
+    return steps
+
+
+class PageCounter:
+    """PDF page counts, cached on disk by path, size and mtime."""
+
+    def __init__(self, cache_path: Optional[Union[str, Path]] = None):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._cache: Dict[str, Tuple[int, float, int]] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Tuple[int, float, int]]:
+        if not (self.cache_path and self.cache_path.exists()):
+            return {}
+        try:
+            with gzip.open(self.cache_path, 'rt', encoding='utf-8') as f:
+                return {k: tuple(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable page count cache {self.cache_path}: {e}")
+            return {}
+
+    def count(self, pdf_path: Union[str, Path]) -> Optional[int]:
+        """Pages in a PDF, or None if it cannot be opened."""
+        path = str(pdf_path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        cached = self._cache.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime:
+            return cached[2]
+        try:
+            import fitz
+            with fitz.open(path) as doc:
+                pages = doc.page_count
+        except Exception as e:
+            logger.warning(f"Could not count pages of {path}: {e}")
+            return None
+        self._cache[path] = (st.st_size, st.st_mtime, pages)
+        self._dirty = True
+        return pages
+
+    def save(self) -> None:
+        """Write the cache if anything was counted, keeping counts other runs saved meanwhile."""
+        if not (self.cache_path and self._dirty):
+            return
+        with path_lock(self.cache_path):
+            merged = self._load()
+            merged.update(self._cache)
+            write_json_gz(self.cache_path, merged, separators=None)
+            self._cache = merged
+        self._dirty = False
+
+
+@dataclass
+class BookEstimate:
+    """Predicted run time and cost of one book."""
+    artist: str
+    book_name: str
+    pages: int
+    predicted_sec: float
+    cost_usd: float
+    pages_source: str  # 'pdf', 'ledger' or 'size'
+
+
+@dataclass
+class CostModel:
+    """Book time = fixed + pages x (page analysis + split) seconds per page."""
+    fixed_sec: float = DEFAULT_FIXED_SEC
+    sec_per_page: float = DEFAULT_SEC_PER_PAGE
+    split_sec_per_page: float = DEFAULT_SPLIT_SEC_PER_PAGE
+    pages_per_mb: float = DEFAULT_PAGES_PER_MB
+    samples: int = 0
+
+    @classmethod
+    def fit(cls, items: Iterable[Dict[str, Any]],
+            page_counts: Dict[Tuple[str, str], int],
+            sizes_mb: Optional[Dict[Tuple[str, str], float]] = None) -> 'CostModel':
+        """
+        Fit per-page rates from successful ledger entries.
+
+        Medians, not means: a run that sat in throttling retries should not
+        set the rate for every book.
+
+        Args:
+            items: Ledger items (plain or DynamoDB JSON)
+            page_counts: (artist, book_name) -> pages, for books not carrying
+                total_pages in their page_analysis step
+            sizes_mb: (artist, book_name) -> source PDF size, to fit pages per MB
+
+        Returns:
+            CostModel (defaults where there is no history)
+        """
+        fixed, per_page, split_per_page = [], [], []
+        for item in items:
+            if _str(item.get('status')) != 'success':
+                continue
+            key = (_str(item.get('artist')) or '', _str(item.get('book_name')) or '')
+            steps = _steps(item)
+            analysis = steps.get('page_analysis', {})
+            pages = _num(analysis.get('total_pages')) or page_counts.get(key)
+            duration = _num(analysis.get('duration_sec'))
+            if not pages or duration is None:
+                continue
+            per_page.append(duration / pages)
+            split = _num(steps.get('pdf_splitter', {}).get('duration_sec'))
+            if split is not None:
+                split_per_page.append(split / pages)
+            toc = [_num(steps.get(s, {}).get('duration_sec')) for s in ('toc_discovery', 'toc_parser')]
+            if None not in toc:
+                fixed.append(sum(toc))
+
+        model = cls()
+        if per_page:
+            model.sec_per_page = median(per_page)
+            model.samples = len(per_page)
+        if split_per_page:
+            model.split_sec_per_page = median(split_per_page)
+        if fixed:
+            model.fixed_sec = median(fixed)
+        ratios = [page_counts[k] / mb for k, mb in (sizes_mb or {}).items()
+                  if mb > 0 and page_counts.get(k)]
+        if ratios:
+            model.pages_per_mb = median(ratios)
+        return model
+
+    def estimate(self, artist: str, book_name: str, pages: Optional[int] = None,
+                 size_mb: float = 0.0, pages_source: str = 'pdf') -> BookEstimate:
+        """
+        Predict one book's run time and vision cost.
+
+        Args:
+            artist: Artist name
+            book_name: Book name
+            pages: Page count, if known
+            size_mb: Source PDF size, used when the page count is unknown
+            pages_source: Where `pages` came from (reported only)
+        """
+        if not pages:
+            pages = max(1, round(size_mb * self.pages_per_mb))
+            pages_source = 'size'
+        seconds = self.fixed_sec + pages * (self.sec_per_page + self.split_sec_per_page)
+        cost = (pages * vision_call_usd()
+                + min(pages, TOC_DISCOVERY_MAX_PAGES) * TEXTRACT_USD_PER_PAGE
+                + vision_call_usd())  # TOC parse
+        return BookEstimate(artist, book_name, pages, seconds, cost, pages_source)
+
+
+@dataclass
+class BatchPlan:
+    """Start order and the predicted outcome of running it on `slots` slots."""
+    order: List[BookEstimate]
+    slots: int
+    strategy: str
+    makespan_sec: float
+    total_sec: float
+    cost_usd: float
+    slot_loads: List[float] = field(default_factory=list)
+
+    @property
+    def lower_bound_sec(self) -> float:
+        """No schedule beats the average load per slot or the longest book."""
+        longest = max((e.predicted_sec for e in self.order), default=0.0)
+        return max(self.total_sec / self.slots, longest) if self.order else 0.0
+
+
+def simulate(order: List[BookEstimate], slots: int) -> List[float]:
+    """Each book starts on the first slot to free up; returns each slot's busy time."""
+    loads = [0.0] * max(1, slots)
+    heapq.heapify(loads)
+    for est in order:
+        heapq.heappush(loads, heapq.heappop(loads) + est.predicted_sec)
+    return sorted(loads, reverse=True)
+
+
+def plan_batch(estimates: List[BookEstimate], slots: int, strategy: str = 'lpt') -> BatchPlan:
+    """
+    Order books for a batch run.
+
+    Args:
+        estimates: Books in their original (path) order
+        slots: Books run at once
+        strategy: 'lpt' (longest predicted first) or 'path' (keep the order)
+
+    Returns:
+        BatchPlan with the start order and its simulated makespan
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"strategy must be one of {STRATEGIES}, got {strategy!r}")
+    order = list(estimates)
+    if strategy == 'lpt':
+        order.sort(key=lambda e: e.predicted_sec, reverse=True)
+    loads = simulate(order, slots)
+    return BatchPlan(
+        order=order,
+        slots=max(1, slots),
+        strategy=strategy,
+        makespan_sec=loads[0] if order else 0.0,
+        total_sec=sum(e.predicted_sec for e in order),
+        cost_usd=sum(e.cost_usd for e in order),
+        slot_loads=loads,
+    )
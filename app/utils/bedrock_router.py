@@ -0,0 +1,304 @@
+"""
+Multi-region Bedrock routing for higher aggregate throughput.
+
+This module provides:
+- BedrockRouter: a drop-in stand-in for a bedrock-runtime client that spreads
+  invoke_model calls over several regions / inference profiles
+- Health and recent-throttle-rate based target selection with automatic failover
+- Per-region counters (calls, throttles, errors, latency)
+- get_bedrock_client(): the shared, pooled client used by the pipeline services
+
+Targets are configured as "region" or "region=geo" strings, e.g.
+"us-east-1,us-west-2,eu-central-1=eu". With "=geo", a cross-region inference
+profile ID such as "us.anthropic.claude-..." is rewritten to "eu.anthropic.claude-..."
+for that target. The default list comes from the BEDROCK_REGIONS environment
+variable (falling back to us-east-1).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGIONS = 'us-east-1'
+INFERENCE_PROFILE_PREFIXES = ('us.', 'eu.', 'apac.', 'us-gov.')
+
+THROTTLE_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceQuotaExceededException',
+}
+UNAVAILABLE_CODES = {
+    'ServiceUnavailableException',
+    'ModelNotReadyException',
+    'ModelTimeoutException',
+    'InternalServerException',
+    'EndpointConnectionError',
+    'ConnectTimeoutError',
+    'ReadTimeoutError',
+    'ConnectionClosedError',
+}
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classify a Bedrock call failure.
+
+    Returns:
+        'throttle' (quota hit - try elsewhere), 'unavailable' (region/connection
+        problem - try elsewhere) or 'fatal' (bad request - do not retry)
+    """
+    code = ''
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code', '')
+    name = type(error).__name__
+
+    if code in THROTTLE_CODES or name in THROTTLE_CODES or 'ThrottlingException' in str(error):
+        return 'throttle'
+    if (code in UNAVAILABLE_CODES or name in UNAVAILABLE_CODES
+            or isinstance(error, (ConnectionError, TimeoutError))):
+        return 'unavailable'
+    return 'fatal'
+
+
+def parse_targets(spec: str) -> List[Tuple[str, Optional[str]]]:
+    """Parse "us-east-1,eu-central-1=eu" into [(region, geo_prefix_or_None), ...]."""
+    targets = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        region, _, geo = item.partition('=')
+        targets.append((region.strip(), geo.strip() or None))
+    return targets
+
+
+@dataclass
+class RouteTarget:
+    """One region (optionally with its own inference-profile geography)."""
+    region: str
+    client: Any
+    geo: Optional[str] = None
+    calls: int = 0
+    successes: int = 0
+    throttles: int = 0
+    errors: int = 0
+    total_latency_sec: float = 0.0
+    in_flight: int = 0
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+    recent: Deque[Tuple[float, bool]] = field(default_factory=lambda: deque(maxlen=100))
+
+    @property
+    def name(self) -> str:
+        return f"{self.region}={self.geo}" if self.geo else self.region
+
+    def model_id_for(self, model_id: str) -> str:
+        """Rewrite a cross-region inference profile ID to this target's geography."""
+        if not self.geo:
+            return model_id
+        for prefix in INFERENCE_PROFILE_PREFIXES:
+            if model_id.startswith(prefix):
+                return f"{self.geo}.{model_id[len(prefix):]}"
+        return model_id
+
+    def throttle_rate(self, now: float, window_sec: float) -> float:
+        """Fraction of calls throttled within the recent window."""
+        outcomes = [throttled for ts, throttled in self.recent if now - ts <= window_sec]
+        if not outcomes:
+            return 0.0
+        return sum(outcomes) / len(outcomes)
+
+
+def _default_client_factory(region: str, max_pool_connections: int,
+                            max_attempts: Optional[int] = None):
+    import boto3
+    from botocore.config import Config
+
+    config = Config(max_pool_connections=max_pool_connections)
+    if max_attempts is not None:
+        config = config.merge(Config(retries={'mode': 'standard', 'max_attempts': max_attempts}))
+    return boto3.client('bedrock-runtime', region_name=region, config=config)
+
+
+class BedrockRouter:
+    """Routes invoke_model calls across a pool of regional Bedrock clients."""
+
+    def __init__(self, targets: Optional[List[Tuple[str, Optional[str]]]] = None,
+                 client_factory: Optional[Callable[[str], Any]] = None,
+                 max_pool_connections: int = 50,
+                 throttle_window_sec: float = 60.0,
+                 base_cooldown_sec: float = 2.0,
+                 max_cooldown_sec: float = 30.0):
+        """
+        Initialize router.
+
+        Args:
+            targets: [(region, geo_prefix_or_None), ...] (default: from BEDROCK_REGIONS)
+            client_factory: Callable creating a client for a region (default: pooled boto3 client)
+            max_pool_connections: HTTP connection pool size per regional client
+            throttle_window_sec: Window for the recent throttle rate
+            base_cooldown_sec: Initial back-off for a region after a throttle/outage
+            max_cooldown_sec: Upper bound for the per-region back-off
+        """
+        if targets is None:
+            targets = parse_targets(os.environ.get('BEDROCK_REGIONS', DEFAULT_REGIONS))
+        if not targets:
+            raise ValueError("BedrockRouter needs at least one region")
+
+        if client_factory is None:
+            # Few in-client retries: the router fails over to another region instead
+            def client_factory(region):
+                return _default_client_factory(region, max_pool_connections, max_attempts=2)
+
+        self.targets = [RouteTarget(region=region, geo=geo, client=client_factory(region))
+                        for region, geo in targets]
+        self.throttle_window_sec = throttle_window_sec
+        self.base_cooldown_sec = base_cooldown_sec
+        self.max_cooldown_sec = max_cooldown_sec
+        self._lock = threading.Lock()
+
+        logger.info(f"BedrockRouter initialized with targets: {[t.name for t in self.targets]}")
+
+    def invoke_model(self, **kwargs) -> Dict[str, Any]:
+        """
+        Same signature as bedrock-runtime invoke_model.
+
+        Tries the best available target first and fails over to the others on
+        throttling or regional errors. Raises the last error if every target fails.
+        """
+        tried = set()
+        last_error = None
+
+        while True:
+            target = self._select(exclude=tried)
+            if target is None:
+                break
+            tried.add(target.name)
+
+            call_kwargs = dict(kwargs)
+            if 'modelId' in call_kwargs:
+                call_kwargs['modelId'] = target.model_id_for(call_kwargs['modelId'])
+
+            with self._lock:
+                target.calls += 1
+                target.in_flight += 1
+            start = time.time()
+            try:
+                response = target.client.invoke_model(**call_kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                self._record_failure(target, kind)
+                if kind == 'fatal':
+                    raise
+                logger.debug(f"Bedrock {kind} in {target.name}, failing over: {e}")
+                last_error = e
+                continue
+            finally:
+                with self._lock:
+                    target.in_flight -= 1
+
+            self._record_success(target, time.time() - start)
+            return response
+
+        raise last_error
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-target counters."""
+        now = time.time()
+        with self._lock:
+            return {
+                t.name: {
+                    'calls': t.calls,
+                    'successes': t.successes,
+                    'throttles': t.throttles,
+                    'errors': t.errors,
+                    'in_flight': t.in_flight,
+                    'avg_latency_sec': round(t.total_latency_sec / t.successes, 3) if t.successes else None,
+                    'recent_throttle_rate': round(t.throttle_rate(now, self.throttle_window_sec), 3),
+                    'cooling_down': t.cooldown_until > now,
+                }
+                for t in self.targets
+            }
+
+    def log_stats(self) -> None:
+        """Log one line of counters per target."""
+        for name, s in self.stats().items():
+            logger.info(f"  Bedrock {name}: {s['successes']}/{s['calls']} ok, "
+                        f"{s['throttles']} throttled, {s['errors']} errors, "
+                        f"avg {s['avg_latency_sec']}s")
+
+    def _select(self, exclude: set) -> Optional[RouteTarget]:
+        """Pick the healthiest, least-loaded target not yet tried for this call."""
+        now = time.time()
+        with self._lock:
+            candidates = [t for t in self.targets if t.name not in exclude]
+            if not candidates:
+                return None
+
+            healthy = [t for t in candidates if t.cooldown_until <= now]
+            if not healthy:
+                # Everything is cooling down - use whichever recovers first
+                return min(candidates, key=lambda t: t.cooldown_until)
+
+            def score(t: RouteTarget) -> float:
+                return (t.in_flight + 1) * (1 + 10 * t.throttle_rate(now, self.throttle_window_sec))
+
+            # min() keeps configuration order on ties, so the first region is preferred
+            return min(healthy, key=score)
+
+    def _record_success(self, target: RouteTarget, latency: float) -> None:
+        with self._lock:
+            target.successes += 1
+            target.total_latency_sec += latency
+            target.consecutive_failures = 0
+            target.recent.append((time.time(), False))
+
+    def _record_failure(self, target: RouteTarget, kind: str) -> None:
+        now = time.time()
+        with self._lock:
+            if kind == 'throttle':
+                target.throttles += 1
+                target.recent.append((now, True))
+            else:
+                target.errors += 1
+            if kind != 'fatal':
+                target.consecutive_failures += 1
+                cooldown = self.base_cooldown_sec * (2 ** (target.consecutive_failures - 1))
+                target.cooldown_until = now + min(cooldown, self.max_cooldown_sec)
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def create_bedrock_client(regions: Optional[str] = None, max_pool_connections: int = 50):
+    """
+    Create a pooled bedrock-runtime client.
+
+    Args:
+        regions: Target spec, e.g. "us-east-1,us-west-2" (default: BEDROCK_REGIONS env var)
+        max_pool_connections: HTTP connection pool size per region
+
+    Returns:
+        A plain boto3 client for a single region, or a BedrockRouter for several
+    """
+    targets = parse_targets(regions or os.environ.get('BEDROCK_REGIONS', DEFAULT_REGIONS))
+    if len(targets) == 1 and not targets[0][1]:
+        return _default_client_factory(targets[0][0], max_pool_connections)
+    return BedrockRouter(targets, max_pool_connections=max_pool_connections)
+
+
+def get_bedrock_client():
+    """Return the process-wide shared Bedrock client (created on first use)."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = create_bedrock_client()
+        return _shared_client
@@ -0,0 +1,498 @@
+"""
+SQLite index over the local artifact corpus.
+
+Corpus-wide reports used to walk every book directory and re-parse all six
+JSON artifacts per book on each run. CorpusIndex keeps their contents in a
+local SQLite database instead:
+
+- books: one row per SheetMusic_Artifacts/{Artist}/{Book}, with summary counts
+- toc_entries, pages, verified_songs, song_locations, output_files: the rows
+  of toc_parse.json, page_analysis.json, verified_songs.json,
+  page_mapping.json and output_files.json
+- output_pdfs: song PDFs on disk under SheetMusic_Output/{Artist}/{Book}
+- artifacts: per-file mtime/size/SHA-1 and parse errors
+
+refresh() stats every artifact and re-parses only files whose mtime or size
+changed and whose content hash differs, so a refresh after a few fixes
+touches a few files. Output directories are re-listed each time and
+re-indexed when any PDF's name, size or mtime changed. Queries then take
+milliseconds:
+
+    index = open_corpus_index(PROJECT_ROOT)
+    for book in index.books(complete=True):
+        ...
+    index.query("SELECT artist, COUNT(*) AS n FROM books GROUP BY artist")
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import logging
+
+from app.utils.page_table import expand_pages
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_NAMES = (
+    'toc_discovery.json', 'toc_parse.json', 'page_analysis.json',
+    'page_mapping.json', 'verified_songs.json', 'output_files.json',
+)
+OUTPUT_DIR_ARTIFACT = 'output_dir'  # pseudo-artifact: the book's SheetMusic_Output directory
+INDEX_FILENAME = 'corpus_index.sqlite'
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE books (
+    id INTEGER PRIMARY KEY,
+    artist TEXT NOT NULL,
+    book TEXT NOT NULL,
+    artifact_count INTEGER DEFAULT 0,
+    complete INTEGER DEFAULT 0,
+    toc_count INTEGER DEFAULT 0,
+    song_count INTEGER DEFAULT 0,
+    output_count INTEGER DEFAULT 0,
+    output_bytes INTEGER DEFAULT 0,
+    local_pdf_count INTEGER DEFAULT 0,
+    vision_song_count INTEGER DEFAULT 0,
+    total_pages INTEGER,
+    page_offset INTEGER,
+    indexed_at REAL,
+    UNIQUE (artist, book)
+);
+CREATE TABLE artifacts (
+    book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    mtime_ns INTEGER,
+    size INTEGER,
+    sha1 TEXT,
+    parse_error TEXT,
+    PRIMARY KEY (book_id, name)
+);
+CREATE TABLE toc_entries (
+    book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    idx INTEGER,
+    song_title TEXT,
+    page_number INTEGER,
+    artist TEXT
+);
+CREATE TABLE pages (
+    book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    pdf_page INTEGER,
+    printed_page INTEGER,
+    content_type TEXT,
+    detected_title TEXT,
+    has_music_notation INTEGER,
+    confidence REAL
+);
+CREATE TABLE verified_songs (
+    book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    idx INTEGER,
+    song_title TEXT,
+    start_page INTEGER,
+    end_page INTEGER,
+    artist TEXT
+);
+CREATE TABLE song_locations (
+    book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    idx INTEGER,
+    song_title TEXT,
+    printed_page INTEGER,
+    pdf_index INTEGER,
+    artist TEXT
+);
+CREATE TABLE output_files (
+    book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    idx INTEGER,
+    song_title TEXT,
+    artist TEXT,
+    output_uri TEXT,
+    start_page INTEGER,
+    end_page INTEGER,
+    file_size_bytes INTEGER
+);
+CREATE TABLE output_pdfs (
+    book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+    filename TEXT,
+    size INTEGER
+);
+CREATE INDEX idx_toc_book ON toc_entries(book_id);
+CREATE INDEX idx_pages_book ON pages(book_id);
+CREATE INDEX idx_pages_type ON pages(content_type);
+CREATE INDEX idx_vs_book ON verified_songs(book_id);
+CREATE INDEX idx_vs_title ON verified_songs(song_title);
+CREATE INDEX idx_sl_book ON song_locations(book_id);
+CREATE INDEX idx_of_book ON output_files(book_id);
+CREATE INDEX idx_pdfs_book ON output_pdfs(book_id);
+"""
+
+# Which table each artifact's rows live in
+ARTIFACT_TABLES = {
+    'toc_parse.json': 'toc_entries',
+    'page_analysis.json': 'pages',
+    'verified_songs.json': 'verified_songs',
+    'page_mapping.json': 'song_locations',
+    'output_files.json': 'output_files',
+    OUTPUT_DIR_ARTIFACT: 'output_pdfs',
+}
+
+
+@dataclass
+class RefreshStats:
+    """What a refresh() did."""
+    books: int = 0
+    parsed: int = 0  # artifacts (re)loaded
+    unchanged: int = 0
+    removed_books: int = 0
+    seconds: float = 0.0
+
+
+class CorpusIndex:
+    """Incrementally maintained SQLite index of the artifact corpus."""
+
+    def __init__(self, db_path: Union[str, Path], artifacts_dir: Union[str, Path],
+                 output_dir: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            db_path: SQLite file (created if missing; ':memory:' for a throwaway index)
+            artifacts_dir: SheetMusic_Artifacts root
+            output_dir: SheetMusic_Output root (None = don't index song PDFs on disk)
+        """
+        if str(db_path) != ':memory:':
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.artifacts_dir = Path(artifacts_dir)
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+        if version:
+            logger.info(f"Corpus index schema {version} is outdated, rebuilding")
+        tables = [r[0] for r in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        with self.conn:
+            for table in tables:
+                self.conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'CorpusIndex':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ===== Refresh =====
+
+    def refresh(self, force: bool = False) -> RefreshStats:
+        """
+        Bring the index up to date with the artifact tree.
+
+        Args:
+            force: Re-parse every artifact even if unchanged
+
+        Returns:
+            RefreshStats
+        """
+        started = time.time()
+        stats = RefreshStats()
+        known = {(r['artist'], r['book']): r['id'] for r in self.conn.execute('SELECT id, artist, book FROM books')}
+        seen = set()
+
+        with self.conn:
+            for artist, book, book_dir in self._book_dirs():
+                book_id = known.get((artist, book))
+                if book_id is None:
+                    book_id = self.conn.execute('INSERT INTO books (artist, book) VALUES (?, ?)',
+                                                (artist, book)).lastrowid
+                seen.add(book_id)
+                stats.books += 1
+
+                changed = False
+                for name in ARTIFACT_NAMES:
+                    changed |= self._refresh_artifact(book_id, name, book_dir / name, force, stats)
+                if self.output_dir:
+                    changed |= self._refresh_output_dir(book_id, self.output_dir / artist / book, force, stats)
+                if changed:
+                    self._update_summary(book_id)
+
+            for book_id in set(known.values()) - seen:
+                self.conn.execute('DELETE FROM books WHERE id = ?', (book_id,))
+                stats.removed_books += 1
+
+        stats.seconds = time.time() - started
+        logger.info(f"Corpus index: {stats.books} books, {stats.parsed} artifacts parsed, "
+                    f"{stats.unchanged} unchanged, {stats.removed_books} removed ({stats.seconds:.2f}s)")
+        return stats
+
+    def _book_dirs(self):
+        if not self.artifacts_dir.exists():
+            return
+        for artist_dir in sorted(self.artifacts_dir.iterdir()):
+            # Skip files and batch results at root level
+            if not artist_dir.is_dir() or artist_dir.name.startswith(('batch_results', '.')):
+                continue
+            for book_dir in sorted(artist_dir.iterdir()):
+                if book_dir.is_dir():
+                    yield artist_dir.name, book_dir.name, book_dir
+
+    def _artifact_state(self, book_id: int, name: str) -> Optional[sqlite3.Row]:
+        return self.conn.execute('SELECT mtime_ns, size, sha1 FROM artifacts WHERE book_id = ? AND name = ?',
+                                 (book_id, name)).fetchone()
+
+    def _refresh_artifact(self, book_id: int, name: str, path: Path, force: bool,
+                          stats: RefreshStats) -> bool:
+        """Reload one artifact if it changed; returns whether the index changed."""
+        row = self._artifact_state(book_id, name)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            if row is None:
+                return False
+            self._clear(book_id, name)
+            self.conn.execute('DELETE FROM artifacts WHERE book_id = ? AND name = ?', (book_id, name))
+            return True
+
+        if row and not force and row['mtime_ns'] == st.st_mtime_ns and row['size'] == st.st_size:
+            stats.unchanged += 1
+            return False
+
+        raw = path.read_bytes()
+        sha1 = hashlib.sha1(raw).hexdigest()
+        if row and not force and row['sha1'] == sha1:
+            # Touched but identical
+            self.conn.execute('UPDATE artifacts SET mtime_ns = ?, size = ? WHERE book_id = ? AND name = ?',
+                              (st.st_mtime_ns, st.st_size, book_id, name))
+            stats.unchanged += 1
+            return False
+
+        error = None
+        self._clear(book_id, name)
+        try:
+            data = json.loads(raw.decode('utf-8'))
+            loader = self._LOADERS.get(name)
+            if loader and data:
+                loader(self, book_id, data)
+        except (ValueError, UnicodeDecodeError, KeyError, TypeError, AttributeError) as e:
+            error = f"{type(e).__name__}: {e}"
+            self._clear(book_id, name)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO artifacts (book_id, name, mtime_ns, size, sha1, parse_error) '
+            'VALUES (?, ?, ?, ?, ?, ?)', (book_id, name, st.st_mtime_ns, st.st_size, sha1, error))
+        stats.parsed += 1
+        return True
+
+    def _refresh_output_dir(self, book_id: int, book_output: Path, force: bool, stats: RefreshStats) -> bool:
+        """
+        Re-index the book's output PDFs if any was added, removed or rewritten.
+
+        The directory mtime only moves when entries are added or removed; an
+        in-place re-split rewrites files without touching it. So the listing
+        is taken every time and compared by a digest of each PDF's name, size
+        and mtime (one scandir per book, no file reads).
+        """
+        row = self._artifact_state(book_id, OUTPUT_DIR_ARTIFACT)
+        try:
+            st = book_output.stat()
+            with os.scandir(book_output) as it:
+                entries = sorted((e.name, e.stat()) for e in it if e.is_file() and e.name.endswith('.pdf'))
+        except (FileNotFoundError, NotADirectoryError):
+            if row is None:
+                return False
+            self._clear(book_id, OUTPUT_DIR_ARTIFACT)
+            self.conn.execute('DELETE FROM artifacts WHERE book_id = ? AND name = ?',
+                              (book_id, OUTPUT_DIR_ARTIFACT))
+            return True
+
+        digest = hashlib.sha1()
+        for name, est in entries:
+            digest.update(f'{name}\0{est.st_size}\0{est.st_mtime_ns}\n'.encode('utf-8'))
+        signature = digest.hexdigest()
+        if row and not force and row['sha1'] == signature:
+            stats.unchanged += 1
+            return False
+
+        self._clear(book_id, OUTPUT_DIR_ARTIFACT)
+        self.conn.executemany('INSERT INTO output_pdfs (book_id, filename, size) VALUES (?, ?, ?)',
+                              [(book_id, name, est.st_size) for name, est in entries])
+        self.conn.execute(
+            'INSERT OR REPLACE INTO artifacts (book_id, name, mtime_ns, size, sha1, parse_error) '
+            'VALUES (?, ?, ?, ?, ?, NULL)', (book_id, OUTPUT_DIR_ARTIFACT, st.st_mtime_ns, len(entries), signature))
+        stats.parsed += 1
+        return True
+
+    def _clear(self, book_id: int, name: str) -> None:
+        table = ARTIFACT_TABLES.get(name)
+        if table:
+            self.conn.execute(f'DELETE FROM {table} WHERE book_id = ?', (book_id,))
+        if name == 'page_analysis.json':
+            self.conn.execute('UPDATE books SET total_pages = NULL WHERE id = ?', (book_id,))
+        elif name == 'page_mapping.json':
+            self.conn.execute('UPDATE books SET page_offset = NULL WHERE id = ?', (book_id,))
+
+    def _load_toc_parse(self, book_id: int, data: Dict[str, Any]) -> None:
+        self.conn.executemany(
+            'INSERT INTO toc_entries (book_id, idx, song_title, page_number, artist) VALUES (?, ?, ?, ?, ?)',
+            [(book_id, i, e.get('song_title'), e.get('page_number'), e.get('artist'))
+             for i, e in enumerate(data.get('entries', []))])
+
+    def _load_page_analysis(self, book_id: int, data: Dict[str, Any]) -> None:
+        pages = expand_pages(data, columns=('printed_page', 'content_type', 'detected_title',
+                                            'has_music_notation', 'confidence'))
+        self.conn.executemany(
+            'INSERT INTO pages (book_id, pdf_page, printed_page, content_type, detected_title, '
+            'has_music_notation, confidence) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(book_id, p['pdf_page'], p.get('printed_page'), p.get('content_type'), p.get('detected_title'),
+              int(bool(p.get('has_music_notation'))), p.get('confidence')) for p in pages])
+        self.conn.execute('UPDATE books SET total_pages = ? WHERE id = ?',
+                          (data.get('total_pages') or len(pages), book_id))
+
+    def _load_verified_songs(self, book_id: int, data: Dict[str, Any]) -> None:
+        songs = data.get('verified_songs', data) if isinstance(data, dict) else data
+        self.conn.executemany(
+            'INSERT INTO verified_songs (book_id, idx, song_title, start_page, end_page, artist) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(book_id, i, s.get('song_title'), s.get('start_page'), s.get('end_page'), s.get('artist'))
+             for i, s in enumerate(songs)])
+
+    def _load_page_mapping(self, book_id: int, data: Dict[str, Any]) -> None:
+        self.conn.executemany(
+            'INSERT INTO song_locations (book_id, idx, song_title, printed_page, pdf_index, artist) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(book_id, i, s.get('song_title'), s.get('printed_page'), s.get('pdf_index'), s.get('artist'))
+             for i, s in enumerate(data.get('song_locations', []))])
+        self.conn.execute('UPDATE books SET page_offset = ? WHERE id = ?', (data.get('offset'), book_id))
+
+    def _load_output_files(self, book_id: int, data: Dict[str, Any]) -> None:
+        rows = []
+        for i, f in enumerate(data.get('output_files', [])):
+            page_range = f.get('page_range') or [None, None]
+            rows.append((book_id, i, f.get('song_title'), f.get('artist'), f.get('output_uri'),
+                         page_range[0], page_range[1] if len(page_range) > 1 else None,
+                         f.get('file_size_bytes', 0)))
+        self.conn.executemany(
+            'INSERT INTO output_files (book_id, idx, song_title, artist, output_uri, start_page, end_page, '
+            'file_size_bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    _LOADERS: Dict[str, Callable[['CorpusIndex', int, Dict[str, Any]], None]] = {
+        'toc_parse.json': _load_toc_parse,
+        'page_analysis.json': _load_page_analysis,
+        'verified_songs.json': _load_verified_songs,
+        'page_mapping.json': _load_page_mapping,
+        'output_files.json': _load_output_files,
+    }
+
+    def _update_summary(self, book_id: int) -> None:
+        self.conn.execute("""
+            UPDATE books SET
+                artifact_count = (SELECT COUNT(*) FROM artifacts WHERE book_id = :id AND name != :out),
+                toc_count = (SELECT COUNT(*) FROM toc_entries WHERE book_id = :id),
+                song_count = (SELECT COUNT(*) FROM verified_songs WHERE book_id = :id),
+                output_count = (SELECT COUNT(*) FROM output_files WHERE book_id = :id),
+                output_bytes = (SELECT COALESCE(SUM(file_size_bytes), 0) FROM output_files WHERE book_id = :id),
+                local_pdf_count = (SELECT COUNT(*) FROM output_pdfs WHERE book_id = :id),
+                vision_song_count = (SELECT COUNT(*) FROM pages WHERE book_id = :id
+                                     AND content_type = 'song_start' AND detected_title IS NOT NULL
+                                     AND detected_title != ''),
+                indexed_at = :now
+            WHERE id = :id
+        """, {'id': book_id, 'out': OUTPUT_DIR_ARTIFACT, 'now': time.time()})
+        self.conn.execute('UPDATE books SET complete = (artifact_count = ?) WHERE id = ?',
+                          (len(ARTIFACT_NAMES), book_id))
+
+    # ===== Queries =====
+
+    def query(self, sql: str, params: Any = ()) -> List[Dict[str, Any]]:
+        """Run any SELECT against the index; rows come back as dicts."""
+        return [dict(r) for r in self.conn.execute(sql, params)]
+
+    def books(self, artist: Optional[str] = None, complete: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Book summaries, ordered by artist and book."""
+        where, params = ['1 = 1'], []
+        if artist is not None:
+            where.append('artist = ?')
+            params.append(artist)
+        if complete is not None:
+            where.append('complete = ?')
+            params.append(int(complete))
+        return self.query(f"SELECT * FROM books WHERE {' AND '.join(where)} ORDER BY artist, book", params)
+
+    def _rows(self, table: str, artist: Optional[str], book: Optional[str], order: str,
+              extra: str = '', params: tuple = ()) -> List[Dict[str, Any]]:
+        where, args = ['1 = 1'], []
+        if artist is not None:
+            where.append('b.artist = ?')
+            args.append(artist)
+        if book is not None:
+            where.append('b.book = ?')
+            args.append(book)
+        if extra:
+            where.append(extra)
+            args.extend(params)
+        return self.query(
+            f"SELECT b.artist AS book_artist, b.book, t.* FROM {table} t JOIN books b ON b.id = t.book_id "
+            f"WHERE {' AND '.join(where)} ORDER BY b.artist, b.book, {order}", args)
+
+    def toc_entries(self, artist: Optional[str] = None, book: Optional[str] = None) -> List[Dict[str, Any]]:
+        """toc_parse.json entries."""
+        return self._rows('toc_entries', artist, book, 't.idx')
+
+    def verified_songs(self, artist: Optional[str] = None, book: Optional[str] = None) -> List[Dict[str, Any]]:
+        """verified_songs.json songs."""
+        return self._rows('verified_songs', artist, book, 't.idx')
+
+    def song_locations(self, artist: Optional[str] = None, book: Optional[str] = None) -> List[Dict[str, Any]]:
+        """page_mapping.json song locations."""
+        return self._rows('song_locations', artist, book, 't.idx')
+
+    def output_files(self, artist: Optional[str] = None, book: Optional[str] = None) -> List[Dict[str, Any]]:
+        """output_files.json entries."""
+        return self._rows('output_files', artist, book, 't.idx')
+
+    def output_pdfs(self, artist: Optional[str] = None, book: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Song PDFs on disk under SheetMusic_Output."""
+        return self._rows('output_pdfs', artist, book, 't.filename')
+
+    def pages(self, artist: Optional[str] = None, book: Optional[str] = None,
+              content_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """page_analysis.json pages, optionally of one content type."""
+        if content_type is None:
+            return self._rows('pages', artist, book, 't.pdf_page')
+        return self._rows('pages', artist, book, 't.pdf_page', 't.content_type = ?', (content_type,))
+
+    def artifact_errors(self) -> List[Dict[str, Any]]:
+        """Artifacts that failed to parse at their last refresh."""
+        return self._rows('artifacts', None, None, 't.name', 't.parse_error IS NOT NULL')
+
+
+def group_by_book(rows: List[Dict[str, Any]]) -> Dict[tuple, List[Dict[str, Any]]]:
+    """Group query rows by (book_artist, book)."""
+    grouped: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in rows:
+        grouped.setdefault((row['book_artist'], row['book']), []).append(row)
+    return grouped
+
+
+def open_corpus_index(project_root: Union[str, Path], refresh: bool = True) -> CorpusIndex:
+    """
+    Open the standard index ({project_root}/.cache/corpus_index.sqlite over
+    SheetMusic_Artifacts and SheetMusic_Output), refreshed by default.
+    """
+    project_root = Path(project_root)
+    index = CorpusIndex(project_root / '.cache' / INDEX_FILENAME,
+                        project_root / 'SheetMusic_Artifacts', project_root / 'SheetMusic_Output')
+    if refresh:
+        index.refresh()
+    return index
@@ -4,7 +4,9 @@ DynamoDB ledger module for tracking processing state and idempotency.
 This module provides functions for:
 - Checking if a book has already been processed
 - Recording processing start, completion, and failure states
-- Supporting local mode with mock DynamoDB
+- Supporting local mode with mock DynamoDB, or a durable SQLite table
+- Optionally coalescing step updates into fewer writes (see ledger_writer)
+- Reading many entries at once (paginated queries, parallel scans)
 """
 
 import hashlib
@@ -16,6 +18,10 @@ import boto3
 from botocore.exceptions import ClientError
 import logging
 
+from app.utils.ledger_snapshot import DEFAULT_SCAN_SEGMENTS, paginate, parallel_scan
+from app.utils.ledger_writer import DEFAULT_FLUSH_INTERVAL_SEC, LedgerWriter
+from app.utils.sqlite_ledger import SQLiteLedgerTable
+
 logger = logging.getLogger(__name__)
 
 
@@ -83,24 +89,50 @@ class DynamoDBLedger:
     """DynamoDB ledger for tracking book processing state."""
     
     def __init__(self, table_name: str = 'jsmith-pipeline-ledger',
-                 local_mode: bool = False):
+                 local_mode: bool = False, coalesce_writes: bool = False,
+                 flush_interval_sec: float = DEFAULT_FLUSH_INTERVAL_SEC,
+                 sqlite_path: Optional[str] = None):
         """
         Initialize DynamoDB ledger.
         
         Args:
             table_name: Name of the DynamoDB table
             local_mode: If True, use mock DynamoDB instead of real service
+            coalesce_writes: Buffer update_step calls and flush them as merged
+                writes (every flush_interval_sec, at step completion and on
+                record_processing_complete / close)
+            flush_interval_sec: Maximum time a step update stays buffered
+            sqlite_path: Keep the ledger in this SQLite file instead of
+                DynamoDB (same update/query semantics, persists across runs)
         """
         self.table_name = table_name
         self.local_mode = local_mode
+        self.writer: Optional[LedgerWriter] = None
         
         if local_mode:
             self.db = MockDynamoDB()
             logger.info(f"DynamoDBLedger initialized in local mode")
         else:
-            self.dynamodb = boto3.resource('dynamodb')
-            self.table = self.dynamodb.Table(table_name)
-            logger.info(f"DynamoDBLedger initialized with table: {table_name}")
+            if sqlite_path:
+                self.table = SQLiteLedgerTable(sqlite_path, name=table_name)
+            else:
+                self.dynamodb = boto3.resource('dynamodb')
+                self.table = self.dynamodb.Table(table_name)
+            if coalesce_writes:
+                self.writer = LedgerWriter(self.table, flush_interval_sec=flush_interval_sec)
+            logger.info(f"DynamoDBLedger initialized with table: {sqlite_path or table_name}")
+
+    def flush(self) -> None:
+        """Write any buffered step updates now."""
+        if self.writer:
+            self.writer.flush()
+
+    def close(self) -> None:
+        """Flush buffered updates and stop the background writer."""
+        if self.writer:
+            self.writer.close()
+        if isinstance(getattr(self, 'table', None), SQLiteLedgerTable):
+            self.table.close()
     
     def generate_book_id(self, s3_uri: str) -> str:
         """
@@ -128,6 +160,8 @@ class DynamoDBLedger:
             if self.local_mode:
                 item = self.db.get_item(self.table_name, {'book_id': book_id})
             else:
+                if self.writer:
+                    self.writer.flush(book_id)
                 response = self.table.get_item(Key={'book_id': book_id})
                 item = response.get('Item')
             
@@ -234,6 +268,9 @@ class DynamoDBLedger:
                     self.db.put_item(self.table_name, existing)
                 else:
                     logger.warning(f"No existing entry found for book {book_id}")
+            elif self.writer:
+                # Buffered step updates and the final status land in one write
+                self.writer.finalize(book_id, update_data)
             else:
                 update_expr = 'SET ' + ', '.join([f'#{k} = :{k}' for k in update_data.keys()])
                 expr_attr_names = {f'#{k}': k for k in update_data.keys()}
@@ -276,6 +313,10 @@ class DynamoDBLedger:
                     if current_step:
                         existing['current_step'] = current_step
                     self.db.put_item(self.table_name, existing)
+            elif self.writer:
+                self.writer.set_step(book_id, step_name, step_data, updated_at=now_iso,
+                                     current_step=current_step,
+                                     flush=step_data.get('status') != 'in_progress')
             else:
                 update_expr = 'SET steps.#step = :step_data, updated_at = :now'
                 expr_attr_names = {'#step': step_name}
@@ -312,6 +353,8 @@ class DynamoDBLedger:
             if self.local_mode:
                 return self.db.get_item(self.table_name, {'book_id': book_id})
             else:
+                if self.writer:
+                    self.writer.flush(book_id)
                 response = self.table.get_item(Key={'book_id': book_id})
                 return response.get('Item')
                 
@@ -333,15 +376,34 @@ class DynamoDBLedger:
             if self.local_mode:
                 return self.db.query(self.table_name, '', filter_status=status)
             else:
+                self.flush()
                 # Note: This requires a GSI on status in the real table
-                response = self.table.query(
+                return list(paginate(
+                    self.table.query,
                     IndexName='status-index',
                     KeyConditionExpression='#status = :status',
                     ExpressionAttributeNames={'#status': 'status'},
                     ExpressionAttributeValues={':status': status}
-                )
-                return response.get('Items', [])
+                ))
                 
         except ClientError as e:
             logger.error(f"Error querying by status: {e}")
             return []
+
+    def scan_all(self, segments: int = DEFAULT_SCAN_SEGMENTS) -> list:
+        """
+        Read every ledger entry with a segmented parallel scan.
+
+        For repeated corpus-wide reads prefer ledger_snapshot.LedgerCache,
+        which keeps a local copy and refreshes it incrementally.
+
+        Args:
+            segments: Parallel scan segments
+
+        Returns:
+            List of all ledger entries
+        """
+        if self.local_mode:
+            return self.db.query(self.table_name, '')
+        self.flush()
+        return parallel_scan(self.table, segments)
@@ -0,0 +1,235 @@
+"""
+Bulk backup and restore of the ledger table in DynamoDB JSON.
+
+Backups use the `aws dynamodb scan --output json` layout
+({"Items": [...], "Count": n, ...}), as in data/dynamodb_backup_*.json.
+Items stay in DynamoDB JSON end to end - they are never converted to Python
+types - so a restore sends the file's items as they are:
+
+- iter_backup_items: streams items out of a backup file with a bounded read
+  buffer, so memory does not grow with the size of the backup
+- batch_write: BatchWriteItem in requests of 25 on a thread pool, with a cap on
+  batches in flight; UnprocessedItems are resent with exponential backoff
+- export_table: parallel segmented Scan streamed straight to a backup file
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+import json
+import os
+import queue
+import random
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_WRITE_LIMIT = 25
+DEFAULT_WORKERS = 8
+DEFAULT_SEGMENTS = 4
+DEFAULT_MAX_RETRIES = 8
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class BulkWriteStats:
+    """Outcome of a batch_write run."""
+    written: int = 0
+    failed: int = 0
+    requests: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    first_error: Optional[str] = None
+
+
+def iter_backup_items(path: Union[str, Path],
+                      chunk_bytes: int = READ_CHUNK_BYTES) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the items of a backup file one at a time.
+
+    Args:
+        path: Backup JSON file ({"Items": [...], ...})
+        chunk_bytes: Read size; the buffer holds at most one chunk plus one item
+
+    Yields:
+        Items in DynamoDB JSON
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            """Drop consumed text and append the next chunk."""
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_bytes)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            return bool(chunk)
+
+        # Find the start of the Items array
+        while True:
+            idx = buf.find('"Items"')
+            bracket = buf.find('[', idx) if idx >= 0 else -1
+            if bracket >= 0:
+                pos = bracket + 1
+                break
+            if not fill():
+                raise ValueError(f"No Items array in {path}")
+
+        while True:
+            # Skip separators between items
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                    pos += 1
+                if pos < len(buf) or not fill():
+                    break
+            if pos >= len(buf):
+                raise ValueError(f"Unterminated Items array in {path}")
+            if buf[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof or not fill():
+                    raise
+                continue
+            yield item
+            pos = end
+
+
+def _batches(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def batch_write(client, table_name: str, items: Iterable[Dict[str, Any]],
+                workers: int = DEFAULT_WORKERS, max_retries: int = DEFAULT_MAX_RETRIES,
+                base_delay_sec: float = 0.05, max_delay_sec: float = 5.0) -> BulkWriteStats:
+    """
+    Put items with parallel BatchWriteItem requests.
+
+    Args:
+        client: Low-level boto3 DynamoDB client
+        table_name: Target table
+        items: Items in DynamoDB JSON (may be a generator)
+        workers: Concurrent requests
+        max_retries: Resends of UnprocessedItems before counting them failed
+        base_delay_sec: First backoff delay; doubles per retry, with jitter
+        max_delay_sec: Backoff ceiling
+
+    Returns:
+        BulkWriteStats
+    """
+    stats = BulkWriteStats()
+    lock = threading.Lock()
+    # At most two batches queued per worker: the producer blocks instead of
+    # reading the whole backup into the executor's queue
+    slots = threading.BoundedSemaphore(workers * 2)
+    started = time.time()
+
+    def write(requests: List[Dict[str, Any]]) -> None:
+        attempt = 0
+        try:
+            while requests:
+                response = client.batch_write_item(RequestItems={table_name: requests})
+                unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+                with lock:
+                    stats.requests += 1
+                    stats.written += len(requests) - len(unprocessed)
+                if not unprocessed:
+                    return
+                attempt += 1
+                if attempt > max_retries:
+                    with lock:
+                        stats.failed += len(unprocessed)
+                        stats.first_error = stats.first_error or \
+                            f"{len(unprocessed)} items still unprocessed after {max_retries} retries"
+                    return
+                with lock:
+                    stats.retries += 1
+                delay = min(max_delay_sec, base_delay_sec * 2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                requests = unprocessed
+        except Exception as e:
+            with lock:
+                stats.failed += len(requests)
+                stats.first_error = stats.first_error or str(e)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in _batches(items, BATCH_WRITE_LIMIT):
+            slots.acquire()
+            pool.submit(write, [{'PutRequest': {'Item': item}} for item in batch])
+
+    stats.seconds = time.time() - started
+    return stats
+
+
+def export_table(client, table_name: str, path: Union[str, Path],
+                 segments: int = DEFAULT_SEGMENTS, page_size: Optional[int] = None) -> int:
+    """
+    Stream a parallel segmented Scan of a table into a backup file.
+
+    Args:
+        client: Low-level boto3 DynamoDB client
+        table_name: Table to export
+        path: Backup file to write (replaced atomically when complete)
+        segments: Parallel scan segments
+        page_size: Limit per Scan request (None = 1 MB pages)
+
+    Returns:
+        Number of items written
+    """
+    pages: 'queue.Queue[Optional[List[Dict[str, Any]]]]' = queue.Queue(maxsize=segments * 2)
+    errors: List[BaseException] = []
+
+    def scan_segment(segment: int) -> None:
+        kwargs: Dict[str, Any] = {'TableName': table_name, 'Segment': segment, 'TotalSegments': segments}
+        if page_size:
+            kwargs['Limit'] = page_size
+        try:
+            for page in client.get_paginator('scan').paginate(**kwargs):
+                pages.put(page.get('Items', []))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            pages.put(None)
+
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    count = 0
+    threads = [threading.Thread(target=scan_segment, args=(s,), daemon=True) for s in range(segments)]
+    for t in threads:
+        t.start()
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('{"Items": [\n')
+        remaining = segments
+        while remaining:
+            page = pages.get()
+            if page is None:
+                remaining -= 1
+                continue
+            for item in page:
+                f.write((',\n' if count else '') + json.dumps(item, ensure_ascii=False))
+                count += 1
+        f.write(f'\n], "Count": {count}, "ScannedCount": {count}, "ConsumedCapacity": null}}\n')
+    for t in threads:
+        t.join()
+    if errors:
+        tmp_path.unlink()
+        raise errors[0]
+    os.replace(tmp_path, path)
+    return count
@@ -0,0 +1,307 @@
+"""
+Ledger snapshots - read the status of every book without a request per book.
+
+A LedgerSnapshot holds the processing ledger's items keyed by book_id, with
+lookups by status and by (artist, book_name). LedgerCache fills one from the
+table and keeps it on disk between runs:
+
+- a full refresh is a segmented parallel Scan; every segment follows
+  LastEvaluatedKey to the end, so nothing past the first 1 MB page is lost
+- an incremental refresh is a Scan filtered to items whose updated_at is at
+  or after the newest updated_at already in the snapshot (minus a clock-skew
+  margin), merged in. The filter is applied after the read: DynamoDB still
+  reads and bills every item, only fewer are returned and merged. The table
+  has no index on updated_at (only status-index), so a Query cannot narrow
+  the read; instead the scan runs on one segment and is rate-limited to
+  INCREMENTAL_SCAN_RCU_PER_SEC so it never bursts against pipeline writes
+- a full refresh still runs every FULL_REFRESH_SEC to drop deleted items
+  and pick up rows that never set updated_at
+- ensure(max_age_sec) reuses the on-disk snapshot while it is recent enough
+
+Scans are eventually consistent (half the read capacity of strongly
+consistent reads) and run on TotalSegments workers; pass page_size to cap
+each request's read capacity on a busy table.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+import gzip
+import json
+import time
+import logging
+
+from app.utils.atomic_file import write_json_gz
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE_NAME = 'jsmith-pipeline-ledger'
+DEFAULT_SCAN_SEGMENTS = 4
+FULL_REFRESH_SEC = 24 * 3600
+CLOCK_SKEW_SEC = 300
+INCREMENTAL_SCAN_RCU_PER_SEC = 100.0
+
+
+def paginate(operation, max_rcu_per_sec: Optional[float] = None, **kwargs) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every item of a Query or Scan, following LastEvaluatedKey.
+
+    Args:
+        operation: table.query or table.scan
+        max_rcu_per_sec: Pause between pages so consumed read capacity stays
+            under this rate (None = no limit)
+        **kwargs: Request parameters
+
+    Yields:
+        Items, in page order
+    """
+    if max_rcu_per_sec:
+        kwargs['ReturnConsumedCapacity'] = 'TOTAL'
+    started = time.time()
+    consumed = 0.0
+    while True:
+        response = operation(**kwargs)
+        yield from response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        kwargs['ExclusiveStartKey'] = last_key
+        if max_rcu_per_sec:
+            consumed += float((response.get('ConsumedCapacity') or {}).get('CapacityUnits', 0))
+            ahead = consumed / max_rcu_per_sec - (time.time() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+def parallel_scan(table, segments: int = DEFAULT_SCAN_SEGMENTS,
+                  page_size: Optional[int] = None, max_rcu_per_sec: Optional[float] = None,
+                  **scan_kwargs) -> List[Dict[str, Any]]:
+    """
+    Scan a whole table with one worker per segment.
+
+    Args:
+        table: boto3 DynamoDB Table resource
+        segments: TotalSegments (1 = plain sequential scan)
+        page_size: Limit per request (None = DynamoDB's 1 MB pages)
+        max_rcu_per_sec: Read capacity budget for the whole scan, split
+            evenly across segments (None = no limit)
+        **scan_kwargs: Extra Scan parameters (FilterExpression, ...)
+
+    Returns:
+        All matching items
+    """
+    def scan_segment(segment: int) -> List[Dict[str, Any]]:
+        kwargs = dict(scan_kwargs)
+        if segments > 1:
+            kwargs.update(Segment=segment, TotalSegments=segments)
+        if page_size:
+            kwargs['Limit'] = page_size
+        rate = max_rcu_per_sec / max(1, segments) if max_rcu_per_sec else None
+        return list(paginate(table.scan, max_rcu_per_sec=rate, **kwargs))
+
+    if segments <= 1:
+        return scan_segment(0)
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        return [item for part in pool.map(scan_segment, range(segments)) for item in part]
+
+
+def plain(obj: Any) -> Any:
+    """Convert DynamoDB Decimals and sets to JSON-friendly numbers and lists."""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, dict):
+        return {k: plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, set, tuple)):
+        return [plain(v) for v in obj]
+    return obj
+
+
+class LedgerSnapshot:
+    """In-memory copy of the ledger, keyed by book_id."""
+
+    def __init__(self, items: Optional[Dict[str, Dict[str, Any]]] = None,
+                 scanned_at: float = 0.0, full_scan_at: float = 0.0):
+        self.items: Dict[str, Dict[str, Any]] = items or {}
+        self.scanned_at = scanned_at
+        self.full_scan_at = full_scan_at
+        self._by_name: Optional[Dict[tuple, Dict[str, Any]]] = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, book_id: str) -> bool:
+        return book_id in self.items
+
+    def get(self, book_id: str) -> Optional[Dict[str, Any]]:
+        """Item for a book_id, or None."""
+        return self.items.get(book_id)
+
+    def find(self, artist: str, book_name: str) -> Optional[Dict[str, Any]]:
+        """Item for an (artist, book_name) pair, or None."""
+        if self._by_name is None:
+            self._by_name = {(i.get('artist'), i.get('book_name')): i for i in self.items.values()}
+        return self._by_name.get((artist, book_name))
+
+    def by_status(self, status: str) -> List[Dict[str, Any]]:
+        """Items with the given status, ordered by artist and book."""
+        return sorted((i for i in self.items.values() if i.get('status') == status),
+                      key=lambda i: (i.get('artist', ''), i.get('book_name', '')))
+
+    def status_counts(self) -> Dict[str, int]:
+        """Number of items per status."""
+        counts: Dict[str, int] = {}
+        for item in self.items.values():
+            status = item.get('status', 'unknown')
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def watermark(self) -> str:
+        """Newest updated_at in the snapshot ('' if none)."""
+        return max((i.get('updated_at') or '' for i in self.items.values()), default='')
+
+    def merge(self, items: List[Dict[str, Any]]) -> None:
+        """Insert or replace items by book_id."""
+        for item in items:
+            self.items[item['book_id']] = plain(item)
+        self._by_name = None
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the snapshot as gzipped JSON (atomic; see atomic_file)."""
+        write_json_gz(path, {
+            'scanned_at': self.scanned_at,
+            'full_scan_at': self.full_scan_at,
+            'items': self.items,
+        })
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'LedgerSnapshot':
+        """Read a snapshot written by save()."""
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['items'], data['scanned_at'], data['full_scan_at'])
+
+
+class LedgerCache(LedgerSnapshot):
+    """Snapshot of the ledger table, optionally cached on disk between runs."""
+
+    def __init__(self, table=None, cache_path: Optional[Union[str, Path]] = None,
+                 segments: int = DEFAULT_SCAN_SEGMENTS, page_size: Optional[int] = None,
+                 full_refresh_sec: float = FULL_REFRESH_SEC,
+                 incremental_rcu_per_sec: Optional[float] = INCREMENTAL_SCAN_RCU_PER_SEC):
+        """
+        Args:
+            table: boto3 DynamoDB Table (default: the pipeline ledger table)
+            cache_path: Snapshot file to reuse and update (None = memory only)
+            segments: Parallel scan segments (full refreshes)
+            page_size: Limit per scan request (None = 1 MB pages)
+            full_refresh_sec: Maximum age of the last full scan before
+                refresh() does a full scan instead of an incremental one
+            incremental_rcu_per_sec: Read capacity rate limit for incremental
+                scans, which read the whole table (None = no limit)
+        """
+        super().__init__()
+        if table is None:
+            import boto3
+            table = boto3.resource('dynamodb').Table(DEFAULT_TABLE_NAME)
+        self.table = table
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.segments = segments
+        self.page_size = page_size
+        self.full_refresh_sec = full_refresh_sec
+        self.incremental_rcu_per_sec = incremental_rcu_per_sec
+        self.scans = 0
+
+    def ensure(self, max_age_sec: Optional[float] = None) -> 'LedgerCache':
+        """
+        Make the snapshot available: reuse the on-disk copy if it is recent
+        enough, otherwise refresh it from the table.
+
+        Args:
+            max_age_sec: Oldest acceptable snapshot (None = any age)
+
+        Returns:
+            self
+        """
+        if not self.items and self.cache_path and self.cache_path.exists():
+            try:
+                cached = LedgerSnapshot.load(self.cache_path)
+                self.items, self.scanned_at, self.full_scan_at = \
+                    cached.items, cached.scanned_at, cached.full_scan_at
+                self._by_name = None
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable ledger cache {self.cache_path}: {e}")
+
+        stale = max_age_sec is not None and time.time() - self.scanned_at > max_age_sec
+        if not self.scanned_at or stale:
+            self.refresh()
+        return self
+
+    def refresh(self, full: bool = False) -> int:
+        """
+        Bring the snapshot up to date.
+
+        Args:
+            full: Force a full scan even if an incremental one would do
+
+        Returns:
+            Number of items read from the table
+        """
+        started = time.time()
+        since = self._incremental_since()
+        if full or since is None or started - self.full_scan_at > self.full_refresh_sec:
+            items = parallel_scan(self.table, self.segments, self.page_size)
+            self.items = {}
+            self.merge(items)
+            self.full_scan_at = started
+            kind = 'full'
+        else:
+            # Reads (and bills) the whole table like a full scan; only the
+            # returned items are fewer. One rate-limited segment keeps it gentle.
+            items = parallel_scan(
+                self.table, 1, self.page_size, self.incremental_rcu_per_sec,
+                FilterExpression='updated_at >= :since',
+                ExpressionAttributeValues={':since': since},
+            )
+            self.merge(items)
+            kind = f'since {since}'
+        self.scanned_at = started
+        self.scans += 1
+        logger.info(f"Ledger snapshot ({kind}): {len(items)} items read, {len(self.items)} total "
+                    f"({time.time() - started:.1f}s)")
+        self.persist()
+        return len(items)
+
+    def persist(self) -> None:
+        """Write the snapshot to cache_path, if one is set."""
+        if self.cache_path:
+            self.save(self.cache_path)
+
+    def _incremental_since(self) -> Optional[str]:
+        """updated_at lower bound for an incremental scan, or None if a full scan is needed."""
+        mark = self.watermark()
+        if not self.full_scan_at or not mark:
+            return None
+        try:
+            newest = datetime.fromisoformat(mark.rstrip('Z'))
+        except ValueError:
+            return None
+        return (newest - timedelta(seconds=CLOCK_SKEW_SEC)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def open_ledger_cache(project_root: Union[str, Path], table=None,
+                      max_age_sec: Optional[float] = 300) -> LedgerCache:
+    """
+    Ledger snapshot cached at <project_root>/.cache/ledger_snapshot.json.gz.
+
+    Args:
+        project_root: Repository root
+        table: boto3 DynamoDB Table (default: the pipeline ledger table)
+        max_age_sec: Oldest acceptable snapshot before refreshing
+
+    Returns:
+        Ready LedgerCache
+    """
+    cache_path = Path(project_root) / '.cache' / 'ledger_snapshot.json.gz'
+    return LedgerCache(table, cache_path=cache_path).ensure(max_age_sec)
@@ -0,0 +1,253 @@
+"""
+Write-coalescing client for the DynamoDB processing ledger.
+
+A pipeline run touches its ledger item many times: status in_progress, then an
+in_progress and a success record per step, then the final status. Each of those
+used to be its own update_item round trip on the critical path.
+
+LedgerWriter buffers SET updates per book instead:
+
+- update / set_step: record attribute and steps.<name> values in memory; a
+  later value for the same path replaces the earlier one
+- a background thread flushes every flush_interval_sec, and set_step(...,
+  flush=True) wakes it early at step boundaries; each flush is one update_item
+  per book with every buffered path merged into a single SET expression
+- finalize: writes the final status synchronously, in the same update_item as
+  anything still buffered for the book, so the final item state is applied
+  atomically and can never be overtaken by an older buffered write
+- close: stops the thread and flushes; registered with atexit so buffered
+  updates are written when the interpreter exits, including after an
+  unhandled exception
+
+Writes are serialized, so updates for a book reach DynamoDB in the order they
+were made. A flush that fails keeps its values buffered (under anything newer)
+and is retried on the next flush.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import atexit
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL_SEC = 5.0
+
+
+@dataclass
+class PendingUpdate:
+    """Buffered SET values for one ledger item."""
+    fields: Dict[str, Any] = field(default_factory=dict)
+    steps: Dict[str, Any] = field(default_factory=dict)
+    updates: int = 0
+
+    def merge(self, newer: 'PendingUpdate') -> None:
+        """Apply a newer update on top of this one."""
+        self.fields.update(newer.fields)
+        self.steps.update(newer.steps)
+        self.updates += newer.updates
+
+
+def build_update(pending: PendingUpdate) -> Dict[str, Any]:
+    """
+    Build update_item arguments for one merged SET expression.
+
+    Args:
+        pending: Buffered values for the item
+
+    Returns:
+        Dict with UpdateExpression, ExpressionAttributeNames and
+        ExpressionAttributeValues
+    """
+    fields = dict(pending.fields)
+    steps = dict(pending.steps)
+    if 'steps' in fields:
+        # A whole-map write and per-step writes would overlap in one expression
+        fields['steps'] = {**fields['steps'], **steps}
+        steps = {}
+
+    parts: List[str] = []
+    names: Dict[str, str] = {}
+    values: Dict[str, Any] = {}
+    for i, (name, value) in enumerate(fields.items()):
+        parts.append(f'#f{i} = :f{i}')
+        names[f'#f{i}'] = name
+        values[f':f{i}'] = value
+    for i, (step, data) in enumerate(steps.items()):
+        parts.append(f'steps.#s{i} = :s{i}')
+        names[f'#s{i}'] = step
+        values[f':s{i}'] = data
+
+    return {
+        'UpdateExpression': 'SET ' + ', '.join(parts),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values,
+    }
+
+
+class LedgerWriter:
+    """Buffers ledger updates per book and flushes them as merged writes."""
+
+    def __init__(self, table, flush_interval_sec: float = DEFAULT_FLUSH_INTERVAL_SEC,
+                 key_name: str = 'book_id'):
+        """
+        Initialize the writer and start its flush thread.
+
+        Args:
+            table: boto3 DynamoDB Table resource (anything with update_item)
+            flush_interval_sec: Maximum time an update stays buffered
+            key_name: Partition key attribute of the table
+        """
+        self.table = table
+        self.flush_interval_sec = flush_interval_sec
+        self.key_name = key_name
+        self.updates = 0
+        self.writes = 0
+
+        self._pending: Dict[str, PendingUpdate] = {}
+        self._lock = threading.Lock()        # guards _pending
+        self._write_lock = threading.Lock()  # serializes update_item calls
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='ledger-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def update(self, book_id: str, fields: Optional[Dict[str, Any]] = None,
+               steps: Optional[Dict[str, Any]] = None, flush: bool = False) -> None:
+        """
+        Buffer top-level attribute and per-step values for a book.
+
+        Args:
+            book_id: Ledger item key
+            fields: Top-level attributes to SET
+            steps: Step name -> step data to SET under the steps map
+            flush: Wake the flush thread now instead of waiting for the timer
+        """
+        if self._closed:
+            raise RuntimeError('LedgerWriter is closed')
+        newer = PendingUpdate(dict(fields or {}), dict(steps or {}), updates=1)
+        with self._lock:
+            self._pending.setdefault(book_id, PendingUpdate()).merge(newer)
+            self.updates += 1
+        if flush:
+            self._wake.set()
+
+    def set_step(self, book_id: str, step_name: str, step_data: Dict[str, Any],
+                 updated_at: Optional[str] = None, current_step: Optional[str] = None,
+                 flush: bool = False) -> None:
+        """
+        Buffer a per-step record, optionally with updated_at and current_step.
+
+        Args:
+            book_id: Ledger item key
+            step_name: Step name (e.g. 'toc_discovery')
+            step_data: Step data dict (status, started_at, completed_at, ...)
+            updated_at: ISO timestamp for the item's updated_at
+            current_step: Optionally update current_step
+            flush: Wake the flush thread now (use at step boundaries)
+        """
+        fields = {}
+        if updated_at:
+            fields['updated_at'] = updated_at
+        if current_step:
+            fields['current_step'] = current_step
+        self.update(book_id, fields, {step_name: step_data}, flush=flush)
+
+    def finalize(self, book_id: str, fields: Dict[str, Any]) -> None:
+        """
+        Synchronously write a book's final attributes with everything buffered.
+
+        The buffered updates and the final fields go out in one update_item,
+        so readers see either the state before it or the complete final state.
+        On failure the merged update stays buffered for a later flush and the
+        error is raised.
+
+        Args:
+            book_id: Ledger item key
+            fields: Final top-level attributes (status, songs_extracted, ...)
+        """
+        with self._write_lock:
+            with self._lock:
+                pending = self._pending.pop(book_id, PendingUpdate())
+                self.updates += 1
+            pending.merge(PendingUpdate(dict(fields), updates=1))
+            self._write(book_id, pending, raise_errors=True)
+
+    def flush(self, book_id: Optional[str] = None) -> int:
+        """
+        Synchronously write buffered updates.
+
+        Args:
+            book_id: Only this book (default: every book)
+
+        Returns:
+            Number of update_item calls that succeeded
+        """
+        written = 0
+        with self._write_lock:
+            with self._lock:
+                if book_id is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    batch = {book_id: self._pending.pop(book_id)} if book_id in self._pending else {}
+            for bid, pending in batch.items():
+                written += self._write(bid, pending, raise_errors=False)
+        return written
+
+    def pending_books(self) -> List[str]:
+        """Books with buffered updates."""
+        with self._lock:
+            return list(self._pending)
+
+    def close(self) -> None:
+        """Stop the flush thread and write everything still buffered."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=max(self.flush_interval_sec, 1.0) * 2)
+        self.flush()
+        atexit.unregister(self.close)
+        if self.updates:
+            logger.info(f"Ledger: {self.updates} updates written in {self.writes} requests")
+        with self._lock:
+            lost = len(self._pending)
+        if lost:
+            logger.error(f"Ledger: {lost} books still have unwritten updates")
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(timeout=self.flush_interval_sec)
+            self._wake.clear()
+            if self._closed:
+                break
+            self.flush()
+
+    def _write(self, book_id: str, pending: PendingUpdate, raise_errors: bool) -> int:
+        """Issue one merged update_item; caller holds _write_lock."""
+        if not pending.fields and not pending.steps:
+            return 0
+        try:
+            self.table.update_item(Key={self.key_name: book_id}, **build_update(pending))
+            self.writes += 1
+            return 1
+        except Exception as e:
+            with self._lock:
+                newer = self._pending.get(book_id)
+                if newer is not None:
+                    pending.merge(newer)
+                self._pending[book_id] = pending
+            if raise_errors:
+                raise
+            logger.warning(f"Ledger flush for {book_id} failed, will retry: {e}")
+            return 0
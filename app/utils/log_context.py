@@ -0,0 +1,68 @@
+"""
+Per-task labels on log lines.
+
+The batch runner runs several books in one process; without a label their
+interleaved log lines cannot be told apart. log_label() sets a label for the
+current thread (or asyncio task) and LogLabelFilter prefixes it to every
+record logged there, so the output reads like the old per-subprocess output:
+
+    with log_label('[3/40]'):
+        run_book(...)       # "... - v3_runner - INFO - [3/40] Running TOC Discovery..."
+
+Threads started inside the block (ThreadPoolExecutor workers) do not inherit
+the label; wrap their target with contextvars.copy_context().run if needed.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+import logging
+
+_label: ContextVar[str] = ContextVar('log_label', default='')
+
+
+def current_label() -> str:
+    """The label set for the current context ('' if none)."""
+    return _label.get()
+
+
+@contextmanager
+def log_label(label: str) -> Iterator[None]:
+    """
+    Prefix log records emitted in this context with a label.
+
+    Args:
+        label: Text to prefix, e.g. '[3/40]'
+    """
+    token = _label.set(label)
+    try:
+        yield
+    finally:
+        _label.reset(token)
+
+
+class LogLabelFilter(logging.Filter):
+    """Prefix the current context's label to each record's message."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        label = _label.get()
+        # A record passes every handler's filter; prefix it only once
+        if label and not getattr(record, 'log_label', None):
+            record.log_label = label
+            if record.args:
+                record.msg = f"{label.replace('%', '%%')} {record.msg}"
+            else:
+                record.msg = f"{label} {record.msg}"
+        return True
+
+
+def install_log_labels(logger: logging.Logger = None) -> None:
+    """
+    Add LogLabelFilter to a logger's handlers (default: the root logger's).
+
+    Idempotent; call after logging is configured.
+    """
+    logger = logger or logging.getLogger()
+    for handler in logger.handlers:
+        if not any(isinstance(f, LogLabelFilter) for f in handler.filters):
+            handler.addFilter(LogLabelFilter())
@@ -0,0 +1,190 @@
+"""
+Compact page_analysis.json format.
+
+The legacy artifact stores one pretty-printed object per page, each carrying
+the model's full raw_response. The compact format keeps every other field but
+stores the per-page data as columns:
+
+    {
+      "format": "page_table/1",
+      ... header fields and songs, unchanged ...
+      "page_table": {
+        "pdf_page": [1, 2, ...],
+        "printed_page": [null, 1, ...],
+        "content_type": [0, 1, ...],       # index into content_types
+        "detected_title": [null, 0, ...],  # index into titles
+        "has_music_notation": [0, 1, ...],
+        "confidence": [0.9, 0.95, ...]
+      },
+      "content_types": ["cover", "song_start", ...],
+      "titles": ["Piano Man", ...],
+      "raw_responses": "page_analysis.raw.json.gz"
+    }
+
+Raw responses go to a gzipped sidecar next to the artifact, read only when
+asked for (e.g. when re-parsing Phase 1 results for a re-plan).
+
+load_page_analysis() reads either format and returns the legacy shape, with
+a 'pages' list built from only the columns the caller asks for.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import gzip
+import json
+
+PAGE_TABLE_FORMAT = 'page_table/1'
+RAW_SIDECAR_NAME = 'page_analysis.raw.json.gz'
+
+# Columns stored as indexes into a vocabulary list
+DICTIONARY_COLUMNS = {'content_type': 'content_types', 'detected_title': 'titles'}
+
+
+def is_compact(data: Dict[str, Any]) -> bool:
+    """Whether a loaded page_analysis dict is in the compact format."""
+    return data.get('format') == PAGE_TABLE_FORMAT
+
+
+def compact_page_analysis(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """
+    Convert a legacy page_analysis dict to the compact format.
+
+    Args:
+        data: page_analysis dict with a 'pages' list (e.g. from to_dict())
+
+    Returns:
+        (compact dict, gzipped raw-response sidecar or None if no page has one)
+    """
+    if is_compact(data):
+        return data, None
+
+    pages = data.get('pages', [])
+    columns: Dict[str, List[Any]] = {}
+    for p in pages:
+        for name in p:
+            if name != 'raw_response' and name not in columns:
+                columns[name] = []
+
+    vocabularies: Dict[str, Dict[Any, int]] = {name: {} for name in DICTIONARY_COLUMNS}
+    raw_responses = {}
+    for p in pages:
+        for name, values in columns.items():
+            value = p.get(name)
+            if name in vocabularies and value is not None:
+                value = vocabularies[name].setdefault(value, len(vocabularies[name]))
+            elif name == 'has_music_notation':
+                value = int(bool(value))
+            values.append(value)
+        if p.get('raw_response'):
+            raw_responses[p['pdf_page']] = p['raw_response']
+
+    compact = {k: v for k, v in data.items() if k != 'pages'}
+    compact['format'] = PAGE_TABLE_FORMAT
+    compact['page_table'] = columns
+    for name, list_name in DICTIONARY_COLUMNS.items():
+        compact[list_name] = list(vocabularies[name])
+
+    sidecar = None
+    if raw_responses:
+        compact['raw_responses'] = RAW_SIDECAR_NAME
+        sidecar = gzip.compress(json.dumps(raw_responses, separators=(',', ':')).encode('utf-8'))
+    return compact, sidecar
+
+
+def dumps_compact(data: Dict[str, Any]) -> bytes:
+    """Serialize a compact page_analysis dict (no indentation)."""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def expand_pages(data: Dict[str, Any], columns: Optional[Iterable[str]] = None,
+                 raw_responses: Optional[Dict[int, str]] = None) -> List[Dict[str, Any]]:
+    """
+    Rebuild the legacy 'pages' list from either format.
+
+    Args:
+        data: Loaded page_analysis dict
+        columns: Fields to include (pdf_page is always included; None = all)
+        raw_responses: pdf_page -> raw_response to merge back in
+
+    Returns:
+        List of page dicts
+    """
+    if not is_compact(data):
+        pages = data.get('pages', [])
+        if columns is None:
+            return pages
+        wanted = set(columns) | {'pdf_page'}
+        return [{k: v for k, v in p.items() if k in wanted} for p in pages]
+
+    table = data['page_table']
+    names = list(table) if columns is None else ['pdf_page'] + [c for c in columns if c in table and c != 'pdf_page']
+    decoded = []
+    for name in names:
+        values = table[name]
+        if name in DICTIONARY_COLUMNS:
+            vocabulary = data[DICTIONARY_COLUMNS[name]]
+            values = [None if v is None else vocabulary[v] for v in values]
+        elif name == 'has_music_notation':
+            values = [bool(v) for v in values]
+        decoded.append(values)
+
+    pages = [dict(zip(names, row)) for row in zip(*decoded)]
+    if raw_responses is not None:
+        for p in pages:
+            p['raw_response'] = raw_responses.get(p['pdf_page'])
+    return pages
+
+
+def read_raw_responses(sidecar: Union[str, Path, bytes]) -> Dict[int, str]:
+    """Read a raw-response sidecar (path or gzipped bytes) as pdf_page -> raw_response."""
+    data = sidecar if isinstance(sidecar, bytes) else Path(sidecar).read_bytes()
+    return {int(k): v for k, v in json.loads(gzip.decompress(data)).items()}
+
+
+def load_page_analysis(path: Union[str, Path], columns: Optional[Iterable[str]] = None,
+                       with_raw: bool = False) -> Dict[str, Any]:
+    """
+    Read page_analysis.json in either format, returning the legacy shape.
+
+    Args:
+        path: page_analysis.json path
+        columns: Page fields to materialize (None = all); scans that only need
+            e.g. content_type and detected_title skip building the rest
+        with_raw: Merge raw responses back into the pages (reads the sidecar)
+
+    Returns:
+        page_analysis dict with a 'pages' list
+    """
+    path = Path(path)
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if not is_compact(data):
+        if columns is not None:
+            data['pages'] = expand_pages(data, columns)
+        return data
+
+    raw = None
+    if with_raw:
+        # Only a sidecar this file names belongs to it
+        sidecar = path.parent / data['raw_responses'] if data.get('raw_responses') else None
+        raw = read_raw_responses(sidecar) if sidecar and sidecar.exists() else {}
+    result = {k: v for k, v in data.items() if k not in ('page_table', 'content_types', 'titles')}
+    result['pages'] = expand_pages(data, columns, raw)
+    return result
+
+
+def write_page_analysis(path: Union[str, Path], data: Dict[str, Any]) -> None:
+    """
+    Write page_analysis.json in the compact format, plus its raw-response sidecar.
+
+    A sidecar left by an earlier run is deleted when this one has no raw
+    responses, so it is never merged into the new pages.
+    """
+    path = Path(path)
+    compact, sidecar = compact_page_analysis(data)
+    path.write_bytes(dumps_compact(compact))
+    sidecar_path = path.parent / RAW_SIDECAR_NAME
+    if sidecar is not None:
+        sidecar_path.write_bytes(sidecar)
+    elif 'raw_responses' not in compact and sidecar_path.exists():
+        sidecar_path.unlink()
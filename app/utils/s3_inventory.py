@@ -0,0 +1,304 @@
+"""
+Bucket inventory snapshots - answer "does this object exist / is it current"
+without a request per object.
+
+An Inventory maps keys to size, ETag and modification time. It is built from
+one paginated listing of a bucket prefix (or from an S3 Inventory report, or
+from a local directory tree laid out like the bucket), kept in memory for
+O(1) lookups, and can be saved to disk and reloaded by later runs.
+
+Snapshots are refreshed incrementally: refresh_prefix() re-lists only one
+book's prefix, and record()/remove() keep the index in step with the caller's
+own writes.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+from urllib.parse import unquote_plus
+import csv
+import gzip
+import io
+import json
+import os
+import time
+import logging
+
+from app.utils.atomic_file import write_json_gz
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InventoryEntry:
+    """One object in a snapshot."""
+    size: int
+    etag: str = ''
+    last_modified: float = 0.0  # epoch seconds
+
+
+def _epoch(value: Any) -> float:
+    """LastModified from a listing (datetime) or a report (ISO string) as epoch seconds."""
+    if value is None or value == '':
+        return 0.0
+    if hasattr(value, 'timestamp'):
+        return value.timestamp()
+    from datetime import datetime
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+class Inventory:
+    """In-memory key index with existence and freshness queries."""
+
+    def __init__(self, bucket: str = '', prefix: str = '',
+                 entries: Optional[Dict[str, InventoryEntry]] = None, listed_at: float = 0.0):
+        """
+        Args:
+            bucket: Bucket name ('' for a local directory snapshot)
+            prefix: Key prefix the snapshot covers
+            entries: Initial key -> InventoryEntry index
+            listed_at: When the snapshot was taken (epoch seconds)
+        """
+        self.bucket = bucket
+        self.prefix = prefix
+        self.entries: Dict[str, InventoryEntry] = entries if entries is not None else {}
+        self.listed_at = listed_at
+        self._sorted_keys: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def exists(self, key: str) -> bool:
+        """Whether key is in the snapshot."""
+        return key in self.entries
+
+    def get(self, key: str) -> Optional[InventoryEntry]:
+        """Entry for key, or None."""
+        return self.entries.get(key)
+
+    def all_exist(self, keys: Iterable[str]) -> bool:
+        """Whether every key is in the snapshot."""
+        return all(key in self.entries for key in keys)
+
+    def is_newer(self, key: str, than_key: str) -> bool:
+        """Whether key exists and was modified no earlier than than_key (False if either is missing)."""
+        entry, other = self.entries.get(key), self.entries.get(than_key)
+        return bool(entry and other and entry.last_modified >= other.last_modified)
+
+    def is_fresh(self, key: str, since: float) -> bool:
+        """Whether key exists and was modified at or after since (epoch seconds)."""
+        entry = self.entries.get(key)
+        return bool(entry and entry.last_modified >= since)
+
+    def matches(self, key: str, size: int, etag: Optional[str] = None) -> bool:
+        """Whether key exists with this size (and ETag, if given)."""
+        entry = self.entries.get(key)
+        if not entry or entry.size != size:
+            return False
+        return etag is None or entry.etag == etag
+
+    def keys_under(self, prefix: str) -> List[str]:
+        """Keys starting with prefix, sorted."""
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self.entries)
+        keys = self._sorted_keys
+        start = bisect_left(keys, prefix)
+        end = start
+        while end < len(keys) and keys[end].startswith(prefix):
+            end += 1
+        return keys[start:end]
+
+    def record(self, key: str, size: int, etag: str = '', last_modified: Optional[float] = None) -> None:
+        """Add or update a key after writing it (keeps the snapshot current)."""
+        if key not in self.entries:
+            self._sorted_keys = None
+        self.entries[key] = InventoryEntry(size, etag, time.time() if last_modified is None else last_modified)
+
+    def remove(self, key: str) -> None:
+        """Drop a key after deleting it."""
+        if self.entries.pop(key, None) is not None:
+            self._sorted_keys = None
+
+    def replace_prefix(self, prefix: str, entries: Dict[str, InventoryEntry]) -> None:
+        """Replace every entry under prefix with a fresh set."""
+        for key in self.keys_under(prefix):
+            del self.entries[key]
+        self.entries.update(entries)
+        self._sorted_keys = None
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the snapshot as gzipped JSON (atomic; see atomic_file)."""
+        path = Path(path)
+        data = {
+            'bucket': self.bucket,
+            'prefix': self.prefix,
+            'listed_at': self.listed_at,
+            'entries': {k: [e.size, e.etag, e.last_modified] for k, e in self.entries.items()},
+        }
+        write_json_gz(path, data)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'Inventory':
+        """Read a snapshot written by save()."""
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        entries = {k: InventoryEntry(*v) for k, v in data['entries'].items()}
+        return cls(data['bucket'], data['prefix'], entries, data['listed_at'])
+
+
+def list_prefix(s3_client, bucket: str, prefix: str) -> Dict[str, InventoryEntry]:
+    """One paginated listing of a prefix."""
+    entries = {}
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            entries[obj['Key']] = InventoryEntry(
+                size=obj.get('Size', 0),
+                etag=obj.get('ETag', '').strip('"'),
+                last_modified=_epoch(obj.get('LastModified')),
+            )
+    return entries
+
+
+class S3Inventory(Inventory):
+    """Snapshot of one bucket prefix, optionally cached on disk between runs."""
+
+    def __init__(self, bucket: str, prefix: str = '', s3_client=None,
+                 cache_path: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            bucket: Bucket to index
+            prefix: Key prefix to index ('' for the whole bucket)
+            s3_client: S3 client (default: shared pooled client)
+            cache_path: Snapshot file to reuse and update (None = memory only)
+        """
+        super().__init__(bucket, prefix)
+        if s3_client is None:
+            from app.utils.s3_transfer import get_s3_client
+            s3_client = get_s3_client()
+        self.s3 = s3_client
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.listings = 0
+
+    def ensure(self, max_age_sec: Optional[float] = None) -> 'S3Inventory':
+        """
+        Make the snapshot available: reuse the on-disk copy if it is recent
+        enough, otherwise list the bucket.
+
+        Args:
+            max_age_sec: Oldest acceptable snapshot (None = any age)
+
+        Returns:
+            self
+        """
+        if not self.entries and self.cache_path and self.cache_path.exists():
+            try:
+                cached = Inventory.load(self.cache_path)
+                if cached.bucket == self.bucket and cached.prefix == self.prefix:
+                    self.entries, self.listed_at = cached.entries, cached.listed_at
+                    self._sorted_keys = None
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable inventory cache {self.cache_path}: {e}")
+
+        stale = max_age_sec is not None and time.time() - self.listed_at > max_age_sec
+        if not self.listed_at or stale:
+            self.refresh()
+        return self
+
+    def refresh(self) -> int:
+        """Re-list the whole prefix; returns the object count."""
+        started = time.time()
+        self.entries = list_prefix(self.s3, self.bucket, self.prefix)
+        self._sorted_keys = None
+        self.listed_at = started
+        self.listings += 1
+        logger.info(f"Inventory s3://{self.bucket}/{self.prefix}: {len(self.entries)} objects "
+                    f"({time.time() - started:.1f}s)")
+        self.persist()
+        return len(self.entries)
+
+    def refresh_prefix(self, prefix: str) -> int:
+        """Re-list one sub-prefix (e.g. a single book) and merge it in; returns its object count."""
+        if not prefix.startswith(self.prefix):
+            raise ValueError(f"{prefix!r} is outside the inventory prefix {self.prefix!r}")
+        entries = list_prefix(self.s3, self.bucket, prefix)
+        self.replace_prefix(prefix, entries)
+        self.listings += 1
+        self.persist()
+        return len(entries)
+
+    def persist(self) -> None:
+        """Write the snapshot to cache_path, if one is set."""
+        if self.cache_path:
+            self.save(self.cache_path)
+
+    def load_report(self, manifest_bucket: str, manifest_key: str) -> int:
+        """
+        Replace the snapshot with an S3 Inventory report (CSV format).
+
+        Args:
+            manifest_bucket: Bucket holding the report
+            manifest_key: Key of the report's manifest.json
+
+        Returns:
+            Object count
+        """
+        manifest = json.loads(self.s3.get_object(Bucket=manifest_bucket, Key=manifest_key)['Body'].read())
+        if manifest.get('fileFormat', 'CSV').upper() != 'CSV':
+            raise ValueError(f"Only CSV inventory reports are supported, got {manifest['fileFormat']}")
+        columns = [c.strip() for c in manifest['fileSchema'].split(',')]
+        key_col, size_col = columns.index('Key'), columns.index('Size')
+        etag_col = columns.index('ETag') if 'ETag' in columns else None
+        mtime_col = columns.index('LastModifiedDate') if 'LastModifiedDate' in columns else None
+
+        entries = {}
+        for report_file in manifest['files']:
+            body = self.s3.get_object(Bucket=manifest_bucket, Key=report_file['key'])['Body'].read()
+            for row in csv.reader(io.StringIO(gzip.decompress(body).decode('utf-8'))):
+                key = unquote_plus(row[key_col])
+                if not key.startswith(self.prefix):
+                    continue
+                entries[key] = InventoryEntry(
+                    size=int(row[size_col] or 0),
+                    etag=row[etag_col] if etag_col is not None else '',
+                    last_modified=_epoch(row[mtime_col]) if mtime_col is not None else 0.0,
+                )
+
+        self.entries = entries
+        self._sorted_keys = None
+        self.listed_at = float(manifest.get('creationTimestamp', 0)) / 1000 or time.time()
+        self.persist()
+        return len(entries)
+
+
+def scan_local(root: Union[str, Path], key_prefix: str = '') -> Inventory:
+    """
+    Snapshot a local directory tree laid out like a bucket.
+
+    Args:
+        root: Directory to walk (e.g. SheetMusic_Artifacts)
+        key_prefix: Prefix for keys, so local and S3 snapshots share key names (e.g. 'v3/')
+
+    Returns:
+        Inventory keyed by key_prefix + relative path with '/' separators
+    """
+    root = Path(root)
+    entries = {}
+    started = time.time()
+
+    def walk(directory: str, base: str) -> None:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    walk(entry.path, f"{base}{entry.name}/")
+                elif entry.is_file():
+                    stat = entry.stat()
+                    entries[base + entry.name] = InventoryEntry(stat.st_size, '', stat.st_mtime)
+
+    if root.exists():
+        walk(str(root), key_prefix)
+    return Inventory('', key_prefix, entries, started)
@@ -0,0 +1,319 @@
+"""
+Delta sync between an S3 prefix and a local mirror directory.
+
+Both sides are snapshotted in one pass (one paginated listing, one directory
+walk) and compared against a persisted sync manifest that records, for every
+file, the size, ETag and local mtime it had when the two sides last agreed.
+With the manifest, an unchanged local file is recognised from its size and
+mtime alone; without it (first run), the local file is hashed and compared to
+the remote ETag, so identical copies are never re-transferred.
+
+Only files that differ are transferred (concurrently, via S3TransferQueue),
+and deletions of previously-synced files are propagated. The same manifest
+covers the whole corpus, so a single book or a whole bucket can be synced:
+
+    sync = DeltaSync('jsmith-artifacts', ARTIFACTS_DIR, prefix='v3/',
+                     manifest_path=CACHE_DIR / 'jsmith-artifacts.json.gz')
+    sync.run('down', sub_prefix='Artist/Book/')   # one book
+    sync.run('down')                               # whole corpus
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+import hashlib
+import os
+import time
+import logging
+
+from app.utils.atomic_file import path_lock
+from app.utils.s3_inventory import Inventory, InventoryEntry, list_prefix, scan_local
+from app.utils.s3_transfer import (
+    MULTIPART_CHUNKSIZE_BYTES, MULTIPART_THRESHOLD_BYTES, S3TransferQueue, get_s3_client,
+)
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ('down', 'up', 'both')
+
+
+def local_etag(path: Union[str, Path], multipart_threshold: int = MULTIPART_THRESHOLD_BYTES,
+               chunk_size: int = MULTIPART_CHUNKSIZE_BYTES) -> str:
+    """
+    ETag S3 would report for this file when uploaded with our transfer settings.
+
+    Single-part uploads get the MD5 of the content; multipart uploads get the
+    MD5 of the concatenated part MD5s plus "-<part count>".
+    """
+    part_md5s = []
+    whole = hashlib.md5()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            whole.update(chunk)
+            part_md5s.append(hashlib.md5(chunk).digest())
+
+    if os.path.getsize(path) < multipart_threshold:
+        return whole.hexdigest()
+    return f"{hashlib.md5(b''.join(part_md5s)).hexdigest()}-{len(part_md5s)}"
+
+
+@dataclass
+class SyncAction:
+    """One planned change."""
+    op: str  # 'download', 'upload', 'delete_local' or 'delete_remote'
+    rel: str  # path relative to the mirror root ('/' separators)
+    size: int = 0
+    reason: str = ''
+
+
+@dataclass
+class SyncResult:
+    """Outcome of a sync run."""
+    actions: List[SyncAction] = field(default_factory=list)
+    unchanged: int = 0
+    conflicts: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    bytes_transferred: int = 0
+
+    def count(self, op: str) -> int:
+        """Successful actions of one kind."""
+        failed = set(self.failed)
+        return sum(1 for a in self.actions if a.op == op and a.rel not in failed)
+
+
+class DeltaSync:
+    """Bidirectional delta sync of one bucket prefix with one local directory."""
+
+    def __init__(self, bucket: str, local_root: Union[str, Path], prefix: str = '',
+                 s3_client=None, manifest_path: Optional[Union[str, Path]] = None,
+                 include: Optional[Callable[[str], bool]] = None, max_workers: Optional[int] = None):
+        """
+        Args:
+            bucket: S3 bucket
+            local_root: Local directory mirroring the prefix
+            prefix: Key prefix that maps to local_root (e.g. 'v3/')
+            s3_client: S3 client (default: shared pooled client)
+            manifest_path: Where the sync manifest is persisted (None = memory only;
+                every run then hashes local files to compare them)
+            include: Predicate on relative paths; other files are ignored on both sides
+            max_workers: Concurrent transfers (default: S3TransferQueue's)
+        """
+        self.bucket = bucket
+        self.local_root = Path(local_root)
+        self.prefix = prefix
+        self.s3 = s3_client or get_s3_client()
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        self.include = include
+        self.max_workers = max_workers
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Inventory:
+        if self.manifest_path and self.manifest_path.exists():
+            try:
+                manifest = Inventory.load(self.manifest_path)
+                if manifest.bucket == self.bucket and manifest.prefix == self.prefix:
+                    return manifest
+                logger.warning(f"Sync manifest {self.manifest_path} is for another bucket/prefix, ignoring")
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable sync manifest {self.manifest_path}: {e}")
+        return Inventory(self.bucket, self.prefix)
+
+    def snapshot(self, sub_prefix: str = ''):
+        """List the remote side and walk the local side; returns (remote, local) keyed by relative path."""
+        remote = {}
+        for key, entry in list_prefix(self.s3, self.bucket, self.prefix + sub_prefix).items():
+            remote[key[len(self.prefix):]] = entry
+        local = scan_local(self.local_root / sub_prefix, key_prefix=sub_prefix).entries
+        if self.include:
+            remote = {rel: e for rel, e in remote.items() if self.include(rel)}
+            local = {rel: e for rel, e in local.items() if self.include(rel)}
+        return remote, local
+
+    def plan(self, direction: str = 'down', sub_prefix: str = '', delete: bool = True,
+             prune: bool = False, remote: Optional[Dict[str, InventoryEntry]] = None,
+             local: Optional[Dict[str, InventoryEntry]] = None) -> SyncResult:
+        """
+        Work out what needs to move, without changing anything.
+
+        Args:
+            direction: 'down' (S3 wins), 'up' (local wins) or 'both'
+                (changes flow either way; if both sides changed, the newer wins)
+            sub_prefix: Restrict to part of the mirror (e.g. 'Artist/Book/')
+            delete: Propagate deletions of files that were previously synced
+            prune: Also delete files on the destination side that were never synced
+                ('down'/'up' only)
+            remote, local: Snapshots from snapshot() (taken if omitted)
+
+        Returns:
+            SyncResult with the planned actions (nothing executed)
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown sync direction {direction!r}, expected one of {DIRECTIONS}")
+        if remote is None or local is None:
+            remote, local = self.snapshot(sub_prefix)
+
+        result = SyncResult()
+        tracked = self.manifest.keys_under(sub_prefix)
+        for rel in sorted(set(remote) | set(local) | set(tracked)):
+            if self.include and not self.include(rel):
+                continue
+            action = self._decide(rel, remote.get(rel), local.get(rel), self.manifest.get(rel),
+                                  direction, delete, prune, result)
+            if action:
+                result.actions.append(action)
+        return result
+
+    def _decide(self, rel: str, r: Optional[InventoryEntry], l: Optional[InventoryEntry],
+                rec: Optional[InventoryEntry], direction: str, delete: bool, prune: bool,
+                result: SyncResult) -> Optional[SyncAction]:
+        local_same = bool(rec and l and l.size == rec.size and l.last_modified == rec.last_modified)
+        remote_same = bool(rec and r and r.etag == rec.etag)
+
+        if r and l:
+            if local_same and remote_same:
+                result.unchanged += 1
+                return None
+            etag = rec.etag if local_same else (self._hash(rel) if l.size == r.size else None)
+            if etag == r.etag:
+                # Identical content; just remember it so it is not hashed again
+                self.manifest.record(rel, l.size, r.etag, l.last_modified)
+                result.unchanged += 1
+                return None
+            if direction == 'down':
+                return SyncAction('download', rel, r.size, 'changed')
+            if direction == 'up':
+                return SyncAction('upload', rel, l.size, 'changed')
+            if remote_same:
+                return SyncAction('upload', rel, l.size, 'local change')
+            if local_same:
+                return SyncAction('download', rel, r.size, 'remote change')
+            result.conflicts.append(rel)
+            if l.last_modified > r.last_modified:
+                return SyncAction('upload', rel, l.size, 'conflict, local newer')
+            return SyncAction('download', rel, r.size, 'conflict, remote newer')
+
+        if r:
+            if rec is None:
+                if direction == 'up':
+                    return SyncAction('delete_remote', rel, r.size, 'not in local') if prune else None
+                return SyncAction('download', rel, r.size, 'new')
+            # Previously synced, now gone locally
+            if direction == 'down' or not delete or (direction == 'both' and not remote_same):
+                return SyncAction('download', rel, r.size, 'missing locally')
+            return SyncAction('delete_remote', rel, r.size, 'deleted locally')
+
+        if l:
+            if rec is None:
+                if direction == 'down':
+                    return SyncAction('delete_local', rel, l.size, 'not in S3') if prune else None
+                return SyncAction('upload', rel, l.size, 'new')
+            # Previously synced, now gone from S3
+            if direction == 'up' or not delete or (direction == 'both' and not local_same):
+                return SyncAction('upload', rel, l.size, 'missing in S3')
+            return SyncAction('delete_local', rel, l.size, 'deleted in S3')
+
+        # Gone on both sides
+        self.manifest.remove(rel)
+        return None
+
+    def _hash(self, rel: str) -> str:
+        return local_etag(self.local_root / rel)
+
+    def run(self, direction: str = 'down', sub_prefix: str = '', delete: bool = True,
+            prune: bool = False, dry_run: bool = False) -> SyncResult:
+        """
+        Plan and apply a sync.
+
+        Args:
+            direction, sub_prefix, delete, prune: See plan()
+            dry_run: Only plan
+
+        Returns:
+            SyncResult (failed lists relative paths whose transfer or delete failed)
+        """
+        started = time.time()
+        remote, local = self.snapshot(sub_prefix)
+        result = self.plan(direction, sub_prefix, delete, prune, remote, local)
+        if dry_run:
+            return result
+
+        uploads = {}
+        queue = S3TransferQueue(self.s3, **({'max_workers': self.max_workers} if self.max_workers else {}))
+        for action in result.actions:
+            local_path = self.local_root / action.rel
+            key = self.prefix + action.rel
+            if action.op == 'download':
+                queue.download_file(self.bucket, key, str(local_path))
+            elif action.op == 'upload':
+                uploads[key] = local_etag(local_path)
+                queue.upload_file(str(local_path), self.bucket, key)
+        queue.close()
+
+        for transfer in queue.results:
+            rel = transfer.key[len(self.prefix):]
+            if not transfer.ok:
+                result.failed.append(rel)
+                continue
+            result.bytes_transferred += transfer.size
+            stat = (self.local_root / rel).stat()
+            etag = uploads[transfer.key] if transfer.kind == 'upload' else remote[rel].etag
+            self.manifest.record(rel, stat.st_size, etag, stat.st_mtime)
+
+        self._delete_local([a.rel for a in result.actions if a.op == 'delete_local'], result)
+        self._delete_remote([a.rel for a in result.actions if a.op == 'delete_remote'], result)
+
+        self.persist(sub_prefix)
+        logger.info(
+            f"Synced s3://{self.bucket}/{self.prefix}{sub_prefix} {direction}: "
+            f"{result.count('download')} down, {result.count('upload')} up, "
+            f"{result.count('delete_local') + result.count('delete_remote')} deleted, "
+            f"{result.unchanged} unchanged, {len(result.failed)} failed, "
+            f"{result.bytes_transferred / 1024:.0f} KB in {time.time() - started:.1f}s"
+        )
+        return result
+
+    def _delete_local(self, rels: List[str], result: SyncResult) -> None:
+        for rel in rels:
+            try:
+                (self.local_root / rel).unlink()
+                self.manifest.remove(rel)
+            except OSError as e:
+                logger.error(f"Could not delete {self.local_root / rel}: {e}")
+                result.failed.append(rel)
+
+    def _delete_remote(self, rels: List[str], result: SyncResult) -> None:
+        for i in range(0, len(rels), 1000):
+            batch = rels[i:i + 1000]
+            try:
+                resp = self.s3.delete_objects(Bucket=self.bucket, Delete={
+                    'Objects': [{'Key': self.prefix + rel} for rel in batch]})
+                errors = {e['Key'][len(self.prefix):] for e in resp.get('Errors', [])} if resp else set()
+            except Exception as e:
+                logger.error(f"S3 delete failed in s3://{self.bucket}/{self.prefix}: {e}")
+                errors = set(batch)
+            for rel in batch:
+                if rel in errors:
+                    result.failed.append(rel)
+                else:
+                    self.manifest.remove(rel)
+
+    def persist(self, sub_prefix: str = '') -> None:
+        """
+        Write the manifest, merging in entries other threads and processes
+        saved for other parts of the mirror since it was loaded. The
+        load-merge-save runs under path_lock, so concurrent persists of
+        different books all land.
+        """
+        if not self.manifest_path:
+            return
+        with path_lock(self.manifest_path):
+            if sub_prefix and self.manifest_path.exists():
+                on_disk = self._load_manifest()
+                on_disk.replace_prefix(sub_prefix, {k: self.manifest.entries[k]
+                                                    for k in self.manifest.keys_under(sub_prefix)})
+                self.manifest = on_disk
+            self.manifest.listed_at = time.time()
+            self.manifest.save(self.manifest_path)
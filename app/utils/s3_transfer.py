@@ -0,0 +1,203 @@
+"""
+S3 transfer layer - pooled clients, multipart settings and concurrent transfers.
+
+Every pipeline component that moves objects goes through here:
+
+- create_s3_client / get_s3_client: S3 clients with a connection pool sized
+  for concurrent transfers and standard-mode retries
+- TRANSFER_CONFIG: multipart thresholds and per-file concurrency for
+  upload_file / download_file
+- S3TransferQueue: runs many uploads/downloads at once on a thread pool, with
+  a bound on queued transfers (backpressure) so producers such as the PDF
+  splitter cannot run arbitrarily far ahead of the network
+
+Publishing a book's song PDFs is then one parallel wave instead of one round
+trip per song.
+"""
+
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, List, Optional
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Connections per client; must cover queue workers x per-file multipart threads
+DEFAULT_MAX_POOL_CONNECTIONS = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', '64'))
+# Concurrent transfers per queue
+DEFAULT_TRANSFER_WORKERS = int(os.environ.get('S3_TRANSFER_WORKERS', '16'))
+
+MULTIPART_THRESHOLD_BYTES = 16 * 1024 * 1024
+MULTIPART_CHUNKSIZE_BYTES = 16 * 1024 * 1024
+MULTIPART_CONCURRENCY = 4
+
+
+def create_s3_client(region_name: Optional[str] = None,
+                     max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS):
+    """
+    Create an S3 client with a pool sized for concurrent transfers.
+
+    Args:
+        region_name: AWS region (default: from the environment)
+        max_pool_connections: HTTP connection pool size
+
+    Returns:
+        boto3 S3 client
+    """
+    import boto3
+    from botocore.config import Config
+
+    config = Config(max_pool_connections=max_pool_connections,
+                    retries={'mode': 'standard', 'max_attempts': 5})
+    return boto3.client('s3', region_name=region_name, config=config)
+
+
+def make_transfer_config(multipart_threshold: int = MULTIPART_THRESHOLD_BYTES,
+                         multipart_chunksize: int = MULTIPART_CHUNKSIZE_BYTES,
+                         max_concurrency: int = MULTIPART_CONCURRENCY):
+    """TransferConfig for upload_file / download_file (multipart above the threshold)."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(multipart_threshold=multipart_threshold,
+                          multipart_chunksize=multipart_chunksize,
+                          max_concurrency=max_concurrency,
+                          use_threads=True)
+
+
+_shared_client = None
+_shared_transfer_config = None
+_shared_lock = threading.Lock()
+
+
+def get_s3_client():
+    """Return the process-wide shared S3 client (created on first use)."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = create_s3_client()
+        return _shared_client
+
+
+def get_transfer_config():
+    """Return the process-wide TransferConfig."""
+    global _shared_transfer_config
+    with _shared_lock:
+        if _shared_transfer_config is None:
+            _shared_transfer_config = make_transfer_config()
+        return _shared_transfer_config
+
+
+@dataclass
+class TransferResult:
+    """Outcome of one queued transfer."""
+    kind: str  # 'upload', 'put' or 'download'
+    bucket: str
+    key: str
+    local_path: Optional[str] = None
+    size: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class S3TransferQueue:
+    """
+    Concurrent S3 uploads and downloads with backpressure.
+
+    submit-style methods return immediately unless max_pending transfers are
+    already queued or running, in which case they block until one finishes.
+    wait() blocks until everything submitted so far is done and returns the
+    results. Failed transfers are reported, not raised.
+
+    Usage:
+        with S3TransferQueue() as queue:
+            for path, key in files:
+                queue.upload_file(path, bucket, key)
+        failed = [r for r in queue.results if not r.ok]
+    """
+
+    def __init__(self, s3_client=None, max_workers: int = DEFAULT_TRANSFER_WORKERS,
+                 max_pending: Optional[int] = None, transfer_config=None):
+        """
+        Args:
+            s3_client: S3 client (default: the shared pooled client)
+            max_workers: Transfers running at once
+            max_pending: Transfers queued or running before submit blocks
+                (default: 4 x max_workers)
+            transfer_config: TransferConfig for file transfers (default: shared one)
+        """
+        self.s3 = s3_client or get_s3_client()
+        self.transfer_config = transfer_config or get_transfer_config()
+        self.max_workers = max(1, max_workers)
+        self._slots = threading.BoundedSemaphore(max_pending or self.max_workers * 4)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='s3-transfer')
+        self._futures = []
+        self._lock = threading.Lock()
+        self.results: List[TransferResult] = []
+
+    def upload_file(self, local_path: str, bucket: str, key: str) -> None:
+        """Queue a file upload (multipart above the threshold)."""
+        result = TransferResult('upload', bucket, key, local_path=str(local_path))
+
+        def run():
+            self.s3.upload_file(str(local_path), bucket, key, Config=self.transfer_config)
+            result.size = os.path.getsize(local_path)
+
+        self._submit(run, result)
+
+    def put_bytes(self, data: bytes, bucket: str, key: str) -> None:
+        """Queue a single-request upload of in-memory data."""
+        result = TransferResult('put', bucket, key, size=len(data))
+        self._submit(lambda: self.s3.put_object(Bucket=bucket, Key=key, Body=data), result)
+
+    def download_file(self, bucket: str, key: str, local_path: str) -> None:
+        """Queue a download (parent directories are created)."""
+        result = TransferResult('download', bucket, key, local_path=str(local_path))
+
+        def run():
+            Path(local_path).parent.mkdir(parents=True, exist_ok=True)
+            self.s3.download_file(bucket, key, str(local_path), Config=self.transfer_config)
+            result.size = os.path.getsize(local_path)
+
+        self._submit(run, result)
+
+    def wait(self) -> List[TransferResult]:
+        """Wait for all submitted transfers; returns results in submission order."""
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            future.result()
+        return list(self.results)
+
+    def close(self) -> None:
+        """Wait for outstanding transfers and stop the worker threads."""
+        self.wait()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'S3TransferQueue':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _submit(self, fn, result: TransferResult) -> None:
+        self._slots.acquire()  # backpressure: blocks while max_pending are in flight
+
+        def run():
+            try:
+                fn()
+            except Exception as e:
+                result.error = str(e)
+                logger.error(f"S3 {result.kind} failed for s3://{result.bucket}/{result.key}: {e}")
+            finally:
+                self._slots.release()
+
+        with self._lock:
+            self.results.append(result)
+            self._futures.append(self._executor.submit(run))
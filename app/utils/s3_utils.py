@@ -6,6 +6,8 @@ This module provides functions for:
 - Pattern matching for PDF discovery
 - S3 pagination handling
 - Local mode support for development
+
+Transfers use the shared pooled client and multipart settings from s3_transfer.
 """
 
 import os
@@ -13,10 +15,11 @@ import re
 from pathlib import Path
 from typing import List, Optional
 from dataclasses import dataclass
-import boto3
 from botocore.exceptions import ClientError
 import logging
 
+from app.utils.s3_transfer import get_s3_client, get_transfer_config
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,7 +49,7 @@ class S3Utils:
         self.local_base_path = local_base_path or './test_data/input/'
         
         if not local_mode:
-            self.s3_client = boto3.client('s3')
+            self.s3_client = get_s3_client()
         else:
             logger.info(f"S3Utils initialized in local mode with base path: {self.local_base_path}")
     
@@ -171,10 +174,24 @@ class S3Utils:
             dest_path = Path(local_path)
             dest_path.parent.mkdir(parents=True, exist_ok=True)
             
-            self.s3_client.download_file(bucket, key, str(dest_path))
+            self.s3_client.download_file(bucket, key, str(dest_path), Config=get_transfer_config())
             logger.info(f"Downloaded s3://{bucket}/{key} to {dest_path}")
             return str(dest_path)
     
+    def local_output_path(self, key: str) -> Path:
+        """
+        Resolve where an output key lives in local mode.
+        
+        Outputs go to the input base path with '/input/' swapped for '/output/'.
+        
+        Args:
+            key: S3 key or relative path
+        
+        Returns:
+            Local path (parent directories are not created)
+        """
+        return Path(self.local_base_path.replace('/input/', '/output/')) / key
+    
     def upload_file(self, local_path: str, bucket: str, key: str) -> str:
         """
         Upload file to S3 or copy to local filesystem.
@@ -188,7 +205,7 @@ class S3Utils:
             S3 URI or local path
         """
         if self.local_mode:
-            dest_path = Path(self.local_base_path.replace('/input/', '/output/')) / key
+            dest_path = self.local_output_path(key)
             dest_path.parent.mkdir(parents=True, exist_ok=True)
             
             import shutil
@@ -196,7 +213,7 @@ class S3Utils:
             logger.info(f"Copied file from {local_path} to {dest_path}")
             return str(dest_path)
         else:
-            self.s3_client.upload_file(local_path, bucket, key)
+            self.s3_client.upload_file(local_path, bucket, key, Config=get_transfer_config())
             s3_uri = f"s3://{bucket}/{key}"
             logger.info(f"Uploaded {local_path} to {s3_uri}")
             return s3_uri
@@ -214,7 +231,7 @@ class S3Utils:
             S3 URI or local path
         """
         if self.local_mode:
-            dest_path = Path(self.local_base_path.replace('/input/', '/output/')) / key
+            dest_path = self.local_output_path(key)
             dest_path.parent.mkdir(parents=True, exist_ok=True)
             dest_path.write_bytes(data)
             logger.info(f"Wrote {len(data)} bytes to {dest_path}")
@@ -225,6 +242,23 @@ class S3Utils:
             logger.info(f"Wrote {len(data)} bytes to {s3_uri}")
             return s3_uri
     
+    def delete_object(self, bucket: str, key: str) -> None:
+        """
+        Delete an object from S3 or the local filesystem (missing is not an error).
+        
+        Args:
+            bucket: S3 bucket name
+            key: S3 key or relative path
+        """
+        if self.local_mode:
+            dest_path = self.local_output_path(key)
+            if dest_path.exists():
+                dest_path.unlink()
+                logger.info(f"Deleted {dest_path}")
+        else:
+            self.s3_client.delete_object(Bucket=bucket, Key=key)
+            logger.info(f"Deleted s3://{bucket}/{key}")
+    
     def read_bytes(self, bucket: str, key: str) -> bytes:
         """
         Read bytes directly from S3 or local filesystem.
@@ -237,7 +271,7 @@ class S3Utils:
             File contents as bytes
         """
         if self.local_mode:
-            source_path = Path(self.local_base_path.replace('/input/', '/output/')) / key
+            source_path = self.local_output_path(key)
             data = source_path.read_bytes()
             logger.info(f"Read {len(data)} bytes from {source_path}")
             return data
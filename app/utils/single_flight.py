@@ -0,0 +1,101 @@
+"""
+Single-flight deduplication of identical in-flight calls.
+
+When several books in one process share identical pages, or a retry races a
+slow original, the same vision request body can be sent twice concurrently.
+SingleFlight makes concurrent callers with the same key share one in-flight
+call and its result (or its exception). Completed results are not cached:
+a call that starts after the previous one finished executes again.
+"""
+
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def request_key(model_id: str, body: str) -> str:
+    """Hash a model ID and serialized request body into a single-flight key."""
+    digest = hashlib.sha256()
+    digest.update(model_id.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(body.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class _Call:
+    """An in-flight call that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Thread-safe group of keyed in-flight calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0
+        self.collapsed = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn() unless an identical call is already in flight, in which case
+        wait for it and return its result (or re-raise its exception).
+
+        Args:
+            key: Request identity, e.g. from request_key()
+            fn: Zero-argument callable performing the request
+
+        Returns:
+            The result of the (possibly shared) call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.collapsed += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Counts of executed calls and duplicates that shared an in-flight call."""
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'collapsed': self.collapsed,
+                'in_flight': len(self._calls),
+            }
+
+
+_default_group = SingleFlight()
+
+
+def get_default_group() -> SingleFlight:
+    """Return the process-wide group shared by all analyzers (and so all books)."""
+    return _default_group
@@ -0,0 +1,432 @@
+"""
+SQLite-backed stand-in for the DynamoDB ledger table.
+
+SQLiteLedgerTable implements the subset of the boto3 Table API the pipeline
+uses - get_item, put_item, delete_item, update_item, query, scan and
+batch_writer - on a local SQLite file, so DynamoDBLedger, LedgerWriter,
+LedgerCache and the runner scripts work unchanged against it:
+
+- items are stored in DynamoDB JSON ({"S": ...}, {"N": ...}), so numbers come
+  back as Decimal exactly as they do from boto3
+- update_item applies SET / REMOVE expressions with #name and :value
+  placeholders, including nested paths (steps.#step), inside one SQLite
+  transaction; like DynamoDB, SET on a path whose parent map is missing fails
+- ConditionExpression supports attribute_exists, attribute_not_exists and
+  comparisons joined by AND, and raises ConditionalCheckFailedException
+- query and scan paginate with Limit / LastEvaluatedKey and honour
+  Segment / TotalSegments
+- export_backup / import_backup read and write the same {"Items": [...]}
+  layout as `aws dynamodb scan` (data/dynamodb_backup_*.json)
+
+The file can be shared by several processes (WAL journal, busy timeout).
+"""
+
+from contextlib import contextmanager
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+import json
+import operator
+import re
+import sqlite3
+import threading
+import logging
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 1000
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+_MISSING = object()
+
+_COMPARISONS = {
+    '=': operator.eq, '<>': operator.ne, '<': operator.lt,
+    '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    pk TEXT PRIMARY KEY,
+    status TEXT,
+    updated_at TEXT,
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_status ON items(status, pk);
+"""
+
+
+def _decimals(obj: Any) -> Any:
+    """Floats to Decimal (boto3 refuses floats; the local table converts them)."""
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    if isinstance(obj, dict):
+        return {k: _decimals(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_decimals(v) for v in obj]
+    return obj
+
+
+def serialize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Python item -> DynamoDB JSON."""
+    return {k: _serializer.serialize(_decimals(v)) for k, v in item.items()}
+
+
+def deserialize_item(data: Dict[str, Any]) -> Dict[str, Any]:
+    """DynamoDB JSON -> Python item (numbers as Decimal)."""
+    return {k: _deserializer.deserialize(v) for k, v in data.items()}
+
+
+def _error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+def _split_top_level(expr: str) -> List[str]:
+    """Split on commas that are not inside parentheses."""
+    parts, depth, current = [], 0, []
+    for ch in expr:
+        if ch == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        depth += ch == '('
+        depth -= ch == ')'
+        current.append(ch)
+    if ''.join(current).strip():
+        parts.append(''.join(current).strip())
+    return parts
+
+
+def _path(expr: str, names: Dict[str, str]) -> List[str]:
+    return [names.get(p, p) if p.startswith('#') else p for p in expr.strip().split('.')]
+
+
+def _get(item: Dict[str, Any], path: List[str]) -> Any:
+    node: Any = item
+    for part in path:
+        if not isinstance(node, dict) or part not in node:
+            return _MISSING
+        node = node[part]
+    return node
+
+
+def _parent(item: Dict[str, Any], path: List[str], operation: str) -> Dict[str, Any]:
+    node = _get(item, path[:-1]) if len(path) > 1 else item
+    if not isinstance(node, dict):
+        raise _error('ValidationException',
+                     'The document path provided in the update expression is invalid for update',
+                     operation)
+    return node
+
+
+def _value(token: str, values: Dict[str, Any], operation: str) -> Any:
+    token = token.strip()
+    if token not in values:
+        raise _error('ValidationException', f'Unknown value placeholder {token}', operation)
+    return values[token]
+
+
+def evaluate_condition(expr: Optional[str], item: Dict[str, Any], names: Dict[str, str],
+                       values: Dict[str, Any], operation: str = 'Condition') -> bool:
+    """
+    Evaluate a condition/filter expression against an item.
+
+    Supports attribute_exists(path), attribute_not_exists(path) and
+    `path <op> :value` comparisons, joined by AND.
+    """
+    if not expr:
+        return True
+    for clause in re.split(r'\s+AND\s+', expr.strip(), flags=re.IGNORECASE):
+        clause = clause.strip()
+        m = re.fullmatch(r'(attribute_exists|attribute_not_exists)\(\s*([^)]+?)\s*\)', clause)
+        if m:
+            exists = _get(item, _path(m.group(2), names)) is not _MISSING
+            ok = exists if m.group(1) == 'attribute_exists' else not exists
+        else:
+            m = re.fullmatch(r'(\S+?)\s*(<>|<=|>=|=|<|>)\s*(:\w+)', clause)
+            if not m:
+                raise _error('ValidationException', f'Unsupported expression: {clause}', operation)
+            left = _get(item, _path(m.group(1), names))
+            right = _value(m.group(3), values, operation)
+            try:
+                ok = left is not _MISSING and _COMPARISONS[m.group(2)](left, right)
+            except TypeError:
+                ok = False
+        if not ok:
+            return False
+    return True
+
+
+def apply_update(item: Dict[str, Any], expr: str, names: Dict[str, str],
+                 values: Dict[str, Any]) -> None:
+    """Apply a SET / REMOVE update expression to an item in place."""
+    clauses = re.split(r'\b(SET|REMOVE)\b', expr.strip(), flags=re.IGNORECASE)
+    if clauses[0].strip():
+        raise _error('ValidationException', f'Unsupported update expression: {expr}', 'UpdateItem')
+    for keyword, body in zip(clauses[1::2], clauses[2::2]):
+        for action in _split_top_level(body):
+            if keyword.upper() == 'REMOVE':
+                path = _path(action, names)
+                _parent(item, path, 'UpdateItem').pop(path[-1], None)
+                continue
+            target, _, source = action.partition('=')
+            path = _path(target, names)
+            source = source.strip()
+            m = re.fullmatch(r'if_not_exists\(\s*([^,]+?)\s*,\s*(:\w+)\s*\)', source)
+            if m:
+                current = _get(item, _path(m.group(1), names))
+                value = current if current is not _MISSING else _value(m.group(2), values, 'UpdateItem')
+            elif source.startswith(':'):
+                value = _value(source, values, 'UpdateItem')
+            else:
+                raise _error('ValidationException', f'Unsupported SET action: {action}', 'UpdateItem')
+            _parent(item, path, 'UpdateItem')[path[-1]] = value
+
+
+class SQLiteLedgerTable:
+    """A boto3-Table-compatible ledger table stored in SQLite."""
+
+    def __init__(self, db_path: Union[str, Path], name: str = 'jsmith-pipeline-ledger',
+                 key_name: str = 'book_id'):
+        """
+        Args:
+            db_path: SQLite file (created if missing; ':memory:' for tests)
+            name: Table name, reported as table_name
+            key_name: Partition key attribute
+        """
+        self.db_path = str(db_path)
+        self.table_name = name
+        self.key_name = key_name
+        self.table_status = 'ACTIVE'
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def load(self) -> None:
+        """No-op (boto3 Table.load fetches table metadata)."""
+
+    @property
+    def item_count(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+
+    # -- single-item operations --------------------------------------------
+
+    def get_item(self, Key: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            item = self._read(Key[self.key_name])
+        return {'Item': item} if item is not None else {}
+
+    def put_item(self, Item: Dict[str, Any], ConditionExpression: Optional[str] = None,
+                 ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+                 ExpressionAttributeValues: Optional[Dict[str, Any]] = None, **kwargs) -> Dict:
+        with self._transaction():
+            existing = self._read(Item[self.key_name]) or {}
+            if not evaluate_condition(ConditionExpression, existing, ExpressionAttributeNames or {},
+                                      ExpressionAttributeValues or {}, 'PutItem'):
+                raise _error('ConditionalCheckFailedException', 'The conditional request failed', 'PutItem')
+            self._write(Item)
+        return {}
+
+    def delete_item(self, Key: Dict[str, Any], ConditionExpression: Optional[str] = None,
+                    ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+                    ExpressionAttributeValues: Optional[Dict[str, Any]] = None, **kwargs) -> Dict:
+        with self._transaction():
+            existing = self._read(Key[self.key_name]) or {}
+            if not evaluate_condition(ConditionExpression, existing, ExpressionAttributeNames or {},
+                                      ExpressionAttributeValues or {}, 'DeleteItem'):
+                raise _error('ConditionalCheckFailedException', 'The conditional request failed', 'DeleteItem')
+            self._conn.execute('DELETE FROM items WHERE pk = ?', (Key[self.key_name],))
+        return {}
+
+    def update_item(self, Key: Dict[str, Any], UpdateExpression: str,
+                    ConditionExpression: Optional[str] = None,
+                    ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+                    ExpressionAttributeValues: Optional[Dict[str, Any]] = None,
+                    ReturnValues: str = 'NONE', **kwargs) -> Dict[str, Any]:
+        names = ExpressionAttributeNames or {}
+        values = _decimals(ExpressionAttributeValues or {})
+        with self._transaction():
+            key = Key[self.key_name]
+            item = self._read(key)
+            if not evaluate_condition(ConditionExpression, item or {}, names, values, 'UpdateItem'):
+                raise _error('ConditionalCheckFailedException', 'The conditional request failed', 'UpdateItem')
+            item = item or {self.key_name: key}
+            apply_update(item, UpdateExpression, names, values)
+            self._write(item)
+        return {'Attributes': item} if ReturnValues == 'ALL_NEW' else {}
+
+    # -- multi-item operations ---------------------------------------------
+
+    def query(self, KeyConditionExpression: str, IndexName: Optional[str] = None,
+              ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+              ExpressionAttributeValues: Optional[Dict[str, Any]] = None,
+              FilterExpression: Optional[str] = None, Limit: Optional[int] = None,
+              ExclusiveStartKey: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        m = re.fullmatch(r'\s*(\S+?)\s*=\s*(:\w+)\s*', KeyConditionExpression)
+        if not m:
+            raise _error('ValidationException', f'Unsupported key condition: {KeyConditionExpression}', 'Query')
+        path = _path(m.group(1), names)
+        value = _value(m.group(2), values, 'Query')
+        where, params = [], []
+        if path == ['status']:
+            where.append('status = ?')
+            params.append(value)
+        elif path == [self.key_name]:
+            where.append('pk = ?')
+            params.append(value)
+        else:
+            FilterExpression = ' AND '.join(filter(None, [KeyConditionExpression, FilterExpression]))
+        return self._page(where, params, FilterExpression, names, values, Limit, ExclusiveStartKey)
+
+    def scan(self, FilterExpression: Optional[str] = None,
+             ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+             ExpressionAttributeValues: Optional[Dict[str, Any]] = None,
+             Segment: Optional[int] = None, TotalSegments: Optional[int] = None,
+             Limit: Optional[int] = None, ExclusiveStartKey: Optional[Dict[str, Any]] = None,
+             **kwargs) -> Dict[str, Any]:
+        where, params = [], []
+        if TotalSegments:
+            where.append('rowid % ? = ?')
+            params.extend([TotalSegments, Segment or 0])
+        return self._page(where, params, FilterExpression, ExpressionAttributeNames or {},
+                          ExpressionAttributeValues or {}, Limit, ExclusiveStartKey)
+
+    @contextmanager
+    def batch_writer(self, **kwargs) -> Iterator['_BatchWriter']:
+        """Buffer puts/deletes and write them in one transaction on exit."""
+        writer = _BatchWriter()
+        yield writer
+        with self._transaction():
+            for op, payload in writer.ops:
+                if op == 'put':
+                    self._write(payload)
+                else:
+                    self._conn.execute('DELETE FROM items WHERE pk = ?', (payload[self.key_name],))
+
+    # -- backups -----------------------------------------------------------
+
+    def iter_items(self) -> Iterator[Dict[str, Any]]:
+        """Every item, in key order."""
+        with self._lock:
+            rows = self._conn.execute('SELECT item FROM items ORDER BY pk').fetchall()
+        for (raw,) in rows:
+            yield deserialize_item(json.loads(raw))
+
+    def export_backup(self, path: Union[str, Path]) -> int:
+        """
+        Write every item in `aws dynamodb scan --output json` layout.
+
+        Returns:
+            Number of items written
+        """
+        with self._lock:
+            raw_items = [json.loads(r) for (r,) in self._conn.execute('SELECT item FROM items ORDER BY pk')]
+        data = {'Items': raw_items, 'Count': len(raw_items), 'ScannedCount': len(raw_items),
+                'ConsumedCapacity': None}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return len(raw_items)
+
+    def import_backup(self, path: Union[str, Path], replace: bool = False) -> int:
+        """
+        Load items from a DynamoDB JSON backup (data/dynamodb_backup_*.json).
+
+        Args:
+            path: Backup file with an "Items" list
+            replace: Delete existing items first (default: upsert)
+
+        Returns:
+            Number of items imported
+        """
+        with open(path, encoding='utf-8') as f:
+            raw_items = json.load(f).get('Items', [])
+        with self._transaction():
+            if replace:
+                self._conn.execute('DELETE FROM items')
+            for raw in raw_items:
+                self._write(deserialize_item(raw))
+        logger.info(f"Imported {len(raw_items)} ledger items from {path}")
+        return len(raw_items)
+
+    # -- internals ---------------------------------------------------------
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute('SELECT item FROM items WHERE pk = ?', (key,)).fetchone()
+        return deserialize_item(json.loads(row[0])) if row else None
+
+    def _write(self, item: Dict[str, Any]) -> None:
+        status = item.get('status')
+        updated_at = item.get('updated_at')
+        self._conn.execute(
+            'INSERT INTO items (pk, status, updated_at, item) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(pk) DO UPDATE SET status = excluded.status, '
+            'updated_at = excluded.updated_at, item = excluded.item',
+            (item[self.key_name], status if isinstance(status, str) else None,
+             updated_at if isinstance(updated_at, str) else None,
+             json.dumps(serialize_item(item), separators=(',', ':'))))
+
+    def _page(self, where: List[str], params: List[Any], filter_expr: Optional[str],
+              names: Dict[str, str], values: Dict[str, Any], limit: Optional[int],
+              start_key: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """One page of a query/scan; Limit counts items examined, as in DynamoDB."""
+        if start_key:
+            where = where + ['pk > ?']
+            params = params + [start_key[self.key_name]]
+        page_size = limit or DEFAULT_PAGE_SIZE
+        sql = 'SELECT item FROM items'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY pk LIMIT ?'
+        with self._lock:
+            rows = self._conn.execute(sql, params + [page_size + 1]).fetchall()
+        more = len(rows) > page_size
+        scanned = [deserialize_item(json.loads(r)) for (r,) in rows[:page_size]]
+        items = [i for i in scanned if evaluate_condition(filter_expr, i, names, values, 'Scan')]
+        response = {'Items': items, 'Count': len(items), 'ScannedCount': len(scanned)}
+        if more:
+            response['LastEvaluatedKey'] = {self.key_name: scanned[-1][self.key_name]}
+        return response
+
+
+class _BatchWriter:
+    """Collects operations for SQLiteLedgerTable.batch_writer."""
+
+    def __init__(self):
+        self.ops: List[tuple] = []
+
+    def put_item(self, Item: Dict[str, Any]) -> None:
+        self.ops.append(('put', Item))
+
+    def delete_item(self, Key: Dict[str, Any]) -> None:
+        self.ops.append(('delete', Key))
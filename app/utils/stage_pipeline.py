@@ -0,0 +1,163 @@
+"""
+Staged pipeline: one worker pool and queue per stage, items flow between them.
+
+Running whole items (books) in parallel ties every stage of an item to one
+slot: while a book downloads, parses its TOC or splits, its share of the
+expensive stage sits unused. StagedPipeline gives each stage its own pool. An
+item moves to the next stage's queue as soon as its current stage finishes,
+and waits there only until that stage has a free worker, so the cheap stages
+of some books overlap the expensive stage of others.
+
+Admission is bounded (max_in_flight): items past the first stage hold temp
+files and memory, so the feeder waits for a finished item before starting
+another.
+
+    pipeline = StagedPipeline([Stage('download', download, 4),
+                               Stage('toc', toc, 4),
+                               Stage('analyze', analyze, 8),
+                               Stage('split', split, 2)], max_in_flight=16)
+    results = pipeline.run(books)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """A pipeline stage: fn(item) runs on one of `workers` threads."""
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+
+
+@dataclass
+class StageStats:
+    """Per-stage counters: items run, time busy and time items spent queued."""
+    items: int = 0
+    failed: int = 0
+    busy_sec: float = 0.0
+    wait_sec: float = 0.0
+
+
+@dataclass
+class ItemResult:
+    """Outcome of one item: the last stage's return value or the first error."""
+    item: Any
+    value: Any = None
+    error: Optional[BaseException] = None
+    failed_stage: Optional[str] = None
+    stage_sec: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class StagedPipeline:
+    """Runs items through stages, each stage on its own worker pool."""
+
+    # Returned by a stage fn to finish its item early
+    STOP = object()
+
+    def __init__(self, stages: List[Stage], max_in_flight: Optional[int] = None,
+                 on_done: Optional[Callable[[ItemResult], None]] = None):
+        """
+        Args:
+            stages: Stages in order. A stage fn returning StagedPipeline.STOP
+                ends the item there (success, remaining stages skipped).
+            max_in_flight: Items admitted but not finished (default: sum of workers)
+            on_done: Called with each ItemResult as it finishes (any thread)
+        """
+        if not stages:
+            raise ValueError("at least one stage is required")
+        self.stages = stages
+        self.max_in_flight = max_in_flight or sum(s.workers for s in stages)
+        self.on_done = on_done
+        self.stats = {s.name: StageStats() for s in stages}
+        self._lock = threading.Lock()
+
+    def run(self, items: Iterable[Any]) -> List[ItemResult]:
+        """
+        Feed items through every stage and wait for all of them.
+
+        Returns:
+            ItemResults in completion order
+        """
+        results: List[ItemResult] = []
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        pending = [0]
+        all_done = threading.Condition(self._lock)
+        pools = [ThreadPoolExecutor(max_workers=s.workers, thread_name_prefix=f"stage-{s.name}")
+                 for s in self.stages]
+
+        def finish(result: ItemResult) -> None:
+            with self._lock:
+                results.append(result)
+            if self.on_done:
+                try:
+                    self.on_done(result)
+                except Exception as e:
+                    logger.warning(f"on_done callback failed: {e}")
+            slots.release()
+            with all_done:
+                pending[0] -= 1
+                all_done.notify_all()
+
+        def run_stage(index: int, result: ItemResult, queued_at: float) -> None:
+            stage = self.stages[index]
+            started = time.time()
+            try:
+                value = stage.fn(result.item)
+            except BaseException as e:
+                value, result.error, result.failed_stage = None, e, stage.name
+            elapsed = time.time() - started
+            result.stage_sec[stage.name] = round(elapsed, 3)
+            with self._lock:
+                stats = self.stats[stage.name]
+                stats.items += 1
+                stats.failed += result.error is not None
+                stats.busy_sec += elapsed
+                stats.wait_sec += started - queued_at
+
+            if result.error is not None or value is self.STOP or index + 1 == len(self.stages):
+                if result.error is None:
+                    result.value = None if value is self.STOP else value
+                finish(result)
+            else:
+                pools[index + 1].submit(run_stage, index + 1, result, time.time())
+
+        try:
+            for item in items:
+                slots.acquire()
+                with all_done:
+                    pending[0] += 1
+                pools[0].submit(run_stage, 0, ItemResult(item=item), time.time())
+            with all_done:
+                while pending[0]:
+                    all_done.wait()
+        finally:
+            for pool in pools:
+                pool.shutdown(wait=True)
+        return results
+
+    def summary(self, elapsed_sec: float) -> Dict[str, Dict[str, float]]:
+        """Per-stage items, failures, utilization and mean queue wait over a run."""
+        out = {}
+        for stage in self.stages:
+            s = self.stats[stage.name]
+            capacity = max(elapsed_sec, 1e-9) * stage.workers
+            out[stage.name] = {
+                'workers': stage.workers,
+                'items': s.items,
+                'failed': s.failed,
+                'utilization': round(s.busy_sec / capacity, 3),
+                'mean_wait_sec': round(s.wait_sec / s.items, 1) if s.items else 0.0,
+            }
+        return out
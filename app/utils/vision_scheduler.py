@@ -0,0 +1,226 @@
+"""
+Global page-level scheduler for vision calls across books.
+
+With a static grid (--parallel-books x --max-workers) each book owns its
+workers: a small book finishes and its slots sit idle while a large book
+crawls on its own few. VisionScheduler instead owns all the workers. Every
+active book submits its page-level tasks to one shared queue and each worker,
+when free, picks the next task by these rules:
+
+1. Priority: lower value first. Probes (a book thread waiting on a single
+   answer, e.g. offset verification) go ahead of bulk page scans.
+2. Fair share: among books with a task at that priority, the one with the
+   fewest tasks in flight, so every active book progresses and a book alone
+   in the queue gets every free worker.
+3. Rotation: ties go to the book served least recently (a new book first,
+   then books in arrival order), so books take turns even on one worker.
+
+Results route back to the submitting book through concurrent.futures.Future.
+Tasks run in the submitter's contextvars context (log labels carry over).
+"""
+
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional
+import contextvars
+import itertools
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_PROBE = 0
+PRIORITY_SCAN = 1
+
+
+class _Task:
+    __slots__ = ('fn', 'args', 'future', 'context')
+
+    def __init__(self, fn: Callable, args: tuple, future: Future, context: contextvars.Context):
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.context = context
+
+
+class _BookQueue:
+    """One book's pending tasks by priority and its running count."""
+
+    def __init__(self, arrival: int):
+        self.arrival = arrival
+        self.pending: Dict[int, Deque[_Task]] = {}
+        self.in_flight = 0
+        self.last_served = -1
+        self.submitted = 0
+        self.completed = 0
+
+    def best_priority(self) -> Optional[int]:
+        return min((p for p, q in self.pending.items() if q), default=None)
+
+
+class VisionScheduler:
+    """Fixed pool of workers serving page-level tasks from all books."""
+
+    def __init__(self, workers: int, max_per_book: Optional[int] = None,
+                 name: str = 'vision'):
+        """
+        Start the worker threads.
+
+        Args:
+            workers: Total concurrent tasks (the Bedrock concurrency budget)
+            max_per_book: Cap on one book's tasks in flight (None = no cap)
+            name: Thread name prefix
+        """
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.workers = workers
+        self.max_per_book = max_per_book
+        self._cond = threading.Condition()
+        self._books: Dict[str, _BookQueue] = {}
+        self._arrivals = itertools.count()
+        self._picks = itertools.count()
+        self._shutdown = False
+        self._local = threading.local()
+        self.busy = 0
+        self.busy_sec = 0.0
+        self.started_at = time.time()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, book_id: str, fn: Callable[..., Any], *args: Any,
+               priority: int = PRIORITY_SCAN) -> Future:
+        """
+        Queue fn(*args) for a book.
+
+        Args:
+            book_id: Book the task belongs to (the fairness unit)
+            fn: Callable to run on a worker
+            priority: PRIORITY_PROBE or PRIORITY_SCAN (lower runs first)
+
+        Returns:
+            Future with fn's result or exception
+        """
+        future: Future = Future()
+        task = _Task(fn, args, future, contextvars.copy_context())
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("VisionScheduler is shut down")
+            book = self._books.get(book_id)
+            if book is None:
+                book = self._books[book_id] = _BookQueue(next(self._arrivals))
+            book.pending.setdefault(priority, deque()).append(task)
+            book.submitted += 1
+            self._cond.notify()
+        return future
+
+    def map(self, book_id: str, fn: Callable[[Any], Any], items: List[Any],
+            priority: int = PRIORITY_SCAN) -> List[Future]:
+        """Submit fn(item) for each item; returns futures in item order."""
+        return [self.submit(book_id, fn, item, priority=priority) for item in items]
+
+    def call(self, book_id: str, fn: Callable[..., Any], *args: Any,
+             priority: int = PRIORITY_PROBE) -> Any:
+        """
+        Run fn(*args) through the queue and wait for it.
+
+        Called from a worker thread (a task that makes a nested call), fn runs
+        inline instead: waiting on the queue from a worker could deadlock.
+        """
+        if self.in_worker():
+            return fn(*args)
+        return self.submit(book_id, fn, *args, priority=priority).result()
+
+    def in_worker(self) -> bool:
+        """True on one of this scheduler's worker threads."""
+        return getattr(self._local, 'worker', False)
+
+    def release(self, book_id: str) -> None:
+        """Forget a finished book (pending tasks, if any, are cancelled)."""
+        with self._cond:
+            book = self._books.pop(book_id, None)
+        if book:
+            for queue in book.pending.values():
+                for task in queue:
+                    task.future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Utilization and per-book counts."""
+        with self._cond:
+            elapsed = max(time.time() - self.started_at, 1e-9)
+            return {
+                'workers': self.workers,
+                'busy': self.busy,
+                'utilization': round(self.busy_sec / (elapsed * self.workers), 3),
+                'books': {
+                    book_id: {'pending': sum(len(q) for q in b.pending.values()),
+                              'in_flight': b.in_flight, 'completed': b.completed}
+                    for book_id, b in self._books.items()
+                },
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers once the queue is drained."""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+    def _pick(self) -> Optional[tuple]:
+        """Next (book, task) by priority, fair share, rotation. Caller holds the lock."""
+        best_key, best = None, None
+        for book in self._books.values():
+            if self.max_per_book is not None and book.in_flight >= self.max_per_book:
+                continue
+            priority = book.best_priority()
+            if priority is None:
+                continue
+            key = (priority, book.in_flight, book.last_served, book.arrival)
+            if best_key is None or key < best_key:
+                best_key, best = key, book
+        if best is None:
+            return None
+        best.last_served = next(self._picks)
+        return best, best.pending[best_key[0]].popleft()
+
+    def _work(self) -> None:
+        self._local.worker = True
+        while True:
+            with self._cond:
+                while True:
+                    picked = self._pick()
+                    if picked or self._shutdown:
+                        break
+                    self._cond.wait()
+                if picked is None:
+                    return
+                book, task = picked
+                book.in_flight += 1
+                self.busy += 1
+
+            started = time.time()
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    task.future.set_result(task.context.run(task.fn, *task.args))
+                except BaseException as e:
+                    task.future.set_exception(e)
+
+            with self._cond:
+                book.in_flight -= 1
+                book.completed += 1
+                self.busy -= 1
+                self.busy_sec += time.time() - started
+                # A book at its cap may be runnable again
+                self._cond.notify()
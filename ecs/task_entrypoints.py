@@ -427,6 +427,11 @@ def pdf_splitter_task():
     - OUTPUT_BUCKET: S3 bucket for output
     - ARTIST: Book artist
     - BOOK_NAME: Book name
+    - SPLIT_WORKERS: Worker processes for splitting (optional, default: 1). Each
+      worker opens its own copy of the source PDF; size the task's memory and
+      vCPUs before raising it
+    - SAVE_PROFILE: Output PDF save profile (optional, default: none)
+    - SPLIT_BACKEND: PDF engine for splitting, pymupdf or qpdf (optional, default: pymupdf)
     """
     from app.services.pdf_splitter import PDFSplitterService
     from app.utils.s3_utils import S3Utils
@@ -472,8 +477,14 @@ def pdf_splitter_task():
             ]
             
             # Run splitting
-            service = PDFSplitterService(output_bucket=output_bucket)
-            output_files = service.split_pdf(pdf_path, page_ranges, artist, book_name)
+            service = PDFSplitterService(output_bucket=output_bucket,
+                                         save_profile=os.environ.get('SAVE_PROFILE', 'none'),
+                                         split_backend=os.environ.get('SPLIT_BACKEND', 'pymupdf'))
+            # Serial by default, like the CLI runners: os.cpu_count() reports the host's
+            # CPUs inside a container, not the task's vCPUs
+            split_workers = int(os.environ.get('SPLIT_WORKERS', '1'))
+            output_files = service.split_pdf(pdf_path, page_ranges, artist, book_name,
+                                             workers=split_workers)
             
             # Write output files list to artifacts bucket
             artifacts_bucket = get_artifact_bucket()
@@ -677,6 +688,7 @@ def page_analysis_task():
     - OUTPUT_BUCKET: S3 bucket for output
     """
     from app.services.holistic_page_analyzer import HolisticPageAnalyzer
+    from app.utils.page_table import RAW_SIDECAR_NAME, compact_page_analysis, dumps_compact
     from app.utils.s3_utils import S3Utils
 
     logger.info("Starting Page Analysis task (HOLISTIC VERSION)")
@@ -726,12 +738,17 @@ def page_analysis_task():
                 artist=artist
             )
 
-            # Save page_analysis.json (full analysis) to artifacts bucket
+            # Save page_analysis.json (compact page table) + raw responses sidecar to artifacts bucket
             result_dict = analyzer.to_dict(result)
             result_dict['book_id'] = book_id
             output_key = f"{artifact_prefix}/page_analysis.json"
-            result_json = json.dumps(result_dict, indent=2)
-            s3_utils.write_bytes(result_json.encode(), artifacts_bucket, output_key)
+            page_analysis, raw_sidecar = compact_page_analysis(result_dict)
+            if raw_sidecar is not None:
+                s3_utils.write_bytes(raw_sidecar, artifacts_bucket, f"{artifact_prefix}/{RAW_SIDECAR_NAME}")
+            else:
+                # Drop an earlier run's sidecar so it is never paired with this page table
+                s3_utils.delete_object(artifacts_bucket, f"{artifact_prefix}/{RAW_SIDECAR_NAME}")
+            s3_utils.write_bytes(dumps_compact(page_analysis), artifacts_bucket, output_key)
 
             # Also save page_mapping.json (for compatibility with downstream tasks)
             page_mapping = {
@@ -4,24 +4,25 @@ Apply manually corrected splits from exported v3_splits JSON files.
 
 For each export:
 1. Replace verified_songs in artifacts
-2. Delete old output PDFs (local + S3)
-3. Re-extract song PDFs from source
-4. Update output_files.json with new sizes
-5. Upload everything to S3
+2. Re-extract only songs whose page range, title or artist changed
+3. Delete only output PDFs no song uses any more (local + S3)
+4. Patch output_files.json
+5. Upload changed PDFs and artifacts to S3
 """
 
 import json
 import sys
-import shutil
 from pathlib import Path
-from datetime import datetime
 
-import boto3
-import fitz  # PyMuPDF - more robust with corrupt PDFs than PyPDF2
 
 sys.stdout.reconfigure(line_buffering=True)
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.incremental_split import IncrementalSplitter
+from app.utils.s3_transfer import create_s3_client
+
 ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
 INPUT_DIR = PROJECT_ROOT / 'SheetMusic_Input'
 OUTPUT_DIR = PROJECT_ROOT / 'SheetMusic_Output'
@@ -30,19 +31,10 @@ S3_ARTIFACTS_BUCKET = 'jsmith-artifacts'
 S3_OUTPUT_BUCKET = 'jsmith-output'
 
 
-def delete_s3_prefix(s3, bucket, prefix):
-    """Delete all objects under a prefix."""
-    paginator = s3.get_paginator('list_objects_v2')
-    to_delete = []
-    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-        for obj in page.get('Contents', []):
-            to_delete.append({'Key': obj['Key']})
-    if not to_delete:
-        return 0
-    for i in range(0, len(to_delete), 1000):
-        batch = to_delete[i:i+1000]
-        s3.delete_objects(Bucket=bucket, Delete={'Objects': batch})
-    return len(to_delete)
+def song_filename(title, song_artist):
+    """Output file name for a song."""
+    safe_title = title.replace('/', '-').replace('\\', '-').replace(':', '-').replace('?', '').replace('"', '').replace('<', '').replace('>', '').replace('|', '').replace('*', '')
+    return f'{song_artist} - {safe_title}.pdf'
 
 
 def apply_export(s3, export_path, artist, book):
@@ -71,60 +63,14 @@ def apply_export(s3, export_path, artist, book):
         return
     print(f'  Source: {source_pdf.name}')
 
-    # Delete old output PDFs
-    output_prefix = f'v3/{artist}/{book}/'
-    deleted = delete_s3_prefix(s3, S3_OUTPUT_BUCKET, output_prefix)
-    print(f'  Deleted {deleted} old S3 output PDFs')
-
-    local_output_dir = OUTPUT_DIR / artist / book
-    if local_output_dir.exists():
-        old_local = len(list(local_output_dir.glob('*.pdf')))
-        shutil.rmtree(local_output_dir)
-        print(f'  Deleted {old_local} old local output PDFs')
-    local_output_dir.mkdir(parents=True, exist_ok=True)
-
-    # Extract new song PDFs using PyMuPDF (handles corrupt PDFs)
-    new_output_files = []
-    doc = fitz.open(str(source_pdf))
-    total_pages = len(doc)
-    print(f'  PDF pages: {total_pages}')
-
-    for song in new_verified_songs:
-        title = song['song_title']
-        start = song['start_page']
-        end = song['end_page']
-        song_artist = song.get('artist', artist)
-
-        safe_title = title.replace('/', '-').replace('\\', '-').replace(':', '-').replace('?', '').replace('"', '').replace('<', '').replace('>', '').replace('|', '').replace('*', '')
-        filename = f'{song_artist} - {safe_title}.pdf'
-        local_path = local_output_dir / filename
-        s3_key = f'v3/{artist}/{book}/{filename}'
-        output_uri = f's3://{S3_OUTPUT_BUCKET}/{s3_key}'
-
-        page_count = min(end, total_pages) - start
-        if page_count <= 0:
-            print(f'    SKIP: "{title}" [{start}-{end}] - 0 pages')
-            continue
-
-        # Extract pages using PyMuPDF
-        new_doc = fitz.open()
-        new_doc.insert_pdf(doc, from_page=start, to_page=min(end, total_pages) - 1)
-        new_doc.save(str(local_path))
-        new_doc.close()
-
-        file_size = local_path.stat().st_size
-        s3.upload_file(str(local_path), S3_OUTPUT_BUCKET, s3_key)
-
-        new_output_files.append({
-            'song_title': title,
-            'artist': song_artist,
-            'output_uri': output_uri,
-            'file_size_bytes': file_size,
-            'page_range': [start, end],
-        })
-
-    doc.close()
-    print(f'  Extracted: {len(new_output_files)} songs')
+    # Re-split only the songs that changed
+    splitter = IncrementalSplitter(OUTPUT_DIR, S3_OUTPUT_BUCKET, s3_client=s3)
+    resplit = splitter.resplit(artist, book, source_pdf, of_data['output_files'],
+                               new_verified_songs, song_filename)
+    new_output_files = resplit.output_files
+    for title in resplit.skipped:
+        print(f'    SKIP: "{title}" - 0 pages')
+    print(f'  Kept {resplit.kept}, re-extracted {resplit.regenerated}, deleted {resplit.deleted} song PDFs')
 
     # Update artifacts
     vs_data = json.load(open(book_dir / 'verified_songs.json'))
@@ -161,7 +107,7 @@ def main():
         print('  Or: apply_split_exports.py --batch')
         sys.exit(1)
 
-    s3 = boto3.client('s3', region_name='us-east-1')
+    s3 = create_s3_client(region_name='us-east-1')
 
     if sys.argv[1] == '--batch':
         # Hardcoded batch for current fixes
@@ -8,24 +8,32 @@ Known quotas (us-east-1 cross-region):
   - 100 requests/minute (RPM) for Claude 3.5 Sonnet V2
   - 800,000 tokens/minute (TPM)
 
+Multi-region routing raises the ceiling: with --regions the calls are spread
+over several regional quotas by app.utils.bedrock_router.BedrockRouter.
+
 Usage:
     python scripts/bedrock_load_test.py --concurrency 4
     python scripts/bedrock_load_test.py --ramp          # Test 1,2,4,8,12,16,20
+    python scripts/bedrock_load_test.py --ramp --levels 8,16,32,48,64 --regions us-east-1,us-west-2
 """
 
 import argparse
 import base64
 import json
+import sys
 import time
 import statistics
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
-import boto3
 import fitz  # PyMuPDF
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.bedrock_router import classify_error, create_bedrock_client
+
 VISION_MODEL_ID = 'us.anthropic.claude-3-5-sonnet-20241022-v2:0'
 
 # Minimal prompt matching our actual pipeline usage
@@ -108,16 +116,15 @@ def make_vision_call(client, image_b64: str, call_id: int) -> dict:
             'input_tokens': input_tokens,
             'output_tokens': output_tokens,
         }
-    except client.exceptions.ThrottlingException as e:
-        elapsed = time.time() - start
-        return {
-            'call_id': call_id,
-            'status': 'throttled',
-            'elapsed_sec': round(elapsed, 3),
-            'error': str(e),
-        }
     except Exception as e:
         elapsed = time.time() - start
+        if classify_error(e) == 'throttle':
+            return {
+                'call_id': call_id,
+                'status': 'throttled',
+                'elapsed_sec': round(elapsed, 3),
+                'error': str(e),
+            }
         error_type = type(e).__name__
         return {
             'call_id': call_id,
@@ -213,6 +220,11 @@ def main():
                         help='Ramp test: 1, 2, 4, 8, 12, 16, 20 concurrent')
     parser.add_argument('--cooldown', type=int, default=15,
                         help='Seconds between ramp levels (default: 15)')
+    parser.add_argument('--levels', default='1,2,4,8,12,16,20',
+                        help='Comma-separated concurrency levels for --ramp')
+    parser.add_argument('--regions', default=None,
+                        help='Comma-separated regions to route across, e.g. "us-east-1,us-west-2" '
+                             '(default: BEDROCK_REGIONS env var or us-east-1)')
     args = parser.parse_args()
 
     print(f"Bedrock Vision Load Test")
@@ -224,11 +236,11 @@ def main():
     image_b64 = get_test_image()
     print()
 
-    # Create Bedrock client
-    client = boto3.client('bedrock-runtime', region_name='us-east-1')
+    # Create Bedrock client (a BedrockRouter when several regions are given)
+    client = create_bedrock_client(args.regions, max_pool_connections=100)
 
     if args.ramp:
-        levels = [1, 2, 4, 8, 12, 16, 20]
+        levels = [int(x) for x in args.levels.split(',')]
         print(f"Ramp test: {levels}")
         print(f"Calls per level: {args.calls}")
         print(f"Cooldown between levels: {args.cooldown}s")
@@ -283,6 +295,14 @@ def main():
 
     else:
         parser.print_help()
+        return
+
+    if hasattr(client, 'stats'):
+        print(f"\nPer-region counters:")
+        for name, s in client.stats().items():
+            print(f"  {name:30s} calls={s['calls']} ok={s['successes']} "
+                  f"throttled={s['throttles']} errors={s['errors']} "
+                  f"avg_latency={s['avg_latency_sec']}s")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,119 @@
+"""
+Benchmark output PDF save profiles on the existing split corpus.
+
+For every book with an output_files.json (and its source PDF in
+SheetMusic_Input), re-extracts each song's page range and serializes it with
+every save profile, measuring output size and CPU time. Nothing is written
+to S3 or to the output folders.
+
+Reports per profile: total bytes, size relative to 'none' (current output),
+and CPU seconds / ms per song.
+
+Usage:
+    python scripts/benchmark_save_profiles.py
+    python scripts/benchmark_save_profiles.py --artist "Billy Joel" --max-songs 10
+    python scripts/benchmark_save_profiles.py --profiles none,compact,max --json profiles.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import fitz
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.pdf_splitter import SAVE_PROFILES, PDFSplitterService, serialize_pdf
+
+INPUT_DIR = PROJECT_ROOT / 'SheetMusic_Input'
+ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
+
+
+def benchmark_book(source_pdf: Path, output_files: list, profiles: list, max_songs: int) -> dict:
+    """Serialize each song of one book with every profile."""
+    splitter = PDFSplitterService(local_mode=True)
+    totals = {name: {'bytes': 0, 'cpu_sec': 0.0, 'songs': 0} for name in profiles}
+
+    source_doc = fitz.open(str(source_pdf))
+    try:
+        for entry in output_files[:max_songs] if max_songs else output_files:
+            start, end = entry['page_range']
+            for name in profiles:
+                # Image rewriting modifies the document, so extract afresh per profile
+                song_doc = splitter.extract_page_range(source_doc, start, end)
+                if song_doc is None:
+                    continue
+                cpu_start = time.process_time()
+                data = serialize_pdf(song_doc, SAVE_PROFILES[name])
+                totals[name]['cpu_sec'] += time.process_time() - cpu_start
+                totals[name]['bytes'] += len(data)
+                totals[name]['songs'] += 1
+                song_doc.close()
+    finally:
+        source_doc.close()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark output PDF save profiles')
+    parser.add_argument('--artist', help='Only this artist')
+    parser.add_argument('--profiles', default=','.join(SAVE_PROFILES),
+                        help=f"Comma-separated profiles (default: {','.join(SAVE_PROFILES)})")
+    parser.add_argument('--max-songs', type=int, default=0, help='Songs per book (default: all)')
+    parser.add_argument('--json', help='Write per-book results to this file')
+    args = parser.parse_args()
+
+    profiles = [p.strip() for p in args.profiles.split(',') if p.strip()]
+    unknown = [p for p in profiles if p not in SAVE_PROFILES]
+    if unknown:
+        parser.error(f"Unknown profiles: {', '.join(unknown)}")
+
+    pattern = f"{args.artist}/*/output_files.json" if args.artist else "*/*/output_files.json"
+    results = {}
+    corpus = {name: {'bytes': 0, 'cpu_sec': 0.0, 'songs': 0} for name in profiles}
+
+    for output_json in sorted(ARTIFACTS_DIR.glob(pattern)):
+        artist, book_name = output_json.parent.parent.name, output_json.parent.name
+        source_pdf = INPUT_DIR / artist / f"{artist} - {book_name}.pdf"
+        if not source_pdf.exists():
+            print(f"  SKIP {artist} - {book_name}: source PDF not found")
+            continue
+        with open(output_json, encoding='utf-8') as f:
+            output_files = [e for e in json.load(f).get('output_files', []) if e.get('page_range')]
+
+        totals = benchmark_book(source_pdf, output_files, profiles, args.max_songs)
+        results[f"{artist} - {book_name}"] = totals
+        for name, t in totals.items():
+            for k in corpus[name]:
+                corpus[name][k] += t[k]
+        base = totals.get('none', {}).get('bytes') or 0
+        sizes = ', '.join(
+            f"{name} {t['bytes'] / 1024 / 1024:.1f}MB" + (f" ({t['bytes'] / base:.0%})" if base else '')
+            for name, t in totals.items()
+        )
+        print(f"  {artist} - {book_name}: {sizes}")
+
+    if not results:
+        print("No books with output_files.json and a source PDF found")
+        return
+
+    base = corpus.get('none', {}).get('bytes') or 0
+    print(f"\n{len(results)} books")
+    print(f"  {'profile':<10} {'size':>10} {'vs none':>8} {'cpu':>9} {'ms/song':>8}")
+    for name, t in corpus.items():
+        ratio = f"{t['bytes'] / base:.1%}" if base else '-'
+        per_song = 1000 * t['cpu_sec'] / t['songs'] if t['songs'] else 0
+        print(f"  {name:<10} {t['bytes'] / 1024 / 1024:>8.1f}MB {ratio:>8} "
+              f"{t['cpu_sec']:>8.1f}s {per_song:>8.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'corpus': corpus, 'books': results}, f, indent=2, ensure_ascii=False)
+        print(f"  Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
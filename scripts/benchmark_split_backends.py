@@ -0,0 +1,175 @@
+"""
+Benchmark PDF split backends (PyMuPDF vs. qpdf) on the existing corpus.
+
+For every book with an output_files.json (and its source PDF in
+SheetMusic_Input), splits the book's songs with each backend into a temporary
+folder and measures wall time, peak memory and total output size. Every run
+happens in a fresh process, so peak RSS is per backend and per book. Nothing
+is written to S3 or to the output folders.
+
+Books are grouped by type so a default backend can be chosen per type:
+  - corrupt: PyMuPDF had to repair the file while opening it
+  - large:   source PDF of --large-mb or more
+  - small:   everything else
+
+Usage:
+    python scripts/benchmark_split_backends.py
+    python scripts/benchmark_split_backends.py --artist "Billy Joel" --max-books 5
+    python scripts/benchmark_split_backends.py --save-profile compact --json backends.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import fitz
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.split_backends import SPLIT_BACKENDS
+
+INPUT_DIR = PROJECT_ROOT / 'SheetMusic_Input'
+ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
+
+
+def book_type(pdf_path: Path, large_bytes: int) -> str:
+    """Classify a source PDF as corrupt, large or small."""
+    try:
+        with fitz.open(str(pdf_path)) as doc:
+            if doc.is_repaired:
+                return 'corrupt'
+    except Exception:
+        return 'corrupt'
+    return 'large' if pdf_path.stat().st_size >= large_bytes else 'small'
+
+
+def run_backend(backend: str, pdf_path: str, ranges: list, save_profile: str) -> dict:
+    """Worker-process entry point: split one book with one backend."""
+    from app.models import PageRange
+    from app.services.pdf_splitter import PDFSplitterService
+    from app.services.split_backends import get_split_backend
+
+    base_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # The splitter silently falls back to PyMuPDF when qpdf cannot parse a file
+    fallback = False
+    probe = get_split_backend(backend)
+    try:
+        probe.close(probe.open(pdf_path))
+    except Exception:
+        fallback = True
+
+    page_ranges = [PageRange(song_title=f'Song {i}', start_page=start, end_page=end)
+                   for i, (start, end) in enumerate(ranges)]
+    with tempfile.TemporaryDirectory() as out_dir:
+        service = PDFSplitterService(local_mode=True, local_output_path=out_dir + '/',
+                                     save_profile=save_profile, split_backend=backend)
+        start = time.perf_counter()
+        output_files = service.split_pdf(pdf_path, page_ranges, 'Artist', 'Book')
+        wall = time.perf_counter() - start
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'wall_sec': wall,
+        'peak_mb': max(0, peak_kb - base_kb) / 1024,
+        'bytes': sum(f.file_size_bytes for f in output_files),
+        'songs': len(output_files),
+        'fallback': fallback,
+    }
+
+
+def benchmark_book(pdf_path: Path, ranges: list, backends: list, save_profile: str) -> dict:
+    """Run every backend on one book, each in a fresh process."""
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                results[backend] = executor.submit(
+                    run_backend, backend, str(pdf_path), ranges, save_profile).result()
+            except Exception as e:
+                results[backend] = {'error': str(e)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PDF split backends')
+    parser.add_argument('--artist', help='Only this artist')
+    parser.add_argument('--backends', default=','.join(SPLIT_BACKENDS),
+                        help=f"Comma-separated backends (default: {','.join(SPLIT_BACKENDS)})")
+    parser.add_argument('--save-profile', default='none', help='Save profile for both backends')
+    parser.add_argument('--large-mb', type=float, default=50, help='Large-book threshold in MB')
+    parser.add_argument('--max-books', type=int, default=0, help='Stop after N books (default: all)')
+    parser.add_argument('--json', help='Write per-book results to this file')
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    unknown = [b for b in backends if b not in SPLIT_BACKENDS]
+    if unknown:
+        parser.error(f"Unknown backends: {', '.join(unknown)}")
+
+    pattern = f"{args.artist}/*/output_files.json" if args.artist else "*/*/output_files.json"
+    results = []
+
+    for output_json in sorted(ARTIFACTS_DIR.glob(pattern)):
+        if args.max_books and len(results) >= args.max_books:
+            break
+        artist, book_name = output_json.parent.parent.name, output_json.parent.name
+        source_pdf = INPUT_DIR / artist / f"{artist} - {book_name}.pdf"
+        if not source_pdf.exists():
+            print(f"  SKIP {artist} - {book_name}: source PDF not found")
+            continue
+        with open(output_json, encoding='utf-8') as f:
+            ranges = [e['page_range'] for e in json.load(f).get('output_files', []) if e.get('page_range')]
+
+        kind = book_type(source_pdf, int(args.large_mb * 1024 * 1024))
+        runs = benchmark_book(source_pdf, ranges, backends, args.save_profile)
+        results.append({'book': f"{artist} - {book_name}", 'type': kind, 'songs': len(ranges),
+                        'source_bytes': source_pdf.stat().st_size, 'runs': runs})
+
+        summary = ', '.join(
+            f"{b} ERROR" if 'error' in r else
+            f"{b} {r['wall_sec']:.1f}s/{r['peak_mb']:.0f}MB/{r['bytes'] / 1024 / 1024:.1f}MB"
+            + (' (fell back)' if r['fallback'] else '')
+            for b, r in runs.items()
+        )
+        print(f"  [{kind}] {artist} - {book_name}: {summary}")
+
+    if not results:
+        print("No books with output_files.json and a source PDF found")
+        return
+
+    print(f"\n{len(results)} books")
+    print(f"  {'type':<8} {'backend':<8} {'books':>5} {'wall':>9} {'peak':>8} {'output':>10} {'errors':>6}")
+    for kind in ('small', 'large', 'corrupt'):
+        books = [r for r in results if r['type'] == kind]
+        if not books:
+            continue
+        wall_by_backend = {}
+        for backend in backends:
+            ok = [r['runs'][backend] for r in books if 'error' not in r['runs'][backend]]
+            errors = len(books) - len(ok)
+            wall = sum(r['wall_sec'] for r in ok)
+            peak = max((r['peak_mb'] for r in ok), default=0)
+            size = sum(r['bytes'] for r in ok)
+            if not errors:
+                wall_by_backend[backend] = wall
+            print(f"  {kind:<8} {backend:<8} {len(books):>5} {wall:>8.1f}s {peak:>6.0f}MB "
+                  f"{size / 1024 / 1024:>8.1f}MB {errors:>6}")
+        if wall_by_backend:
+            print(f"  {kind:<8} fastest without errors: {min(wall_by_backend, key=wall_by_backend.get)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"  Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
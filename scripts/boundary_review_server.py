@@ -3,10 +3,16 @@
 Local server for the Boundary Review viewer.
 Serves static files AND handles split execution via API.
 
+With --virtual, song PDFs are built on request from the source book and the
+current verified_songs.json ranges (GET /api/song-pdf), applying a fix only
+rewrites verified_songs.json, and song PDFs are written and uploaded when the
+book is published (POST /api/publish).
+
 Usage:
     python scripts/boundary_review_server.py
     python scripts/boundary_review_server.py --port 8080
     python scripts/boundary_review_server.py --dry-run
+    python scripts/boundary_review_server.py --virtual
 
 Then open: http://localhost:8080/web/editors/boundary_review.html
 """
@@ -14,18 +20,21 @@ Then open: http://localhost:8080/web/editors/boundary_review.html
 import argparse
 import json
 import os
-import shutil
 import sys
 import time
 import traceback
 from functools import partial
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 from pathlib import Path
-from urllib.parse import unquote
+from urllib.parse import parse_qs, unquote, urlparse
 
 sys.stdout.reconfigure(line_buffering=True)
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.page_table import load_page_analysis
+
 ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
 INPUT_DIR = PROJECT_ROOT / 'SheetMusic_Input'
 OUTPUT_DIR = PROJECT_ROOT / 'SheetMusic_Output'
@@ -33,7 +42,12 @@ OUTPUT_DIR = PROJECT_ROOT / 'SheetMusic_Output'
 S3_ARTIFACTS_BUCKET = 'jsmith-artifacts'
 S3_OUTPUT_BUCKET = 'jsmith-output'
 
+# Written next to output_files.json when a publish could not sync S3
+S3_PENDING_NAME = 's3_pending.json'
+
 DRY_RUN = False
+VIRTUAL = False
+VIRTUAL_STORE = None  # VirtualSongStore when --virtual
 
 
 def sanitize_filename(title, artist):
@@ -81,8 +95,7 @@ def apply_absorption_fix(artist, book, split_pages, merge_pages=None):
             vs_data = json.load(f)
         with open(of_path, encoding='utf-8') as f:
             of_data = json.load(f)
-        with open(pa_path, encoding='utf-8') as f:
-            pa_data = json.load(f)
+        pa_data = load_page_analysis(pa_path, columns=['detected_title'])
     except Exception as e:
         result['status'] = 'error'
         result['errors'].append(f'Failed to load artifacts: {e}')
@@ -205,7 +218,62 @@ def apply_absorption_fix(artist, book, split_pages, merge_pages=None):
         print(f'  DRY RUN — not writing anything')
         return result
 
-    # === Now re-extract PDFs ===
+    if VIRTUAL:
+        # Song PDFs are built on request; nothing is extracted until publish
+        vs_data['verified_songs'] = songs
+        with open(vs_path, 'w', encoding='utf-8') as f:
+            json.dump(vs_data, f, indent=2, ensure_ascii=False)
+        print(f'  Updated verified_songs.json (song PDFs pending publish)')
+        result['virtual'] = True
+        result['new_song_count'] = len(songs)
+        result['old_song_count'] = len(of_data['output_files'])
+        return result
+
+    vs_data['verified_songs'] = songs
+    publish = publish_book(artist, book, vs_data)
+    if publish['status'] != 'ok':
+        result['status'] = publish['status']
+    result['errors'].extend(publish['errors'])
+    result['new_song_count'] = publish.get('new_song_count', 0)
+    result['old_song_count'] = publish.get('old_song_count', 0)
+    return result
+
+
+def write_s3_pending(path, output_files, uploads, **extra):
+    """Write the s3_pending.json marker (see publish_book)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'output_files': output_files, 'uploads': uploads, **extra},
+                  f, indent=2, ensure_ascii=False)
+
+
+def publish_book(artist, book, vs_data=None):
+    """
+    Materialize a book's song PDFs from its verified_songs and sync S3.
+
+    Only songs whose range, title or artist changed since output_files.json
+    are re-extracted and uploaded. vs_data, when given, is written as the
+    new verified_songs.json first.
+
+    Before touching S3, s3_pending.json records the output_files list S3
+    last matched and every song object about to be uploaded under a new
+    name. If the S3 step fails, local files and output_files.json are still
+    updated and the marker stays: the next publish diffs against the
+    recorded list, so the failed uploads and deletions are redone, and then
+    deletes recorded uploads the final output_files no longer uses.
+    """
+    book_dir = ARTIFACTS_DIR / artist / book
+    vs_path = book_dir / 'verified_songs.json'
+    of_path = book_dir / 'output_files.json'
+    pending_path = book_dir / S3_PENDING_NAME
+    result = {'artist': artist, 'book': book, 'status': 'ok', 'errors': []}
+
+    if vs_data is None:
+        with open(vs_path, encoding='utf-8') as f:
+            vs_data = json.load(f)
+    with open(of_path, encoding='utf-8') as f:
+        of_data = json.load(f)
+    songs = vs_data['verified_songs']
+
     source_pdf = INPUT_DIR / artist / f'{artist} - {book}.pdf'
     if not source_pdf.exists():
         result['status'] = 'error'
@@ -213,60 +281,55 @@ def apply_absorption_fix(artist, book, split_pages, merge_pages=None):
         return result
 
     try:
-        import fitz  # PyMuPDF
+        from app.services.incremental_split import IncrementalSplitter
     except ImportError:
         result['status'] = 'error'
         result['errors'].append('PyMuPDF (fitz) not installed. Run: pip install PyMuPDF')
         return result
 
-    # Delete old output PDFs locally
-    local_output_dir = OUTPUT_DIR / artist / book
-    if local_output_dir.exists():
-        old_count = len(list(local_output_dir.glob('*.pdf')))
-        shutil.rmtree(local_output_dir)
-        print(f'  Deleted {old_count} old local PDFs')
-    local_output_dir.mkdir(parents=True, exist_ok=True)
-
-    # Re-extract all songs from source PDF
-    doc = fitz.open(str(source_pdf))
-    total_pages = len(doc)
-    new_output_files = []
-
-    for song in songs:
-        title = song['song_title']
-        start = song['start_page']
-        end = song['end_page']
-        song_artist = song.get('artist', artist)
-
-        filename = sanitize_filename(title, song_artist)
-        local_path = local_output_dir / filename
-        s3_key = f'v3/{artist}/{book}/{filename}'
-        output_uri = f's3://{S3_OUTPUT_BUCKET}/{s3_key}'
-
-        page_count = min(end, total_pages) - start
-        if page_count <= 0:
-            print(f'    SKIP: "{title}" [{start}-{end}] — 0 pages')
-            continue
-
-        new_doc = fitz.open()
-        new_doc.insert_pdf(doc, from_page=start, to_page=min(end, total_pages) - 1)
-        new_doc.save(str(local_path))
-        new_doc.close()
+    old_output_files = of_data['output_files']
 
-        file_size = local_path.stat().st_size
-        new_output_files.append({
-            'song_title': title,
-            'artist': song_artist,
-            'output_uri': output_uri,
-            'file_size_bytes': file_size,
-            'page_range': [start, end],
-        })
+    # What S3 holds: output_files.json, unless an earlier S3 sync failed
+    pending = {'output_files': old_output_files}
+    if pending_path.exists():
+        with open(pending_path, encoding='utf-8') as f:
+            pending = json.load(f)
+        print(f'  S3 sync pending from an earlier publish; diffing against the last synced state')
+    s3_output_files = pending['output_files']
+    uploads = pending.get('uploads', [])
 
-    doc.close()
-    print(f'  Extracted {len(new_output_files)} song PDFs locally')
+    # Re-extract only changed songs; S3 is kept in step when reachable
+    s3 = None
+    try:
+        from app.utils.s3_transfer import create_s3_client
+        s3 = create_s3_client(region_name='us-east-1')
+        splitter = IncrementalSplitter(OUTPUT_DIR, S3_OUTPUT_BUCKET, s3_client=s3)
+        # Record new object names first, so an interrupted upload leaves no untracked orphans
+        synced = {entry['output_uri'] for entry in s3_output_files}
+        planned = splitter.planned_uploads(artist, book, s3_output_files, songs, sanitize_filename)
+        uploads = list(dict.fromkeys(uploads + [uri for uri in planned if uri not in synced]))
+        write_s3_pending(pending_path, s3_output_files, uploads)
+        resplit = splitter.resplit(
+            artist, book, source_pdf, s3_output_files, songs, sanitize_filename)
+        orphans = splitter.delete_unused(artist, book, uploads, resplit.output_files)
+        if orphans:
+            print(f'  Deleted {orphans} song PDFs left by an interrupted publish')
+    except Exception as e:
+        result['errors'].append(f'S3 sync failed: {e}')
+        print(f'  WARNING: S3 sync failed: {e}')
+        print(f'  Local files are updated; S3 changes will be redone on the next publish.')
+        s3 = None
+        write_s3_pending(pending_path, s3_output_files, uploads, error=str(e),
+                         failed_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        resplit = IncrementalSplitter(OUTPUT_DIR, S3_OUTPUT_BUCKET).resplit(
+            artist, book, source_pdf, old_output_files, songs, sanitize_filename)
+
+    new_output_files = resplit.output_files
+    for title in resplit.skipped:
+        print(f'    SKIP: "{title}" — 0 pages')
+    print(f'  Kept {resplit.kept}, re-extracted {resplit.regenerated}, deleted {resplit.deleted} song PDFs')
 
     # Update verified_songs.json
-    vs_data['verified_songs'] = songs
     with open(vs_path, 'w', encoding='utf-8') as f:
         json.dump(vs_data, f, indent=2, ensure_ascii=False)
 
@@ -277,45 +340,28 @@ def apply_absorption_fix(artist, book, split_pages, merge_pages=None):
 
     print(f'  Updated local artifacts')
 
-    # Upload to S3
-    try:
-        import boto3
-        s3 = boto3.client('s3', region_name='us-east-1')
-
-        # Delete old S3 output
-        output_prefix = f'v3/{artist}/{book}/'
-        paginator = s3.get_paginator('list_objects_v2')
-        to_delete = []
-        for page in paginator.paginate(Bucket=S3_OUTPUT_BUCKET, Prefix=output_prefix):
-            for obj in page.get('Contents', []):
-                to_delete.append({'Key': obj['Key']})
-        if to_delete:
-            for i in range(0, len(to_delete), 1000):
-                s3.delete_objects(Bucket=S3_OUTPUT_BUCKET, Delete={'Objects': to_delete[i:i+1000]})
-            print(f'  Deleted {len(to_delete)} old S3 output PDFs')
-
-        # Upload new song PDFs
-        for entry in new_output_files:
-            uri = entry['output_uri']
-            s3_key = uri.replace(f's3://{S3_OUTPUT_BUCKET}/', '')
-            local_path = local_output_dir / sanitize_filename(entry['song_title'], entry['artist'])
-            s3.upload_file(str(local_path), S3_OUTPUT_BUCKET, s3_key)
-        print(f'  Uploaded {len(new_output_files)} song PDFs to S3')
-
-        # Upload updated artifacts
-        for name in ['verified_songs.json', 'output_files.json']:
-            local = book_dir / name
-            if local.exists():
-                s3.upload_file(str(local), S3_ARTIFACTS_BUCKET, f'v3/{artist}/{book}/{name}')
-        print(f'  Uploaded artifacts to S3')
-
-    except Exception as e:
-        result['errors'].append(f'S3 upload failed: {e}')
-        print(f'  WARNING: S3 upload failed: {e}')
-        print(f'  Local files are updated. Re-run with AWS credentials to sync S3.')
-
+    # Upload updated artifacts
+    if s3 is not None:
+        try:
+            for name in ['verified_songs.json', 'output_files.json']:
+                local = book_dir / name
+                if local.exists():
+                    s3.upload_file(str(local), S3_ARTIFACTS_BUCKET, f'v3/{artist}/{book}/{name}')
+            print(f'  Uploaded artifacts to S3')
+        except Exception as e:
+            result['errors'].append(f'S3 upload failed: {e}')
+            print(f'  WARNING: S3 upload failed: {e}')
+        # Song PDFs are in sync either way; artifacts are re-uploaded on every publish
+        if pending_path.exists():
+            pending_path.unlink()
+            print(f'  Pending S3 sync completed')
+
+    result['s3_pending'] = pending_path.exists()
+    result['kept'] = resplit.kept
+    result['regenerated'] = resplit.regenerated
+    result['deleted'] = resplit.deleted
     result['new_song_count'] = len(new_output_files)
-    result['old_song_count'] = len(of_data['output_files'])  # already updated, but we logged it
+    result['old_song_count'] = len(old_output_files)
     return result
 
 
@@ -325,14 +371,68 @@ class BoundaryReviewHandler(SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(PROJECT_ROOT), **kwargs)
 
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/api/config':
+            self.send_json(200, {'virtual': VIRTUAL, 'dry_run': DRY_RUN})
+        elif path == '/api/song-pdf':
+            self.handle_song_pdf()
+        else:
+            super().do_GET()
+
     def do_POST(self):
         if self.path == '/api/apply-fix':
             self.handle_apply_fix()
         elif self.path == '/api/preview-fix':
             self.handle_preview_fix()
+        elif self.path == '/api/publish':
+            self.handle_publish()
         else:
             self.send_error(404, 'Not found')
 
+    def handle_song_pdf(self):
+        """Build a song PDF from the source book: ?artist=&book=&start=&end= (0-indexed, end exclusive)."""
+        if VIRTUAL_STORE is None:
+            self.send_json(404, {'status': 'error', 'error': 'Server not started with --virtual'})
+            return
+        try:
+            query = parse_qs(urlparse(self.path).query)
+            artist, book = query['artist'][0], query['book'][0]
+            start, end = int(query['start'][0]), int(query['end'][0])
+            source_pdf = INPUT_DIR / artist / f'{artist} - {book}.pdf'
+            if not source_pdf.exists():
+                self.send_json(404, {'status': 'error', 'error': f'Source PDF not found: {source_pdf}'})
+                return
+            data = VIRTUAL_STORE.song_pdf(source_pdf, start, end)
+        except (KeyError, ValueError) as e:
+            self.send_json(400, {'status': 'error', 'error': str(e)})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', len(data))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_publish(self):
+        """Materialize song PDFs for a book edited in virtual mode."""
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length))
+            artist, book = body['artist'], body['book']
+
+            if DRY_RUN:
+                self.send_json(200, {'status': 'dry_run', 'errors': []})
+                return
+
+            print(f'\n=== PUBLISH: {artist} / {book} ===')
+            self.send_json(200, publish_book(artist, book))
+
+        except Exception as e:
+            traceback.print_exc()
+            self.send_json(500, {'status': 'error', 'error': str(e)})
+
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -355,8 +455,7 @@ class BoundaryReviewHandler(SimpleHTTPRequestHandler):
             book_dir = ARTIFACTS_DIR / artist / book
             with open(book_dir / 'verified_songs.json', encoding='utf-8') as f:
                 vs_data = json.load(f)
-            with open(book_dir / 'page_analysis.json', encoding='utf-8') as f:
-                pa_data = json.load(f)
+            pa_data = load_page_analysis(book_dir / 'page_analysis.json', columns=['detected_title'])
 
             songs = [dict(s) for s in vs_data['verified_songs']]  # deep copy
             pa_lookup = {p['pdf_page']: p for p in pa_data.get('pages', [])}
@@ -456,10 +555,18 @@ def main():
     parser = argparse.ArgumentParser(description='Boundary Review server')
     parser.add_argument('--port', type=int, default=8080)
     parser.add_argument('--dry-run', action='store_true', help='Preview only, do not modify files')
+    parser.add_argument('--virtual', action='store_true',
+                        help='Serve song PDFs from source ranges; write PDFs only on publish')
+    parser.add_argument('--virtual-cache', type=Path,
+                        help='Directory for caching built song PDFs across runs (with --virtual)')
     args = parser.parse_args()
 
-    global DRY_RUN
+    global DRY_RUN, VIRTUAL, VIRTUAL_STORE
     DRY_RUN = args.dry_run
+    VIRTUAL = args.virtual
+    if VIRTUAL:
+        from app.services.virtual_songs import VirtualSongStore
+        VIRTUAL_STORE = VirtualSongStore(cache_dir=args.virtual_cache)
 
     os.chdir(PROJECT_ROOT)
 
@@ -469,6 +576,7 @@ def main():
     print(f'  Serving: {PROJECT_ROOT}')
     print(f'  Port: {args.port}')
     print(f'  Dry run: {DRY_RUN}')
+    print(f'  Virtual song PDFs: {VIRTUAL}')
     print(f'  Open: {url}')
     print(f'  Press Ctrl+C to stop\n')
 
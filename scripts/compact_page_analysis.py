@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Convert local page_analysis.json artifacts to the compact page-table format.
+
+Raw vision responses move to page_analysis.raw.json.gz next to each artifact.
+Already-compact files are skipped. Push the result to S3 afterwards with:
+
+    python scripts/sync_mirrors.py --direction up --only artifacts
+
+Usage:
+    python scripts/compact_page_analysis.py             # dry run
+    python scripts/compact_page_analysis.py --apply
+    python scripts/compact_page_analysis.py --apply --artist "Billy Joel"
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+sys.stdout.reconfigure(line_buffering=True)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.page_table import RAW_SIDECAR_NAME, is_compact, write_page_analysis
+
+ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact local page_analysis.json artifacts')
+    parser.add_argument('--artist', help='Only this artist')
+    parser.add_argument('--apply', action='store_true', help='Write changes (default: dry run)')
+    args = parser.parse_args()
+
+    root = ARTIFACTS_DIR / args.artist if args.artist else ARTIFACTS_DIR
+    pattern = '*/page_analysis.json' if args.artist else '*/*/page_analysis.json'
+
+    converted = skipped = 0
+    before_total = after_total = 0
+    for pa_path in sorted(root.glob(pattern)):
+        with open(pa_path, encoding='utf-8') as f:
+            data = json.load(f)
+        if is_compact(data):
+            skipped += 1
+            continue
+
+        before = pa_path.stat().st_size
+        if args.apply:
+            write_page_analysis(pa_path, data)
+            sidecar = pa_path.parent / RAW_SIDECAR_NAME
+            after = pa_path.stat().st_size + (sidecar.stat().st_size if sidecar.exists() else 0)
+            after_total += after
+            print(f'  {pa_path.parent.parent.name} / {pa_path.parent.name}: '
+                  f'{before / 1024:.0f} KB -> {after / 1024:.0f} KB')
+        else:
+            print(f'  would compact {pa_path.parent.parent.name} / {pa_path.parent.name} ({before / 1024:.0f} KB)')
+        before_total += before
+        converted += 1
+
+    print(f'\n{converted} to compact, {skipped} already compact')
+    if args.apply and converted:
+        print(f'{before_total / 1048576:.1f} MB -> {after_total / 1048576:.1f} MB')
+    elif not args.apply:
+        print('Dry run - use --apply to write changes.')
+
+
+if __name__ == '__main__':
+    main()
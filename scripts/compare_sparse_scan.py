@@ -0,0 +1,130 @@
+"""
+Compare sparse (TOC-guided) page scanning against full scans on the corpus.
+
+For every book with a full-scan page_analysis.json, replays the stored Phase 1
+vision results as if they were live calls, runs the sparse scan over them and
+plans both page lists with the same analyzer. Reports, per book and in total:
+
+  - vision calls: full scan (one per page) vs. sparse scan
+  - accuracy: songs whose page range is identical to the full-scan plan,
+    plus songs moved / missing / extra
+
+No Bedrock calls are made. Offset-fallback verification calls are excluded
+from both sides.
+
+Usage:
+    python scripts/compare_sparse_scan.py
+    python scripts/compare_sparse_scan.py --artist "Billy Joel" --verbose
+    python scripts/compare_sparse_scan.py --boundary-mode decoder --json sparse_report.json
+"""
+
+import argparse
+import copy
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.holistic_page_analyzer import HolisticPageAnalyzer
+from app.services.replan import NoVisionClient, diff_verified_songs
+from app.utils.page_table import load_page_analysis
+
+ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
+
+
+def compare_book(book_dir: Path, analyzer: HolisticPageAnalyzer) -> dict:
+    """Replay one book's stored page results through full and sparse scanning."""
+    page_analysis = load_page_analysis(book_dir / 'page_analysis.json', with_raw=True)
+    with open(book_dir / 'toc_parse.json', encoding='utf-8') as f:
+        toc_entries = json.load(f).get('entries', [])
+
+    stored = analyzer.pages_from_dicts(page_analysis.get('pages', []))
+    total = len(stored)
+    sorted_toc = sorted(toc_entries, key=lambda x: x.get('page_number', 999))
+
+    def replay(indices):
+        return {i: copy.deepcopy(stored[i]) for i in indices}
+
+    if len(sorted_toc) >= analyzer.SPARSE_MIN_TOC_ENTRIES:
+        sparse_pages, stats = analyzer.sparse_scan(replay, total, sorted_toc)
+    else:
+        sparse_pages, stats = copy.deepcopy(stored), {'full_scan': total}
+
+    book_id = page_analysis.get('book_id', '')
+    full = analyzer.plan_book(copy.deepcopy(stored), toc_entries, total, book_id, '')
+    sparse = analyzer.plan_book(sparse_pages, toc_entries, total, book_id, '')
+    diff = diff_verified_songs(analyzer.to_verified_songs(full), analyzer.to_verified_songs(sparse))
+
+    return {
+        'book': f"{book_dir.parent.name} - {book_dir.name}",
+        'pages': total,
+        'sparse_calls': sum(stats.values()),
+        'stats': stats,
+        'songs': diff['old_count'],
+        'identical': diff['unchanged'],
+        'moved': diff['moved'],
+        'missing': [s['song_title'] for s in diff['removed']],
+        'extra': [s['song_title'] for s in diff['added']],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare sparse vs. full page scanning')
+    parser.add_argument('--artist', help='Only this artist')
+    parser.add_argument('--boundary-mode', choices=['greedy', 'decoder'], default='greedy')
+    parser.add_argument('--json', help='Write the per-book report to this file')
+    parser.add_argument('--verbose', action='store_true', help='List songs that differ')
+    args = parser.parse_args()
+
+    analyzer = HolisticPageAnalyzer(bedrock_client=NoVisionClient(),
+                                    boundary_mode=args.boundary_mode)
+    pattern = f"{args.artist}/*/page_analysis.json" if args.artist else "*/*/page_analysis.json"
+    book_dirs = [p.parent for p in sorted(ARTIFACTS_DIR.glob(pattern))
+                 if (p.parent / 'toc_parse.json').exists()]
+
+    reports = []
+    for book_dir in book_dirs:
+        try:
+            r = compare_book(book_dir, analyzer)
+        except Exception as e:
+            print(f"  ERROR {book_dir.parent.name} - {book_dir.name}: {e}")
+            continue
+        reports.append(r)
+        saved = 1 - r['sparse_calls'] / r['pages'] if r['pages'] else 0
+        escalated = ' (escalated)' if r['stats'].get('full_scan') else ''
+        print(f"  {r['book']}: {r['sparse_calls']}/{r['pages']} calls ({saved:.0%} saved){escalated}, "
+              f"{r['identical']}/{r['songs']} songs identical")
+        if args.verbose:
+            for m in r['moved']:
+                print(f"      moved   {m['song_title']}: {m['old_range']} -> {m['new_range']}")
+            for title in r['missing']:
+                print(f"      missing {title}")
+            for title in r['extra']:
+                print(f"      extra   {title}")
+
+    if not reports:
+        print("No books with page_analysis.json and toc_parse.json found")
+        return
+
+    pages = sum(r['pages'] for r in reports)
+    calls = sum(r['sparse_calls'] for r in reports)
+    songs = sum(r['songs'] for r in reports)
+    identical = sum(r['identical'] for r in reports)
+    exact_books = sum(1 for r in reports if r['identical'] == r['songs'] and not r['extra'])
+    escalated = sum(1 for r in reports if r['stats'].get('full_scan'))
+
+    print(f"\n{len(reports)} books, {escalated} fell back to a full scan")
+    print(f"  Vision calls: {calls:,} sparse vs {pages:,} full ({1 - calls / pages:.1%} saved)")
+    print(f"  Songs identical: {identical:,}/{songs:,} ({identical / songs:.1%})" if songs else "")
+    print(f"  Books identical: {exact_books}/{len(reports)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+        print(f"  Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
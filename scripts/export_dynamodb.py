@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Export a DynamoDB table to a backup file.
+
+Runs a parallel segmented Scan and streams each page to disk, in the same
+layout as `aws dynamodb scan --output json` (restore with restore_dynamodb.py).
+
+Usage:
+    python scripts/export_dynamodb.py --table jsmith-pipeline-ledger
+    python scripts/export_dynamodb.py --table jsmith-pipeline-ledger --output data/backup.json --segments 8
+"""
+
+import argparse
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import boto3
+from botocore.config import Config
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.ledger_backup import DEFAULT_SEGMENTS, export_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export a DynamoDB table to a backup file')
+    parser.add_argument('--table', required=True, help='Table to export')
+    parser.add_argument('--output',
+                        help='Backup file (default: data/dynamodb_backup_<table>_<date>.json)')
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS,
+                        help=f'Parallel scan segments (default: {DEFAULT_SEGMENTS})')
+    parser.add_argument('--page-size', type=int,
+                        help='Items per Scan request, to limit read capacity per call')
+    args = parser.parse_args()
+
+    output = Path(args.output) if args.output else \
+        PROJECT_ROOT / 'data' / f'dynamodb_backup_{args.table}_{date.today().isoformat()}.json'
+    client = boto3.client('dynamodb', config=Config(
+        max_pool_connections=args.segments * 2, retries={'mode': 'standard', 'max_attempts': 5}))
+
+    print(f'Exporting {args.table} with {args.segments} scan segments...')
+    started = time.time()
+    count = export_table(client, args.table, output, segments=args.segments,
+                         page_size=args.page_size)
+    print(f'Wrote {count} items to {output} ({time.time() - started:.1f}s)')
+
+
+if __name__ == '__main__':
+    main()
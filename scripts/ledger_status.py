@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Corpus-wide view of the DynamoDB processing ledger from a local snapshot.
+
+The snapshot (.cache/ledger_snapshot.json.gz) is reused while it is younger
+than --max-age, otherwise refreshed: incrementally (items updated since the
+last scan) or, with --full or once a day, with a full parallel scan.
+
+Usage:
+    python scripts/ledger_status.py                        # status counts
+    python scripts/ledger_status.py --status failed        # list failed books
+    python scripts/ledger_status.py --full --segments 8    # force a full scan
+    python scripts/ledger_status.py --export ledger.json   # dump every entry
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+sys.stdout.reconfigure(encoding='utf-8', line_buffering=True)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.ledger_snapshot import DEFAULT_SCAN_SEGMENTS, LedgerCache
+from app.utils.sqlite_ledger import SQLiteLedgerTable
+
+DYNAMODB_TABLE = 'jsmith-pipeline-ledger'
+CACHE_PATH = PROJECT_ROOT / '.cache' / 'ledger_snapshot.json.gz'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ledger status from a cached snapshot')
+    parser.add_argument('--status', help='List books with this status')
+    parser.add_argument('--max-age', type=float, default=300,
+                        help='Reuse a snapshot younger than this many seconds (default: 300)')
+    parser.add_argument('--full', action='store_true', help='Force a full table scan')
+    parser.add_argument('--segments', type=int, default=DEFAULT_SCAN_SEGMENTS,
+                        help=f'Parallel scan segments (default: {DEFAULT_SCAN_SEGMENTS})')
+    parser.add_argument('--page-size', type=int,
+                        help='Items per scan request, to limit read capacity per call')
+    parser.add_argument('--export', help='Write every entry to this JSON file')
+    parser.add_argument('--ledger-db', help='Read a local SQLite ledger instead of DynamoDB')
+    args = parser.parse_args()
+
+    if args.ledger_db:
+        table = SQLiteLedgerTable(args.ledger_db, name=DYNAMODB_TABLE)
+    else:
+        import boto3
+        table = boto3.resource('dynamodb').Table(DYNAMODB_TABLE)
+    # The local ledger is already on disk: no snapshot file needed
+    ledger = LedgerCache(table, cache_path=None if args.ledger_db else CACHE_PATH,
+                         segments=args.segments,
+                         page_size=args.page_size)
+    if args.full:
+        ledger.refresh(full=True)
+    else:
+        ledger.ensure(max_age_sec=args.max_age)
+
+    print(f'{len(ledger)} ledger entries')
+    for status, count in sorted(ledger.status_counts().items(), key=lambda kv: -kv[1]):
+        print(f'  {status:15s} {count:5d}')
+
+    if args.status:
+        entries = ledger.by_status(args.status)
+        print(f'\n{args.status} ({len(entries)}):')
+        for item in entries:
+            step = item.get('current_step') or ''
+            error = (item.get('error_message') or '')[:80]
+            print(f"  {item.get('artist')} / {item.get('book_name')}  "
+                  f"[{step}] {item.get('updated_at', '')}  {error}")
+
+    if args.export:
+        entries = sorted(ledger.items.values(),
+                         key=lambda i: (i.get('artist', ''), i.get('book_name', '')))
+        with open(args.export, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+        print(f'\nExported {len(entries)} entries to {args.export}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Manage a local SQLite ledger (see app/utils/sqlite_ledger.py).
+
+Runner scripts use it with --ledger-db instead of the DynamoDB table. Backups
+use the same layout as `aws dynamodb scan --output json`, so a local ledger
+can be seeded from data/dynamodb_backup_*.json and exported back.
+
+Usage:
+    python scripts/local_ledger.py import data/dynamodb_backup_jsmith-pipeline-ledger_2026-02-14.json
+    python scripts/local_ledger.py export ledger_backup.json
+    python scripts/local_ledger.py bench --books 400
+    python scripts/local_ledger.py import backup.json --db /tmp/ledger.sqlite --replace
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+sys.stdout.reconfigure(encoding='utf-8', line_buffering=True)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.ledger_writer import LedgerWriter
+from app.utils.sqlite_ledger import SQLiteLedgerTable
+
+DEFAULT_DB = PROJECT_ROOT / '.cache' / 'ledger.sqlite'
+STEPS = ['toc_discovery', 'toc_parser', 'page_analysis', 'pdf_splitter']
+
+
+def run_book(table, book_id, writer=None):
+    """The ledger traffic of one single-book run: start, 2 updates per step, final status."""
+    now = '2026-01-01T00:00:00Z'
+    table.put_item(Item={'book_id': book_id, 'status': 'in_progress', 'steps': {},
+                         'created_at': now, 'updated_at': now})
+    for step in STEPS:
+        for status in ('in_progress', 'success'):
+            data = {'status': status, 'started_at': now, 'duration_sec': 1.5}
+            if writer:
+                writer.set_step(book_id, step, data, updated_at=now, current_step=step,
+                                flush=status == 'success')
+            else:
+                table.update_item(
+                    Key={'book_id': book_id},
+                    UpdateExpression='SET steps.#step = :d, updated_at = :now, current_step = :c',
+                    ExpressionAttributeNames={'#step': step},
+                    ExpressionAttributeValues={':d': data, ':now': now, ':c': step})
+    final = {'status': 'success', 'updated_at': now, 'songs_extracted': 12}
+    if writer:
+        writer.finalize(book_id, final)
+    else:
+        table.update_item(
+            Key={'book_id': book_id},
+            UpdateExpression='SET #s = :s, updated_at = :now, songs_extracted = :n',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={':s': 'success', ':now': now, ':n': 12})
+
+
+def bench(books):
+    """Time direct vs coalesced ledger writes against a scratch database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ('direct', 'coalesced'):
+            with SQLiteLedgerTable(Path(tmp) / f'{label}.sqlite') as table:
+                writer = LedgerWriter(table) if label == 'coalesced' else None
+                started = time.perf_counter()
+                for n in range(books):
+                    run_book(table, f'book-{n:05d}', writer)
+                if writer:
+                    writer.close()
+                elapsed = time.perf_counter() - started
+                writes = books * (2 + 2 * len(STEPS)) if not writer else books + writer.writes
+                print(f'  {label:10s} {books} books in {elapsed:.2f}s '
+                      f'({elapsed / books * 1000:.2f} ms/book, {writes} writes)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage a local SQLite ledger')
+    parser.add_argument('--db', default=str(DEFAULT_DB), help=f'Ledger file (default: {DEFAULT_DB})')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_import = sub.add_parser('import', help='Load a DynamoDB JSON backup')
+    p_import.add_argument('backup_file')
+    p_import.add_argument('--replace', action='store_true', help='Delete existing items first')
+    p_export = sub.add_parser('export', help='Write a DynamoDB JSON backup')
+    p_export.add_argument('backup_file')
+    p_bench = sub.add_parser('bench', help='Measure ledger write overhead (scratch database)')
+    p_bench.add_argument('--books', type=int, default=400)
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        bench(args.books)
+        return
+
+    with SQLiteLedgerTable(args.db) as table:
+        if args.command == 'import':
+            count = table.import_backup(args.backup_file, replace=args.replace)
+            print(f'Imported {count} items into {args.db} ({table.item_count} total)')
+        else:
+            count = table.export_backup(args.backup_file)
+            print(f'Exported {count} items from {args.db} to {args.backup_file}')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,6 @@ Copy processed song PDFs to MobileSheets import structure with arrangement namin
 Format: SheetMusic_ForImport/<Artist>/<Book>/<Song Title>[ - <Arrangement>].pdf
 """
 
-import json
 import re
 import shutil
 import sys
@@ -15,6 +14,7 @@ from typing import Dict, List, Tuple
 # Add parent directory to path to import from app
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.utils.sanitization import sanitize_song_title
+from app.utils.corpus_index import group_by_book, open_corpus_index
 
 # Directories
 ARTIFACTS_DIR = Path("SheetMusic_Artifacts")
@@ -67,65 +67,50 @@ def collect_all_songs() -> Tuple[Dict, Dict]:
     # book_songs: (artist, book) -> list of song entries
     book_songs = {}
 
-    for artist_dir in ARTIFACTS_DIR.iterdir():
-        if not artist_dir.is_dir():
-            continue
-
-        artist = artist_dir.name
-
-        for book_dir in artist_dir.iterdir():
-            if not book_dir.is_dir():
-                continue
-
-            book = book_dir.name
-            verified_path = book_dir / "verified_songs.json"
-
-            if not verified_path.exists():
-                continue
-
-            # Load verified songs
-            with open(verified_path, 'r', encoding='utf-8') as f:
-                verified_data = json.load(f)
-
-            # Load output files to get actual song-level artist
-            output_path = book_dir / "output_files.json"
-            song_artists = {}
-            if output_path.exists():
-                with open(output_path, 'r', encoding='utf-8') as f:
-                    output_data = json.load(f)
-                for output_file in output_data.get('output_files', []):
-                    song_artists[output_file['song_title']] = output_file['artist']
-
-            songs = verified_data.get('verified_songs', [])
-            arrangement_type = detect_arrangement_type(book)
-
-            # Track songs for this book
-            book_songs[(artist, book)] = []
-
-            for song in songs:
-                title = song['song_title']
-                normalized = normalize_title(title)
-                # Get actual song artist from output_files.json, fallback to book artist
-                song_artist = song_artists.get(title, artist)
-
-                # Record occurrence
-                song_occurrences[normalized].append({
-                    'artist': artist,
-                    'book': book,
-                    'original_title': title,
-                    'song_artist': song_artist,  # Add actual song artist
-                    'arrangement': arrangement_type,
-                    'start_page': song['start_page'],
-                    'end_page': song['end_page']
-                })
-
-                # Track for this book
-                book_songs[(artist, book)].append({
-                    'title': title,
-                    'normalized': normalized,
-                    'song_artist': song_artist,
-                    'arrangement': arrangement_type
-                })
+    index = open_corpus_index(ARTIFACTS_DIR.resolve().parent)
+    has_verified = {(r['artist'], r['book']) for r in index.query(
+        "SELECT b.artist, b.book FROM artifacts a JOIN books b ON b.id = a.book_id "
+        "WHERE a.name = 'verified_songs.json'")}
+    verified_by_book = group_by_book(index.verified_songs())
+    outputs_by_book = group_by_book(index.output_files())
+    index.close()
+
+    for artist, book in sorted(has_verified):
+        # Actual song-level artist from output_files.json
+        song_artists = {}
+        for output_file in outputs_by_book.get((artist, book), []):
+            song_artists[output_file['song_title']] = output_file['artist']
+
+        songs = verified_by_book.get((artist, book), [])
+        arrangement_type = detect_arrangement_type(book)
+
+        # Track songs for this book
+        book_songs[(artist, book)] = []
+
+        for song in songs:
+            title = song['song_title']
+            normalized = normalize_title(title)
+            # Get actual song artist from output_files.json, fallback to book artist
+            song_artist = song_artists.get(title, artist)
+
+            # Record occurrence
+            song_occurrences[normalized].append({
+                'artist': artist,
+                'book': book,
+                'original_title': title,
+                'song_artist': song_artist,  # Add actual song artist
+                'arrangement': arrangement_type,
+                'start_page': song['start_page'],
+                'end_page': song['end_page']
+            })
+
+            # Track for this book
+            book_songs[(artist, book)].append({
+                'title': title,
+                'normalized': normalized,
+                'song_artist': song_artist,
+                'arrangement': arrangement_type
+            })
 
     return song_occurrences, book_songs
 
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Refresh and query the local corpus index (.cache/corpus_index.sqlite).
+
+Usage:
+    python scripts/query_corpus.py                       # refresh + summary
+    python scripts/query_corpus.py --rebuild             # re-parse every artifact
+    python scripts/query_corpus.py "SELECT artist, COUNT(*) AS books FROM books GROUP BY artist"
+    python scripts/query_corpus.py --errors              # artifacts that failed to parse
+
+Tables: books, artifacts, toc_entries, pages, verified_songs, song_locations,
+output_files, output_pdfs (see app/utils/corpus_index.py).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+
+sys.stdout.reconfigure(encoding='utf-8', line_buffering=True)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.corpus_index import open_corpus_index
+
+
+def print_rows(rows):
+    if not rows:
+        print('(no rows)')
+        return
+    columns = list(rows[0])
+    widths = [min(40, max(len(c), *(len(str(r[c])) for r in rows))) for c in columns]
+    print('  '.join(c.ljust(w) for c, w in zip(columns, widths)))
+    print('  '.join('-' * w for w in widths))
+    for r in rows:
+        print('  '.join(str(r[c])[:w].ljust(w) for c, w in zip(columns, widths)))
+    print(f'({len(rows)} rows)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the local corpus index')
+    parser.add_argument('sql', nargs='?', help='SELECT statement to run')
+    parser.add_argument('--rebuild', action='store_true', help='Re-parse every artifact')
+    parser.add_argument('--errors', action='store_true', help='List artifacts that failed to parse')
+    args = parser.parse_args()
+
+    index = open_corpus_index(PROJECT_ROOT, refresh=False)
+    stats = index.refresh(force=args.rebuild)
+    print(f'Index: {stats.books} books, {stats.parsed} artifacts parsed, '
+          f'{stats.unchanged} unchanged ({stats.seconds:.2f}s)\n')
+
+    if args.errors:
+        print_rows([{'artist': e['book_artist'], 'book': e['book'], 'artifact': e['name'],
+                     'error': e['parse_error']} for e in index.artifact_errors()])
+    elif args.sql:
+        started = time.time()
+        rows = index.query(args.sql)
+        print_rows(rows)
+        print(f'{(time.time() - started) * 1000:.1f} ms')
+    else:
+        print_rows(index.query(
+            'SELECT COUNT(DISTINCT artist) AS artists, COUNT(*) AS books, SUM(complete) AS complete, '
+            'SUM(song_count) AS songs, SUM(toc_count) AS toc_entries, SUM(local_pdf_count) AS local_pdfs '
+            'FROM books'))
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,134 +1,67 @@
 """
 Regenerate the V3 Book Index HTML page from local artifacts.
 
-Scans SheetMusic_Artifacts for all completed books and generates
-web/v3_book_index.html with current data.
+Reads all books from the local corpus index (refreshed from SheetMusic_Artifacts
+and SheetMusic_Output) and generates web/v3_book_index.html with current data.
 
 Usage:
     python scripts/regenerate_v3_index.py
 """
 
 import json
-import os
+import sys
 from pathlib import Path
 from html import escape
 
 PROJECT_ROOT = Path(__file__).parent.parent
-ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
-OUTPUT_DIR = PROJECT_ROOT / 'SheetMusic_Output'
-OUTPUT_HTML = PROJECT_ROOT / 'web' / 'v3_book_index.html'
+sys.path.insert(0, str(PROJECT_ROOT))
 
-EXPECTED_ARTIFACTS = [
-    'toc_discovery.json', 'toc_parse.json', 'page_analysis.json',
-    'page_mapping.json', 'verified_songs.json', 'output_files.json'
-]
+from app.utils.corpus_index import group_by_book, open_corpus_index
 
+OUTPUT_HTML = PROJECT_ROOT / 'web' / 'v3_book_index.html'
 
-def scan_books():
-    """Scan artifacts directory and collect book data."""
-    books = []
 
-    for artist_dir in sorted(ARTIFACTS_DIR.iterdir()):
-        if not artist_dir.is_dir():
-            continue
-        artist = artist_dir.name
-        # Skip batch results files at root level
-        if artist.startswith('batch_results'):
-            continue
-
-        for book_dir in sorted(artist_dir.iterdir()):
-            if not book_dir.is_dir():
-                continue
-            book_name = book_dir.name
-
-            # Count artifacts
-            artifact_count = sum(
-                1 for a in EXPECTED_ARTIFACTS
-                if (book_dir / a).exists()
-            )
-
-            # Load output_files.json if it exists
-            output_file = book_dir / 'output_files.json'
-            song_count = 0
-            pdf_count = 0
-            total_size_bytes = 0
-            output_titles = []
-
-            if output_file.exists():
-                try:
-                    with open(output_file) as f:
-                        data = json.load(f)
-                    files = data.get('output_files', [])
-                    song_count = len(files)
-                    pdf_count = len(files)
-                    total_size_bytes = sum(
-                        f.get('file_size_bytes', 0) for f in files
-                    )
-                    output_titles = [f.get('song_title', '') for f in files]
-                except (json.JSONDecodeError, KeyError):
-                    pass
-
-            # TOC songs from toc_parse.json
-            toc_songs = 0
-            toc_titles = []
-            toc_file = book_dir / 'toc_parse.json'
-            if toc_file.exists():
-                try:
-                    with open(toc_file) as f:
-                        toc_data = json.load(f)
-                    entries = toc_data.get('entries', [])
-                    toc_songs = len(entries)
-                    toc_titles = [e.get('song_title', '') for e in entries]
-                except (json.JSONDecodeError, KeyError):
-                    pass
-
-            # Vision-detected songs from page_analysis.json
-            vision_titles = []
-            pa_file = book_dir / 'page_analysis.json'
-            if pa_file.exists():
-                try:
-                    with open(pa_file) as f:
-                        pa_data = json.load(f)
-                    for page in pa_data.get('pages', []):
-                        if page.get('content_type') == 'song_start' and page.get('detected_title'):
-                            vision_titles.append(page['detected_title'])
-                except (json.JSONDecodeError, KeyError):
-                    pass
-            vision_songs = len(vision_titles)
-
-            # Physical PDF files on local disk
-            local_pdfs = 0
-            disk_titles = []
-            local_output_dir = OUTPUT_DIR / artist / book_name
-            if local_output_dir.exists():
-                for f in sorted(local_output_dir.iterdir()):
-                    if f.suffix == '.pdf':
-                        local_pdfs += 1
-                        name = f.stem
-                        # Strip "Artist - " prefix if present
-                        if ' - ' in name:
-                            name = name.split(' - ', 1)[1]
-                        disk_titles.append(name)
-
-            is_complete = artifact_count == 6
-
-            books.append({
-                'artist': artist,
-                'book_name': book_name,
-                'song_count': song_count,
-                'toc_songs': toc_songs,
-                'vision_songs': vision_songs,
-                'local_pdfs': local_pdfs,
-                'pdf_count': pdf_count,
-                'total_size_mb': round(total_size_bytes / 1024 / 1024, 1),
-                'artifact_count': artifact_count,
-                'is_complete': is_complete,
-                'output_titles': output_titles,
-                'toc_titles': toc_titles,
-                'vision_titles': vision_titles,
-                'disk_titles': disk_titles,
-            })
+def scan_books():
+    """Collect book data from the corpus index (refreshed from changed artifacts only)."""
+    index = open_corpus_index(PROJECT_ROOT)
+    output_titles = group_by_book(index.output_files())
+    toc_titles = group_by_book(index.toc_entries())
+    vision_titles = group_by_book(index.query(
+        "SELECT b.artist AS book_artist, b.book, p.detected_title FROM pages p JOIN books b ON b.id = p.book_id "
+        "WHERE p.content_type = 'song_start' AND p.detected_title IS NOT NULL AND p.detected_title != '' "
+        "ORDER BY b.artist, b.book, p.pdf_page"))
+    disk_files = group_by_book(index.output_pdfs())
 
+    books = []
+    for b in index.books():
+        key = (b['artist'], b['book'])
+
+        disk_titles = []
+        for f in disk_files.get(key, []):
+            name = Path(f['filename']).stem
+            # Strip "Artist - " prefix if present
+            if ' - ' in name:
+                name = name.split(' - ', 1)[1]
+            disk_titles.append(name)
+
+        books.append({
+            'artist': b['artist'],
+            'book_name': b['book'],
+            'song_count': b['output_count'],
+            'toc_songs': b['toc_count'],
+            'vision_songs': b['vision_song_count'],
+            'local_pdfs': b['local_pdf_count'],
+            'pdf_count': b['output_count'],
+            'total_size_mb': round(b['output_bytes'] / 1024 / 1024, 1),
+            'artifact_count': b['artifact_count'],
+            'is_complete': bool(b['complete']),
+            'output_titles': [f['song_title'] or '' for f in output_titles.get(key, [])],
+            'toc_titles': [e['song_title'] or '' for e in toc_titles.get(key, [])],
+            'vision_titles': [p['detected_title'] for p in vision_titles.get(key, [])],
+            'disk_titles': disk_titles,
+        })
+
+    index.close()
     return books
 
 
@@ -0,0 +1,129 @@
+"""
+V3 Re-plan: rerun page-analysis Phases 2-5 from stored artifacts.
+
+Rebuilds each book's Phase 1 page list from its local page_analysis.json and
+reruns TOC matching, offset calculation, boundary assignment and page
+reconciliation with no vision calls, then reports how verified_songs.json
+would change. Use this to evaluate heuristic changes across the corpus in
+seconds instead of paying for a full re-analysis.
+
+By default new artifacts are written to a mirror directory so they can be
+compared side by side; --in-place overwrites the local artifacts (re-run the
+splitter afterwards for books whose songs changed).
+
+Note: offset-fallback matches that needed a live vision check during the
+original run cannot be re-verified here and are placed from the TOC instead.
+
+Usage:
+    python scripts/replan_v3.py --artist "Billy Joel" --book "52nd Street"
+    python scripts/replan_v3.py --all --workers 8
+    python scripts/replan_v3.py --all --in-place
+    python scripts/replan_v3.py --all --boundary-mode decoder
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.holistic_page_analyzer import HolisticPageAnalyzer
+from app.services.replan import NoVisionClient, replan_book
+
+ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
+DEFAULT_OUTPUT_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts_Replan'
+
+
+def find_book_dirs(artist: str = None, book: str = None) -> list:
+    """Find artifact directories that have the inputs re-planning needs."""
+    artist_dirs = [ARTIFACTS_DIR / artist] if artist else sorted(ARTIFACTS_DIR.iterdir())
+    book_dirs = []
+    for artist_dir in artist_dirs:
+        if not artist_dir.is_dir():
+            continue
+        for book_dir in sorted(artist_dir.iterdir()):
+            if book and book_dir.name != book:
+                continue
+            if (book_dir / 'page_analysis.json').exists() and (book_dir / 'toc_parse.json').exists():
+                book_dirs.append(book_dir)
+    return book_dirs
+
+
+def replan_and_write(book_dir: Path, output_root: Path, boundary_mode: str = 'greedy') -> dict:
+    """Re-plan one book and write its new artifacts. Runs in a worker process."""
+    try:
+        analyzer = HolisticPageAnalyzer(bedrock_client=NoVisionClient(), boundary_mode=boundary_mode)
+        result = replan_book(book_dir, analyzer)
+    except Exception as e:
+        return {'book': f"{book_dir.parent.name} - {book_dir.name}", 'error': str(e)}
+
+    out_dir = output_root / result.artist / result.book_name
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, data in (('verified_songs.json', result.verified_songs),
+                       ('page_mapping.json', result.page_mapping)):
+        with open(out_dir / name, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    return {'book': f"{result.artist} - {result.book_name}", 'diff': result.diff}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-plan V3 song boundaries from stored page analysis')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--artist', help='Re-plan all books for one artist')
+    group.add_argument('--all', action='store_true', help='Re-plan every book')
+    parser.add_argument('--book', help='Only this book (with --artist)')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes (default: 4)')
+    parser.add_argument('--output-dir', default=str(DEFAULT_OUTPUT_DIR),
+                        help='Where to write new artifacts (default: SheetMusic_Artifacts_Replan)')
+    parser.add_argument('--in-place', action='store_true',
+                        help='Overwrite artifacts in SheetMusic_Artifacts instead')
+    parser.add_argument('--boundary-mode', choices=['greedy', 'decoder'], default='greedy',
+                        help='Song boundary assignment to re-plan with (default: greedy)')
+    parser.add_argument('--verbose', action='store_true', help='List every moved/added/removed song')
+    args = parser.parse_args()
+
+    book_dirs = find_book_dirs(args.artist, args.book)
+    output_root = ARTIFACTS_DIR if args.in_place else Path(args.output_dir)
+    print(f"Re-planning {len(book_dirs)} books with {args.workers} workers -> {output_root}")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(replan_and_write, book_dirs, [output_root] * len(book_dirs),
+                                [args.boundary_mode] * len(book_dirs)))
+
+    changed = errors = 0
+    for r in results:
+        if 'error' in r:
+            errors += 1
+            print(f"  ERROR {r['book']}: {r['error']}")
+            continue
+        diff = r['diff']
+        if not diff['changed']:
+            continue
+        changed += 1
+        mapping = diff['page_mapping']
+        print(f"  CHANGED {r['book']}: {diff['old_count']} -> {diff['new_count']} songs, "
+              f"{len(diff['moved'])} moved, {len(diff['added'])} added, {len(diff['removed'])} removed")
+        if mapping['changed']:
+            offset = (f"offset {mapping['old_offset']} -> {mapping['new_offset']}, "
+                      if mapping['offset_changed'] else '')
+            print(f"      page_mapping: {offset}{len(mapping['moved'])} locations moved, "
+                  f"{len(mapping['added'])} added, {len(mapping['removed'])} removed")
+        if args.verbose:
+            for m in diff['moved']:
+                print(f"      moved   {m['song_title']}: {m['old_range']} -> {m['new_range']}")
+            for s in diff['added']:
+                print(f"      added   {s['song_title']}: [{s['start_page']}, {s['end_page']}]")
+            for s in diff['removed']:
+                print(f"      removed {s['song_title']}: [{s['start_page']}, {s['end_page']}]")
+            for m in mapping['moved']:
+                print(f"      mapping {m['song_title']}: printed/pdf_index {m['old']} -> {m['new']}")
+
+    print(f"\nDone: {len(results) - errors} re-planned, {changed} changed, {errors} errors")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,19 +2,28 @@
 """
 Restore DynamoDB table from backup file.
 
+The backup is streamed item by item and written with parallel BatchWriteItem
+requests (25 items each); unprocessed items are retried with backoff.
+
 Usage:
     python scripts/restore_dynamodb.py --backup-file data/dynamodb_backup_jsmith-pipeline-ledger_2026-02-14.json --table jsmith-pipeline-ledger [--dry-run]
 """
 
 import argparse
-import json
 import sys
 from decimal import Decimal
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.ledger_backup import DEFAULT_WORKERS, batch_write, iter_backup_items
+
 
 def convert_dynamodb_json(obj: Any) -> Any:
     """
@@ -60,81 +69,61 @@ def convert_dynamodb_json(obj: Any) -> Any:
     return obj
 
 
-def restore_items(backup_file: str, table_name: str, dry_run: bool = False) -> None:
+def restore_items(backup_file: str, table_name: str, dry_run: bool = False,
+                  workers: int = DEFAULT_WORKERS) -> None:
     """Restore items from backup file to DynamoDB table."""
 
-    # Load backup
+    # Items are streamed from the file and sent in DynamoDB JSON as they are
     print(f"Loading backup from: {backup_file}")
-    with open(backup_file, 'r', encoding='utf-8') as f:
-        backup_data = json.load(f)
-
-    items = backup_data.get('Items', [])
-    total_items = len(items)
-    print(f"Found {total_items} items in backup")
+    items = iter_backup_items(backup_file)
 
     if dry_run:
         print("\n[DRY RUN] Would restore the following items:")
-        for i, item in enumerate(items[:5]):
-            converted = convert_dynamodb_json(item)
-            book_id = converted.get('book_id', 'unknown')
-            artist = converted.get('artist', 'unknown')
-            book_name = converted.get('book_name', 'unknown')
-            status = converted.get('status', 'unknown')
-            print(f"  {i+1}. {artist} / {book_name} ({book_id}) - {status}")
+        total_items = 0
+        for item in items:
+            total_items += 1
+            if total_items <= 5:
+                converted = convert_dynamodb_json(item)
+                book_id = converted.get('book_id', 'unknown')
+                artist = converted.get('artist', 'unknown')
+                book_name = converted.get('book_name', 'unknown')
+                status = converted.get('status', 'unknown')
+                print(f"  {total_items}. {artist} / {book_name} ({book_id}) - {status}")
         if total_items > 5:
             print(f"  ... and {total_items - 5} more items")
         print(f"\n[DRY RUN] Would write {total_items} items to table: {table_name}")
         return
 
-    # Initialize DynamoDB
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(table_name)
+    # Low-level client: BatchWriteItem takes the backup's DynamoDB JSON directly
+    client = boto3.client('dynamodb', config=Config(
+        max_pool_connections=workers * 2, retries={'mode': 'standard', 'max_attempts': 5}))
 
     # Verify table exists
     try:
-        table.load()
+        table = client.describe_table(TableName=table_name)['Table']
         print(f"Target table: {table_name}")
-        print(f"  Status: {table.table_status}")
-        print(f"  Item count: {table.item_count}")
+        print(f"  Status: {table['TableStatus']}")
+        print(f"  Item count: {table.get('ItemCount', 0)}")
     except ClientError as e:
         print(f"Error: Table '{table_name}' does not exist or is not accessible")
         print(f"  {e}")
         sys.exit(1)
 
-    # Restore items in batches of 25 (DynamoDB batch_write limit)
-    print(f"\nRestoring {total_items} items...")
-    success_count = 0
-    error_count = 0
-
-    for i in range(0, total_items, 25):
-        batch = items[i:i+25]
-        batch_num = i // 25 + 1
-        total_batches = (total_items + 24) // 25
-
-        try:
-            with table.batch_writer() as writer:
-                for item in batch:
-                    # Convert DynamoDB JSON to Python types
-                    converted_item = convert_dynamodb_json(item)
-                    writer.put_item(Item=converted_item)
-                    success_count += 1
-
-            print(f"  Batch {batch_num}/{total_batches}: Restored {min(i+25, total_items)}/{total_items} items")
-
-        except ClientError as e:
-            print(f"  Batch {batch_num}/{total_batches}: ERROR - {e}")
-            error_count += len(batch)
+    print(f"\nRestoring with {workers} parallel BatchWriteItem workers...")
+    stats = batch_write(client, table_name, items, workers=workers)
 
     # Summary
     print(f"\n{'='*60}")
     print(f"RESTORATION COMPLETE")
     print(f"{'='*60}")
-    print(f"  Total items: {total_items}")
-    print(f"  Successful: {success_count}")
-    print(f"  Errors: {error_count}")
-
-    if error_count > 0:
-        print(f"\nWARNING: {error_count} items failed to restore")
+    print(f"  Total items: {stats.written + stats.failed}")
+    print(f"  Successful: {stats.written}")
+    print(f"  Errors: {stats.failed}")
+    print(f"  Requests: {stats.requests} ({stats.retries} retries of unprocessed items)")
+    print(f"  Time: {stats.seconds:.1f}s")
+
+    if stats.failed > 0:
+        print(f"\nWARNING: {stats.failed} items failed to restore: {stats.first_error}")
         sys.exit(1)
 
 
@@ -173,9 +162,16 @@ Examples:
         help='Preview restoration without writing to DynamoDB'
     )
 
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Concurrent BatchWriteItem requests (default: {DEFAULT_WORKERS})'
+    )
+
     args = parser.parse_args()
 
-    restore_items(args.backup_file, args.table, args.dry_run)
+    restore_items(args.backup_file, args.table, args.dry_run, args.workers)
 
 
 if __name__ == '__main__':
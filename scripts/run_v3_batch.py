@@ -9,6 +9,14 @@ Parallelism strategy (based on load testing):
   - Sustained load throttles at ~48 concurrent (8 books x 6 workers)
   - Default: 4 parallel books x 6 workers each = 24 concurrent calls
   - Vision workers retry with exponential backoff on throttling
+  - Books start longest-predicted first (--order lpt): run time is estimated
+    from page count and the per-page durations of past runs in the ledger,
+    so the largest books do not start last and leave a single-book tail
+  - In-process, page analysis uses one global scheduler by default: all
+    parallel-books x max-workers vision workers serve a shared queue of
+    page-level tasks from every active book (fair share per book, probes
+    first), so a large book picks up the slots a finished small book frees.
+    --scheduler per-book restores a fixed pool per book.
 
 Usage:
     # All books for one artist (parallel)
@@ -20,16 +28,44 @@ Usage:
     # Subset
     python scripts/run_v3_batch.py --artist "Billy Joel" --only "52nd Street,Glass Houses"
 
-    # Dry run to see what would process
+    # Dry run to see what would process (with predicted wall time and cost)
     python scripts/run_v3_batch.py --all --dry-run
 
     # Tuning
     python scripts/run_v3_batch.py --all --parallel-books 4 --max-workers 12
+
+    # Spread vision calls over several regions' quotas
+    python scripts/run_v3_batch.py --all --parallel-books 8 --regions us-east-1,us-west-2
+
+    # 48 vision workers shared by up to 12 books in flight
+    python scripts/run_v3_batch.py --all --parallel-books 12 --vision-workers 48
+
+    # Staged: overlap downloads, TOC and splitting with other books' page scans
+    python scripts/run_v3_batch.py --all --engine staged --parallel-books 8 --split-books 2
+
+    # One subprocess per book (isolates crashes in native code)
+    python scripts/run_v3_batch.py --all --engine subprocess
+
+Engines:
+  - inprocess (default): books run on threads of this process and share one
+    S3 client, one ledger writer, the vision client (its connection pool,
+    regional routing and request de-duplication) and the TOC services. Saves
+    an interpreter start and re-import of the service stack per book, and
+    coalesces ledger writes across books. A failing book is recorded and the
+    batch continues; a crash in native code (segfault) takes the batch down.
+  - staged: in-process, but each stage has its own worker pool and queue:
+    download (--download-workers), TOC discovery + parsing (--toc-workers),
+    page analysis (--parallel-books books at a time) and split/upload/sync
+    (--split-books). A book moves to the next stage as soon as that stage has
+    a free worker, so downloads, TOC calls and splits of some books overlap
+    other books' page scans instead of waiting behind them.
+  - subprocess: each book runs scripts/run_v3_single_book.py in its own process.
 """
 
 import argparse
 import json
 import os
+import signal
 import subprocess
 import sys
 import time
@@ -39,8 +75,18 @@ from datetime import datetime
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.batch_planner import STRATEGIES, BatchPlan, CostModel, PageCounter, plan_batch
+from app.utils.log_context import install_log_labels, log_label
+from app.utils.stage_pipeline import Stage, StagedPipeline
+from app.utils.s3_inventory import Inventory, S3Inventory, scan_local
+
 INPUT_DIR = PROJECT_ROOT / 'SheetMusic_Input'
 ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
+ARTIFACTS_BUCKET = 'jsmith-artifacts'
+INVENTORY_CACHE_DIR = PROJECT_ROOT / '.cache' / 'inventory'
+PAGE_COUNT_CACHE = PROJECT_ROOT / '.cache' / 'page_counts.json.gz'
 PYTHON = sys.executable
 
 # Lock for synchronized console output
@@ -89,19 +135,78 @@ def get_all_books() -> list:
     return all_books
 
 
-def is_already_processed(artist: str, book_name: str) -> bool:
+EXPECTED_ARTIFACTS = ['toc_discovery.json', 'toc_parse.json', 'page_analysis.json',
+                      'page_mapping.json', 'verified_songs.json', 'output_files.json']
+
+
+def load_artifact_inventory(source: str = 'local', max_age_sec: float = 3600) -> Inventory:
+    """
+    Snapshot of existing artifacts, keyed like the artifacts bucket (v3/{artist}/{book}/{file}).
+
+    Args:
+        source: 'local' (one walk of SheetMusic_Artifacts) or 's3' (one listing
+            of the artifacts bucket, cached on disk for max_age_sec)
+        max_age_sec: Oldest acceptable cached S3 snapshot
+    """
+    if source == 's3':
+        return S3Inventory(ARTIFACTS_BUCKET, 'v3/',
+                           cache_path=INVENTORY_CACHE_DIR / f'{ARTIFACTS_BUCKET}.json.gz').ensure(max_age_sec)
+    return scan_local(ARTIFACTS_DIR, key_prefix='v3/')
+
+
+def is_already_processed(artist: str, book_name: str, inventory: Inventory) -> bool:
     """Check if a book already has all 6 artifacts (skip if complete)."""
-    book_dir = ARTIFACTS_DIR / artist / book_name
-    if not book_dir.exists():
-        return False
+    return inventory.all_exist(f"v3/{artist}/{book_name}/{f}" for f in EXPECTED_ARTIFACTS)
+
 
-    expected = ['toc_discovery.json', 'toc_parse.json', 'page_analysis.json',
-                'page_mapping.json', 'verified_songs.json', 'output_files.json']
-    return all((book_dir / f).exists() for f in expected)
+def load_ledger_history(ledger_db: str = None) -> list:
+    """Ledger items for fitting the planner (empty if the ledger is unreachable)."""
+    try:
+        if ledger_db:
+            from app.utils.sqlite_ledger import SQLiteLedgerTable
+            with SQLiteLedgerTable(ledger_db) as table:
+                return list(table.iter_items())
+        from app.utils.ledger_snapshot import open_ledger_cache
+        return list(open_ledger_cache(PROJECT_ROOT, max_age_sec=3600).items.values())
+    except Exception as e:
+        print(f"  WARNING: no ledger history for the planner ({e}); using default rates")
+        return []
+
+
+def plan_books(books: list, slots: int, strategy: str, ledger_db: str = None) -> BatchPlan:
+    """
+    Estimate each book from its page count and ledger history, then order them.
+
+    Returns:
+        BatchPlan; plan.order holds estimates in start order (matched back to
+        the book dicts by (artist, book_name))
+    """
+    counter = PageCounter(PAGE_COUNT_CACHE)
+    history = load_ledger_history(ledger_db)
+    page_counts, sizes = {}, {}
+    for item in history:
+        key = (item.get('artist') or '', item.get('book_name') or '')
+        pdf = INPUT_DIR / key[0] / f"{key[0]} - {key[1]}.pdf"
+        pages = counter.count(pdf) if pdf.exists() else None
+        if pages:
+            page_counts[key] = pages
+            sizes[key] = pdf.stat().st_size / 1024 / 1024
+    model = CostModel.fit(history, page_counts, sizes)
+
+    estimates = []
+    for b in books:
+        pages = counter.count(INPUT_DIR / b['artist'] / b['file_name'])
+        estimates.append(model.estimate(b['artist'], b['book_name'], pages, b['file_size_mb']))
+    counter.save()
+
+    print(f"\n  Planner: {model.samples} past runs -> {model.sec_per_page:.2f}s/page analysis, "
+          f"{model.split_sec_per_page:.3f}s/page split, {model.fixed_sec:.0f}s fixed per book")
+    return plan_batch(estimates, slots, strategy)
 
 
 def run_single_book(artist: str, book_name: str, max_workers: int = 6,
-                    book_num: int = 0, total_books: int = 0) -> dict:
+                    book_num: int = 0, total_books: int = 0,
+                    scan_mode: str = 'full', ledger_db: str = None) -> dict:
     """Run the V3 pipeline for a single book. Returns result dict."""
     cmd = [
         PYTHON, '-u',
@@ -109,7 +214,10 @@ def run_single_book(artist: str, book_name: str, max_workers: int = 6,
         '--artist', artist,
         '--book', book_name,
         '--max-workers', str(max_workers),
+        '--scan-mode', scan_mode,
     ]
+    if ledger_db:
+        cmd += ['--ledger-db', ledger_db]
 
     label = f"[{book_num}/{total_books}]" if total_books > 0 else ""
     start_time = time.time()
@@ -174,6 +282,149 @@ def run_single_book(artist: str, book_name: str, max_workers: int = 6,
         }
 
 
+class InProcessRunner:
+    """
+    Runs books with run_v3_single_book.run_book on the caller's thread,
+    sharing clients and the ledger writer across books.
+    """
+
+    def __init__(self, max_workers: int = 6, scan_mode: str = 'full', ledger_db: str = None,
+                 vision_workers: int = None):
+        scripts_dir = str(PROJECT_ROOT / 'scripts')
+        if scripts_dir not in sys.path:
+            sys.path.insert(0, scripts_dir)
+        import run_v3_single_book as single
+        from app.utils.ledger_writer import LedgerWriter
+
+        self.single = single
+        self.opts = single.BookRunOptions(max_workers=max_workers, scan_mode=scan_mode)
+        self.s3 = single.create_s3_client()
+        if ledger_db:
+            from app.utils.sqlite_ledger import SQLiteLedgerTable
+            table = SQLiteLedgerTable(ledger_db, name=single.DYNAMODB_TABLE)
+        else:
+            import boto3
+            table = boto3.resource('dynamodb').Table(single.DYNAMODB_TABLE)
+        self.ledger = LedgerWriter(table)
+        # One queue of page-level vision tasks for all books (None: per-book pools)
+        self.scheduler = None
+        if vision_workers:
+            from app.utils.vision_scheduler import VisionScheduler
+            self.scheduler = VisionScheduler(workers=vision_workers)
+        # SIGTERM exits through main's finally, so buffered ledger updates are flushed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+        install_log_labels()
+
+    def run(self, artist: str, book_name: str, book_num: int = 0, total_books: int = 0) -> dict:
+        """Run one book; failures are returned as a result, never raised."""
+        label = f"[{book_num}/{total_books}]" if total_books > 0 else ""
+        start_time = time.time()
+        sync_print(f"\n{'='*70}")
+        sync_print(f"  {label} STARTING: {artist} - {book_name}")
+        sync_print(f"  Time: {datetime.now().strftime('%H:%M:%S')}")
+        sync_print(f"{'='*70}\n")
+
+        result = {'artist': artist, 'book_name': book_name}
+        try:
+            with log_label(label):
+                book_result = self.single.run_book(artist, book_name, self.s3, self.ledger, self.opts,
+                                                   scheduler=self.scheduler)
+            duration = time.time() - start_time
+            sync_print(f"  {label} DONE: {artist} - {book_name} ({duration/60:.1f} min)")
+            result.update(status='success', duration_sec=round(duration, 1),
+                          duration_min=round(duration / 60, 1),
+                          local_sync=(book_result or {}).get('local_sync', 'ok'))
+        except Exception as e:
+            duration = time.time() - start_time
+            sync_print(f"  {label} FAILED: {artist} - {book_name}")
+            result.update(status='failed', duration_sec=round(duration, 1), error=str(e))
+        return result
+
+    def run_staged(self, books: list, stage_workers: dict, on_result) -> StagedPipeline:
+        """
+        Run books through per-stage worker pools (see BookRun for the stages).
+
+        Args:
+            books: Book dicts (artist, book_name) in start order
+            stage_workers: Workers for 'download', 'toc', 'analyze' and 'split'
+            on_result: Called with (book, result dict) as each book finishes
+
+        Returns:
+            The finished StagedPipeline (for its per-stage summary)
+        """
+        total = len(books)
+        single = self.single
+        runner = self
+
+        class Job:
+            def __init__(self, num, book):
+                self.book = book
+                self.label = f"[{num}/{total}]"
+                self.run = single.BookRun(book['artist'], book['book_name'], runner.s3,
+                                          runner.ledger, runner.opts, scheduler=runner.scheduler)
+                self.downloaded = False
+                self.started = None
+
+        def stage(fn):
+            def call(job):
+                with log_label(job.label):
+                    return fn(job)
+            return call
+
+        def download(job):
+            sync_print(f"  {job.label} STARTING: {job.book['artist']} - {job.book['book_name']}")
+            job.started = time.time()
+            if not job.run.prepare():
+                return StagedPipeline.STOP
+            job.run.download()
+            job.downloaded = True
+
+        def done(item_result):
+            job = item_result.item
+            result = {'artist': job.book['artist'], 'book_name': job.book['book_name'],
+                      'stage_sec': item_result.stage_sec}
+            duration = time.time() - job.started if job.started else 0.0
+            if item_result.ok:
+                sync_print(f"  {job.label} DONE: {job.book['artist']} - {job.book['book_name']} "
+                           f"({duration/60:.1f} min)")
+                result.update(status='success', duration_sec=round(duration, 1),
+                              duration_min=round(duration / 60, 1),
+                              local_sync=(item_result.value or {}).get('local_sync', 'ok'))
+            else:
+                with log_label(job.label):
+                    # Failures before the download are not recorded, as in run_book
+                    if job.downloaded:
+                        job.run.fail(item_result.error)
+                    else:
+                        single.logger.error(f"Book failed: {item_result.error}")
+                sync_print(f"  {job.label} FAILED ({item_result.failed_stage}): "
+                           f"{job.book['artist']} - {job.book['book_name']}")
+                result.update(status='failed', duration_sec=round(duration, 1),
+                              error=str(item_result.error))
+            with log_label(job.label):
+                job.run.cleanup()
+            on_result(job.book, result)
+
+        pipeline = StagedPipeline([
+            Stage('download', stage(download), stage_workers['download']),
+            Stage('toc', stage(lambda job: job.run.toc()), stage_workers['toc']),
+            Stage('analyze', stage(lambda job: job.run.analyze()), stage_workers['analyze']),
+            Stage('split', stage(lambda job: job.run.split()), stage_workers['split']),
+        ], on_done=done)
+        pipeline.run(Job(n, book) for n, book in enumerate(books, 1))
+        return pipeline
+
+    def close(self):
+        """Flush buffered ledger updates and log the shared vision client's stats."""
+        if self.scheduler:
+            stats = self.scheduler.stats()
+            self.scheduler.shutdown()
+            sync_print(f"  Vision scheduler: {stats['workers']} workers, "
+                       f"{stats['utilization']:.0%} utilization")
+        self.ledger.close()
+        self.single.log_vision_stats()
+
+
 def main():
     parser = argparse.ArgumentParser(description='V3 Batch Pipeline Runner')
     group = parser.add_mutually_exclusive_group(required=True)
@@ -189,8 +440,40 @@ def main():
                         help='Number of books to process in parallel (default: 4)')
     parser.add_argument('--max-workers', type=int, default=6,
                         help='Parallel Bedrock vision calls per book (default: 6)')
+    parser.add_argument('--regions',
+                        help='Comma-separated Bedrock regions to route vision calls across '
+                             '(sets BEDROCK_REGIONS for each book run)')
+    parser.add_argument('--scan-mode', choices=['full', 'sparse'], default='full',
+                        help='Page analysis scan mode (sparse: only pages around TOC-predicted boundaries)')
+    parser.add_argument('--inventory', choices=['local', 's3'], default='local',
+                        help='Where to look for finished books: local artifacts or the S3 artifacts bucket')
+    parser.add_argument('--ledger-db',
+                        help='Keep the ledger in this local SQLite file instead of DynamoDB')
+    parser.add_argument('--engine', choices=['inprocess', 'staged', 'subprocess'], default='inprocess',
+                        help='Run books on threads of this process (default), through per-stage '
+                             'worker pools (staged), or one subprocess each')
+    parser.add_argument('--scheduler', choices=['global', 'per-book'], default='global',
+                        help='In-process page analysis: one vision queue for all books (default) '
+                             'or --max-workers per book')
+    parser.add_argument('--vision-workers', type=int,
+                        help='Global scheduler workers (default: parallel-books x max-workers)')
+    parser.add_argument('--download-workers', type=int, default=4,
+                        help='Staged engine: concurrent source downloads (default: 4)')
+    parser.add_argument('--toc-workers', type=int, default=4,
+                        help='Staged engine: concurrent TOC discovery/parsing (default: 4)')
+    parser.add_argument('--split-books', type=int, default=2,
+                        help='Staged engine: books splitting/uploading at once (default: 2)')
+    parser.add_argument('--order', choices=STRATEGIES, default='lpt',
+                        help='Start order: longest predicted first (default) or path order')
     args = parser.parse_args()
 
+    use_scheduler = args.engine in ('inprocess', 'staged') and args.scheduler == 'global'
+    vision_workers = (args.vision_workers or args.parallel_books * args.max_workers) \
+        if use_scheduler else None
+
+    if args.regions:
+        os.environ['BEDROCK_REGIONS'] = args.regions
+
     skip_books = set(b.strip() for b in args.skip.split(',')) if args.skip else set()
     only_books = set(b.strip() for b in args.only.split(',')) if args.only else None
 
@@ -206,6 +489,8 @@ def main():
         print("No books found!")
         sys.exit(1)
 
+    inventory = load_artifact_inventory(args.inventory) if not args.force else None
+
     # Filter
     books_to_run = []
     skipped_complete = 0
@@ -219,24 +504,35 @@ def main():
             continue
 
         # Skip already-processed books unless --force
-        if not args.force and is_already_processed(artist, name):
+        if not args.force and is_already_processed(artist, name, inventory):
             skipped_complete += 1
             continue
 
         books_to_run.append(b)
 
     # Show plan
-    total_conc = args.parallel_books * args.max_workers
+    total_conc = vision_workers or args.parallel_books * args.max_workers
     print(f"\nPlan:")
     print(f"  Books to process:    {len(books_to_run)}")
     print(f"  Already complete:    {skipped_complete} (skipped)")
     print(f"  Parallel books:      {args.parallel_books}")
-    print(f"  Vision workers/book: {args.max_workers}")
+    if vision_workers:
+        print(f"  Vision workers:      {vision_workers} (global scheduler, shared by all books)")
+    else:
+        print(f"  Vision workers/book: {args.max_workers}")
     print(f"  Total concurrency:   {total_conc} Bedrock calls")
-
-    if total_conc > 50:
-        print(f"  WARNING: {total_conc} concurrent calls exceeds tested safe limit of 50")
-        print(f"           Consider reducing --parallel-books or --max-workers")
+    print(f"  Engine:              {args.engine}")
+    if args.engine == 'staged':
+        print(f"  Stage workers:       download {args.download_workers}, toc {args.toc_workers}, "
+              f"analyze {args.parallel_books}, split {args.split_books}")
+    regions = [r for r in os.environ.get('BEDROCK_REGIONS', 'us-east-1').split(',') if r.strip()]
+    print(f"  Bedrock regions:     {', '.join(regions)}")
+
+    # The tested safe limit applies per region quota
+    if total_conc > 50 * len(regions):
+        print(f"  WARNING: {total_conc} concurrent calls exceeds tested safe limit of "
+              f"50 per region ({50 * len(regions)})")
+        print(f"           Consider reducing --parallel-books, --max-workers or --vision-workers")
 
     # Group by artist for display
     by_artist = {}
@@ -251,6 +547,27 @@ def main():
             for b in books:
                 print(f"      {b['file_size_mb']:6.1f} MB  {b['book_name']}")
 
+    # Order books so the longest start first; predict wall time and cost
+    plan = None
+    if books_to_run:
+        plan = plan_books(books_to_run, args.parallel_books, args.order, args.ledger_db)
+        by_key = {(b['artist'], b['book_name']): b for b in books_to_run}
+        books_to_run = [by_key[(e.artist, e.book_name)] for e in plan.order]
+        for e in plan.order:
+            by_key[(e.artist, e.book_name)]['predicted_sec'] = round(e.predicted_sec, 1)
+        path_plan = plan_batch(sorted(plan.order, key=lambda e: (e.artist, e.book_name)),
+                               args.parallel_books, 'path')
+        pages = sum(e.pages for e in plan.order)
+        print(f"  Pages:               {pages} ({sum(e.pages_source != 'pdf' for e in plan.order)} "
+              f"books estimated from file size)")
+        print(f"  Predicted wall time: {plan.makespan_sec/3600:.1f} hr ({plan.strategy} order; "
+              f"path order {path_plan.makespan_sec/3600:.1f} hr, "
+              f"lower bound {plan.lower_bound_sec/3600:.1f} hr)")
+        print(f"  Predicted work:      {plan.total_sec/3600:.1f} book-hours")
+        print(f"  Predicted cost:      ${plan.cost_usd:,.2f} (vision + Textract estimate)")
+        for e in plan.order[:3]:
+            print(f"    {e.predicted_sec/60:6.1f} min  {e.pages:4d} pages  {e.artist} - {e.book_name}")
+
     if args.dry_run:
         print("\n[DRY RUN] No processing performed.")
         return
@@ -260,15 +577,29 @@ def main():
     results = []
     results_lock = threading.Lock()
     completed_count = [0]  # mutable counter
+    runner = InProcessRunner(max_workers=args.max_workers, scan_mode=args.scan_mode,
+                             ledger_db=args.ledger_db, vision_workers=vision_workers) \
+        if args.engine in ('inprocess', 'staged') else None
+    stage_summary = None
 
     def process_book(book, book_num):
-        result = run_single_book(
-            book['artist'], book['book_name'],
-            max_workers=args.max_workers,
-            book_num=book_num,
-            total_books=len(books_to_run)
-        )
+        if runner:
+            result = runner.run(book['artist'], book['book_name'],
+                                book_num=book_num, total_books=len(books_to_run))
+        else:
+            result = run_single_book(
+                book['artist'], book['book_name'],
+                max_workers=args.max_workers,
+                book_num=book_num,
+                total_books=len(books_to_run),
+                scan_mode=args.scan_mode,
+                ledger_db=args.ledger_db
+            )
+        return record_result(book, result)
+
+    def record_result(book, result):
         result['file_size_mb'] = book['file_size_mb']
+        result['predicted_sec'] = book.get('predicted_sec')
 
         with results_lock:
             results.append(result)
@@ -281,24 +612,36 @@ def main():
                        f"Elapsed: {elapsed/60:.1f} min")
         return result
 
-    if args.parallel_books <= 1:
-        # Sequential mode
-        for i, book in enumerate(books_to_run):
-            process_book(book, i + 1)
-    else:
-        # Parallel mode
-        with ThreadPoolExecutor(max_workers=args.parallel_books) as executor:
-            futures = {}
+    try:
+        if args.engine == 'staged':
+            pipeline = runner.run_staged(books_to_run, {
+                'download': args.download_workers,
+                'toc': args.toc_workers,
+                'analyze': args.parallel_books,
+                'split': args.split_books,
+            }, record_result)
+            stage_summary = pipeline.summary(time.time() - batch_start)
+        elif args.parallel_books <= 1:
+            # Sequential mode
             for i, book in enumerate(books_to_run):
-                future = executor.submit(process_book, book, i + 1)
-                futures[future] = book
-
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    book = futures[future]
-                    sync_print(f"  EXCEPTION: {book['artist']} - {book['book_name']}: {e}")
+                process_book(book, i + 1)
+        else:
+            # Parallel mode
+            with ThreadPoolExecutor(max_workers=args.parallel_books) as executor:
+                futures = {}
+                for i, book in enumerate(books_to_run):
+                    future = executor.submit(process_book, book, i + 1)
+                    futures[future] = book
+
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        book = futures[future]
+                        sync_print(f"  EXCEPTION: {book['artist']} - {book['book_name']}: {e}")
+    finally:
+        if runner:
+            runner.close()
 
     # Final summary
     batch_duration = time.time() - batch_start
@@ -307,6 +650,12 @@ def main():
     print(f"{'='*70}")
     print(f"  Duration: {batch_duration/60:.1f} min ({batch_duration/3600:.1f} hr)")
     print(f"  Config:   {args.parallel_books} parallel books x {args.max_workers} workers")
+    if plan:
+        print(f"  Predicted: {plan.makespan_sec/60:.1f} min ({args.order} order)")
+    if stage_summary:
+        for name, st in stage_summary.items():
+            print(f"  Stage {name:9s} {st['workers']:3d} workers, {st['items']:4d} books, "
+                  f"{st['utilization']:.0%} busy, mean queue wait {st['mean_wait_sec']:.0f}s")
     print()
 
     succeeded = [r for r in results if r['status'] == 'success']
@@ -322,6 +671,12 @@ def main():
             err = r.get('error', 'Unknown')[:80]
             print(f"    [{r['status']}] {r['artist']} - {r['book_name']}: {err}")
 
+    unsynced = [r for r in succeeded if r.get('local_sync', 'ok') != 'ok']
+    if unsynced:
+        print(f"\n  LOCAL MIRROR OUT OF DATE ({len(unsynced)}; S3 is complete, run scripts/sync_mirrors.py):")
+        for r in unsynced:
+            print(f"    {r['artist']} - {r['book_name']}: {r['local_sync'][:80]}")
+
     # Save results
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     results_file = PROJECT_ROOT / 'SheetMusic_Artifacts' / f'batch_results_{timestamp}.json'
@@ -333,6 +688,14 @@ def main():
                 'parallel_books': args.parallel_books,
                 'max_workers': args.max_workers,
                 'total_concurrency': total_conc,
+                'engine': args.engine,
+                'vision_workers': vision_workers,
+            },
+            'stages': stage_summary,
+            'plan': {
+                'order': args.order,
+                'predicted_makespan_sec': round(plan.makespan_sec, 1) if plan else None,
+                'predicted_cost_usd': round(plan.cost_usd, 2) if plan else None,
             },
             'total_duration_sec': round(batch_duration, 1),
             'books_processed': len(results),
@@ -0,0 +1,153 @@
+"""
+V3 Bedrock Batch Page Analysis
+
+Re-runs page analysis (step 3) for many books through a single Bedrock
+model-invocation (batch) job instead of synchronous invoke_model calls, so a
+corpus-wide re-analysis is not throttled by per-minute quotas.
+
+All page-classification requests are written as JSONL under an S3 input prefix,
+one batch job is submitted and polled, and the output is ingested back into
+per-book page lists. Phases 2-5 then run locally with no further vision calls
+and write page_analysis.json, page_mapping.json and verified_songs.json as usual.
+
+Books must already have toc_parse.json (run the TOC steps first).
+
+Usage:
+    python scripts/run_v3_bedrock_batch.py --artist "Billy Joel" --role-arn arn:aws:iam::123:role/BedrockBatch
+    python scripts/run_v3_bedrock_batch.py --all --role-arn ... --dry-run
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import boto3
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.bedrock_batch import BatchBook, BedrockBatchJobService, BedrockBatchPageScanner
+from app.utils.s3_inventory import S3Inventory
+from app.utils.s3_transfer import create_s3_client
+from app.utils.ledger_writer import LedgerWriter
+from run_v3_batch import INPUT_DIR, get_all_books, get_books_for_artist
+from run_v3_single_book import (
+    ARTIFACTS_BUCKET, INPUT_BUCKET, S3_PREFIX, DYNAMODB_TABLE,
+    generate_book_id, get_artifact_prefix, read_artifact_json,
+    run_page_analysis, update_dynamo_step, utc_now,
+)
+
+logger = logging.getLogger('v3_bedrock_batch')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='V3 Bedrock Batch Page Analysis')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--artist', help='Process all books for a single artist')
+    group.add_argument('--all', action='store_true', help='Process all artists')
+    parser.add_argument('--only', help='Comma-separated book names to process (only these)')
+    parser.add_argument('--role-arn', required=True,
+                        help='IAM service role Bedrock uses to read/write the batch prefixes')
+    parser.add_argument('--job-name', help='Batch job name (default: v3-pages-<timestamp>)')
+    parser.add_argument('--poll-interval', type=int, default=60,
+                        help='Seconds between job status checks (default: 60)')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would run')
+    args = parser.parse_args()
+
+    only_books = set(b.strip() for b in args.only.split(',')) if args.only else None
+    all_books = get_all_books() if args.all else get_books_for_artist(args.artist)
+    if only_books:
+        all_books = [b for b in all_books if b['book_name'] in only_books]
+
+    s3 = create_s3_client()
+    artifacts = S3Inventory(ARTIFACTS_BUCKET, f"{S3_PREFIX}/", s3_client=s3).ensure()
+
+    # Collect books that are ready for page analysis
+    batch_books = []
+    book_info = {}
+    for b in all_books:
+        artist, book_name = b['artist'], b['book_name']
+        s3_key = f"{S3_PREFIX}/{artist}/{artist} - {book_name}.pdf"
+        source_pdf_uri = f"s3://{INPUT_BUCKET}/{s3_key}"
+        book_id = generate_book_id(source_pdf_uri)
+        artifact_prefix = get_artifact_prefix(artist, book_name)
+
+        toc_key = f"{artifact_prefix}/toc_parse.json"
+        if not artifacts.exists(toc_key):
+            logger.warning(f"  SKIP {artist} - {book_name}: no toc_parse.json")
+            continue
+
+        toc_parse = read_artifact_json(s3, ARTIFACTS_BUCKET, toc_key)
+        pdf_path = str(INPUT_DIR / artist / b['file_name'])
+        batch_books.append(BatchBook(book_id=book_id, pdf_path=pdf_path,
+                                     toc_entries=toc_parse.get('entries', [])))
+        book_info[book_id] = {
+            'artist': artist,
+            'book_name': book_name,
+            'pdf_path': pdf_path,
+            'source_pdf_uri': source_pdf_uri,
+            'artifact_prefix': artifact_prefix,
+            'toc_parse': toc_parse,
+        }
+
+    logger.info(f"{len(batch_books)} books ready for batch page analysis")
+    if args.dry_run or not batch_books:
+        for info in book_info.values():
+            logger.info(f"  {info['artist']} - {info['book_name']}")
+        return
+
+    job_name = args.job_name or f"v3-pages-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    base_uri = f"s3://{ARTIFACTS_BUCKET}/batch-inference/{job_name}"
+
+    scanner = BedrockBatchPageScanner(
+        BedrockBatchJobService(role_arn=args.role_arn, s3_client=s3),
+        poll_interval=args.poll_interval
+    )
+    batch_start = time.time()
+    pages_by_book, summary = scanner.run(
+        batch_books, job_name, f"{base_uri}/input/", f"{base_uri}/output/"
+    )
+    logger.info(f"Batch job {summary.job_id}: {summary.status} "
+                f"({summary.records_succeeded}/{summary.records_submitted} records, "
+                f"{summary.duplicates_collapsed} duplicate pages collapsed, "
+                f"{(time.time() - batch_start) / 60:.1f} min)")
+
+    # Phases 2-5 per book, no further vision calls
+    ledger = LedgerWriter(boto3.resource('dynamodb').Table(DYNAMODB_TABLE))
+    failed = []
+    for book_id, info in book_info.items():
+        logger.info(f"\n{info['artist']} - {info['book_name']}")
+        step_start = time.time()
+        started_at = utc_now()
+        try:
+            verified_songs = run_page_analysis(
+                s3, info['pdf_path'], book_id, info['source_pdf_uri'],
+                info['artifact_prefix'], info['toc_parse'], info['artist'],
+                pages=pages_by_book[book_id]
+            )
+            update_dynamo_step(ledger, book_id, 'page_analysis', {
+                'status': 'success',
+                'started_at': started_at,
+                'completed_at': utc_now(),
+                'duration_sec': round(time.time() - step_start, 1),
+                'songs_found': len(verified_songs.get('verified_songs', [])),
+                'mode': 'bedrock_batch',
+                'batch_job_id': summary.job_id,
+            })
+        except Exception as e:
+            logger.error(f"  Page analysis failed: {e}", exc_info=True)
+            failed.append(f"{info['artist']} - {info['book_name']}")
+    ledger.close()
+
+    logger.info(f"\nDone: {len(book_info) - len(failed)} succeeded, {len(failed)} failed")
+    for name in failed:
+        logger.info(f"  FAILED: {name}")
+    logger.info("Re-run the splitter for these books with --force-step pdf_splitter")
+
+
+if __name__ == '__main__':
+    main()
@@ -18,12 +18,16 @@ import hashlib
 import json
 import logging
 import os
+import signal
 import sys
 import tempfile
+import threading
 import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from decimal import Decimal
 from pathlib import Path
+from typing import Optional
 
 import boto3
 
@@ -32,6 +36,12 @@ PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from app.utils.sanitization import sanitize_artist_name, sanitize_book_name
+from app.utils.s3_transfer import create_s3_client
+from app.utils.s3_inventory import S3Inventory
+from app.utils.s3_sync import DeltaSync
+from app.utils.page_table import RAW_SIDECAR_NAME, compact_page_analysis, dumps_compact
+from app.utils.ledger_writer import LedgerWriter
+from app.utils.sqlite_ledger import SQLiteLedgerTable
 
 logging.basicConfig(
     level=logging.INFO,
@@ -45,6 +55,7 @@ OUTPUT_BUCKET = 'jsmith-output'
 ARTIFACTS_BUCKET = 'jsmith-artifacts'
 S3_PREFIX = 'v3'
 DYNAMODB_TABLE = 'jsmith-pipeline-ledger'
+SYNC_MANIFEST_DIR = PROJECT_ROOT / '.cache' / 'sync'
 
 PIPELINE_STEPS = [
     'toc_discovery',
@@ -54,6 +65,61 @@ PIPELINE_STEPS = [
 ]
 
 
+@dataclass
+class BookRunOptions:
+    """Per-book pipeline settings (the single-book runner's CLI flags)."""
+    force_step: Optional[str] = None
+    dry_run: bool = False
+    max_workers: int = 1
+    boundary_mode: str = 'greedy'
+    scan_mode: str = 'full'
+    split_workers: int = 1
+    save_profile: str = 'none'
+    split_backend: str = 'pymupdf'
+
+
+class BookRunError(Exception):
+    """A book cannot be run at all (as opposed to a step failing)."""
+
+
+def log_vision_stats():
+    """Log the shared vision client's routing and de-duplication counters."""
+    from app.utils.bedrock_router import get_bedrock_client
+    bedrock = get_bedrock_client()
+    if hasattr(bedrock, 'log_stats'):
+        bedrock.log_stats()
+    from app.utils.single_flight import get_default_group
+    sf_stats = get_default_group().stats()
+    if sf_stats['collapsed']:
+        logger.info(f"  Vision calls: {sf_stats['executed']} sent, "
+                    f"{sf_stats['collapsed']} identical in-flight duplicates collapsed")
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def shared_service(factory):
+    """
+    One instance of a stateless service class per process.
+
+    The TOC services each create their AWS clients in __init__; a batch
+    running many books in one process reuses them (boto3 clients are
+    thread-safe).
+    """
+    with _services_lock:
+        if factory not in _services:
+            _services[factory] = factory()
+        return _services[factory]
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    """Page count of a local PDF (recorded in the ledger for the batch planner)."""
+    import fitz
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
 def generate_book_id(s3_uri: str) -> str:
     return hashlib.sha256(s3_uri.encode()).hexdigest()[:16]
 
@@ -93,42 +159,62 @@ def utc_now():
     return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
 
 
-def sync_to_local(s3_client, artist: str, book_name: str, source_pdf_path: str = None):
-    """Sync artifacts and output PDFs from S3 to local filesystem."""
+def artifacts_sync(s3_client) -> DeltaSync:
+    """Delta sync of the artifacts bucket with SheetMusic_Artifacts."""
+    return DeltaSync(ARTIFACTS_BUCKET, PROJECT_ROOT / 'SheetMusic_Artifacts', prefix=f"{S3_PREFIX}/",
+                     s3_client=s3_client, manifest_path=SYNC_MANIFEST_DIR / f"{ARTIFACTS_BUCKET}.json.gz")
+
+
+def output_sync(s3_client) -> DeltaSync:
+    """Delta sync of song PDFs in the output bucket with SheetMusic_Output/{Artist}/{Book}/."""
+    # Only {Artist}/{Book}/*.pdf; source songbook copies live at the artist level
+    return DeltaSync(OUTPUT_BUCKET, PROJECT_ROOT / 'SheetMusic_Output', prefix=f"{S3_PREFIX}/",
+                     s3_client=s3_client, manifest_path=SYNC_MANIFEST_DIR / f"{OUTPUT_BUCKET}.json.gz",
+                     include=lambda rel: rel.count('/') == 2 and rel.endswith('.pdf'))
+
+
+_bucket_syncs = {}
+
+
+def bucket_sync(factory, s3_client):
+    """
+    The process-wide DeltaSync made by factory (artifacts_sync or output_sync)
+    and the lock that serializes its runs.
+
+    Books finishing together in one process (in-process and staged batches)
+    then share one manifest per bucket instead of each loading, merging and
+    rewriting .cache/sync/{bucket}.json.gz.
+    """
+    with _services_lock:
+        if factory not in _bucket_syncs:
+            _bucket_syncs[factory] = (factory(s3_client), threading.Lock())
+        return _bucket_syncs[factory]
+
+
+def sync_to_local(s3_client, artist: str, book_name: str, source_pdf_path: str = None) -> list:
+    """
+    Sync artifacts and output PDFs from S3 to local filesystem (only what changed).
+
+    Returns:
+        Relative paths that failed to sync (empty on success)
+    """
     sa = sanitize_artist_name(artist)
     sb = sanitize_book_name(book_name)
+    book_prefix = f"{sa}/{sb}/"
+    failed = []
 
     # 1. Sync artifacts: s3://jsmith-artifacts/v3/{Artist}/{Book}/ → SheetMusic_Artifacts/{Artist}/{Book}/
-    artifacts_local = PROJECT_ROOT / 'SheetMusic_Artifacts' / sa / sb
-    artifacts_local.mkdir(parents=True, exist_ok=True)
-    artifacts_prefix = f"{S3_PREFIX}/{sa}/{sb}/"
-
-    paginator = s3_client.get_paginator('list_objects_v2')
-    count = 0
-    for page in paginator.paginate(Bucket=ARTIFACTS_BUCKET, Prefix=artifacts_prefix):
-        for obj in page.get('Contents', []):
-            key = obj['Key']
-            filename = key.split('/')[-1]
-            local_path = artifacts_local / filename
-            s3_client.download_file(ARTIFACTS_BUCKET, key, str(local_path))
-            count += 1
-    logger.info(f"  Synced {count} artifacts → {artifacts_local}")
-
     # 2. Sync output PDFs: s3://jsmith-output/v3/{Artist}/{Book}/ → SheetMusic_Output/{Artist}/{Book}/
-    output_local = PROJECT_ROOT / 'SheetMusic_Output' / sa / sb
-    output_local.mkdir(parents=True, exist_ok=True)
-    output_prefix = f"{S3_PREFIX}/{sa}/{sb}/"
-
-    count = 0
-    for page in paginator.paginate(Bucket=OUTPUT_BUCKET, Prefix=output_prefix):
-        for obj in page.get('Contents', []):
-            key = obj['Key']
-            filename = key.split('/')[-1]
-            if filename.endswith('.pdf'):
-                local_path = output_local / filename
-                s3_client.download_file(OUTPUT_BUCKET, key, str(local_path))
-                count += 1
-    logger.info(f"  Synced {count} song PDFs → {output_local}")
+    for factory, label in ((artifacts_sync, 'artifacts'), (output_sync, 'song PDFs')):
+        sync, lock = bucket_sync(factory, s3_client)
+        with lock:
+            result = sync.run('down', sub_prefix=book_prefix)
+        logger.info(f"  Synced {label} → {sync.local_root / sa / sb}: "
+                    f"{result.count('download')} updated, {result.count('delete_local')} removed, "
+                    f"{result.unchanged} unchanged")
+        if result.failed:
+            logger.error(f"  {len(result.failed)} {label} failed to sync: {', '.join(result.failed[:5])}")
+            failed.extend(result.failed)
 
     # 3. Copy source songbook PDF to SheetMusic_Output/{Artist}/ level
     if source_pdf_path and os.path.exists(source_pdf_path):
@@ -146,6 +232,7 @@ def sync_to_local(s3_client, artist: str, book_name: str, source_pdf_path: str =
             logger.info(f"  Downloaded source PDF → {source_dest}")
         except Exception as e:
             logger.warning(f"  Could not download source PDF: {e}")
+    return failed
 
 
 def dynamo_safe(obj):
@@ -163,6 +250,13 @@ def update_dynamo_step(table, book_id: str, step_name: str, step_data: dict,
                        current_step: str = None):
     ts = utc_now()
     step_data = dynamo_safe(step_data)
+    if isinstance(table, LedgerWriter):
+        # Buffered; a finished step wakes the flush thread, in_progress marks wait for it
+        table.set_step(book_id, step_name, step_data, updated_at=ts,
+                       current_step=current_step,
+                       flush=step_data.get('status') != 'in_progress')
+        return
+
     update_expr = 'SET steps.#step = :step_data, updated_at = :now'
     names = {'#step': step_name}
     values = {':step_data': step_data, ':now': ts}
@@ -184,7 +278,7 @@ def run_toc_discovery(s3, pdf_path: str, book_id: str, artifact_prefix: str):
     from app.services.toc_discovery import TOCDiscoveryService
 
     logger.info("Running TOC Discovery...")
-    service = TOCDiscoveryService()
+    service = shared_service(TOCDiscoveryService)
     result = service.discover_toc(pdf_path, max_pages=20)
 
     data = {
@@ -240,7 +334,7 @@ def run_toc_parser(s3, pdf_path: str, book_id: str, artifact_prefix: str,
         'toc_pages': toc_pages,
     }
 
-    service = BedrockParserService()
+    service = shared_service(BedrockParserService)
     result = service.bedrock_vision_parse(toc_images, book_metadata)
 
     data = {
@@ -269,60 +363,61 @@ def run_toc_parser(s3, pdf_path: str, book_id: str, artifact_prefix: str,
 
 def run_page_analysis(s3, pdf_path: str, book_id: str, source_pdf_uri: str,
                       artifact_prefix: str, toc_parse: dict, artist: str,
-                      max_workers: int = 1):
-    """Step 3: Holistic page analysis - analyzes every page, produces all downstream artifacts."""
+                      max_workers: int = 1, pages: list = None,
+                      boundary_mode: str = 'greedy', scan_mode: str = 'full',
+                      scheduler=None):
+    """Step 3: Holistic page analysis - analyzes every page, produces all downstream artifacts.
+
+    If `pages` is given (e.g. from a Bedrock batch job), the page scan is skipped.
+    If `scheduler` is given (a VisionScheduler shared across books), vision
+    calls go through its queue instead of this book's own max_workers pool.
+    """
     from app.services.holistic_page_analyzer import HolisticPageAnalyzer
 
     logger.info("Running Holistic Page Analysis...")
-    logger.info(f"  (max_workers={max_workers}, analyzes every page)")
+    if pages is None and scheduler is not None:
+        logger.info(f"  (shared scheduler, {scheduler.workers} workers across books)")
+    elif pages is None:
+        logger.info(f"  (max_workers={max_workers}, analyzes every page)")
+    else:
+        logger.info(f"  (using {len(pages)} pre-computed page results, no vision calls)")
+    analyzer = HolisticPageAnalyzer(max_workers=max_workers, boundary_mode=boundary_mode,
+                                    scan_mode=scan_mode, scheduler=scheduler)
 
     toc_entries = toc_parse.get('entries', [])
-    analyzer = HolisticPageAnalyzer(max_workers=max_workers)
-    result = analyzer.analyze_book(
-        pdf_path=pdf_path,
-        book_id=book_id,
-        source_pdf_uri=source_pdf_uri,
-        toc_entries=toc_entries,
-        artist=artist
-    )
+    try:
+        result = analyzer.analyze_book(
+            pdf_path=pdf_path,
+            book_id=book_id,
+            source_pdf_uri=source_pdf_uri,
+            toc_entries=toc_entries,
+            artist=artist,
+            pages=pages
+        )
+    finally:
+        if scheduler is not None:
+            scheduler.release(book_id)
 
-    # Save page_analysis.json (full analysis)
+    # Save page_analysis.json (compact page table) + raw vision responses sidecar
     result_dict = analyzer.to_dict(result)
     result_dict['book_id'] = book_id
-    write_artifact_json(s3, ARTIFACTS_BUCKET, f"{artifact_prefix}/page_analysis.json", result_dict)
+    page_analysis, raw_sidecar = compact_page_analysis(result_dict)
+    if raw_sidecar is not None:
+        s3.put_object(Bucket=ARTIFACTS_BUCKET, Key=f"{artifact_prefix}/{RAW_SIDECAR_NAME}",
+                      Body=raw_sidecar, ContentType='application/gzip')
+    else:
+        # Drop an earlier run's sidecar so replan never merges stale responses
+        s3.delete_object(Bucket=ARTIFACTS_BUCKET, Key=f"{artifact_prefix}/{RAW_SIDECAR_NAME}")
+    s3.put_object(Bucket=ARTIFACTS_BUCKET, Key=f"{artifact_prefix}/page_analysis.json",
+                  Body=dumps_compact(page_analysis), ContentType='application/json')
+    logger.info(f"  Wrote s3://{ARTIFACTS_BUCKET}/{artifact_prefix}/page_analysis.json")
 
     # Save page_mapping.json (for compatibility)
-    page_mapping = {
-        'book_id': book_id,
-        'offset': result.calculated_offset,
-        'confidence': result.offset_confidence,
-        'samples_verified': result.matched_song_count,
-        'song_locations': [
-            {
-                'song_title': song.title,
-                'printed_page': song.toc_page or song.start_pdf_page,
-                'pdf_index': song.start_pdf_page - 1,
-                'artist': song.artist
-            }
-            for song in result.songs
-        ],
-        'mapping_method': 'holistic_analysis'
-    }
+    page_mapping = analyzer.to_page_mapping(result)
     write_artifact_json(s3, ARTIFACTS_BUCKET, f"{artifact_prefix}/page_mapping.json", page_mapping)
 
     # Save verified_songs.json (for PDF splitter)
-    verified_songs = {
-        'book_id': book_id,
-        'verified_songs': [
-            {
-                'song_title': song.title,
-                'start_page': song.start_pdf_page - 1,  # Convert 1-indexed to 0-indexed
-                'end_page': song.end_pdf_page,           # 1-indexed inclusive == 0-indexed exclusive
-                'artist': song.artist
-            }
-            for song in result.songs
-        ]
-    }
+    verified_songs = analyzer.to_verified_songs(result)
     write_artifact_json(s3, ARTIFACTS_BUCKET, f"{artifact_prefix}/verified_songs.json", verified_songs)
 
     logger.info(f"  TOC songs: {result.toc_song_count}")
@@ -339,7 +434,9 @@ def run_page_analysis(s3, pdf_path: str, book_id: str, source_pdf_uri: str,
 
 
 def run_pdf_splitter(s3, pdf_path: str, book_id: str, artifact_prefix: str,
-                     verified_songs: dict, artist: str, book_name: str):
+                     verified_songs: dict, artist: str, book_name: str,
+                     workers: int = 1, save_profile: str = 'none',
+                     split_backend: str = 'pymupdf'):
     """Step 4: Split PDF into individual song files."""
     from app.services.pdf_splitter import PDFSplitterService
     from app.models import PageRange
@@ -356,8 +453,9 @@ def run_pdf_splitter(s3, pdf_path: str, book_id: str, artifact_prefix: str,
         for song in verified_songs.get('verified_songs', [])
     ]
 
-    service = PDFSplitterService(output_bucket=OUTPUT_BUCKET)
-    output_files = service.split_pdf(pdf_path, page_ranges, artist, book_name)
+    service = PDFSplitterService(output_bucket=OUTPUT_BUCKET, save_profile=save_profile,
+                                 split_backend=split_backend)
+    output_files = service.split_pdf(pdf_path, page_ranges, artist, book_name, workers=workers)
 
     # Write output_files.json to artifacts
     data = {
@@ -381,291 +479,441 @@ def run_pdf_splitter(s3, pdf_path: str, book_id: str, artifact_prefix: str,
     return data
 
 
-def main():
-    parser = argparse.ArgumentParser(description='V3 Single-Book Pipeline Runner')
-    parser.add_argument('--artist', required=True, help='Artist name')
-    parser.add_argument('--book', required=True, help='Book name')
-    parser.add_argument('--force-step', help='Force re-run of a specific step')
-    parser.add_argument('--dry-run', action='store_true', help='Show what would run without executing')
-    parser.add_argument('--max-workers', type=int, default=1,
-                        help='Parallel Bedrock vision calls for page analysis (default: 1)')
-    args = parser.parse_args()
-
-    artist = args.artist
-    book_name = args.book
-
-    # Build paths
-    s3_key = f"{S3_PREFIX}/{artist}/{artist} - {book_name}.pdf"
-    source_pdf_uri = f"s3://{INPUT_BUCKET}/{s3_key}"
-    book_id = generate_book_id(source_pdf_uri)
-    artifact_prefix = get_artifact_prefix(artist, book_name)
-
-    logger.info("=" * 70)
-    logger.info("V3 SINGLE-BOOK PIPELINE RUNNER")
-    logger.info("=" * 70)
-    logger.info(f"  Artist:          {artist}")
-    logger.info(f"  Book:            {book_name}")
-    logger.info(f"  Book ID:         {book_id}")
-    logger.info(f"  Source:          {source_pdf_uri}")
-    logger.info(f"  Artifact prefix: {artifact_prefix}")
-    logger.info("")
-
-    # AWS clients
-    s3 = boto3.client('s3')
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(DYNAMODB_TABLE)
-
-    # Verify source PDF exists
-    try:
-        s3.head_object(Bucket=INPUT_BUCKET, Key=s3_key)
-        logger.info(f"  Source PDF confirmed in S3")
-    except Exception as e:
-        logger.error(f"Source PDF not found at s3://{INPUT_BUCKET}/{s3_key}")
-        logger.error(f"Upload first: aws s3 cp \"SheetMusic_Input/{artist}/{artist} - {book_name}.pdf\" \"s3://{INPUT_BUCKET}/{s3_key}\"")
-        sys.exit(1)
-
-    # Check which steps already have artifacts
-    artifact_files = {
-        'toc_discovery': f"{artifact_prefix}/toc_discovery.json",
-        'toc_parser': f"{artifact_prefix}/toc_parse.json",
-        'page_analysis': f"{artifact_prefix}/verified_songs.json",
-        'pdf_splitter': f"{artifact_prefix}/output_files.json",
-    }
+class BookRun:
+    """
+    One book's pipeline, stage by stage.
+
+    run_book runs the stages in order on one thread. The staged batch runner
+    (run_v3_batch.py --engine staged) hands each stage to its own worker pool,
+    so a book moves on as soon as the next stage has a free worker.
+
+    Stages: prepare (source check, existing artifacts, ledger entry),
+    download, toc (discovery + parser), analyze (page analysis),
+    split (splitter, final status, local sync). Call fail() when a stage
+    after download raises, and cleanup() at the end either way.
+    """
+
+    STAGES = ('prepare', 'download', 'toc', 'analyze', 'split')
+
+    def __init__(self, artist: str, book_name: str, s3, ledger: LedgerWriter,
+                 opts: BookRunOptions = None, scheduler=None):
+        self.artist = artist
+        self.book_name = book_name
+        self.s3 = s3
+        self.ledger = ledger
+        self.opts = opts or BookRunOptions()
+        self.scheduler = scheduler
+
+        # Build paths
+        self.s3_key = f"{S3_PREFIX}/{artist}/{artist} - {book_name}.pdf"
+        self.source_pdf_uri = f"s3://{INPUT_BUCKET}/{self.s3_key}"
+        self.book_id = generate_book_id(self.source_pdf_uri)
+        self.artifact_prefix = get_artifact_prefix(artist, book_name)
+        self.artifact_files = {}
+        self.existing = {}
+        self.now_iso = None
+        self.temp_dir = None
+        self.pdf_path = None
+        self.pipeline_start = None
+        self.toc_discovery = None
+        self.toc_parse = None
+        self.verified_songs = None
+        self.output_data = None
+
+    def prepare(self) -> bool:
+        """
+        Check the source, find finished steps and create or reopen the ledger entry.
+
+        Returns:
+            False for a dry run (the plan is logged, nothing else happens)
+
+        Raises:
+            BookRunError: Source PDF missing or unknown --force-step
+        """
+        logger.info("=" * 70)
+        logger.info("V3 SINGLE-BOOK PIPELINE RUNNER")
+        logger.info("=" * 70)
+        logger.info(f"  Artist:          {self.artist}")
+        logger.info(f"  Book:            {self.book_name}")
+        logger.info(f"  Book ID:         {self.book_id}")
+        logger.info(f"  Source:          {self.source_pdf_uri}")
+        logger.info(f"  Artifact prefix: {self.artifact_prefix}")
+        logger.info("")
 
-    logger.info("Checking existing artifacts:")
-    existing = {}
-    for step, key in artifact_files.items():
+        # Verify source PDF exists
         try:
-            s3.head_object(Bucket=ARTIFACTS_BUCKET, Key=key)
-            existing[step] = True
-            logger.info(f"  {step:20s} -> EXISTS (will skip)")
-        except Exception:
-            existing[step] = False
-            logger.info(f"  {step:20s} -> not found (will run)")
-
-    # Apply force-step override
-    if args.force_step:
-        if args.force_step in existing:
-            existing[args.force_step] = False
-            logger.info(f"\n  --force-step: Will re-run {args.force_step}")
-            # Also invalidate downstream steps
-            found = False
+            self.s3.head_object(Bucket=INPUT_BUCKET, Key=self.s3_key)
+            logger.info(f"  Source PDF confirmed in S3")
+        except Exception as e:
+            logger.error(f"Source PDF not found at s3://{INPUT_BUCKET}/{self.s3_key}")
+            logger.error(f"Upload first: aws s3 cp \"SheetMusic_Input/{self.artist}/{self.artist} - "
+                         f"{self.book_name}.pdf\" \"s3://{INPUT_BUCKET}/{self.s3_key}\"")
+            raise BookRunError(f"Source PDF not found at s3://{INPUT_BUCKET}/{self.s3_key}") from e
+
+        # Check which steps already have artifacts
+        self.artifact_files = {
+            'toc_discovery': f"{self.artifact_prefix}/toc_discovery.json",
+            'toc_parser': f"{self.artifact_prefix}/toc_parse.json",
+            'page_analysis': f"{self.artifact_prefix}/verified_songs.json",
+            'pdf_splitter': f"{self.artifact_prefix}/output_files.json",
+        }
+
+        logger.info("Checking existing artifacts:")
+        # One listing of the book's artifact prefix instead of a HEAD per artifact
+        inventory = S3Inventory(ARTIFACTS_BUCKET, f"{self.artifact_prefix}/",
+                                s3_client=self.s3).ensure()
+        self.existing = {}
+        for step, key in self.artifact_files.items():
+            self.existing[step] = inventory.exists(key)
+            if self.existing[step]:
+                logger.info(f"  {step:20s} -> EXISTS (will skip)")
+            else:
+                logger.info(f"  {step:20s} -> not found (will run)")
+
+        # Apply force-step override
+        if self.opts.force_step:
+            if self.opts.force_step in self.existing:
+                self.existing[self.opts.force_step] = False
+                logger.info(f"\n  --force-step: Will re-run {self.opts.force_step}")
+                # Also invalidate downstream steps
+                found = False
+                for step in PIPELINE_STEPS:
+                    if step == self.opts.force_step:
+                        found = True
+                    if found:
+                        self.existing[step] = False
+                        if step != self.opts.force_step:
+                            logger.info(f"  --force-step: Will also re-run downstream {step}")
+            else:
+                raise BookRunError(f"Unknown step: {self.opts.force_step}. Valid: {PIPELINE_STEPS}")
+
+        if self.opts.dry_run:
+            logger.info("\n[DRY RUN] Would execute the following steps:")
             for step in PIPELINE_STEPS:
-                if step == args.force_step:
-                    found = True
-                if found:
-                    existing[step] = False
-                    if step != args.force_step:
-                        logger.info(f"  --force-step: Will also re-run downstream {step}")
-        else:
-            logger.error(f"Unknown step: {args.force_step}. Valid: {PIPELINE_STEPS}")
-            sys.exit(1)
-
-    if args.dry_run:
-        logger.info("\n[DRY RUN] Would execute the following steps:")
-        for step in PIPELINE_STEPS:
-            action = "SKIP (artifact exists)" if existing.get(step) else "RUN"
-            logger.info(f"  {step:20s} -> {action}")
-        return
+                action = "SKIP (artifact exists)" if self.existing.get(step) else "RUN"
+                logger.info(f"  {step:20s} -> {action}")
+            return False
 
-    # Initialize or update DynamoDB record
-    now_iso = utc_now()
-    try:
-        resp = table.get_item(Key={'book_id': book_id})
-        if 'Item' not in resp:
-            logger.info("Creating DynamoDB ledger entry...")
-            table.put_item(Item={
-                'book_id': book_id,
-                'artist': artist,
-                'book_name': book_name,
-                'pipeline_version': 'v3',
-                'status': 'in_progress',
-                'source_pdf_uri': source_pdf_uri,
-                'current_step': 'toc_discovery',
-                'created_at': now_iso,
-                'updated_at': now_iso,
-                'steps': {}
-            })
-        else:
-            logger.info(f"DynamoDB entry exists (status: {resp['Item'].get('status')})")
-            table.update_item(
-                Key={'book_id': book_id},
-                UpdateExpression='SET #status = :s, updated_at = :now',
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={':s': 'in_progress', ':now': now_iso}
-            )
-    except Exception as e:
-        logger.warning(f"DynamoDB update failed (continuing anyway): {e}")
+        # Initialize or update DynamoDB record
+        self.now_iso = utc_now()
+        try:
+            resp = self.ledger.table.get_item(Key={'book_id': self.book_id})
+            if 'Item' not in resp:
+                logger.info("Creating DynamoDB ledger entry...")
+                self.ledger.table.put_item(Item={
+                    'book_id': self.book_id,
+                    'artist': self.artist,
+                    'book_name': self.book_name,
+                    'pipeline_version': 'v3',
+                    'status': 'in_progress',
+                    'source_pdf_uri': self.source_pdf_uri,
+                    'current_step': 'toc_discovery',
+                    'created_at': self.now_iso,
+                    'updated_at': self.now_iso,
+                    'steps': {}
+                })
+            else:
+                logger.info(f"DynamoDB entry exists (status: {resp['Item'].get('status')})")
+                self.ledger.update(self.book_id, {'status': 'in_progress', 'updated_at': self.now_iso})
+        except Exception as e:
+            logger.warning(f"DynamoDB update failed (continuing anyway): {e}")
+        return True
 
-    # Download PDF once
-    logger.info("\nDownloading source PDF...")
-    temp_dir = tempfile.mkdtemp(prefix='v3_runner_')
-    pdf_path = os.path.join(temp_dir, f"{artist} - {book_name}.pdf")
-    s3.download_file(INPUT_BUCKET, s3_key, pdf_path)
-    pdf_size = os.path.getsize(pdf_path)
-    logger.info(f"  Downloaded {pdf_size / 1024 / 1024:.1f} MB to {pdf_path}")
+    def download(self):
+        """Download the source PDF into a temp dir (removed by cleanup())."""
+        # Download PDF once
+        logger.info("\nDownloading source PDF...")
+        self.temp_dir = tempfile.mkdtemp(prefix='v3_runner_')
+        self.pdf_path = os.path.join(self.temp_dir, f"{self.artist} - {self.book_name}.pdf")
+        self.s3.download_file(INPUT_BUCKET, self.s3_key, self.pdf_path)
+        pdf_size = os.path.getsize(self.pdf_path)
+        logger.info(f"  Downloaded {pdf_size / 1024 / 1024:.1f} MB to {self.pdf_path}")
 
-    pipeline_start = time.time()
+        self.pipeline_start = time.time()
 
-    try:
+    def toc(self):
+        """Steps 1 and 2: TOC discovery and TOC parser."""
         # ---- Step 1: TOC Discovery ----
-        if not existing.get('toc_discovery'):
+        if not self.existing.get('toc_discovery'):
             step_start = time.time()
-            update_dynamo_step(table, book_id, 'toc_discovery',
-                               {'status': 'in_progress', 'started_at': now_iso},
+            update_dynamo_step(self.ledger, self.book_id, 'toc_discovery',
+                               {'status': 'in_progress', 'started_at': self.now_iso},
                                current_step='toc_discovery')
-            toc_discovery = run_toc_discovery(s3, pdf_path, book_id, artifact_prefix)
+            self.toc_discovery = run_toc_discovery(self.s3, self.pdf_path, self.book_id,
+                                                   self.artifact_prefix)
             duration = time.time() - step_start
-            update_dynamo_step(table, book_id, 'toc_discovery', {
+            update_dynamo_step(self.ledger, self.book_id, 'toc_discovery', {
                 'status': 'success',
-                'started_at': now_iso,
+                'started_at': self.now_iso,
                 'completed_at': utc_now(),
                 'duration_sec': round(duration, 1),
-                'toc_pages_found': len(toc_discovery.get('toc_pages', []))
+                'toc_pages_found': len(self.toc_discovery.get('toc_pages', []))
             })
             logger.info(f"  TOC Discovery completed in {duration:.1f}s\n")
         else:
             logger.info("\nStep 1: TOC Discovery - SKIPPED (artifact exists)")
-            toc_discovery = read_artifact_json(s3, ARTIFACTS_BUCKET,
-                                               artifact_files['toc_discovery'])
-            logger.info(f"  Loaded existing: {len(toc_discovery.get('toc_pages', []))} TOC pages\n")
+            self.toc_discovery = read_artifact_json(self.s3, ARTIFACTS_BUCKET,
+                                                    self.artifact_files['toc_discovery'])
+            logger.info(f"  Loaded existing: {len(self.toc_discovery.get('toc_pages', []))} TOC pages\n")
 
         # ---- Step 2: TOC Parser ----
-        if not existing.get('toc_parser'):
+        if not self.existing.get('toc_parser'):
             step_start = time.time()
             now_iso2 = utc_now()
-            update_dynamo_step(table, book_id, 'toc_parser',
+            update_dynamo_step(self.ledger, self.book_id, 'toc_parser',
                                {'status': 'in_progress', 'started_at': now_iso2},
                                current_step='toc_parser')
-            toc_parse = run_toc_parser(s3, pdf_path, book_id, artifact_prefix, toc_discovery)
+            self.toc_parse = run_toc_parser(self.s3, self.pdf_path, self.book_id,
+                                            self.artifact_prefix, self.toc_discovery)
             duration = time.time() - step_start
-            update_dynamo_step(table, book_id, 'toc_parser', {
+            update_dynamo_step(self.ledger, self.book_id, 'toc_parser', {
                 'status': 'success',
                 'started_at': now_iso2,
                 'completed_at': utc_now(),
                 'duration_sec': round(duration, 1),
-                'songs_found': len(toc_parse.get('entries', []))
+                'songs_found': len(self.toc_parse.get('entries', []))
             })
             logger.info(f"  TOC Parser completed in {duration:.1f}s\n")
         else:
             logger.info("Step 2: TOC Parser - SKIPPED (artifact exists)")
-            toc_parse = read_artifact_json(s3, ARTIFACTS_BUCKET,
-                                           artifact_files['toc_parser'])
-            logger.info(f"  Loaded existing: {len(toc_parse.get('entries', []))} entries\n")
+            self.toc_parse = read_artifact_json(self.s3, ARTIFACTS_BUCKET,
+                                                self.artifact_files['toc_parser'])
+            logger.info(f"  Loaded existing: {len(self.toc_parse.get('entries', []))} entries\n")
 
+    def analyze(self):
+        """Step 3: page analysis."""
         # ---- Step 3: Page Analysis (Holistic) ----
-        if not existing.get('page_analysis'):
+        if not self.existing.get('page_analysis'):
             step_start = time.time()
             now_iso3 = utc_now()
-            update_dynamo_step(table, book_id, 'page_analysis',
+            update_dynamo_step(self.ledger, self.book_id, 'page_analysis',
                                {'status': 'in_progress', 'started_at': now_iso3},
                                current_step='page_analysis')
-            verified_songs = run_page_analysis(s3, pdf_path, book_id, source_pdf_uri,
-                                               artifact_prefix, toc_parse, artist,
-                                               max_workers=args.max_workers)
+            self.verified_songs = run_page_analysis(self.s3, self.pdf_path, self.book_id,
+                                                    self.source_pdf_uri, self.artifact_prefix,
+                                                    self.toc_parse, self.artist,
+                                                    max_workers=self.opts.max_workers,
+                                                    boundary_mode=self.opts.boundary_mode,
+                                                    scan_mode=self.opts.scan_mode,
+                                                    scheduler=self.scheduler)
             duration = time.time() - step_start
-            update_dynamo_step(table, book_id, 'page_analysis', {
+            update_dynamo_step(self.ledger, self.book_id, 'page_analysis', {
                 'status': 'success',
                 'started_at': now_iso3,
                 'completed_at': utc_now(),
                 'duration_sec': round(duration, 1),
-                'songs_found': len(verified_songs.get('verified_songs', []))
+                'songs_found': len(self.verified_songs.get('verified_songs', [])),
+                'total_pages': pdf_page_count(self.pdf_path),
             })
             logger.info(f"  Page Analysis completed in {duration:.1f}s\n")
         else:
             logger.info("Step 3: Page Analysis - SKIPPED (artifact exists)")
-            verified_songs = read_artifact_json(s3, ARTIFACTS_BUCKET,
-                                                artifact_files['page_analysis'])
-            logger.info(f"  Loaded existing: {len(verified_songs.get('verified_songs', []))} songs\n")
+            self.verified_songs = read_artifact_json(self.s3, ARTIFACTS_BUCKET,
+                                                     self.artifact_files['page_analysis'])
+            logger.info(f"  Loaded existing: {len(self.verified_songs.get('verified_songs', []))} songs\n")
 
+    def split(self) -> dict:
+        """Step 4: PDF splitter, then the final ledger status and local sync."""
         # ---- Step 4: PDF Splitter ----
-        if not existing.get('pdf_splitter'):
+        if not self.existing.get('pdf_splitter'):
             step_start = time.time()
             now_iso4 = utc_now()
-            update_dynamo_step(table, book_id, 'pdf_splitter',
+            update_dynamo_step(self.ledger, self.book_id, 'pdf_splitter',
                                {'status': 'in_progress', 'started_at': now_iso4},
                                current_step='pdf_splitter')
-            output_data = run_pdf_splitter(s3, pdf_path, book_id, artifact_prefix,
-                                           verified_songs, artist, book_name)
+            self.output_data = run_pdf_splitter(self.s3, self.pdf_path, self.book_id,
+                                                self.artifact_prefix, self.verified_songs,
+                                                self.artist, self.book_name,
+                                                workers=self.opts.split_workers,
+                                                save_profile=self.opts.save_profile,
+                                                split_backend=self.opts.split_backend)
             duration = time.time() - step_start
-            update_dynamo_step(table, book_id, 'pdf_splitter', {
+            update_dynamo_step(self.ledger, self.book_id, 'pdf_splitter', {
                 'status': 'success',
                 'started_at': now_iso4,
                 'completed_at': utc_now(),
                 'duration_sec': round(duration, 1),
-                'files_created': len(output_data.get('output_files', []))
+                'files_created': len(self.output_data.get('output_files', []))
             })
             logger.info(f"  PDF Splitter completed in {duration:.1f}s\n")
         else:
             logger.info("Step 4: PDF Splitter - SKIPPED (artifact exists)")
-            output_data = read_artifact_json(s3, ARTIFACTS_BUCKET,
-                                             artifact_files['pdf_splitter'])
-            logger.info(f"  Loaded existing: {len(output_data.get('output_files', []))} files\n")
+            self.output_data = read_artifact_json(self.s3, ARTIFACTS_BUCKET,
+                                                  self.artifact_files['pdf_splitter'])
+            logger.info(f"  Loaded existing: {len(self.output_data.get('output_files', []))} files\n")
 
         # ---- Pipeline Complete ----
-        total_duration = time.time() - pipeline_start
-        songs_count = len(output_data.get('output_files', []))
+        total_duration = time.time() - self.pipeline_start
+        songs_count = len(self.output_data.get('output_files', []))
 
         # Update DynamoDB final status
         final_now = utc_now()
-        table.update_item(
-            Key={'book_id': book_id},
-            UpdateExpression='SET #status = :s, updated_at = :now, songs_extracted = :songs, total_duration_sec = :dur',
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={
-                ':s': 'success',
-                ':now': final_now,
-                ':songs': songs_count,
-                ':dur': Decimal(str(round(total_duration, 1)))
-            }
-        )
+        self.ledger.finalize(self.book_id, {
+            'status': 'success',
+            'updated_at': final_now,
+            'songs_extracted': songs_count,
+            'total_duration_sec': Decimal(str(round(total_duration, 1))),
+        })
 
         logger.info("=" * 70)
         logger.info("PIPELINE COMPLETE")
         logger.info("=" * 70)
-        logger.info(f"  Book:     {artist} - {book_name}")
-        logger.info(f"  Book ID:  {book_id}")
+        logger.info(f"  Book:     {self.artist} - {self.book_name}")
+        logger.info(f"  Book ID:  {self.book_id}")
         logger.info(f"  Songs:    {songs_count}")
         logger.info(f"  Duration: {total_duration:.1f}s ({total_duration / 60:.1f} min)")
-        logger.info(f"  Artifacts: s3://{ARTIFACTS_BUCKET}/{artifact_prefix}/")
+        logger.info(f"  Artifacts: s3://{ARTIFACTS_BUCKET}/{self.artifact_prefix}/")
         logger.info(f"  Output:    s3://{OUTPUT_BUCKET}/{S3_PREFIX}/")
         logger.info("")
 
         # ---- Sync to local filesystem ----
+        # S3 holds the results either way; a failed mirror is reported, not raised
         logger.info("Syncing to local filesystem...")
+        local_sync = 'ok'
         try:
-            sync_to_local(s3, artist, book_name, source_pdf_path=pdf_path)
-            logger.info("  Local sync complete.\n")
+            failed = sync_to_local(self.s3, self.artist, self.book_name, source_pdf_path=self.pdf_path)
+            if failed:
+                local_sync = f"{len(failed)} files failed"
+            else:
+                logger.info("  Local sync complete.\n")
         except Exception as sync_err:
-            logger.warning(f"  Local sync failed (non-fatal): {sync_err}")
+            local_sync = f"failed: {sync_err}"
+            logger.error(f"  Local sync failed: {sync_err}", exc_info=sync_err)
+        if local_sync != 'ok':
+            logger.error(f"  Local mirror is out of date ({local_sync}); re-run scripts/sync_mirrors.py")
 
-    except Exception as e:
-        logger.error(f"Pipeline failed: {e}", exc_info=True)
+        return {'book_id': self.book_id, 'status': 'success', 'songs': songs_count,
+                'duration_sec': round(total_duration, 1), 'local_sync': local_sync}
+
+    def fail(self, e: Exception):
+        """Log a stage failure and record it in the ledger (best effort)."""
+        logger.error(f"Pipeline failed: {e}", exc_info=e)
         # Record failure in DynamoDB
         try:
             fail_now = utc_now()
-            table.update_item(
-                Key={'book_id': book_id},
-                UpdateExpression='SET #status = :s, updated_at = :now, error_message = :err',
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={
-                    ':s': 'failed',
-                    ':now': fail_now,
-                    ':err': str(e)
-                }
-            )
+            self.ledger.finalize(self.book_id, {
+                'status': 'failed',
+                'updated_at': fail_now,
+                'error_message': str(e),
+            })
         except Exception:
             pass
-        sys.exit(1)
-    finally:
-        # Cleanup temp dir
+
+    def cleanup(self):
+        """Remove the temp dir, if a download created one."""
+        if self.temp_dir is None:
+            return
         import shutil
         try:
-            shutil.rmtree(temp_dir)
-            logger.info(f"Cleaned up temp dir: {temp_dir}")
+            shutil.rmtree(self.temp_dir)
+            logger.info(f"Cleaned up temp dir: {self.temp_dir}")
         except Exception:
             pass
+        self.temp_dir = None
+
+
+def run_book(artist: str, book_name: str, s3, ledger: LedgerWriter,
+             opts: BookRunOptions = None, scheduler=None) -> dict:
+    """
+    Run the pipeline for one book: skip steps whose artifacts exist, record
+    progress in the ledger, sync results to the local mirrors.
+
+    Safe to call concurrently for different books from one process; the S3
+    client, ledger writer and vision client are shared.
+
+    Args:
+        artist: Artist name
+        book_name: Book name
+        s3: S3 client
+        ledger: Ledger writer (its .table is used for the initial read/put)
+        opts: Per-book settings (default: BookRunOptions())
+        scheduler: VisionScheduler shared with other books' page analysis
+            (default: this book's own max_workers pool)
+
+    Returns:
+        Dict with book_id, status ('success' or 'dry_run'), songs and duration_sec
+
+    Raises:
+        BookRunError: The book cannot be run (missing source PDF, unknown step)
+        Exception: A step failed; the failure is recorded in the ledger first
+    """
+    run = BookRun(artist, book_name, s3, ledger, opts, scheduler)
+    if not run.prepare():
+        return {'book_id': run.book_id, 'status': 'dry_run', 'songs': 0, 'duration_sec': 0.0}
+
+    run.download()
+    try:
+        run.toc()
+        run.analyze()
+        return run.split()
+    except Exception as e:
+        run.fail(e)
+        raise
+    finally:
+        run.cleanup()
+
 
+def main():
+    parser = argparse.ArgumentParser(description='V3 Single-Book Pipeline Runner')
+    parser.add_argument('--artist', required=True, help='Artist name')
+    parser.add_argument('--book', required=True, help='Book name')
+    parser.add_argument('--force-step', help='Force re-run of a specific step')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would run without executing')
+    parser.add_argument('--max-workers', type=int, default=1,
+                        help='Parallel Bedrock vision calls for page analysis (default: 1)')
+    parser.add_argument('--boundary-mode', choices=['greedy', 'decoder'], default='greedy',
+                        help='Song boundary assignment: greedy passes or global sequence decoder')
+    parser.add_argument('--scan-mode', choices=['full', 'sparse'], default='full',
+                        help='Classify every page, or only pages around TOC-predicted boundaries')
+    parser.add_argument('--split-workers', type=int, default=1,
+                        help='Worker processes for the PDF splitter (default: 1)')
+    parser.add_argument('--save-profile', choices=['none', 'compact', 'max', 'web', 'mobile'],
+                        default='none', help='Output PDF save profile (default: none)')
+    parser.add_argument('--split-backend', choices=['pymupdf', 'qpdf'], default='pymupdf',
+                        help='PDF engine for splitting (default: pymupdf)')
+    parser.add_argument('--ledger-flush-sec', type=float, default=5.0,
+                        help='Max seconds a DynamoDB ledger update stays buffered (default: 5)')
+    parser.add_argument('--ledger-db',
+                        help='Keep the ledger in this local SQLite file instead of DynamoDB')
+    args = parser.parse_args()
+
+    opts = BookRunOptions(
+        force_step=args.force_step,
+        dry_run=args.dry_run,
+        max_workers=args.max_workers,
+        boundary_mode=args.boundary_mode,
+        scan_mode=args.scan_mode,
+        split_workers=args.split_workers,
+        save_profile=args.save_profile,
+        split_backend=args.split_backend,
+    )
+
+    # AWS clients
+    s3 = create_s3_client()
+    if args.ledger_db:
+        table = SQLiteLedgerTable(args.ledger_db, name=DYNAMODB_TABLE)
+    else:
+        dynamodb = boto3.resource('dynamodb')
+        table = dynamodb.Table(DYNAMODB_TABLE)
+
+    # Ledger updates are buffered and merged per flush; the final status is
+    # written synchronously. SIGTERM (ECS stop, kill) exits through the
+    # finally block below so buffered updates are flushed.
+    ledger = LedgerWriter(table, flush_interval_sec=args.ledger_flush_sec)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    try:
+        result = run_book(args.artist, args.book, s3, ledger, opts)
+        if result['status'] == 'success':
+            log_vision_stats()
+    except BookRunError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    except Exception:
+        # Already logged and recorded in the ledger by run_book
+        sys.exit(1)
+    finally:
+        ledger.close()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Delta-sync the local SheetMusic_Artifacts / SheetMusic_Output mirrors with S3.
+
+Compares both sides against a persisted manifest (.cache/sync/) and moves only
+files that changed. Deletions of previously-synced files are propagated.
+
+Usage:
+    python scripts/sync_mirrors.py                          # pull whole corpus (artifacts + PDFs)
+    python scripts/sync_mirrors.py --direction up --artist "Billy Joel"
+    python scripts/sync_mirrors.py --direction both --dry-run
+    python scripts/sync_mirrors.py --only artifacts --prune  # exact mirror of S3
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+
+sys.stdout.reconfigure(line_buffering=True)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.utils.s3_sync import DIRECTIONS
+from app.utils.s3_transfer import create_s3_client
+from run_v3_single_book import artifacts_sync, output_sync
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Delta-sync local mirrors with S3')
+    parser.add_argument('--direction', choices=DIRECTIONS, default='down',
+                        help="down: S3 -> local, up: local -> S3, both: changes flow either way")
+    parser.add_argument('--artist', help='Only this artist')
+    parser.add_argument('--book', help='Only this book (requires --artist)')
+    parser.add_argument('--only', choices=['artifacts', 'output'], help='Only one mirror')
+    parser.add_argument('--no-delete', action='store_true',
+                        help='Do not propagate deletions of previously-synced files')
+    parser.add_argument('--prune', action='store_true',
+                        help='Delete destination files that were never synced (down/up only)')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would change')
+    args = parser.parse_args()
+
+    if args.book and not args.artist:
+        parser.error('--book requires --artist')
+    if args.prune and args.direction == 'both':
+        parser.error('--prune needs a one-way direction')
+
+    sub_prefix = ''
+    if args.artist:
+        sub_prefix = f"{args.artist}/" + (f"{args.book}/" if args.book else '')
+
+    s3 = create_s3_client()
+    syncs = {'artifacts': artifacts_sync(s3), 'output': output_sync(s3)}
+    if args.only:
+        syncs = {args.only: syncs[args.only]}
+
+    failed = 0
+    for name, sync in syncs.items():
+        print(f"\n=== {name}: s3://{sync.bucket}/{sync.prefix}{sub_prefix} <-> {sync.local_root / sub_prefix} ===")
+        result = sync.run(args.direction, sub_prefix=sub_prefix, delete=not args.no_delete,
+                          prune=args.prune, dry_run=args.dry_run)
+        for action in result.actions:
+            print(f"  {action.op:14s} {action.rel}  ({action.reason})")
+        for rel in result.conflicts:
+            print(f"  CONFLICT      {rel} (changed on both sides; newer copy kept)")
+        print(f"  {len(result.actions)} changes, {result.unchanged} unchanged"
+              + ('' if args.dry_run else f", {result.bytes_transferred / 1024:.0f} KB transferred"))
+        failed += len(result.failed)
+
+    if args.dry_run:
+        print('\nDry run - nothing changed.')
+    if failed:
+        print(f'\n{failed} operations failed')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
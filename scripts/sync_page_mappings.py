@@ -15,6 +15,10 @@ import sys
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.corpus_index import group_by_book, open_corpus_index
+
 ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
 
 DRY_RUN = '--apply' not in sys.argv
@@ -91,6 +95,20 @@ def sync_book(artist, book):
     return True, details
 
 
+def books_out_of_sync(index):
+    """(artist, book) pairs whose page_mapping song list differs from verified_songs, per the corpus index."""
+    verified = group_by_book(index.verified_songs())
+    mapped = group_by_book(index.song_locations())
+    candidates = []
+    for b in index.books():
+        key = (b['artist'], b['book'])
+        vs = [(s['song_title'], s['start_page']) for s in verified.get(key, [])]
+        pm = [(s['song_title'], s['pdf_index']) for s in mapped.get(key, [])]
+        if vs != pm:
+            candidates.append(key)
+    return candidates
+
+
 def main():
     if DRY_RUN:
         print('=== DRY RUN (use --apply to write changes) ===\n')
@@ -101,24 +119,23 @@ def main():
     skipped = 0
     errors = 0
 
-    for artist_dir in sorted(ARTIFACTS_DIR.iterdir()):
-        if not artist_dir.is_dir():
-            continue
-        artist = artist_dir.name
-        for book_dir in sorted(artist_dir.iterdir()):
-            if not book_dir.is_dir():
-                continue
-            book = book_dir.name
-            try:
-                was_changed, details = sync_book(artist, book)
-                if was_changed:
-                    print(f'  SYNC: {artist} / {book} — {details}')
-                    changed += 1
-                else:
-                    skipped += 1
-            except Exception as e:
-                print(f'  ERROR: {artist} / {book} — {e}')
-                errors += 1
+    # The index narrows the scan to books that look out of sync; only those are opened
+    index = open_corpus_index(PROJECT_ROOT)
+    candidates = books_out_of_sync(index)
+    skipped = len(index.books()) - len(candidates)
+    index.close()
+
+    for artist, book in candidates:
+        try:
+            was_changed, details = sync_book(artist, book)
+            if was_changed:
+                print(f'  SYNC: {artist} / {book} — {details}')
+                changed += 1
+            else:
+                skipped += 1
+        except Exception as e:
+            print(f'  ERROR: {artist} / {book} — {e}')
+            errors += 1
 
     print(f'\nResults: {changed} synced, {skipped} already OK, {errors} errors')
 
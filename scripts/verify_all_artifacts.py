@@ -18,6 +18,12 @@ from decimal import Decimal
 import boto3
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.ledger_snapshot import open_ledger_cache
+from app.utils.s3_inventory import S3Inventory
+from app.utils.s3_transfer import create_s3_client
+
 ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
 OUTPUT_DIR = PROJECT_ROOT / 'SheetMusic_Output'
 INPUT_DIR = PROJECT_ROOT / 'SheetMusic_Input'
@@ -36,7 +42,7 @@ EXPECTED_ARTIFACTS = [
 ]
 
 
-def verify_book(artist, book_name, s3, dynamo_table, s3_output_keys):
+def verify_book(artist, book_name, s3_artifacts, ledger, s3_outputs):
     """Verify a single book. Returns list of issues."""
     issues = []
     book_dir = ARTIFACTS_DIR / artist / book_name
@@ -55,12 +61,10 @@ def verify_book(artist, book_name, s3, dynamo_table, s3_output_keys):
         except json.JSONDecodeError as e:
             issues.append(f'INVALID JSON in {artifact}: {e}')
 
-    # 2. Check S3 artifacts exist
+    # 2. Check S3 artifacts exist (use pre-fetched inventory)
     for artifact in EXPECTED_ARTIFACTS:
         s3_key = f'v3/{artist}/{book_name}/{artifact}'
-        try:
-            s3.head_object(Bucket=S3_ARTIFACTS_BUCKET, Key=s3_key)
-        except Exception:
+        if not s3_artifacts.exists(s3_key):
             issues.append(f'MISSING S3 artifact: {s3_key}')
 
     # 3. Check verified_songs vs output_files consistency
@@ -107,27 +111,20 @@ def verify_book(artist, book_name, s3, dynamo_table, s3_output_keys):
     if missing_local > 0:
         issues.append(f'MISSING {missing_local} local output PDFs')
 
-    # 5. Check S3 output PDFs exist (use pre-fetched set)
+    # 5. Check S3 output PDFs exist (use pre-fetched inventory)
     missing_s3 = 0
     for song in output_files_data:
         uri = song.get('output_uri', '')
         s3_key = uri.replace(f's3://{S3_OUTPUT_BUCKET}/', '')
-        if s3_key not in s3_output_keys:
+        if not s3_outputs.exists(s3_key):
             missing_s3 += 1
 
     if missing_s3 > 0:
         issues.append(f'MISSING {missing_s3} S3 output PDFs')
 
-    # 6. Check DynamoDB entry
-    try:
-        resp = dynamo_table.get_item(Key={
-            'artist': artist,
-            'book_name': book_name,
-        })
-        if 'Item' not in resp:
-            issues.append('MISSING DynamoDB ledger entry')
-    except Exception as e:
-        issues.append(f'DynamoDB error: {e}')
+    # 6. Check DynamoDB entry (use pre-fetched ledger snapshot)
+    if ledger.find(artist, book_name) is None:
+        issues.append('MISSING DynamoDB ledger entry')
 
     return issues, vs_count, of_count
 
@@ -136,19 +133,18 @@ def main():
     print('V3 Pipeline Artifact Verification')
     print('=' * 70)
 
-    # Pre-fetch all S3 output keys for fast lookup
-    print('Loading S3 output inventory...')
-    s3 = boto3.client('s3')
-    paginator = s3.get_paginator('list_objects_v2')
-    s3_output_keys = set()
-    for page in paginator.paginate(Bucket=S3_OUTPUT_BUCKET, Prefix='v3/'):
-        for obj in page.get('Contents', []):
-            s3_output_keys.add(obj['Key'])
-    print(f'  {len(s3_output_keys)} objects in S3 output bucket')
-
-    # DynamoDB
+    # Pre-fetch S3 artifact and output keys: one listing per bucket instead of a HEAD per object
+    print('Loading S3 inventories...')
+    s3 = create_s3_client()
+    s3_artifacts = S3Inventory(S3_ARTIFACTS_BUCKET, 'v3/', s3_client=s3).ensure()
+    s3_outputs = S3Inventory(S3_OUTPUT_BUCKET, 'v3/', s3_client=s3).ensure()
+    print(f'  {len(s3_artifacts)} objects in S3 artifacts bucket')
+    print(f'  {len(s3_outputs)} objects in S3 output bucket')
+
+    # DynamoDB: one parallel scan (or a recent cached snapshot) instead of a read per book
     dynamo = boto3.resource('dynamodb', region_name='us-east-1')
-    dynamo_table = dynamo.Table(DYNAMO_TABLE)
+    ledger = open_ledger_cache(PROJECT_ROOT, dynamo.Table(DYNAMO_TABLE))
+    print(f'  {len(ledger)} DynamoDB ledger entries')
 
     # Scan all books
     books_checked = 0
@@ -171,7 +167,7 @@ def main():
             book_name = book_dir.name
 
             issues, vs_count, of_count = verify_book(
-                artist, book_name, s3, dynamo_table, s3_output_keys
+                artist, book_name, s3_artifacts, ledger, s3_outputs
             )
             total_songs_vs += vs_count
             total_songs_of += of_count
@@ -195,7 +191,7 @@ def main():
     print(f'  With issues:        {books_with_issues}')
     print(f'  Total songs (verified_songs): {total_songs_vs}')
     print(f'  Total songs (output_files):   {total_songs_of}')
-    print(f'  S3 output objects:  {len(s3_output_keys)}')
+    print(f'  S3 output objects:  {len(s3_outputs)}')
 
     if all_issues:
         print(f'\n  ISSUES DETAIL:')
@@ -18,6 +18,7 @@ Usage:
 
 import argparse
 import json
+import sys
 import time
 import base64
 import requests
@@ -25,6 +26,10 @@ from pathlib import Path
 from difflib import SequenceMatcher
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.page_table import load_page_analysis
+
 ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
 CACHE_DIR = Path('S:/SlowImageCache/pdf_verification_v3')
 
@@ -77,8 +82,7 @@ def verify_book(artist, book, ollama_url=None):
 
     with open(artifacts / 'verified_songs.json') as f:
         vs_data = json.load(f)
-    with open(artifacts / 'page_analysis.json') as f:
-        pa_data = json.load(f)
+    pa_data = load_page_analysis(artifacts / 'page_analysis.json', columns=('content_type', 'detected_title'))
 
     songs = vs_data.get('verified_songs', [])
     pages = pa_data.get('pages', [])
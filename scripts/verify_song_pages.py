@@ -15,6 +15,13 @@ Usage:
     python scripts/verify_song_pages.py --artist "Pink Floyd"  # One artist
     python scripts/verify_song_pages.py --book-limit 10    # First N books only
     python scripts/verify_song_pages.py --workers 2        # Limit parallelism
+    python scripts/verify_song_pages.py --virtual          # Check verified ranges before publish
+
+With --virtual, no song PDFs are read or rendered: only the structural
+checks run on the current verified_songs.json ranges (gaps, overlaps, empty
+ranges and ranges past the end of the source book), so edited boundaries can
+be sanity-checked before publish. The visual check needs materialized song
+PDFs; a range built from the source would always match the source cache.
 """
 
 import argparse
@@ -30,6 +37,8 @@ from PIL import Image
 import fitz  # PyMuPDF
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
 ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
 OUTPUT_DIR = PROJECT_ROOT / 'SheetMusic_Output'
 INPUT_DIR = PROJECT_ROOT / 'SheetMusic_Input'
@@ -38,7 +47,6 @@ RENDER_DPI = 72  # Lower DPI for comparison (faster rendering)
 HASH_SIZE = 16   # Hash resolution (produces HASH_SIZE^2 bits)
 MISMATCH_THRESHOLD = 15  # Max hamming distance for pHash "match" (out of 256 bits)
 
-
 def render_pdf_page(doc, page_num, dpi=72):
     """Render a PDF page to a PIL Image at given DPI."""
     zoom = dpi / 72
@@ -54,6 +62,86 @@ def load_cache_image(cache_path):
     return Image.open(cache_path).convert('RGB')
 
 
+def open_song_pdf(result, output_lookup, output_book_dir, artist, title, expected_pages):
+    """Find and open a materialized song PDF.
+
+    Returns (document, file name), or (None, None) after recording the problem
+    in result.
+    """
+    out_info = output_lookup.get(title, {})
+    filename = out_info.get('filename', '')
+
+    if not filename:
+        # Try to construct filename
+        filename = f"{artist} - {title}.pdf"
+
+    song_pdf_path = output_book_dir / filename
+
+    # If exact path doesn't exist, try case-insensitive search
+    if not song_pdf_path.exists():
+        # Search for matching file
+        found = False
+        if output_book_dir.exists():
+            for f in output_book_dir.iterdir():
+                if f.name.lower() == filename.lower():
+                    song_pdf_path = f
+                    found = True
+                    break
+                # Also try matching just the song title portion
+                if f.suffix.lower() == '.pdf' and title.lower() in f.stem.lower():
+                    song_pdf_path = f
+                    found = True
+                    break
+
+        if not found:
+            result['songs_missing_pdf'] += 1
+            result['song_issues'].append(
+                f"MISSING PDF: '{title}' (expected: {filename})"
+            )
+            return None, None
+
+    # Open song PDF and verify
+    try:
+        return fitz.open(song_pdf_path), song_pdf_path.name
+    except Exception as e:
+        result['pages_error'] += expected_pages
+        result['song_issues'].append(f"PDF OPEN ERROR: '{title}': {e}")
+        return None, None
+
+
+def check_ranges(result, artist, book, songs):
+    """Structural checks of song ranges against the source book (--virtual).
+
+    Records empty ranges and ranges outside the source page count in result
+    and sets its status; gaps and overlaps are recorded by the caller.
+    """
+    source_pdf = INPUT_DIR / artist / f"{artist} - {book}.pdf"
+    try:
+        with fitz.open(source_pdf) as doc:
+            source_pages = len(doc)
+    except Exception as e:
+        result['status'] = 'MISSING_ARTIFACTS'
+        result['structural_issues'].append(f'Source PDF not readable: {source_pdf}: {e}')
+        return
+
+    for song in songs:
+        title = song['song_title']
+        start_page = song['start_page']
+        end_page = song['end_page']
+        result['songs_checked'] += 1
+        if end_page <= start_page:
+            result['structural_issues'].append(
+                f"EMPTY RANGE: '{title}' has range {start_page}-{end_page}"
+            )
+        elif start_page < 0 or end_page > source_pages:
+            result['structural_issues'].append(
+                f"OUT OF RANGE: '{title}' has range {start_page}-{end_page}, "
+                f"source has {source_pages} pages"
+            )
+
+    result['status'] = 'STRUCTURAL' if result['structural_issues'] else 'OK'
+
+
 def verify_book(book_info):
     """Verify all song PDFs for a single book.
 
@@ -66,6 +154,7 @@ def verify_book(book_info):
     artist = book_info['artist']
     book = book_info['book']
     threshold = book_info.get('threshold', MISMATCH_THRESHOLD)
+    virtual = book_info.get('virtual', False)
     result = {
         'artist': artist,
         'book': book,
@@ -92,7 +181,7 @@ def verify_book(book_info):
         result['structural_issues'].append('verified_songs.json not found')
         return result
 
-    if not output_files_path.exists():
+    if not virtual and not output_files_path.exists():
         result['status'] = 'MISSING_ARTIFACTS'
         result['structural_issues'].append('output_files.json not found')
         return result
@@ -100,8 +189,10 @@ def verify_book(book_info):
     try:
         with open(verified_path, 'r', encoding='utf-8') as f:
             verified_data = json.load(f)
-        with open(output_files_path, 'r', encoding='utf-8') as f:
-            output_data = json.load(f)
+        output_data = {}
+        if not virtual:
+            with open(output_files_path, 'r', encoding='utf-8') as f:
+                output_data = json.load(f)
     except Exception as e:
         result['status'] = 'JSON_ERROR'
         result['structural_issues'].append(f'JSON parse error: {e}')
@@ -143,6 +234,10 @@ def verify_book(book_info):
                 f"'{nxt['song_title']}' starts at {nxt['start_page']}"
             )
 
+    if virtual:
+        check_ranges(result, artist, book, songs)
+        return result
+
     # Check cache directory exists
     cache_book_dir = CACHE_DIR / artist / book
     if not cache_book_dir.exists():
@@ -161,45 +256,9 @@ def verify_book(book_info):
 
         result['songs_checked'] += 1
 
-        # Find the song PDF
-        out_info = output_lookup.get(title, {})
-        filename = out_info.get('filename', '')
-
-        if not filename:
-            # Try to construct filename
-            filename = f"{artist} - {title}.pdf"
-
-        song_pdf_path = output_book_dir / filename
-
-        # If exact path doesn't exist, try case-insensitive search
-        if not song_pdf_path.exists():
-            # Search for matching file
-            found = False
-            if output_book_dir.exists():
-                for f in output_book_dir.iterdir():
-                    if f.name.lower() == filename.lower():
-                        song_pdf_path = f
-                        found = True
-                        break
-                    # Also try matching just the song title portion
-                    if f.suffix.lower() == '.pdf' and title.lower() in f.stem.lower():
-                        song_pdf_path = f
-                        found = True
-                        break
-
-            if not found:
-                result['songs_missing_pdf'] += 1
-                result['song_issues'].append(
-                    f"MISSING PDF: '{title}' (expected: {filename})"
-                )
-                continue
-
-        # Open song PDF and verify
-        try:
-            song_doc = fitz.open(song_pdf_path)
-        except Exception as e:
-            result['pages_error'] += expected_pages
-            result['song_issues'].append(f"PDF OPEN ERROR: '{title}': {e}")
+        song_doc, song_pdf_name = open_song_pdf(
+            result, output_lookup, output_book_dir, artist, title, expected_pages)
+        if song_doc is None:
             continue
 
         actual_pages = len(song_doc)
@@ -254,7 +313,7 @@ def verify_book(book_info):
                         'expected_source_page': source_page_num,
                         'distance': int(distance),
                         'position': position,
-                        'song_pdf': str(song_pdf_path.name),
+                        'song_pdf': song_pdf_name,
                     })
 
             except Exception as e:
@@ -303,6 +362,8 @@ def main():
     parser.add_argument('--workers', type=int, default=4, help="Parallel workers (default: 4)")
     parser.add_argument('--threshold', type=int, default=MISMATCH_THRESHOLD,
                         help=f"Hash distance threshold (default: {MISMATCH_THRESHOLD})")
+    parser.add_argument('--virtual', action='store_true',
+                        help="Check verified ranges structurally only (no song PDFs, no image comparison)")
     args = parser.parse_args()
 
     books = discover_books()
@@ -318,6 +379,7 @@ def main():
     # Inject threshold into book_info dicts for workers
     for b in books:
         b['threshold'] = args.threshold
+        b['virtual'] = args.virtual
 
     print(f"Song PDF Page Verification")
     print(f"  Books to verify: {len(books)}")
@@ -326,6 +388,7 @@ def main():
     print(f"  Hash size: {HASH_SIZE}x{HASH_SIZE} ({HASH_SIZE**2} bits)")
     print(f"  Mismatch threshold: {args.threshold}")
     print(f"  Workers: {args.workers}")
+    print(f"  Song PDFs: {'none (--virtual: structural range checks only)' if args.virtual else OUTPUT_DIR}")
     print()
 
     start = time.time()
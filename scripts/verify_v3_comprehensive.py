@@ -31,6 +31,12 @@ PROJECT_ROOT = Path(__file__).parent.parent
 INPUT_DIR = PROJECT_ROOT / 'SheetMusic_Input'
 ARTIFACTS_DIR = PROJECT_ROOT / 'SheetMusic_Artifacts'
 OUTPUT_DIR = PROJECT_ROOT / 'SheetMusic_Output'
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.ledger_snapshot import open_ledger_cache
+from app.utils.page_table import expand_pages, is_compact
+from app.utils.s3_inventory import S3Inventory
+from app.utils.s3_transfer import create_s3_client
 
 # === S3 ===
 S3_INPUT_BUCKET = 'jsmith-input'
@@ -83,11 +89,8 @@ class VerificationReport:
 def load_s3_inventory(s3, bucket, prefix='v3/'):
     """Pre-load all S3 keys and sizes into a dict for fast lookup."""
     print(f'  Loading S3 inventory: s3://{bucket}/{prefix}')
-    inventory = {}
-    paginator = s3.get_paginator('list_objects_v2')
-    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-        for obj in page.get('Contents', []):
-            inventory[obj['Key']] = obj['Size']
+    snapshot = S3Inventory(bucket, prefix, s3_client=s3).ensure()
+    inventory = {key: entry.size for key, entry in snapshot.entries.items()}
     print(f'    {len(inventory)} objects')
     return inventory
 
@@ -135,12 +138,12 @@ def validate_page_analysis(data, artist, book, report):
     if not isinstance(data, dict):
         report.add_issue(artist, book, 'SCHEMA', 'page_analysis: not a dict')
         return
-    required = ['book_id', 'total_pages', 'pages']
+    required = ['book_id', 'total_pages', 'page_table' if is_compact(data) else 'pages']
     for key in required:
         if key not in data:
             report.add_issue(artist, book, 'SCHEMA', f'page_analysis: missing key "{key}"')
     total_pages = data.get('total_pages', 0)
-    pages_list = data.get('pages', [])
+    pages_list = expand_pages(data, columns=()) if is_compact(data) and 'page_table' in data else data.get('pages', [])
     if not isinstance(pages_list, list):
         report.add_issue(artist, book, 'SCHEMA', 'page_analysis: pages is not a list')
     elif len(pages_list) != total_pages and total_pages > 0:
@@ -235,7 +238,7 @@ def get_pdf_page_count(pdf_path):
         return None
 
 
-def verify_book(artist, book_name, report, s3_artifacts_inv, s3_output_inv, s3_input_inv, dynamo_table):
+def verify_book(artist, book_name, report, s3_artifacts_inv, s3_output_inv, s3_input_inv, ledger):
     """Run all verification checks for a single book."""
     book_dir = ARTIFACTS_DIR / artist / book_name
     issues_before = len(report.issues)
@@ -340,7 +343,6 @@ def verify_book(artist, book_name, report, s3_artifacts_inv, s3_output_inv, s3_i
     # page_analysis page count consistency
     pa_data = artifact_data.get('page_analysis.json', {})
     total_pages = pa_data.get('total_pages', 0)
-    pages_list = pa_data.get('pages', [])
 
     # Check input PDF page count matches page_analysis.total_pages
     if total_pages > 0 and local_input.exists():
@@ -446,29 +448,25 @@ def verify_book(artist, book_name, report, s3_artifacts_inv, s3_output_inv, s3_i
     # 5. DYNAMODB LEDGER CHECK
     # =========================================================
     if book_id:
-        try:
-            resp = dynamo_table.get_item(Key={'book_id': book_id})
-            if 'Item' not in resp:
-                report.add_issue(artist, book_name, 'DYNAMO', f'No DynamoDB entry for book_id={book_id}')
-            else:
-                item = resp['Item']
-                # Check key fields exist
-                for field in ['artist', 'book_name', 'status']:
-                    if field not in item:
-                        report.add_issue(artist, book_name, 'DYNAMO',
-                                         f'DynamoDB entry missing field: {field}')
-                # Verify artist/book_name match
-                db_artist = item.get('artist', '')
-                db_book = item.get('book_name', '')
-                if db_artist != artist:
-                    report.add_issue(artist, book_name, 'DYNAMO',
-                                     f'DynamoDB artist mismatch: "{db_artist}" vs "{artist}"')
-                if db_book != book_name:
+        item = ledger.get(book_id)
+        if item is None:
+            report.add_issue(artist, book_name, 'DYNAMO', f'No DynamoDB entry for book_id={book_id}')
+        else:
+            # Check key fields exist
+            for field in ['artist', 'book_name', 'status']:
+                if field not in item:
                     report.add_issue(artist, book_name, 'DYNAMO',
-                                     f'DynamoDB book_name mismatch: "{db_book}" vs "{book_name}"')
-                report.add_stat('dynamo_entries_found')
-        except Exception as e:
-            report.add_issue(artist, book_name, 'DYNAMO', f'DynamoDB error: {e}')
+                                     f'DynamoDB entry missing field: {field}')
+            # Verify artist/book_name match
+            db_artist = item.get('artist', '')
+            db_book = item.get('book_name', '')
+            if db_artist != artist:
+                report.add_issue(artist, book_name, 'DYNAMO',
+                                 f'DynamoDB artist mismatch: "{db_artist}" vs "{artist}"')
+            if db_book != book_name:
+                report.add_issue(artist, book_name, 'DYNAMO',
+                                 f'DynamoDB book_name mismatch: "{db_book}" vs "{book_name}"')
+            report.add_stat('dynamo_entries_found')
     else:
         report.add_issue(artist, book_name, 'DYNAMO', 'No book_id found in artifacts')
 
@@ -495,7 +493,7 @@ def main():
     # PHASE 1: Pre-load S3 inventories
     # =========================================================
     print('PHASE 1: Loading S3 inventories...')
-    s3 = boto3.client('s3', region_name='us-east-1')
+    s3 = create_s3_client(region_name='us-east-1')
 
     s3_input_inv = load_s3_inventory(s3, S3_INPUT_BUCKET, prefix='v3/')
     s3_artifacts_inv = load_s3_inventory(s3, S3_ARTIFACTS_BUCKET, prefix='v3/')
@@ -505,9 +503,10 @@ def main():
     report.stats['s3_artifact_objects'] = len(s3_artifacts_inv)
     report.stats['s3_output_objects'] = len(s3_output_inv)
 
-    # DynamoDB
+    # DynamoDB ledger: one parallel scan (or a recent cached snapshot)
     dynamo = boto3.resource('dynamodb', region_name='us-east-1')
-    dynamo_table = dynamo.Table(DYNAMO_TABLE)
+    ledger = open_ledger_cache(PROJECT_ROOT, dynamo.Table(DYNAMO_TABLE))
+    report.stats['dynamo_entries'] = len(ledger)
 
     print()
 
@@ -549,7 +548,7 @@ def main():
         book_id, song_count = verify_book(
             artist, book_name, report,
             s3_artifacts_inv, s3_output_inv, s3_input_inv,
-            dynamo_table
+            ledger
         )
 
         if book_id:
@@ -0,0 +1,22 @@
+"""
+Shared helpers for the unit tests.
+"""
+
+import fitz
+
+
+class NoVisionClient:
+    """Bedrock runtime stand-in that fails the test if a vision call is made."""
+
+    def invoke_model(self, **kwargs):
+        raise AssertionError("unexpected vision call")
+
+
+def make_pdf(path, page_count, label='Page'):
+    """Write a PDF whose pages read '{label} 1', '{label} 2', ..."""
+    doc = fitz.open()
+    for i in range(page_count):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"{label} {i + 1}")
+    doc.save(str(path))
+    doc.close()
@@ -0,0 +1,56 @@
+"""
+Unit tests for atomic, locked cache file writes.
+"""
+
+import gzip
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.atomic_file import path_lock, write_json_gz
+
+
+def read(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TestWriteJsonGz:
+    """Test atomic replacement."""
+
+    def test_round_trip_and_no_temp_files_left(self, tmp_path):
+        path = tmp_path / 'sub' / 'cache.json.gz'
+        write_json_gz(path, {'a': [1, 2]})
+        write_json_gz(path, {'a': [3]})
+
+        assert read(path) == {'a': [3]}
+        assert [p.name for p in path.parent.iterdir() if p.suffix == '.tmp'] == []
+
+    def test_concurrent_writers_do_not_collide(self, tmp_path):
+        path = tmp_path / 'cache.json.gz'
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda n: write_json_gz(path, {'n': n}), range(64)))
+
+        assert read(path)['n'] in range(64)
+
+
+class TestPathLock:
+    """Test read-merge-write serialization."""
+
+    def test_reentrant_and_serializes_merges(self, tmp_path):
+        path = tmp_path / 'counts.json.gz'
+        write_json_gz(path, {})
+
+        def add(n):
+            with path_lock(path):
+                data = read(path)
+                data[str(n)] = n
+                write_json_gz(path, data)  # takes the same lock again
+
+        threads = [threading.Thread(target=add, args=(n,)) for n in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+
+        assert sorted(read(path).values()) == list(range(16))
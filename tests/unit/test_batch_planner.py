@@ -0,0 +1,109 @@
+"""
+Unit tests for the makespan-aware batch planner.
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from app.utils.batch_planner import (
+    DEFAULT_SEC_PER_PAGE, BookEstimate, CostModel, PageCounter, plan_batch, simulate, vision_call_usd,
+)
+from tests.unit.helpers import make_pdf
+
+
+def ledger_item(artist, book, analysis_sec, split_sec=2.0, toc_sec=(50.0, 10.0), status='success',
+                total_pages=None):
+    analysis = {'status': 'success', 'duration_sec': Decimal(str(analysis_sec))}
+    if total_pages:
+        analysis['total_pages'] = Decimal(total_pages)
+    return {'artist': artist, 'book_name': book, 'status': status, 'steps': {
+        'toc_discovery': {'duration_sec': Decimal(str(toc_sec[0]))},
+        'toc_parser': {'duration_sec': Decimal(str(toc_sec[1]))},
+        'page_analysis': analysis,
+        'pdf_splitter': {'duration_sec': Decimal(str(split_sec))},
+    }}
+
+
+def est(name, seconds):
+    return BookEstimate('A', name, pages=1, predicted_sec=seconds, cost_usd=0.0, pages_source='pdf')
+
+
+class TestCostModel:
+    """Test fitting rates from ledger history."""
+
+    def test_fit_uses_medians_of_successful_runs(self):
+        items = [
+            ledger_item('A', 'b1', 100.0),
+            ledger_item('A', 'b2', 200.0),
+            ledger_item('A', 'b3', 5000.0),  # throttled outlier
+            ledger_item('A', 'b4', 1.0, status='failed'),
+            ledger_item('A', 'b5', 60.0, total_pages=300),  # no local PDF, pages from the ledger
+        ]
+        counts = {('A', 'b1'): 100, ('A', 'b2'): 100, ('A', 'b3'): 1000, ('A', 'b4'): 100}
+        model = CostModel.fit(items, counts, sizes_mb={('A', 'b1'): 10.0, ('A', 'b2'): 20.0})
+
+        assert model.samples == 4
+        assert model.sec_per_page == pytest.approx(1.5)  # median of 0.2, 1.0, 2.0, 5.0
+        assert model.fixed_sec == pytest.approx(60.0)
+        assert model.pages_per_mb == pytest.approx(7.5)
+
+    def test_defaults_without_history_and_size_fallback(self):
+        model = CostModel.fit([], {})
+        assert (model.samples, model.sec_per_page) == (0, DEFAULT_SEC_PER_PAGE)
+
+        estimate = model.estimate('A', 'b', pages=None, size_mb=10.0)
+        assert (estimate.pages, estimate.pages_source) == (80, 'size')
+        assert estimate.cost_usd > 80 * vision_call_usd()
+
+
+class TestPlanBatch:
+    """Test ordering and the simulated makespan."""
+
+    def test_longest_first_removes_the_tail(self):
+        books = [est(f'small{i}', 10.0) for i in range(6)] + [est('big', 60.0)]
+
+        path = plan_batch(books, slots=2, strategy='path')
+        lpt = plan_batch(books, slots=2, strategy='lpt')
+
+        assert path.makespan_sec == 90.0   # big starts last on a slot already 30s in
+        assert lpt.order[0].book_name == 'big'
+        assert lpt.makespan_sec == lpt.lower_bound_sec == 60.0
+        assert lpt.total_sec == path.total_sec == 120.0
+
+    def test_simulate_assigns_to_first_free_slot(self):
+        assert simulate([est('a', 5), est('b', 3), est('c', 3), est('d', 1)], 2) == [6, 6]
+
+    def test_unknown_strategy(self):
+        with pytest.raises(ValueError):
+            plan_batch([], slots=1, strategy='random')
+
+
+class TestPageCounter:
+    """Test page counting and its on-disk cache."""
+
+    def test_counts_and_reuses_cache(self, tmp_path):
+        pdf = tmp_path / 'book.pdf'
+        make_pdf(pdf, 3)
+        cache = tmp_path / 'counts.json.gz'
+
+        counter = PageCounter(cache)
+        assert counter.count(pdf) == 3
+        assert counter.count(tmp_path / 'missing.pdf') is None
+        counter.save()
+
+        reloaded = PageCounter(cache)
+        assert reloaded._cache[str(pdf)][2] == 3
+        assert reloaded.count(pdf) == 3 and not reloaded._dirty
+
+    def test_save_keeps_counts_from_concurrent_runs(self, tmp_path):
+        cache = tmp_path / 'counts.json.gz'
+        first, second = PageCounter(cache), PageCounter(cache)
+        for name, counter, pages in (('a.pdf', first, 2), ('b.pdf', second, 4)):
+            make_pdf(tmp_path / name, pages)
+            counter.count(tmp_path / name)
+        first.save()
+        second.save()
+
+        reloaded = PageCounter(cache)
+        assert sorted(v[2] for v in reloaded._cache.values()) == [2, 4]
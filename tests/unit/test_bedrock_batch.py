@@ -0,0 +1,147 @@
+"""
+Unit tests for Bedrock batch page scanning (local job service stand-in).
+"""
+
+import json
+import itertools
+import pytest
+
+from app.services.bedrock_batch import (
+    BatchBook,
+    BedrockBatchPageScanner,
+    LocalBatchJobService,
+)
+from app.services.holistic_page_analyzer import HolisticPageAnalyzer
+from tests.unit.helpers import NoVisionClient, make_pdf
+
+
+def response_body(content_type, title=None, printed_page=None):
+    text = json.dumps({
+        'printed_page': printed_page,
+        'content_type': content_type,
+        'song_title': title,
+        'has_music': content_type.startswith('song'),
+    })
+    return {'content': [{'type': 'text', 'text': text}]}
+
+
+class TestBedrockBatchPageScanner:
+    """Test batch scanning end to end with the local job service."""
+
+    @pytest.fixture
+    def books(self, tmp_path):
+        make_pdf(tmp_path / 'a.pdf', 4)
+        make_pdf(tmp_path / 'b.pdf', 2)
+        return [
+            BatchBook('book-a', str(tmp_path / 'a.pdf'), [
+                {'song_title': 'First Song', 'page_number': 1},
+                {'song_title': 'Second Song', 'page_number': 3},
+            ]),
+            BatchBook('book-b', str(tmp_path / 'b.pdf'), []),
+        ]
+
+    def test_run_returns_pages_per_book(self, books, tmp_path):
+        # Records are written in book order, page order
+        responses = iter([
+            response_body('song_start', 'First Song', 1),
+            response_body('song_continuation'),
+            response_body('song_start', 'Second Song', 3),
+            response_body('song_continuation'),
+            response_body('cover'),
+            response_body('blank'),
+        ])
+        service = LocalBatchJobService(responder=lambda body: next(responses))
+        scanner = BedrockBatchPageScanner(service, poll_interval=0)
+
+        pages_by_book, summary = scanner.run(
+            books, 'test-job', str(tmp_path / 'in'), str(tmp_path / 'out')
+        )
+
+        assert summary.status == 'Completed'
+        assert summary.records_submitted == 6
+        assert summary.records_succeeded == 6
+        assert [p.pdf_page for p in pages_by_book['book-a']] == [1, 2, 3, 4]
+        assert pages_by_book['book-a'][2].detected_title == 'Second Song'
+        assert [p.content_type for p in pages_by_book['book-b']] == ['cover', 'blank']
+
+    def test_failed_records_become_error_pages(self, books, tmp_path):
+        counter = itertools.count()
+
+        def responder(body):
+            if next(counter) == 1:
+                raise RuntimeError("model error")
+            return response_body('song_continuation')
+
+        service = LocalBatchJobService(responder=responder)
+        scanner = BedrockBatchPageScanner(service, poll_interval=0)
+
+        pages_by_book, summary = scanner.run(
+            books, 'test-job', str(tmp_path / 'in'), str(tmp_path / 'out')
+        )
+
+        assert summary.status == 'PartiallyCompleted'
+        assert summary.records_failed == 1
+        assert pages_by_book['book-a'][1].content_type == 'error'
+
+    def test_request_bodies_match_synchronous_calls(self, books, tmp_path):
+        scanner = BedrockBatchPageScanner(LocalBatchJobService(responder=dict), poll_interval=0)
+        shard_paths, manifest = scanner.write_requests(books[:1], str(tmp_path))
+
+        with open(shard_paths[0]) as f:
+            record = json.loads(f.readline())
+
+        assert len(record['recordId']) == 11
+        assert manifest[record['recordId']] == [('book-a', 1)]
+        body = record['modelInput']
+        assert body['anthropic_version'] == 'bedrock-2023-05-31'
+        assert body['messages'][0]['content'][0]['type'] == 'image'
+        assert 'First Song' in body['messages'][0]['content'][1]['text']
+
+    def test_analyze_book_with_batch_pages_makes_no_vision_calls(self, books, tmp_path):
+        responses = iter([
+            response_body('song_start', 'First Song', 1),
+            response_body('song_continuation'),
+            response_body('song_continuation'),  # Second Song start missed by the model
+            response_body('song_continuation'),
+        ])
+        scanner = BedrockBatchPageScanner(
+            LocalBatchJobService(responder=lambda body: next(responses)), poll_interval=0
+        )
+        pages_by_book, _ = scanner.run(
+            books[:1], 'test-job', str(tmp_path / 'in'), str(tmp_path / 'out')
+        )
+
+        analyzer = HolisticPageAnalyzer(bedrock_client=NoVisionClient())
+        result = analyzer.analyze_book(
+            books[0].pdf_path, 'book-a', 's3://bucket/a.pdf',
+            books[0].toc_entries, pages=pages_by_book['book-a']
+        )
+
+        assert [s.title for s in result.songs] == ['First Song', 'Second Song']
+        assert result.songs[1].match_method == 'toc_only'
+        assert result.songs[1].start_pdf_page == 3
+
+    def test_identical_pages_are_sent_once(self, tmp_path):
+        make_pdf(tmp_path / 'edition1.pdf', 2)
+        make_pdf(tmp_path / 'edition2.pdf', 2)
+        toc = [{'song_title': 'Same Song', 'page_number': 1}]
+        books = [
+            BatchBook('ed-1', str(tmp_path / 'edition1.pdf'), toc),
+            BatchBook('ed-2', str(tmp_path / 'edition2.pdf'), toc),
+        ]
+        sent = []
+
+        def responder(body):
+            sent.append(body)
+            return response_body('song_start', 'Same Song', 1)
+
+        scanner = BedrockBatchPageScanner(LocalBatchJobService(responder=responder), poll_interval=0)
+        pages_by_book, summary = scanner.run(
+            books, 'test-job', str(tmp_path / 'in'), str(tmp_path / 'out')
+        )
+
+        assert len(sent) == 2
+        assert summary.records_submitted == 2
+        assert summary.duplicates_collapsed == 2
+        assert [p.pdf_page for p in pages_by_book['ed-2']] == [1, 2]
+        assert pages_by_book['ed-2'][0] is not pages_by_book['ed-1'][0]
@@ -0,0 +1,140 @@
+"""
+Unit tests for multi-region Bedrock routing.
+"""
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.utils.bedrock_router import (
+    BedrockRouter,
+    classify_error,
+    parse_targets,
+)
+
+
+def throttle_error():
+    return ClientError(
+        {'Error': {'Code': 'ThrottlingException', 'Message': 'Too many requests'}},
+        'InvokeModel'
+    )
+
+
+def validation_error():
+    return ClientError(
+        {'Error': {'Code': 'ValidationException', 'Message': 'Bad body'}},
+        'InvokeModel'
+    )
+
+
+class FakeRegionClient:
+    """Local stand-in endpoint for one region."""
+
+    def __init__(self, region, fail_with=None):
+        self.region = region
+        self.fail_with = fail_with
+        self.calls = []
+
+    def invoke_model(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.fail_with is not None:
+            raise self.fail_with()
+        return {'region': self.region}
+
+
+@pytest.fixture
+def clients():
+    return {}
+
+
+def make_router(clients, spec, failing=None, **kwargs):
+    failing = failing or {}
+
+    def factory(region):
+        clients[region] = FakeRegionClient(region, failing.get(region))
+        return clients[region]
+
+    return BedrockRouter(parse_targets(spec), client_factory=factory, **kwargs)
+
+
+class TestParseTargets:
+    """Test target spec parsing."""
+
+    def test_regions_and_geo_prefixes(self):
+        assert parse_targets('us-east-1, us-west-2,eu-central-1=eu') == [
+            ('us-east-1', None), ('us-west-2', None), ('eu-central-1', 'eu')
+        ]
+
+    def test_ignores_empty_items(self):
+        assert parse_targets('us-east-1,,') == [('us-east-1', None)]
+
+
+class TestClassifyError:
+    """Test error classification."""
+
+    def test_throttle(self):
+        assert classify_error(throttle_error()) == 'throttle'
+
+    def test_connection_errors_are_unavailable(self):
+        assert classify_error(ConnectionError('reset')) == 'unavailable'
+
+    def test_validation_is_fatal(self):
+        assert classify_error(validation_error()) == 'fatal'
+
+
+class TestBedrockRouter:
+    """Test routing, failover and counters with stand-in endpoints."""
+
+    def test_prefers_first_region_when_idle(self, clients):
+        router = make_router(clients, 'us-east-1,us-west-2')
+        assert router.invoke_model(modelId='m', body='{}') == {'region': 'us-east-1'}
+
+    def test_fails_over_on_throttle(self, clients):
+        router = make_router(clients, 'us-east-1,us-west-2',
+                             failing={'us-east-1': throttle_error})
+
+        response = router.invoke_model(modelId='m', body='{}')
+
+        assert response == {'region': 'us-west-2'}
+        stats = router.stats()
+        assert stats['us-east-1']['throttles'] == 1
+        assert stats['us-east-1']['cooling_down'] is True
+        assert stats['us-west-2']['successes'] == 1
+
+    def test_throttled_region_avoided_on_next_call(self, clients):
+        router = make_router(clients, 'us-east-1,us-west-2',
+                             failing={'us-east-1': throttle_error})
+        router.invoke_model(modelId='m', body='{}')
+        router.invoke_model(modelId='m', body='{}')
+
+        assert len(clients['us-east-1'].calls) == 1
+        assert len(clients['us-west-2'].calls) == 2
+
+    def test_raises_last_error_when_all_regions_throttle(self, clients):
+        router = make_router(clients, 'us-east-1,us-west-2',
+                             failing={'us-east-1': throttle_error, 'us-west-2': throttle_error})
+
+        with pytest.raises(ClientError) as exc_info:
+            router.invoke_model(modelId='m', body='{}')
+
+        assert exc_info.value.response['Error']['Code'] == 'ThrottlingException'
+
+    def test_fatal_errors_do_not_fail_over(self, clients):
+        router = make_router(clients, 'us-east-1,us-west-2',
+                             failing={'us-east-1': validation_error})
+
+        with pytest.raises(ClientError):
+            router.invoke_model(modelId='m', body='{}')
+
+        assert clients['us-west-2'].calls == []
+        assert router.stats()['us-east-1']['errors'] == 1
+
+    def test_rewrites_inference_profile_for_geo_target(self, clients):
+        router = make_router(clients, 'eu-central-1=eu')
+        router.invoke_model(modelId='us.anthropic.claude-3-5-sonnet-20241022-v2:0', body='{}')
+
+        assert clients['eu-central-1'].calls[0]['modelId'] == \
+            'eu.anthropic.claude-3-5-sonnet-20241022-v2:0'
+
+    def test_requires_a_region(self):
+        with pytest.raises(ValueError):
+            BedrockRouter([], client_factory=FakeRegionClient)
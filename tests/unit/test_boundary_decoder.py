@@ -0,0 +1,129 @@
+"""
+Unit tests for the HMM-style song boundary decoder.
+"""
+
+import pytest
+
+from app.services.boundary_decoder import BoundaryDecoder
+from app.services.holistic_page_analyzer import HolisticPageAnalyzer, PageInfo
+from tests.unit.helpers import NoVisionClient
+
+
+def exact(a, b):
+    return a.lower() == b.lower()
+
+
+def page(n, content_type='song_continuation', title=None, printed=None):
+    return PageInfo(pdf_page=n, printed_page=printed, content_type=content_type,
+                    detected_title=title, has_music_notation=True, confidence=0.9)
+
+
+TOC = [
+    {'song_title': 'Alpha', 'page_number': 1},
+    {'song_title': 'Beta', 'page_number': 3},
+    {'song_title': 'Gamma', 'page_number': 6},
+]
+
+
+def book_pages():
+    """Cover + TOC, then Alpha (2 pages), Beta (3 pages), Gamma (2 pages); offset 2."""
+    return [
+        page(1, 'cover'),
+        page(2, 'toc'),
+        page(3, 'song_start', 'Alpha', 1),
+        page(4, 'song_continuation', None, 2),
+        page(5, 'song_start', 'Beta', 3),
+        page(6, 'song_continuation', None, 4),
+        page(7, 'song_continuation', None, 5),
+        page(8, 'song_start', 'Gamma', 6),
+        page(9, 'song_continuation', None, 7),
+    ]
+
+
+class TestBoundaryDecoder:
+    """Test decoding on small synthetic books."""
+
+    def test_clean_book(self):
+        result = BoundaryDecoder(exact).decode(book_pages(), TOC, offset=2, offset_confidence=1.0)
+
+        assert [(s.toc_index, s.pdf_page) for s in result.starts] == [(0, 3), (1, 5), (2, 8)]
+        assert all(s.title_matched for s in result.starts)
+        assert all(s.posterior > 0.9 for s in result.starts)
+        assert result.skipped == []
+
+    def test_missed_start_recovered_from_location_and_printed_pages(self):
+        pages = book_pages()
+        pages[4] = page(5, 'song_continuation', None, 3)  # Beta's start misclassified
+
+        result = BoundaryDecoder(exact).decode(pages, TOC, offset=2, offset_confidence=1.0)
+
+        beta = result.starts[1]
+        assert beta.pdf_page == 5
+        assert not beta.title_matched
+
+    def test_low_posterior_starts_are_probed_and_confirmed(self):
+        pages = book_pages()
+        for p in pages:
+            p.printed_page = None
+        pages[4] = page(5, 'song_continuation')
+        probed = []
+
+        def probe(page_idx, title):
+            probed.append((page_idx, title))
+            return page_idx == 4
+
+        result = BoundaryDecoder(exact).decode(pages, TOC, offset=0, offset_confidence=0.0, probe=probe)
+
+        assert all(title == 'Beta' for _, title in probed)
+        assert result.starts[1].pdf_page == 5
+        assert result.starts[1].probed
+        assert pages[4].content_type == 'song_start'
+
+    def test_confident_starts_are_not_probed(self):
+        def probe(page_idx, title):
+            raise AssertionError("unexpected probe")
+
+        result = BoundaryDecoder(exact).decode(book_pages(), TOC, 2, 1.0, probe=probe)
+        assert result.probes == 0
+
+    def test_song_missing_from_pdf_is_skipped(self):
+        toc = TOC + [{'song_title': 'Delta', 'page_number': 8}]
+        pages = book_pages()
+
+        result = BoundaryDecoder(exact).decode(pages, toc, offset=2, offset_confidence=1.0)
+
+        assert [s.toc_index for s in result.starts] == [0, 1, 2]
+        assert result.skipped == [3]
+
+
+class TestAnalyzerDecoderMode:
+    """Test the analyzer's decoder boundary mode."""
+
+    def test_plan_book_with_decoder(self):
+        analyzer = HolisticPageAnalyzer(bedrock_client=NoVisionClient(), boundary_mode='decoder')
+        pages = book_pages()
+        pages.append(page(10, 'song_start', 'Bonus Track'))
+
+        result = analyzer.plan_book(pages, TOC, len(pages), 'book-1', 's3://b/k.pdf', 'Artist')
+
+        assert [(s.title, s.start_pdf_page, s.end_pdf_page) for s in result.songs] == [
+            ('Alpha', 3, 4), ('Beta', 5, 7), ('Gamma', 8, 9), ('Bonus Track', 10, 10)
+        ]
+        assert result.songs[0].match_method == 'direct_match'
+        assert result.songs[3].match_method == 'detected_only'
+
+    def test_offset_from_printed_pages_is_reported(self):
+        analyzer = HolisticPageAnalyzer(bedrock_client=NoVisionClient(), boundary_mode='decoder')
+        pages = book_pages()
+        for p in pages:
+            p.detected_title = None  # no title matches, so no offset from Phase 2
+
+        result = analyzer.plan_book(pages, TOC, len(pages), 'book-1', 's3://b/k.pdf', 'Artist')
+
+        assert result.calculated_offset == 2
+        assert result.offset_confidence == 1.0
+        assert analyzer.to_page_mapping(result)['offset'] == 2
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            HolisticPageAnalyzer(bedrock_client=NoVisionClient(), boundary_mode='magic')
@@ -0,0 +1,149 @@
+"""
+Unit tests for the SQLite corpus index.
+"""
+
+import json
+import os
+
+import pytest
+
+from app.utils.corpus_index import ARTIFACT_NAMES, CorpusIndex, group_by_book
+from app.utils.page_table import write_page_analysis
+
+
+def write_book(root, artist, book, songs=('Song A', 'Song B'), compact=False):
+    book_dir = root / 'SheetMusic_Artifacts' / artist / book
+    book_dir.mkdir(parents=True, exist_ok=True)
+    verified = [{'song_title': t, 'start_page': i * 2, 'end_page': i * 2 + 2, 'artist': artist}
+                for i, t in enumerate(songs)]
+    artifacts = {
+        'toc_discovery.json': {'toc_pages': [1]},
+        'toc_parse.json': {'entries': [{'song_title': t, 'page_number': i + 1} for i, t in enumerate(songs)]},
+        'page_mapping.json': {'offset': 2, 'song_locations': [
+            {'song_title': s['song_title'], 'printed_page': 1, 'pdf_index': s['start_page']} for s in verified]},
+        'verified_songs.json': {'verified_songs': verified},
+        'output_files.json': {'output_files': [
+            {'song_title': s['song_title'], 'artist': artist, 'output_uri': f"s3://out/{s['song_title']}.pdf",
+             'page_range': [s['start_page'], s['end_page']], 'file_size_bytes': 100} for s in verified]},
+    }
+    for name, data in artifacts.items():
+        (book_dir / name).write_text(json.dumps(data))
+    pages = {'total_pages': 4, 'pages': [
+        {'pdf_page': i + 1, 'content_type': 'song_start' if i % 2 == 0 else 'song_continuation',
+         'detected_title': songs[i // 2] if i % 2 == 0 else None} for i in range(len(songs) * 2)]}
+    if compact:
+        write_page_analysis(book_dir / 'page_analysis.json', pages)
+    else:
+        (book_dir / 'page_analysis.json').write_text(json.dumps(pages))
+
+    output_dir = root / 'SheetMusic_Output' / artist / book
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for t in songs:
+        (output_dir / f'{artist} - {t}.pdf').write_bytes(b'%PDF')
+    return book_dir
+
+
+def bump(path, data):
+    """Rewrite a file with a later mtime."""
+    path.write_text(json.dumps(data))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    write_book(tmp_path, 'Billy Joel', 'Greatest Hits', songs=('Piano Man', 'Honesty'))
+    write_book(tmp_path, 'Queen', 'Anthology', songs=('Bohemian Rhapsody',), compact=True)
+    return tmp_path
+
+
+def open_index(root):
+    return CorpusIndex(root / 'index.sqlite', root / 'SheetMusic_Artifacts', root / 'SheetMusic_Output')
+
+
+class TestCorpusIndex:
+    """Test indexing, incremental refresh and queries."""
+
+    def test_initial_index(self, corpus):
+        with open_index(corpus) as index:
+            stats = index.refresh()
+            books = index.books()
+
+        assert stats.books == 2 and stats.parsed == 2 * (len(ARTIFACT_NAMES) + 1)
+        assert [(b['artist'], b['book']) for b in books] == [('Billy Joel', 'Greatest Hits'), ('Queen', 'Anthology')]
+        bj = books[0]
+        assert (bj['complete'], bj['toc_count'], bj['song_count'], bj['output_count']) == (1, 2, 2, 2)
+        assert (bj['local_pdf_count'], bj['vision_song_count'], bj['page_offset']) == (2, 2, 2)
+
+    def test_refresh_is_incremental(self, corpus):
+        with open_index(corpus) as index:
+            index.refresh()
+        vs_path = corpus / 'SheetMusic_Artifacts' / 'Queen' / 'Anthology' / 'verified_songs.json'
+        bump(vs_path, {'verified_songs': [{'song_title': 'Bohemian Rhapsody', 'start_page': 0, 'end_page': 3},
+                                          {'song_title': 'Radio Ga Ga', 'start_page': 3, 'end_page': 4}]})
+
+        with open_index(corpus) as index:
+            stats = index.refresh()
+            songs = index.verified_songs('Queen', 'Anthology')
+
+        assert stats.parsed == 1
+        assert [s['song_title'] for s in songs] == ['Bohemian Rhapsody', 'Radio Ga Ga']
+
+    def test_touched_but_identical_is_not_reparsed(self, corpus):
+        with open_index(corpus) as index:
+            index.refresh()
+            toc = corpus / 'SheetMusic_Artifacts' / 'Queen' / 'Anthology' / 'toc_parse.json'
+            bump(toc, json.loads(toc.read_text()))
+
+            assert index.refresh().parsed == 0
+
+    def test_rewritten_output_pdf_is_reindexed(self, corpus):
+        with open_index(corpus) as index:
+            index.refresh()
+            assert index.refresh().parsed == 0
+
+            out_dir = corpus / 'SheetMusic_Output' / 'Queen' / 'Anthology'
+            dir_mtime = out_dir.stat().st_mtime_ns
+            (out_dir / 'Queen - Bohemian Rhapsody.pdf').write_bytes(b'%PDF-resplit')
+            os.utime(out_dir, ns=(dir_mtime, dir_mtime))  # in-place rewrite leaves the dir alone
+
+            assert index.refresh().parsed == 1
+            assert [p['size'] for p in index.output_pdfs('Queen', 'Anthology')] == [len(b'%PDF-resplit')]
+
+    def test_removed_book_and_artifact(self, corpus):
+        with open_index(corpus) as index:
+            index.refresh()
+            (corpus / 'SheetMusic_Artifacts' / 'Billy Joel' / 'Greatest Hits' / 'output_files.json').unlink()
+            index.refresh()
+            assert index.books()[0]['complete'] == 0
+            assert index.output_files('Billy Joel') == []
+
+            write_book(corpus, 'ABBA', 'Gold')
+            for f in (corpus / 'SheetMusic_Artifacts' / 'Queen' / 'Anthology').iterdir():
+                f.unlink()
+            (corpus / 'SheetMusic_Artifacts' / 'Queen' / 'Anthology').rmdir()
+            stats = index.refresh()
+
+            assert stats.removed_books == 1
+            assert [b['artist'] for b in index.books()] == ['ABBA', 'Billy Joel']
+            assert index.query('SELECT COUNT(*) AS n FROM verified_songs')[0]['n'] == 4
+
+    def test_parse_errors_are_recorded(self, corpus):
+        bad = corpus / 'SheetMusic_Artifacts' / 'Queen' / 'Anthology' / 'verified_songs.json'
+        bad.write_text('{not json')
+        with open_index(corpus) as index:
+            index.refresh()
+            errors = index.artifact_errors()
+
+        assert [(e['book'], e['name']) for e in errors] == [('Anthology', 'verified_songs.json')]
+
+    def test_queries(self, corpus):
+        with open_index(corpus) as index:
+            index.refresh()
+            starts = index.pages(content_type='song_start')
+            toc = group_by_book(index.toc_entries())
+            pdfs = index.output_pdfs('Queen', 'Anthology')
+
+        assert [p['detected_title'] for p in starts] == ['Piano Man', 'Honesty', 'Bohemian Rhapsody']
+        assert [e['song_title'] for e in toc[('Billy Joel', 'Greatest Hits')]] == ['Piano Man', 'Honesty']
+        assert [p['filename'] for p in pdfs] == ['Queen - Bohemian Rhapsody.pdf']
@@ -0,0 +1,144 @@
+"""
+Unit tests for HolisticPageAnalyzer sparse (TOC-guided) and scheduled scanning.
+"""
+
+import copy
+import pytest
+
+from app.services.holistic_page_analyzer import HolisticPageAnalyzer, PageInfo
+from tests.unit.helpers import NoVisionClient
+
+
+SONGS = ['Alpha', 'Bravo', 'Charlie', 'Delta', 'Echo', 'Foxtrot', 'Golf', 'Hotel']
+
+
+def make_book(front=2, song_pages=4):
+    """Front matter pages, then each song with song_pages pages; offset == front."""
+    pages = [PageInfo(pdf_page=i + 1, content_type='cover' if i == 0 else 'toc')
+             for i in range(front)]
+    toc = []
+    for n, title in enumerate(SONGS):
+        printed = n * song_pages + 1
+        toc.append({'song_title': title, 'page_number': printed})
+        for j in range(song_pages):
+            pdf_page = len(pages) + 1
+            pages.append(PageInfo(
+                pdf_page=pdf_page,
+                printed_page=printed + j,
+                content_type='song_start' if j == 0 else 'song_continuation',
+                detected_title=title if j == 0 else None,
+                has_music_notation=True,
+                confidence=0.9,
+            ))
+    return pages, toc
+
+
+class ReplayClassifier:
+    """Serves stored page results and records which pages were requested."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def __call__(self, indices):
+        self.calls.extend(indices)
+        return {i: copy.deepcopy(self.pages[i]) for i in indices}
+
+
+@pytest.fixture
+def analyzer():
+    return HolisticPageAnalyzer(bedrock_client=NoVisionClient(), scan_mode='sparse')
+
+
+class TestSparseScan:
+    """Test the sparse scan against replayed full-scan results."""
+
+    def test_clean_book_skips_interior_pages(self, analyzer):
+        truth, toc = make_book()
+        classify = ReplayClassifier(truth)
+
+        pages, stats = analyzer.sparse_scan(classify, len(truth), toc)
+
+        assert stats['full_scan'] == 0
+        assert stats['escalated'] == 0
+        assert len(classify.calls) < len(truth)
+        assert len(set(classify.calls)) == len(classify.calls)
+        starts = [p.pdf_page for p in pages if p.content_type == 'song_start']
+        assert starts == [3, 7, 11, 15, 19, 23, 27, 31]
+
+    def test_sparse_plan_matches_full_plan(self, analyzer):
+        truth, toc = make_book()
+        sparse_pages, _ = analyzer.sparse_scan(ReplayClassifier(truth), len(truth), toc)
+
+        full = analyzer.plan_book(copy.deepcopy(truth), toc, len(truth), 'b', '')
+        sparse = analyzer.plan_book(sparse_pages, toc, len(truth), 'b', '')
+
+        assert analyzer.to_verified_songs(sparse) == analyzer.to_verified_songs(full)
+
+    def test_disagreeing_region_is_escalated(self, analyzer):
+        truth, toc = make_book()
+        # TOC misprint: Delta listed at printed page 11 instead of 13
+        toc[3]['page_number'] = 11
+        classify = ReplayClassifier(truth)
+
+        pages, stats = analyzer.sparse_scan(classify, len(truth), toc)
+
+        assert stats['escalated'] > 0
+        assert stats['full_scan'] == 0
+        assert pages[14].content_type == 'song_start'
+        assert pages[14].detected_title == 'Delta'
+
+    def test_falls_back_to_full_scan_without_offset(self, analyzer):
+        truth, toc = make_book()
+        for p in truth:
+            p.printed_page = None
+            p.detected_title = None
+        classify = ReplayClassifier(truth)
+
+        pages, stats = analyzer.sparse_scan(classify, len(truth), toc)
+
+        assert stats['full_scan'] > 0
+        assert sorted(classify.calls) == list(range(len(truth)))
+        assert len(pages) == len(truth)
+
+    def test_invalid_scan_mode(self):
+        with pytest.raises(ValueError):
+            HolisticPageAnalyzer(bedrock_client=NoVisionClient(), scan_mode='partial')
+
+
+class CountingVisionClient:
+    """Bedrock runtime stand-in answering every page as a continuation."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, modelId, body):
+        import io
+        import json
+        self.calls += 1
+        text = json.dumps({'printed_page': None, 'content_type': 'song_continuation',
+                           'song_title': None, 'has_music': True})
+        return {'body': io.BytesIO(json.dumps({'content': [{'text': text}]}).encode())}
+
+
+class TestScheduledScan:
+    """Test page scans through a shared VisionScheduler."""
+
+    def test_pages_scanned_through_scheduler(self):
+        import fitz
+        from app.utils.vision_scheduler import VisionScheduler
+
+        doc = fitz.open()
+        for n in range(5):
+            doc.new_page().insert_text((72, 72), f"page {n}")
+        client = CountingVisionClient()
+        with VisionScheduler(workers=3) as scheduler:
+            analyzer = HolisticPageAnalyzer(bedrock_client=client, scheduler=scheduler)
+            analyzer._book_key = 'book-1'
+            pages = analyzer._classify_pages(doc, [0, 2, 4], 'Alpha')
+            completed = scheduler.stats()['books']['book-1']['completed']
+
+        assert sorted(pages) == [0, 2, 4]
+        assert [pages[i].pdf_page for i in (0, 2, 4)] == [1, 3, 5]
+        assert all(p.content_type == 'song_continuation' for p in pages.values())
+        assert client.calls == completed == 3
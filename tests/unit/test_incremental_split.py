@@ -0,0 +1,168 @@
+"""
+Unit tests for incremental re-splitting.
+"""
+
+import pytest
+import fitz
+
+from app.services.incremental_split import IncrementalSplitter, plan_incremental_split
+from tests.unit.helpers import make_pdf
+
+
+def filename(title, artist):
+    return f'{artist} - {title}.pdf'
+
+
+def song(title, start, end, artist='Artist'):
+    return {'song_title': title, 'start_page': start, 'end_page': end, 'artist': artist}
+
+
+class FakeS3Client:
+    """Records upload_file / delete_objects calls."""
+
+    def __init__(self):
+        self.uploads = []
+        self.deleted = []
+
+    def upload_file(self, Filename, Bucket, Key, Config=None):
+        self.uploads.append(Key)
+
+    def delete_objects(self, Bucket, Delete):
+        self.deleted.extend(obj['Key'] for obj in Delete['Objects'])
+
+
+@pytest.fixture
+def source_pdf(tmp_path):
+    path = tmp_path / 'book.pdf'
+    make_pdf(path, 10)
+    return path
+
+
+@pytest.fixture
+def original(tmp_path, source_pdf):
+    """Output files from a full split of three songs."""
+    songs = [song('One', 0, 3), song('Two', 3, 6), song('Three', 6, 10)]
+    splitter = IncrementalSplitter(tmp_path / 'out', 'bucket')
+    return songs, splitter.resplit('Artist', 'Book', source_pdf, [], songs, filename).output_files
+
+
+class TestPlan:
+    """Test matching new songs to existing outputs."""
+
+    def test_keep_regenerate_obsolete(self, original):
+        _, output_files = original
+        new_songs = [song('One', 0, 3), song('Two', 3, 5), song('Four', 5, 10)]
+
+        plan = plan_incremental_split(output_files, new_songs, 'Artist')
+
+        assert list(plan.keep) == [0]
+        assert plan.regenerate == [1, 2]
+        assert [e['song_title'] for e in plan.obsolete] == ['Two', 'Three']
+
+    def test_artist_change_regenerates(self, original):
+        _, output_files = original
+        new_songs = [song('One', 0, 3, artist='Guest'), song('Two', 3, 6), song('Three', 6, 10)]
+
+        plan = plan_incremental_split(output_files, new_songs, 'Artist')
+
+        assert plan.regenerate == [0]
+
+    def test_duplicate_titles_match_one_to_one(self):
+        output_files = [
+            {'song_title': 'Intro', 'artist': 'A', 'output_uri': 's3://b/1', 'page_range': [0, 1]},
+            {'song_title': 'Intro', 'artist': 'A', 'output_uri': 's3://b/2', 'page_range': [5, 6]},
+        ]
+        new_songs = [song('Intro', 0, 1, 'A'), song('Intro', 0, 1, 'A'), song('Intro', 5, 6, 'A')]
+
+        plan = plan_incremental_split(output_files, new_songs, 'A')
+
+        assert plan.keep[0]['output_uri'] == 's3://b/1'
+        assert plan.keep[2]['output_uri'] == 's3://b/2'
+        assert plan.regenerate == [1]
+
+
+class TestResplit:
+    """Test applying a re-split to local files and S3."""
+
+    def test_only_changed_songs_are_uploaded(self, tmp_path, source_pdf, original):
+        _, output_files = original
+        s3 = FakeS3Client()
+        splitter = IncrementalSplitter(tmp_path / 'out', 'bucket', s3_client=s3)
+        new_songs = [song('One', 0, 3), song('Two', 3, 5), song('Four', 5, 10)]
+
+        result = splitter.resplit('Artist', 'Book', source_pdf, output_files, new_songs, filename)
+
+        assert (result.kept, result.regenerated, result.deleted) == (1, 2, 1)
+        assert sorted(s3.uploads) == ['v3/Artist/Book/Artist - Four.pdf', 'v3/Artist/Book/Artist - Two.pdf']
+        # "Two" was overwritten in place; only "Three" is gone
+        assert s3.deleted == ['v3/Artist/Book/Artist - Three.pdf']
+        assert result.output_files[0] is output_files[0]
+        assert result.output_files[1]['page_range'] == [3, 5]
+
+        book_dir = tmp_path / 'out' / 'Artist' / 'Book'
+        assert sorted(p.name for p in book_dir.glob('*.pdf')) == \
+            ['Artist - Four.pdf', 'Artist - One.pdf', 'Artist - Two.pdf']
+        with fitz.open(str(book_dir / 'Artist - Two.pdf')) as doc:
+            assert len(doc) == 2
+
+    def test_unchanged_book_does_nothing(self, tmp_path, source_pdf, original):
+        songs, output_files = original
+        s3 = FakeS3Client()
+        splitter = IncrementalSplitter(tmp_path / 'out', 'bucket', s3_client=s3)
+
+        result = splitter.resplit('Artist', 'Book', source_pdf, output_files, songs, filename)
+
+        assert result.output_files == output_files
+        assert s3.uploads == [] and s3.deleted == []
+
+    def test_missing_local_copy_is_restored(self, tmp_path, source_pdf, original):
+        songs, output_files = original
+        local = tmp_path / 'out' / 'Artist' / 'Book' / 'Artist - One.pdf'
+        local.unlink()
+        s3 = FakeS3Client()
+        splitter = IncrementalSplitter(tmp_path / 'out', 'bucket', s3_client=s3)
+
+        result = splitter.resplit('Artist', 'Book', source_pdf, output_files, songs, filename)
+
+        assert local.exists()
+        assert result.kept == 3
+        assert s3.uploads == []
+
+    def test_empty_range_is_skipped(self, tmp_path, source_pdf, original):
+        _, output_files = original
+        splitter = IncrementalSplitter(tmp_path / 'out', 'bucket')
+        new_songs = [song('One', 0, 3), song('Two', 3, 10), song('Ghost', 12, 14)]
+
+        result = splitter.resplit('Artist', 'Book', source_pdf, output_files, new_songs, filename)
+
+        assert result.skipped == ['Ghost']
+        assert [e['song_title'] for e in result.output_files] == ['One', 'Two']
+
+    def test_planned_uploads_match_resplit(self, tmp_path, source_pdf, original):
+        _, output_files = original
+        s3 = FakeS3Client()
+        splitter = IncrementalSplitter(tmp_path / 'out', 'bucket', s3_client=s3)
+        new_songs = [song('One', 0, 3), song('Two', 3, 5), song('Four', 5, 10)]
+
+        planned = splitter.planned_uploads('Artist', 'Book', output_files, new_songs, filename)
+        splitter.resplit('Artist', 'Book', source_pdf, output_files, new_songs, filename)
+
+        assert sorted(planned) == sorted(f's3://bucket/{key}' for key in s3.uploads)
+
+    def test_delete_unused_keeps_current_outputs(self, tmp_path, source_pdf, original):
+        _, output_files = original
+        s3 = FakeS3Client()
+        splitter = IncrementalSplitter(tmp_path / 'out', 'bucket', s3_client=s3)
+        new_songs = [song('One', 0, 3), song('Two', 3, 10)]
+        interrupted = [song('One', 0, 3), song('Two', 3, 5), song('Four', 5, 10)]
+        uploads = splitter.planned_uploads('Artist', 'Book', output_files, interrupted, filename)
+        splitter.resplit('Artist', 'Book', source_pdf, output_files, interrupted, filename)
+        result = splitter.resplit('Artist', 'Book', source_pdf, output_files, new_songs, filename)
+        s3.deleted.clear()
+
+        deleted = splitter.delete_unused('Artist', 'Book', uploads, result.output_files)
+
+        assert deleted == 1
+        assert s3.deleted == ['v3/Artist/Book/Artist - Four.pdf']
+        book_dir = tmp_path / 'out' / 'Artist' / 'Book'
+        assert sorted(p.name for p in book_dir.glob('*.pdf')) == ['Artist - One.pdf', 'Artist - Two.pdf']
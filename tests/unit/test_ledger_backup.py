@@ -0,0 +1,106 @@
+"""
+Unit tests for bulk ledger backup and restore.
+"""
+
+import json
+import threading
+
+import pytest
+
+from app.utils.ledger_backup import batch_write, export_table, iter_backup_items
+
+
+def typed_item(n):
+    return {'book_id': {'S': f'b{n:03d}'}, 'status': {'S': 'success'},
+            'steps': {'M': {'toc': {'M': {'duration_sec': {'N': str(n + 0.5)}}}}}}
+
+
+class FakeClient:
+    """BatchWriteItem that leaves items unprocessed on request; segmented Scan pages."""
+
+    def __init__(self, items=(), unprocessed_rounds=0, fail_keys=()):
+        self.items = list(items)
+        self.written = {}
+        self.unprocessed_rounds = unprocessed_rounds
+        self.fail_keys = set(fail_keys)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def batch_write_item(self, RequestItems):
+        (table, requests), = RequestItems.items()
+        with self.lock:
+            self.requests.append(len(requests))
+            assert len(requests) <= 25
+            if self.unprocessed_rounds:
+                self.unprocessed_rounds -= 1
+                keep, rest = requests[:len(requests) // 2], requests[len(requests) // 2:]
+            else:
+                keep = [r for r in requests if r['PutRequest']['Item']['book_id']['S'] not in self.fail_keys]
+                rest = [r for r in requests if r not in keep]
+            for r in keep:
+                item = r['PutRequest']['Item']
+                self.written[item['book_id']['S']] = item
+        return {'UnprocessedItems': {table: rest} if rest else {}}
+
+    def get_paginator(self, name):
+        client = self
+
+        class Paginator:
+            def paginate(self, TableName, Segment, TotalSegments, Limit=None):
+                mine = client.items[Segment::TotalSegments]
+                for i in range(0, len(mine), 3):
+                    yield {'Items': mine[i:i + 3]}
+        return Paginator()
+
+
+@pytest.fixture
+def backup(tmp_path):
+    path = tmp_path / 'backup.json'
+    items = [typed_item(n) for n in range(60)]
+    path.write_text(json.dumps({'Items': items, 'Count': 60, 'ScannedCount': 60,
+                                'ConsumedCapacity': None}, indent=2))
+    return path, items
+
+
+class TestLedgerBackup:
+    """Test streaming parse, batch writes and export."""
+
+    @pytest.mark.parametrize('chunk_bytes', [16, 4096, 1 << 20])
+    def test_streaming_parse_matches_json_load(self, backup, chunk_bytes):
+        path, items = backup
+        assert list(iter_backup_items(path, chunk_bytes=chunk_bytes)) == items
+
+    def test_items_key_after_metadata(self, tmp_path):
+        path = tmp_path / 'b.json'
+        path.write_text('{"Count": 1, "Items": [{"book_id": {"S": "x"}}]}')
+        assert list(iter_backup_items(path)) == [{'book_id': {'S': 'x'}}]
+
+    def test_batch_write_retries_unprocessed(self, backup):
+        path, items = backup
+        client = FakeClient(unprocessed_rounds=2)
+        stats = batch_write(client, 'ledger', iter_backup_items(path), workers=4, base_delay_sec=0)
+
+        assert (stats.written, stats.failed, stats.retries) == (60, 0, 2)
+        assert len(client.written) == 60 and max(client.requests) == 25
+
+    def test_batch_write_gives_up_after_max_retries(self, backup):
+        path, _ = backup
+        client = FakeClient(fail_keys={'b007'})
+        stats = batch_write(client, 'ledger', iter_backup_items(path), max_retries=2, base_delay_sec=0)
+
+        assert (stats.written, stats.failed) == (59, 1)
+        assert 'unprocessed' in stats.first_error
+
+    def test_export_then_restore_round_trip(self, tmp_path):
+        items = [typed_item(n) for n in range(20)]
+        out = tmp_path / 'export.json'
+
+        assert export_table(FakeClient(items), 'ledger', out, segments=3) == 20
+        data = json.loads(out.read_text())
+        assert data['Count'] == 20
+        key = lambda i: i['book_id']['S']
+        assert sorted(data['Items'], key=key) == items
+
+        target = FakeClient()
+        batch_write(target, 'ledger-test', iter_backup_items(out))
+        assert sorted(target.written) == [key(i) for i in items]
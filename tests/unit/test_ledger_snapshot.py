@@ -0,0 +1,137 @@
+"""
+Unit tests for ledger pagination, parallel scans and the snapshot cache.
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from app.utils.dynamodb_ledger import DynamoDBLedger
+from app.utils.ledger_snapshot import LedgerCache, LedgerSnapshot, paginate, parallel_scan
+
+
+class FakeTable:
+    """Pages Query/Scan results two items at a time and honours segments."""
+
+    def __init__(self, items, page=2):
+        self.items = list(items)
+        self.page = page
+        self.requests = []
+
+    def _page(self, items, kwargs):
+        self.requests.append(kwargs)
+        start = kwargs.get('ExclusiveStartKey', {}).get('pos', 0)
+        response = {'Items': items[start:start + self.page]}
+        if start + self.page < len(items):
+            response['LastEvaluatedKey'] = {'pos': start + self.page}
+        if kwargs.get('ReturnConsumedCapacity') == 'TOTAL':
+            response['ConsumedCapacity'] = {'CapacityUnits': 5.0}
+        return response
+
+    def query(self, **kwargs):
+        status = kwargs['ExpressionAttributeValues'][':status']
+        return self._page([i for i in self.items if i['status'] == status], kwargs)
+
+    def scan(self, **kwargs):
+        items = self.items
+        if 'TotalSegments' in kwargs:
+            items = items[kwargs['Segment']::kwargs['TotalSegments']]
+        if 'FilterExpression' in kwargs:
+            since = kwargs['ExpressionAttributeValues'][':since']
+            items = [i for i in items if i.get('updated_at', '') >= since]
+        return self._page(items, kwargs)
+
+
+def entry(n, status='success', updated_at=None):
+    return {'book_id': f'b{n}', 'artist': 'Artist', 'book_name': f'Book {n}', 'status': status,
+            'updated_at': updated_at or f'2025-12-{n + 1:02d}T00:00:00Z', 'songs_extracted': Decimal(n)}
+
+
+@pytest.fixture
+def table():
+    return FakeTable([entry(n, 'failed' if n % 3 == 0 else 'success') for n in range(7)])
+
+
+class TestPagination:
+    """Test that every page is read."""
+
+    def test_paginate_follows_last_evaluated_key(self, table):
+        assert len(list(paginate(table.scan))) == 7
+        assert len(table.requests) == 4
+
+    def test_parallel_scan_covers_all_segments(self, table):
+        items = parallel_scan(table, segments=3)
+
+        assert sorted(i['book_id'] for i in items) == [f'b{n}' for n in range(7)]
+        assert {r['TotalSegments'] for r in table.requests} == {3}
+
+    def test_query_by_status_reads_every_page(self, table):
+        ledger = DynamoDBLedger(local_mode=True)
+        ledger.local_mode, ledger.table = False, table
+
+        assert sorted(i['book_id'] for i in ledger.query_by_status('success')) == \
+            ['b1', 'b2', 'b4', 'b5']
+
+
+class TestLedgerCache:
+    """Test snapshot queries, persistence and incremental refresh."""
+
+    def test_snapshot_queries(self, table):
+        ledger = LedgerCache(table).ensure()
+
+        assert len(ledger) == 7
+        assert ledger.status_counts() == {'failed': 3, 'success': 4}
+        assert [i['book_id'] for i in ledger.by_status('failed')] == ['b0', 'b3', 'b6']
+        assert ledger.find('Artist', 'Book 4')['songs_extracted'] == 4
+
+    def test_cache_is_reused_while_fresh(self, table, tmp_path):
+        path = tmp_path / 'ledger.json.gz'
+        LedgerCache(table, cache_path=path).ensure()
+        table.requests.clear()
+
+        ledger = LedgerCache(table, cache_path=path).ensure(max_age_sec=3600)
+        assert len(ledger) == 7 and table.requests == []
+        assert LedgerSnapshot.load(path).get('b2')['status'] == 'success'
+
+    def test_incremental_refresh_merges_recent_updates(self, table):
+        ledger = LedgerCache(table, segments=1).ensure()
+        table.items[1] = entry(1, 'failed', updated_at='2026-01-02T00:00:00Z')
+        table.items.append(entry(9, 'in_progress', updated_at='2026-01-02T00:00:01Z'))
+        table.requests.clear()
+
+        read = ledger.refresh()
+
+        # The two updates plus b6, which falls inside the clock-skew margin
+        assert read == 3
+        assert all('FilterExpression' in r and 'TotalSegments' not in r for r in table.requests)
+        assert ledger.get('b1')['status'] == 'failed'
+        assert ledger.status_counts() == {'failed': 4, 'success': 3, 'in_progress': 1}
+
+    def test_paginate_rate_limits_consumed_capacity(self, table, monkeypatch):
+        import app.utils.ledger_snapshot as ledger_snapshot
+
+        class Clock:
+            now, slept = 0.0, []
+
+            def time(self):
+                return self.now
+
+            def sleep(self, sec):
+                self.slept.append(sec)
+                self.now += sec
+
+        clock = Clock()
+        monkeypatch.setattr(ledger_snapshot, 'time', clock)
+
+        items = list(paginate(table.scan, max_rcu_per_sec=10.0))
+
+        # 4 pages of 5 RCU at 10 RCU/s: half a second after each of the first 3
+        assert len(items) == 7
+        assert clock.slept == [0.5, 0.5, 0.5]
+
+    def test_full_refresh_drops_deleted_items(self, table):
+        ledger = LedgerCache(table).ensure()
+        del table.items[0]
+        ledger.refresh(full=True)
+
+        assert 'b0' not in ledger and len(ledger) == 6
@@ -0,0 +1,123 @@
+"""
+Unit tests for the write-coalescing ledger writer.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.utils.ledger_writer import LedgerWriter, PendingUpdate, build_update
+
+
+class FakeTable:
+    """Applies SET expressions built by build_update to in-memory items."""
+
+    def __init__(self, fail=0):
+        self.items = {}
+        self.calls = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        with self.lock:
+            if self.fail:
+                self.fail -= 1
+                raise RuntimeError('throttled')
+            self.calls.append(UpdateExpression)
+            item = self.items.setdefault(Key['book_id'], {'steps': {}})
+            for assignment in UpdateExpression[len('SET '):].split(', '):
+                path, value = assignment.split(' = ')
+                value = ExpressionAttributeValues[value]
+                if path.startswith('steps.'):
+                    item['steps'][ExpressionAttributeNames[path[len('steps.'):]]] = value
+                else:
+                    item[ExpressionAttributeNames[path]] = value
+
+
+@pytest.fixture
+def table():
+    return FakeTable()
+
+
+class TestLedgerWriter:
+    """Test buffering, merging and flush guarantees."""
+
+    def test_updates_merge_into_one_write(self, table):
+        with LedgerWriter(table, flush_interval_sec=60) as ledger:
+            ledger.update('b1', {'status': 'in_progress', 'updated_at': 't0'})
+            ledger.set_step('b1', 'toc', {'status': 'in_progress'}, updated_at='t1', current_step='toc')
+            ledger.set_step('b1', 'toc', {'status': 'success'}, updated_at='t2')
+            ledger.set_step('b1', 'parse', {'status': 'in_progress'}, current_step='parse')
+            assert table.calls == []
+
+        assert len(table.calls) == 1
+        assert table.items['b1'] == {
+            'status': 'in_progress', 'updated_at': 't2', 'current_step': 'parse',
+            'steps': {'toc': {'status': 'success'}, 'parse': {'status': 'in_progress'}},
+        }
+        assert (ledger.updates, ledger.writes) == (4, 1)
+
+    def test_finalize_writes_pending_and_status_together(self, table):
+        ledger = LedgerWriter(table, flush_interval_sec=60)
+        ledger.set_step('b1', 'split', {'status': 'success'}, updated_at='t1')
+        ledger.set_step('b2', 'toc', {'status': 'in_progress'})
+        ledger.finalize('b1', {'status': 'success', 'songs_extracted': 12})
+
+        assert len(table.calls) == 1
+        assert table.items['b1']['status'] == 'success'
+        assert table.items['b1']['steps'] == {'split': {'status': 'success'}}
+        assert ledger.pending_books() == ['b2']
+        ledger.close()
+        assert 'b2' in table.items
+
+    def test_step_boundary_wakes_flush_thread(self, table):
+        with LedgerWriter(table, flush_interval_sec=60) as ledger:
+            ledger.set_step('b1', 'toc', {'status': 'success'}, flush=True)
+            deadline = time.time() + 5
+            while not table.calls and time.time() < deadline:
+                time.sleep(0.01)
+            assert table.items['b1']['steps']['toc'] == {'status': 'success'}
+
+    def test_timer_flush(self, table):
+        with LedgerWriter(table, flush_interval_sec=0.05) as ledger:
+            ledger.set_step('b1', 'toc', {'status': 'in_progress'})
+            deadline = time.time() + 5
+            while not table.calls and time.time() < deadline:
+                time.sleep(0.01)
+            assert 'b1' in table.items
+
+    def test_failed_flush_is_retried_under_newer_values(self):
+        table = FakeTable(fail=1)
+        ledger = LedgerWriter(table, flush_interval_sec=60)
+        ledger.set_step('b1', 'toc', {'status': 'in_progress'}, current_step='toc')
+        assert ledger.flush() == 0
+        ledger.set_step('b1', 'toc', {'status': 'success'})
+        assert ledger.flush() == 1
+
+        assert table.items['b1']['steps']['toc'] == {'status': 'success'}
+        assert table.items['b1']['current_step'] == 'toc'
+        ledger.close()
+
+    def test_failed_finalize_raises_and_stays_buffered(self):
+        table = FakeTable(fail=1)
+        ledger = LedgerWriter(table, flush_interval_sec=60)
+        ledger.set_step('b1', 'toc', {'status': 'success'})
+        with pytest.raises(RuntimeError):
+            ledger.finalize('b1', {'status': 'success'})
+        ledger.close()
+
+        assert table.items['b1']['status'] == 'success'
+        assert table.items['b1']['steps']['toc'] == {'status': 'success'}
+
+    def test_closed_writer_rejects_updates(self, table):
+        ledger = LedgerWriter(table)
+        ledger.close()
+        with pytest.raises(RuntimeError):
+            ledger.update('b1', {'status': 'in_progress'})
+
+    def test_whole_steps_map_absorbs_step_writes(self):
+        args = build_update(PendingUpdate({'steps': {'a': 1}}, {'b': 2}))
+
+        assert args['UpdateExpression'] == 'SET #f0 = :f0'
+        assert args['ExpressionAttributeValues'][':f0'] == {'a': 1, 'b': 2}
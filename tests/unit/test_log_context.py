@@ -0,0 +1,65 @@
+"""
+Unit tests for per-task log labels.
+"""
+
+import logging
+import threading
+
+import pytest
+
+from app.utils.log_context import LogLabelFilter, current_label, install_log_labels, log_label
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger('test_log_context')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handlers = [ListHandler(), ListHandler()]
+    for h in handlers:
+        logger.addHandler(h)
+    install_log_labels(logger)
+    install_log_labels(logger)
+    yield logger, handlers
+    for h in handlers:
+        logger.removeHandler(h)
+
+
+class TestLogContext:
+    """Test labels set per context and applied once per record."""
+
+    def test_label_prefixed_once_across_handlers(self, logger):
+        log, (first, second) = logger
+        assert sum(isinstance(f, LogLabelFilter) for f in first.filters) == 1
+        with log_label('[1/2]'):
+            log.info('done %d%%', 50)
+            log.info('100% literal')
+        log.info('unlabelled')
+
+        assert first.lines == second.lines == ['[1/2] done 50%', '[1/2] 100% literal', 'unlabelled']
+        assert current_label() == ''
+
+    def test_labels_are_per_thread(self, logger):
+        log, (handler, _) = logger
+        barrier = threading.Barrier(2)
+
+        def book(n):
+            with log_label(f'[{n}/2]'):
+                barrier.wait()
+                log.info('step')
+
+        threads = [threading.Thread(target=book, args=(n,)) for n in (1, 2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(handler.lines) == ['[1/2] step', '[2/2] step']
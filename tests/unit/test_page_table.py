@@ -0,0 +1,92 @@
+"""
+Unit tests for the compact page_analysis format.
+"""
+
+import json
+
+from app.utils.page_table import (
+    RAW_SIDECAR_NAME, compact_page_analysis, expand_pages, is_compact,
+    load_page_analysis, write_page_analysis,
+)
+
+
+def legacy_page_analysis():
+    pages = [
+        {'pdf_page': 1, 'printed_page': None, 'content_type': 'cover', 'detected_title': None,
+         'has_music_notation': False, 'confidence': 0.9, 'raw_response': '{"type": "cover"}'},
+        {'pdf_page': 2, 'printed_page': 1, 'content_type': 'song_start', 'detected_title': 'Piano Man',
+         'has_music_notation': True, 'confidence': 0.95, 'raw_response': '{"type": "song_start"}'},
+        {'pdf_page': 3, 'printed_page': 2, 'content_type': 'song_continuation', 'detected_title': 'Piano Man',
+         'has_music_notation': True, 'confidence': 0.8, 'raw_response': None},
+    ]
+    return {'book_id': 'abc', 'total_pages': 3, 'pages': pages,
+            'songs': [{'title': 'Piano Man', 'start_pdf_page': 2, 'end_pdf_page': 3}]}
+
+
+class TestPageTable:
+    """Test round-tripping and column selection."""
+
+    def test_round_trip(self, tmp_path):
+        original = legacy_page_analysis()
+        path = tmp_path / 'page_analysis.json'
+        write_page_analysis(path, original)
+
+        assert is_compact(json.loads(path.read_text()))
+        assert (tmp_path / RAW_SIDECAR_NAME).exists()
+        loaded = load_page_analysis(path, with_raw=True)
+        assert loaded['pages'] == original['pages']
+        assert loaded['songs'] == original['songs']
+        assert loaded['total_pages'] == 3
+
+    def test_raw_responses_load_on_demand(self, tmp_path):
+        path = tmp_path / 'page_analysis.json'
+        write_page_analysis(path, legacy_page_analysis())
+
+        pages = load_page_analysis(path)['pages']
+        assert 'raw_response' not in pages[0]
+        assert pages[1]['detected_title'] == 'Piano Man'
+
+    def test_titles_are_dictionary_encoded(self):
+        compact, sidecar = compact_page_analysis(legacy_page_analysis())
+
+        assert compact['titles'] == ['Piano Man']
+        assert compact['page_table']['detected_title'] == [None, 0, 0]
+        assert compact['page_table']['has_music_notation'] == [0, 1, 1]
+        assert 'pages' not in compact and sidecar is not None
+
+    def test_column_selection(self, tmp_path):
+        path = tmp_path / 'page_analysis.json'
+        write_page_analysis(path, legacy_page_analysis())
+
+        pages = load_page_analysis(path, columns=['content_type'])['pages']
+        assert pages[1] == {'pdf_page': 2, 'content_type': 'song_start'}
+
+    def test_legacy_files_still_load(self, tmp_path):
+        path = tmp_path / 'page_analysis.json'
+        path.write_text(json.dumps(legacy_page_analysis(), indent=2))
+
+        assert load_page_analysis(path, with_raw=True)['pages'] == legacy_page_analysis()['pages']
+        assert load_page_analysis(path, columns=['detected_title'])['pages'][1] == \
+            {'pdf_page': 2, 'detected_title': 'Piano Man'}
+        assert expand_pages(legacy_page_analysis(), columns=()) == [{'pdf_page': p} for p in (1, 2, 3)]
+
+    def test_no_raw_responses_no_sidecar(self, tmp_path):
+        data = legacy_page_analysis()
+        for p in data['pages']:
+            p.pop('raw_response')
+        path = tmp_path / 'page_analysis.json'
+        write_page_analysis(path, data)
+
+        assert not (tmp_path / RAW_SIDECAR_NAME).exists()
+        assert load_page_analysis(path, with_raw=True)['pages'][0]['raw_response'] is None
+
+    def test_rewrite_without_raw_responses_drops_old_sidecar(self, tmp_path):
+        path = tmp_path / 'page_analysis.json'
+        write_page_analysis(path, legacy_page_analysis())
+        data = legacy_page_analysis()
+        for p in data['pages']:
+            p.pop('raw_response')
+        write_page_analysis(path, data)
+
+        assert not (tmp_path / RAW_SIDECAR_NAME).exists()
+        assert load_page_analysis(path, with_raw=True)['pages'][1]['raw_response'] is None
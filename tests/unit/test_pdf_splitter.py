@@ -0,0 +1,251 @@
+"""
+Unit tests for the PDF splitter service (local mode).
+"""
+
+import shutil
+
+import pytest
+import fitz
+
+from app.models import PageRange
+from app.services.pdf_splitter import (
+    SAVE_PROFILES,
+    PDFSplitterService,
+    get_save_profile,
+    serialize_pdf,
+    shard_page_ranges,
+)
+from app.services.split_backends import QPDFCLIBackend, get_split_backend
+from tests.unit.helpers import make_pdf
+
+
+@pytest.fixture
+def source_pdf(tmp_path):
+    path = tmp_path / 'book.pdf'
+    make_pdf(path, 12)
+    return str(path)
+
+
+@pytest.fixture
+def page_ranges():
+    return [
+        PageRange(song_title=f"Song {n}", start_page=start, end_page=end)
+        for n, (start, end) in enumerate([(0, 2), (2, 3), (3, 6), (6, 7), (7, 10), (10, 12)], 1)
+    ]
+
+
+@pytest.fixture
+def splitter(tmp_path):
+    return PDFSplitterService(output_bucket='out', local_mode=True,
+                              local_output_path=str(tmp_path / 'output') + '/')
+
+
+class TestSplitPdf:
+    """Test sequential and process-parallel splitting."""
+
+    def test_parallel_matches_sequential(self, splitter, source_pdf, page_ranges, tmp_path):
+        sequential = splitter.split_pdf(source_pdf, page_ranges, 'Artist', 'Book')
+        parallel = splitter.split_pdf(source_pdf, page_ranges, 'Artist', 'Book', workers=3)
+
+        assert [f.song_title for f in parallel] == [pr.song_title for pr in page_ranges]
+        assert [(f.page_range, f.output_uri) for f in parallel] == \
+            [(f.page_range, f.output_uri) for f in sequential]
+        with fitz.open(parallel[2].output_uri) as doc:
+            assert len(doc) == 3
+
+    def test_song_errors_are_isolated(self, splitter, source_pdf, page_ranges, monkeypatch):
+        extract = splitter._extract_and_save_song
+
+        def failing_extract(source_doc, page_range, *args):
+            if page_range.song_title == 'Song 2':
+                raise RuntimeError("write failed")
+            return extract(source_doc, page_range, *args)
+
+        monkeypatch.setattr(splitter, '_extract_and_save_song', failing_extract)
+        output_files = splitter.split_pdf(source_pdf, page_ranges, 'Artist', 'Book')
+
+        assert [f.song_title for f in output_files] == \
+            ['Song 1', 'Song 3', 'Song 4', 'Song 5', 'Song 6']
+
+    def test_missing_source_returns_empty(self, splitter, page_ranges, tmp_path):
+        assert splitter.split_pdf(str(tmp_path / 'missing.pdf'), page_ranges, 'A', 'B', workers=2) == []
+
+
+class FakeS3Client:
+    """Records put_object / upload_file calls."""
+
+    def __init__(self):
+        self.puts = {}
+        self.uploads = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.puts[Key] = Body
+
+    def upload_file(self, Filename, Bucket, Key, Config=None):
+        with open(Filename, 'rb') as f:
+            self.uploads[Key] = f.read()
+
+
+class TestSingleSerialization:
+    """Test that each song is serialized once and its size reported from that write."""
+
+    def test_local_size_matches_file(self, splitter, source_pdf, page_ranges):
+        output_files = splitter.split_pdf(source_pdf, page_ranges, 'Artist', 'Book')
+
+        for f in output_files:
+            with open(f.output_uri, 'rb') as out:
+                assert len(out.read()) == f.file_size_bytes
+
+    def test_small_songs_are_put_from_memory(self, source_pdf, page_ranges):
+        splitter = PDFSplitterService(output_bucket='out')
+        splitter.s3_utils.s3_client = client = FakeS3Client()
+
+        output_files = splitter.split_pdf(source_pdf, page_ranges[:2], 'Artist', 'Book')
+
+        assert client.uploads == {}
+        assert [len(body) for body in client.puts.values()] == [f.file_size_bytes for f in output_files]
+        assert output_files[0].output_uri.startswith('s3://out/')
+
+    def test_failed_upload_drops_song(self, source_pdf, page_ranges):
+        splitter = PDFSplitterService(output_bucket='out')
+        splitter.s3_utils.s3_client = client = FakeS3Client()
+        put = client.put_object
+
+        def flaky_put(Bucket, Key, Body):
+            if 'Song 2' in Key:
+                raise RuntimeError("SlowDown")
+            put(Bucket, Key, Body)
+
+        client.put_object = flaky_put
+        output_files = splitter.split_pdf(source_pdf, page_ranges[:3], 'Artist', 'Book')
+
+        assert [f.song_title for f in output_files] == ['Song 1', 'Song 3']
+
+    def test_large_songs_are_streamed_through_upload_file(self, source_pdf, page_ranges, monkeypatch):
+        splitter = PDFSplitterService(output_bucket='out')
+        splitter.s3_utils.s3_client = client = FakeS3Client()
+        monkeypatch.setattr(PDFSplitterService, 'STREAM_THRESHOLD_BYTES', 1)
+
+        output_files = splitter.split_pdf(source_pdf, page_ranges[:2], 'Artist', 'Book')
+
+        assert client.puts == {}
+        assert [len(body) for body in client.uploads.values()] == [f.file_size_bytes for f in output_files]
+        assert all(body.startswith(b'%PDF') for body in client.uploads.values())
+
+
+def make_song_doc():
+    """One-page song carrying an unused, uncompressed stream (as insert_pdf can leave)."""
+    doc = fitz.open()
+    page = doc.new_page()
+    for i in range(40):
+        page.insert_text((72, 72 + i * 12), f"Verse line {i} " * 4)
+    xref = doc.get_new_xref()
+    doc.update_object(xref, "<<>>")
+    doc.update_stream(xref, b"0" * 5000, compress=False)
+    return doc
+
+
+class TestSaveProfiles:
+    """Test output PDF save profiles."""
+
+    def test_compact_is_smaller_than_none(self):
+        none = serialize_pdf(make_song_doc(), SAVE_PROFILES['none'])
+        compact = serialize_pdf(make_song_doc(), SAVE_PROFILES['compact'])
+
+        assert len(compact) < len(none)
+        with fitz.open(stream=compact, filetype='pdf') as doc:
+            assert 'Verse line 39' in doc[0].get_text()
+
+    @pytest.mark.parametrize('name', sorted(SAVE_PROFILES))
+    def test_every_profile_produces_a_valid_pdf(self, name, tmp_path):
+        path = tmp_path / f'{name}.pdf'
+        assert serialize_pdf(make_song_doc(), SAVE_PROFILES[name], str(path)) is None
+        with fitz.open(str(path)) as doc:
+            assert len(doc) == 1
+
+    def test_splitter_uses_profile(self, tmp_path, source_pdf, page_ranges):
+        splitters = {
+            name: PDFSplitterService(local_mode=True, save_profile=name,
+                                     local_output_path=str(tmp_path / name) + '/')
+            for name in ('none', 'max')
+        }
+        sizes = {
+            name: sum(f.file_size_bytes for f in s.split_pdf(source_pdf, page_ranges, 'A', 'B'))
+            for name, s in splitters.items()
+        }
+        assert sizes['max'] < sizes['none']
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            get_save_profile('tiny')
+
+
+class TestShardPageRanges:
+    """Test contiguous, page-balanced sharding."""
+
+    def test_shards_are_contiguous_and_complete(self, page_ranges):
+        indexed = list(enumerate(page_ranges))
+        shards = shard_page_ranges(indexed, 3)
+
+        assert len(shards) == 3
+        assert [item for shard in shards for item in shard] == indexed
+
+    def test_more_shards_than_songs(self, page_ranges):
+        shards = shard_page_ranges(list(enumerate(page_ranges[:2])), 8)
+        assert [len(s) for s in shards] == [1, 1]
+
+
+class TestSplitBackends:
+    """Test the qpdf split backends against PyMuPDF."""
+
+    def split_with(self, backend, tmp_path, source_pdf, page_ranges, **kwargs):
+        service = PDFSplitterService(local_mode=True, split_backend=backend,
+                                     local_output_path=str(tmp_path / backend) + '/', **kwargs)
+        return service.split_pdf(source_pdf, page_ranges, 'Artist', 'Book')
+
+    def test_qpdf_matches_pymupdf(self, tmp_path, source_pdf, page_ranges):
+        pytest.importorskip('pikepdf')
+        pymupdf = self.split_with('pymupdf', tmp_path, source_pdf, page_ranges)
+        qpdf = self.split_with('qpdf', tmp_path, source_pdf, page_ranges)
+
+        assert [f.page_range for f in qpdf] == [f.page_range for f in pymupdf]
+        for f in qpdf:
+            with fitz.open(f.output_uri) as doc:
+                start, end = f.page_range
+                assert len(doc) == end - start
+                assert doc[0].get_text().strip() == f"Page {start + 1}"
+
+    @pytest.mark.skipif(not shutil.which('qpdf'), reason='qpdf executable not installed')
+    def test_qpdf_cli(self, tmp_path, source_pdf):
+        backend = QPDFCLIBackend()
+        source = backend.open(source_pdf)
+        assert backend.page_count(source) == 12
+        assert backend.extract(source, 12, 14) is None
+
+        data = backend.serialize(backend.extract(source, 3, 6), SAVE_PROFILES['compact'])
+        with fitz.open(stream=data, filetype='pdf') as doc:
+            assert len(doc) == 3
+
+    def test_unreadable_source_falls_back_to_pymupdf(self, tmp_path, page_ranges, monkeypatch):
+        pytest.importorskip('pikepdf')
+        path = tmp_path / 'book.pdf'
+        make_pdf(path, 12)
+        service = PDFSplitterService(local_mode=True, split_backend='qpdf',
+                                     local_output_path=str(tmp_path / 'out') + '/')
+
+        def refuse(pdf_path):
+            raise RuntimeError("unable to find trailer dictionary")
+
+        monkeypatch.setattr(service.backend, 'open', refuse)
+        output_files = service.split_pdf(str(path), page_ranges, 'Artist', 'Book')
+
+        assert len(output_files) == len(page_ranges)
+
+    def test_image_profiles_need_pymupdf(self):
+        pytest.importorskip('pikepdf')
+        with pytest.raises(ValueError):
+            PDFSplitterService(local_mode=True, split_backend='qpdf', save_profile='mobile')
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            get_split_backend('ghostscript')
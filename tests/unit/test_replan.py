@@ -0,0 +1,133 @@
+"""
+Unit tests for re-planning song boundaries from stored artifacts.
+"""
+
+import json
+import pytest
+
+from app.services.holistic_page_analyzer import HolisticPageAnalyzer, PageInfo
+from app.services.replan import diff_page_mapping, diff_verified_songs, replan_book
+from tests.unit.helpers import NoVisionClient
+
+
+def raw(content_type, title=None, printed_page=None):
+    return json.dumps({
+        'printed_page': printed_page,
+        'content_type': content_type,
+        'song_title': title,
+        'has_music': content_type.startswith('song'),
+    })
+
+
+def song(title, start, end, artist='Artist'):
+    return {'song_title': title, 'start_page': start, 'end_page': end, 'artist': artist}
+
+
+class TestDiffVerifiedSongs:
+    """Test verified_songs diffing."""
+
+    def test_identical(self):
+        doc = {'verified_songs': [song('A', 0, 2), song('B', 2, 4)]}
+        diff = diff_verified_songs(doc, doc)
+        assert diff['changed'] is False
+        assert diff['unchanged'] == 2
+
+    def test_moved_added_removed(self):
+        old = {'verified_songs': [song('A', 0, 2), song('B', 2, 4), song('C', 4, 5)]}
+        new = {'verified_songs': [song('A', 0, 3), song('B', 3, 4), song('D', 4, 5)]}
+        diff = diff_verified_songs(old, new)
+        assert [m['song_title'] for m in diff['moved']] == ['A', 'B']
+        assert diff['moved'][0]['old_range'] == [0, 2]
+        assert [s['song_title'] for s in diff['added']] == ['D']
+        assert [s['song_title'] for s in diff['removed']] == ['C']
+
+    def test_repeated_titles_are_distinct(self):
+        old = {'verified_songs': [song('Reprise', 0, 1), song('Reprise', 5, 6)]}
+        new = {'verified_songs': [song('Reprise', 0, 1)]}
+        diff = diff_verified_songs(old, new)
+        assert diff['unchanged'] == 1
+        assert diff['removed'] == [song('Reprise', 5, 6)]
+
+
+class TestDiffPageMapping:
+    """Test page_mapping diffing."""
+
+    @staticmethod
+    def mapping(offset, *locations):
+        return {'offset': offset, 'song_locations': [
+            {'song_title': t, 'printed_page': p, 'pdf_index': i} for t, p, i in locations]}
+
+    def test_identical(self):
+        doc = self.mapping(2, ('A', 1, 2), ('B', 3, 4))
+        assert diff_page_mapping(doc, doc)['changed'] is False
+
+    def test_offset_and_locations(self):
+        old = self.mapping(2, ('A', 1, 2), ('B', 3, 4), ('C', 5, 6))
+        new = self.mapping(3, ('A', 1, 3), ('B', 3, 4), ('D', 7, 9))
+        diff = diff_page_mapping(old, new)
+        assert (diff['old_offset'], diff['new_offset'], diff['offset_changed']) == (2, 3, True)
+        assert diff['moved'] == [{'song_title': 'A', 'old': [1, 2], 'new': [1, 3]}]
+        assert (diff['added'], diff['removed']) == (['D'], ['C'])
+
+
+class TestReplanBook:
+    """Test re-planning a book directory with no vision calls."""
+
+    @pytest.fixture
+    def book_dir(self, tmp_path):
+        book_dir = tmp_path / 'Artist' / 'Book'
+        book_dir.mkdir(parents=True)
+        pages = [
+            # Phase 5 rewrote page 3 as a continuation; the raw response says song_start
+            {'pdf_page': 1, 'content_type': 'song_start', 'detected_title': 'First Song',
+             'raw_response': raw('song_start', 'First Song', 1)},
+            {'pdf_page': 2, 'content_type': 'song_continuation',
+             'raw_response': raw('song_continuation', None, 2)},
+            {'pdf_page': 3, 'content_type': 'song_continuation',
+             'raw_response': raw('song_start', 'Second Song', 3)},
+            {'pdf_page': 4, 'content_type': 'song_continuation',
+             'raw_response': raw('song_continuation', None, 4)},
+        ]
+        files = {
+            'page_analysis.json': {'book_id': 'book-1', 'source_pdf_uri': 's3://b/k.pdf',
+                                   'total_pages': 4, 'pages': pages},
+            'toc_parse.json': {'entries': [{'song_title': 'First Song', 'page_number': 1},
+                                           {'song_title': 'Second Song', 'page_number': 3}]},
+            'verified_songs.json': {'book_id': 'book-1',
+                                    'verified_songs': [song('First Song', 0, 4)]},
+        }
+        for name, data in files.items():
+            (book_dir / name).write_text(json.dumps(data))
+        return book_dir
+
+    def test_replan_recovers_raw_classification(self, book_dir):
+        result = replan_book(book_dir, HolisticPageAnalyzer(bedrock_client=NoVisionClient()))
+
+        titles = [s['song_title'] for s in result.verified_songs['verified_songs']]
+        assert titles == ['First Song', 'Second Song']
+        assert result.verified_songs['verified_songs'][1]['start_page'] == 2
+        assert result.changed
+        assert [s['song_title'] for s in result.diff['added']] == ['Second Song']
+        assert result.page_mapping['book_id'] == 'book-1'
+        assert result.diff['page_mapping']['added'] == ['First Song', 'Second Song']
+
+    def test_default_analyzer_makes_no_client(self, book_dir, monkeypatch):
+        import app.utils.bedrock_router as router
+        monkeypatch.setattr(router, 'get_bedrock_client', lambda: pytest.fail("client created"))
+        assert replan_book(book_dir).changed
+
+    def test_missing_inputs_raise(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            replan_book(tmp_path)
+
+
+class TestPagesFromDicts:
+    """Test rebuilding Phase 1 pages from stored dicts."""
+
+    def test_without_raw_response_uses_stored_fields(self):
+        analyzer = HolisticPageAnalyzer(bedrock_client=NoVisionClient())
+        pages = analyzer.pages_from_dicts([
+            {'pdf_page': 7, 'printed_page': 5, 'content_type': 'song_start',
+             'detected_title': 'X', 'has_music_notation': True, 'confidence': 0.9},
+        ])
+        assert pages == [PageInfo(7, 5, 'song_start', 'X', True, 0.9)]
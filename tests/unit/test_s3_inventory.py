@@ -0,0 +1,141 @@
+"""
+Unit tests for bucket inventory snapshots.
+"""
+
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils.s3_inventory import Inventory, S3Inventory, scan_local
+
+
+class FakeS3Client:
+    """Serves list_objects_v2 pages and get_object bodies from a dict."""
+
+    def __init__(self, objects=None, page_size=2):
+        self.objects = objects or {}
+        self.page_size = page_size
+        self.list_calls = 0
+        self.bodies = {}
+
+    def get_paginator(self, name):
+        assert name == 'list_objects_v2'
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        self.list_calls += 1
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))
+        for i in range(0, len(keys), self.page_size):
+            yield {'Contents': [
+                {'Key': k, 'Size': self.objects[k][0], 'ETag': f'"{self.objects[k][1]}"',
+                 'LastModified': datetime.fromtimestamp(self.objects[k][2], tz=timezone.utc)}
+                for k in keys[i:i + self.page_size]
+            ]}
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.bodies[Key])}
+
+
+@pytest.fixture
+def s3():
+    return FakeS3Client({
+        'v3/A/Book1/toc_parse.json': (10, 'e1', 1000),
+        'v3/A/Book1/page_analysis.json': (20, 'e2', 2000),
+        'v3/A/Book2/toc_parse.json': (30, 'e3', 1500),
+        'v3/B/Book1/toc_parse.json': (40, 'e4', 1000),
+        'other/readme.txt': (5, 'e5', 1000),
+    })
+
+
+class TestInventory:
+    """Test lookups against a listed snapshot."""
+
+    def test_single_listing_answers_queries(self, s3):
+        inv = S3Inventory('bucket', 'v3/', s3_client=s3).ensure()
+
+        assert len(inv) == 4 and s3.list_calls == 1
+        assert inv.exists('v3/A/Book1/toc_parse.json')
+        assert not inv.exists('other/readme.txt')
+        assert inv.matches('v3/A/Book2/toc_parse.json', 30, 'e3')
+        assert not inv.matches('v3/A/Book2/toc_parse.json', 30, 'other')
+        assert inv.is_newer('v3/A/Book1/page_analysis.json', 'v3/A/Book1/toc_parse.json')
+        assert not inv.is_fresh('v3/A/Book1/toc_parse.json', since=1500)
+
+    def test_keys_under(self, s3):
+        inv = S3Inventory('bucket', 'v3/', s3_client=s3).ensure()
+
+        assert inv.keys_under('v3/A/Book1/') == \
+            ['v3/A/Book1/page_analysis.json', 'v3/A/Book1/toc_parse.json']
+        inv.record('v3/A/Book1/verified_songs.json', 7)
+        assert len(inv.keys_under('v3/A/Book1/')) == 3
+        assert inv.keys_under('v3/C/') == []
+
+    def test_refresh_prefix_replaces_one_book(self, s3):
+        inv = S3Inventory('bucket', 'v3/', s3_client=s3).ensure()
+        del s3.objects['v3/A/Book1/page_analysis.json']
+        s3.objects['v3/A/Book1/verified_songs.json'] = (50, 'e6', 3000)
+        s3.objects['v3/B/Book1/new.json'] = (1, 'e7', 3000)
+
+        assert inv.refresh_prefix('v3/A/Book1/') == 2
+        assert inv.keys_under('v3/A/Book1/') == \
+            ['v3/A/Book1/toc_parse.json', 'v3/A/Book1/verified_songs.json']
+        # Other books are untouched until they are refreshed
+        assert not inv.exists('v3/B/Book1/new.json')
+        with pytest.raises(ValueError):
+            inv.refresh_prefix('other/')
+
+    def test_cached_snapshot_is_reused(self, tmp_path, s3):
+        cache = tmp_path / 'inventory' / 'bucket.json.gz'
+        S3Inventory('bucket', 'v3/', s3_client=s3, cache_path=cache).ensure()
+
+        again = S3Inventory('bucket', 'v3/', s3_client=s3, cache_path=cache).ensure()
+        assert s3.list_calls == 1
+        assert again.get('v3/B/Book1/toc_parse.json').etag == 'e4'
+
+        stale = S3Inventory('bucket', 'v3/', s3_client=s3, cache_path=cache).ensure(max_age_sec=-1)
+        assert s3.list_calls == 2 and stale.listings == 1
+
+    def test_save_load_round_trip(self, tmp_path, s3):
+        inv = S3Inventory('bucket', 'v3/', s3_client=s3).ensure()
+        inv.save(tmp_path / 'snap.json.gz')
+
+        loaded = Inventory.load(tmp_path / 'snap.json.gz')
+        assert loaded.entries == inv.entries
+        assert (loaded.bucket, loaded.prefix, loaded.listed_at) == ('bucket', 'v3/', inv.listed_at)
+
+
+class TestSources:
+    """Test snapshots built from inventory reports and local directories."""
+
+    def test_load_report(self):
+        s3 = FakeS3Client()
+        rows = ('"bucket","v3/A/Song+One.pdf","12","abc","2024-01-01T00:00:00.000Z"\n'
+                '"bucket","other/x.pdf","3","def","2024-01-01T00:00:00.000Z"\n')
+        s3.bodies['data/1.csv.gz'] = gzip.compress(rows.encode())
+        s3.bodies['manifest.json'] = json.dumps({
+            'fileFormat': 'CSV',
+            'fileSchema': 'Bucket, Key, Size, ETag, LastModifiedDate',
+            'files': [{'key': 'data/1.csv.gz'}],
+            'creationTimestamp': '1704067200000',
+        }).encode()
+
+        inv = S3Inventory('bucket', 'v3/', s3_client=s3)
+        assert inv.load_report('reports', 'manifest.json') == 1
+        assert inv.matches('v3/A/Song One.pdf', 12, 'abc')
+        assert inv.listed_at == 1704067200
+        assert s3.list_calls == 0
+
+    def test_scan_local(self, tmp_path):
+        book = tmp_path / 'A' / 'Book1'
+        book.mkdir(parents=True)
+        (book / 'toc_parse.json').write_text('{}')
+        (tmp_path / 'A' / 'notes.txt').write_text('hello')
+
+        inv = scan_local(tmp_path, key_prefix='v3/')
+
+        assert inv.all_exist(['v3/A/Book1/toc_parse.json', 'v3/A/notes.txt'])
+        assert inv.get('v3/A/notes.txt').size == 5
+        assert len(scan_local(tmp_path / 'missing')) == 0
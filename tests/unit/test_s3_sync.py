@@ -0,0 +1,188 @@
+"""
+Unit tests for S3 <-> local delta sync.
+"""
+
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils.s3_sync import DeltaSync, local_etag
+
+
+class FakeS3Client:
+    """In-memory bucket with listing, file transfers and batch delete."""
+
+    def __init__(self):
+        self.objects = {}  # key -> (bytes, mtime)
+        self.transfers = []
+
+    def put(self, key, data, mtime=None):
+        self.objects[key] = (data, mtime or time.time())
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        yield {'Contents': [
+            {'Key': k, 'Size': len(data), 'ETag': f'"{hashlib.md5(data).hexdigest()}"',
+             'LastModified': datetime.fromtimestamp(mtime, tz=timezone.utc)}
+            for k, (data, mtime) in sorted(self.objects.items()) if k.startswith(Prefix)
+        ]}
+
+    def upload_file(self, Filename, Bucket, Key, Config=None):
+        self.transfers.append(('up', Key))
+        with open(Filename, 'rb') as f:
+            self.put(Key, f.read())
+
+    def download_file(self, Bucket, Key, Filename, Config=None):
+        self.transfers.append(('down', Key))
+        with open(Filename, 'wb') as f:
+            f.write(self.objects[Key][0])
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete['Objects']:
+            self.objects.pop(obj['Key'], None)
+        return {}
+
+
+@pytest.fixture
+def s3():
+    client = FakeS3Client()
+    client.put('v3/A/Book1/toc_parse.json', b'{"entries": []}')
+    client.put('v3/A/Book1/verified_songs.json', b'{"verified_songs": []}')
+    client.put('v3/B/Book2/toc_parse.json', b'{"entries": [1]}')
+    return client
+
+
+def make_sync(s3, tmp_path, **kwargs):
+    return DeltaSync('bucket', tmp_path / 'mirror', prefix='v3/', s3_client=s3,
+                     manifest_path=tmp_path / 'manifest.json.gz', max_workers=2, **kwargs)
+
+
+def touch_later(path, data):
+    """Rewrite a file and make sure its mtime moves."""
+    path.write_bytes(data)
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+class TestDeltaSync:
+    """Test what gets transferred, deleted and skipped."""
+
+    def test_first_sync_downloads_everything(self, tmp_path, s3):
+        result = make_sync(s3, tmp_path).run('down')
+
+        assert result.count('download') == 3
+        assert (tmp_path / 'mirror' / 'B' / 'Book2' / 'toc_parse.json').read_bytes() == b'{"entries": [1]}'
+
+    def test_resync_moves_only_changes(self, tmp_path, s3):
+        make_sync(s3, tmp_path).run('down')
+        s3.transfers.clear()
+        s3.put('v3/A/Book1/verified_songs.json', b'{"verified_songs": [1]}')
+
+        result = make_sync(s3, tmp_path).run('down')
+
+        assert s3.transfers == [('down', 'v3/A/Book1/verified_songs.json')]
+        assert result.unchanged == 2
+        assert result.bytes_transferred == len(b'{"verified_songs": [1]}')
+
+    def test_identical_local_copy_is_not_downloaded(self, tmp_path, s3):
+        book = tmp_path / 'mirror' / 'A' / 'Book1'
+        book.mkdir(parents=True)
+        (book / 'toc_parse.json').write_bytes(b'{"entries": []}')
+
+        result = make_sync(s3, tmp_path).run('down', sub_prefix='A/Book1/')
+
+        assert s3.transfers == [('down', 'v3/A/Book1/verified_songs.json')]
+        assert result.unchanged == 1
+
+    def test_local_edit_is_uploaded(self, tmp_path, s3):
+        make_sync(s3, tmp_path).run('down')
+        s3.transfers.clear()
+        touch_later(tmp_path / 'mirror' / 'A' / 'Book1' / 'verified_songs.json', b'{"fixed": true}')
+
+        result = make_sync(s3, tmp_path).run('both')
+
+        assert s3.transfers == [('up', 'v3/A/Book1/verified_songs.json')]
+        assert s3.objects['v3/A/Book1/verified_songs.json'][0] == b'{"fixed": true}'
+        # The manifest now records the uploaded state
+        assert make_sync(s3, tmp_path).plan('both').actions == []
+        assert result.conflicts == []
+
+    def test_deletions_propagate(self, tmp_path, s3):
+        make_sync(s3, tmp_path).run('down')
+        del s3.objects['v3/A/Book1/toc_parse.json']
+        (tmp_path / 'mirror' / 'B' / 'Book2' / 'toc_parse.json').unlink()
+
+        result = make_sync(s3, tmp_path).run('both')
+
+        assert not (tmp_path / 'mirror' / 'A' / 'Book1' / 'toc_parse.json').exists()
+        assert 'v3/B/Book2/toc_parse.json' not in s3.objects
+        assert (result.count('delete_local'), result.count('delete_remote')) == (1, 1)
+
+    def test_down_restores_local_deletion(self, tmp_path, s3):
+        make_sync(s3, tmp_path).run('down')
+        (tmp_path / 'mirror' / 'B' / 'Book2' / 'toc_parse.json').unlink()
+
+        result = make_sync(s3, tmp_path).run('down')
+
+        assert [a.op for a in result.actions] == ['download']
+        assert 'v3/B/Book2/toc_parse.json' in s3.objects
+
+    def test_untracked_local_files_need_prune(self, tmp_path, s3):
+        make_sync(s3, tmp_path).run('down')
+        extra = tmp_path / 'mirror' / 'A' / 'Book1' / 'scratch.json'
+        extra.write_text('{}')
+
+        assert make_sync(s3, tmp_path).run('down').actions == []
+        assert extra.exists()
+        make_sync(s3, tmp_path).run('down', prune=True)
+        assert not extra.exists()
+
+    def test_conflict_newer_side_wins(self, tmp_path, s3):
+        make_sync(s3, tmp_path).run('down')
+        local = tmp_path / 'mirror' / 'A' / 'Book1' / 'toc_parse.json'
+        touch_later(local, b'{"local": 1}')
+        s3.put('v3/A/Book1/toc_parse.json', b'{"remote": 1}', mtime=local.stat().st_mtime + 60)
+
+        result = make_sync(s3, tmp_path).run('both')
+
+        assert result.conflicts == ['A/Book1/toc_parse.json']
+        assert local.read_bytes() == b'{"remote": 1}'
+
+    def test_include_filter(self, tmp_path, s3):
+        s3.put('v3/A/Book1/notes.txt', b'x')
+        sync = make_sync(s3, tmp_path, include=lambda rel: rel.endswith('.json'))
+
+        assert sync.run('down').count('download') == 3
+        assert not (tmp_path / 'mirror' / 'A' / 'Book1' / 'notes.txt').exists()
+
+    def test_concurrent_book_syncs_keep_every_manifest_entry(self, tmp_path, s3):
+        from concurrent.futures import ThreadPoolExecutor
+        from app.utils.s3_inventory import Inventory
+
+        books = [f'C/Book{n}/' for n in range(12)]
+        for book in books:
+            s3.put(f'v3/{book}toc_parse.json', book.encode())
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(lambda b: make_sync(s3, tmp_path).run('down', sub_prefix=b), books))
+
+        manifest = Inventory.load(tmp_path / 'manifest.json.gz')
+        assert all(f'{book}toc_parse.json' in manifest.entries for book in books)
+        assert not list(tmp_path.glob('*.tmp'))
+
+    def test_bad_direction(self, tmp_path, s3):
+        with pytest.raises(ValueError):
+            make_sync(s3, tmp_path).plan('sideways')
+
+
+def test_local_etag_multipart(tmp_path):
+    path = tmp_path / 'big.pdf'
+    path.write_bytes(b'a' * 10 + b'b' * 10)
+
+    assert local_etag(path) == hashlib.md5(b'a' * 10 + b'b' * 10).hexdigest()
+    parts = hashlib.md5(b'a' * 10).digest() + hashlib.md5(b'b' * 10).digest()
+    assert local_etag(path, multipart_threshold=16, chunk_size=10) == f'{hashlib.md5(parts).hexdigest()}-2'
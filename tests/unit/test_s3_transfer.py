@@ -0,0 +1,92 @@
+"""
+Unit tests for the concurrent S3 transfer queue.
+"""
+
+import threading
+import time
+
+from app.utils.s3_transfer import S3TransferQueue
+
+
+class SlowS3Client:
+    """Fake S3 client whose calls take a while and track concurrency."""
+
+    def __init__(self, delay=0.02, fail_keys=()):
+        self.delay = delay
+        self.fail_keys = set(fail_keys)
+        self.objects = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _call(self, key):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if key in self.fail_keys:
+                raise RuntimeError("SlowDown")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def put_object(self, Bucket, Key, Body):
+        self._call(Key)
+        self.objects[Key] = Body
+
+    def upload_file(self, Filename, Bucket, Key, Config=None):
+        self._call(Key)
+        with open(Filename, 'rb') as f:
+            self.objects[Key] = f.read()
+
+    def download_file(self, Bucket, Key, Filename, Config=None):
+        self._call(Key)
+        with open(Filename, 'wb') as f:
+            f.write(self.objects[Key])
+
+
+class TestS3TransferQueue:
+    """Test concurrency, backpressure and error reporting."""
+
+    def test_transfers_run_concurrently(self):
+        client = SlowS3Client()
+        with S3TransferQueue(client, max_workers=8, transfer_config=object()) as queue:
+            for i in range(24):
+                queue.put_bytes(b'x' * i, 'bucket', f'song{i}.pdf')
+
+        assert len(client.objects) == 24
+        assert client.max_in_flight > 1
+        assert all(r.ok for r in queue.results)
+
+    def test_backpressure_bounds_pending(self):
+        client = SlowS3Client()
+        queue = S3TransferQueue(client, max_workers=8, max_pending=3, transfer_config=object())
+        for i in range(12):
+            queue.put_bytes(b'x', 'bucket', f'song{i}.pdf')
+        queue.close()
+
+        assert client.max_in_flight <= 3
+        assert len(client.objects) == 12
+
+    def test_failures_are_reported(self):
+        client = SlowS3Client(fail_keys={'song2.pdf'})
+        with S3TransferQueue(client, max_workers=4, transfer_config=object()) as queue:
+            for i in range(4):
+                queue.put_bytes(b'x', 'bucket', f'song{i}.pdf')
+
+        assert [r.key for r in queue.results if not r.ok] == ['song2.pdf']
+        assert 'SlowDown' in queue.results[2].error
+
+    def test_upload_and_download_files(self, tmp_path):
+        client = SlowS3Client(delay=0)
+        source = tmp_path / 'song.pdf'
+        source.write_bytes(b'%PDF-1.7')
+
+        with S3TransferQueue(client, transfer_config=object()) as queue:
+            queue.upload_file(str(source), 'bucket', 'v3/A/B/song.pdf')
+        with S3TransferQueue(client, transfer_config=object()) as queue:
+            queue.download_file('bucket', 'v3/A/B/song.pdf', str(tmp_path / 'sync' / 'song.pdf'))
+
+        assert (tmp_path / 'sync' / 'song.pdf').read_bytes() == b'%PDF-1.7'
+        assert [r.size for r in queue.results] == [8]
@@ -112,6 +112,16 @@ class TestS3UtilsLocalMode:
         
         assert Path(result).exists()
         assert Path(result).read_bytes() == test_data
+    
+    def test_delete_object_local_mode(self, sample_structure):
+        """Test deleting in local mode, including a key that does not exist."""
+        s3_utils = S3Utils(local_mode=True, local_base_path=str(sample_structure))
+        
+        result = s3_utils.write_bytes(b'stale', 'local', 'output/raw.json.gz')
+        s3_utils.delete_object('local', 'output/raw.json.gz')
+        s3_utils.delete_object('local', 'output/raw.json.gz')
+        
+        assert not Path(result).exists()
 
 
 class TestS3Object:
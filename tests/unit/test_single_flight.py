@@ -0,0 +1,90 @@
+"""
+Unit tests for single-flight request deduplication.
+"""
+
+import threading
+import time
+import pytest
+
+from app.utils.single_flight import SingleFlight, request_key
+
+
+class TestRequestKey:
+    """Test request hashing."""
+
+    def test_same_inputs_same_key(self):
+        assert request_key('model', '{"a": 1}') == request_key('model', '{"a": 1}')
+
+    def test_model_and_body_both_matter(self):
+        assert request_key('model', '{}') != request_key('other', '{}')
+        assert request_key('model', '{}') != request_key('model', '{"a": 1}')
+
+
+class TestSingleFlight:
+    """Test collapsing of concurrent identical calls."""
+
+    def run_concurrently(self, group, key, fn, count):
+        results = [None] * count
+        errors = [None] * count
+
+        def worker(i):
+            try:
+                results[i] = group.do(key, fn)
+            except Exception as e:
+                errors[i] = e
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results, errors
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        group = SingleFlight()
+        executions = []
+        release = threading.Event()
+
+        def slow_call():
+            executions.append(1)
+            release.wait(5)
+            return 'result'
+
+        # Let followers queue up behind the leader before it finishes
+        threading.Timer(0.2, release.set).start()
+        results, errors = self.run_concurrently(group, 'k', slow_call, 5)
+
+        assert results == ['result'] * 5
+        assert errors == [None] * 5
+        assert len(executions) == 1
+        assert group.stats() == {'executed': 1, 'collapsed': 4, 'in_flight': 0}
+
+    def test_errors_propagate_to_all_waiters(self):
+        group = SingleFlight()
+
+        def failing_call():
+            time.sleep(0.2)
+            raise RuntimeError('boom')
+
+        results, errors = self.run_concurrently(group, 'k', failing_call, 3)
+
+        assert all(isinstance(e, RuntimeError) for e in errors)
+        assert group.stats()['executed'] == 1
+
+    def test_sequential_calls_are_not_cached(self):
+        group = SingleFlight()
+        assert group.do('k', lambda: 1) == 1
+        assert group.do('k', lambda: 2) == 2
+        assert group.stats()['collapsed'] == 0
+
+    def test_different_keys_run_independently(self):
+        group = SingleFlight()
+        assert group.do('a', lambda: 'A') == 'A'
+        assert group.do('b', lambda: 'B') == 'B'
+        assert group.stats()['executed'] == 2
+
+    def test_leader_exception_reraised(self):
+        group = SingleFlight()
+        with pytest.raises(ValueError):
+            group.do('k', lambda: (_ for _ in ()).throw(ValueError('bad')))
+        assert group.stats()['in_flight'] == 0
@@ -0,0 +1,103 @@
+"""
+Unit tests for the SQLite ledger table.
+"""
+
+import json
+from decimal import Decimal
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.utils.dynamodb_ledger import DynamoDBLedger
+from app.utils.ledger_snapshot import paginate, parallel_scan
+from app.utils.sqlite_ledger import SQLiteLedgerTable
+
+
+@pytest.fixture
+def table(tmp_path):
+    with SQLiteLedgerTable(tmp_path / 'ledger.sqlite') as t:
+        yield t
+
+
+def seed(table, n=5):
+    for i in range(n):
+        table.put_item(Item={'book_id': f'b{i}', 'status': 'success' if i % 2 else 'failed',
+                             'steps': {}, 'updated_at': f'2026-01-0{i + 1}T00:00:00Z'})
+
+
+class TestSQLiteLedgerTable:
+    """Test the boto3 Table subset on SQLite."""
+
+    def test_update_expression_with_nested_paths(self, table):
+        table.put_item(Item={'book_id': 'b1', 'status': 'in_progress', 'steps': {}})
+        table.update_item(
+            Key={'book_id': 'b1'},
+            UpdateExpression='SET steps.#step = :d, #s = :s, total = if_not_exists(total, :zero)',
+            ExpressionAttributeNames={'#step': 'toc_parser', '#s': 'status'},
+            ExpressionAttributeValues={':d': {'status': 'success', 'duration_sec': 1.5},
+                                       ':s': 'success', ':zero': 0})
+
+        item = table.get_item(Key={'book_id': 'b1'})['Item']
+        assert item['status'] == 'success' and item['total'] == 0
+        assert item['steps']['toc_parser'] == {'status': 'success', 'duration_sec': Decimal('1.5')}
+
+    def test_set_under_missing_map_fails_like_dynamodb(self, table):
+        with pytest.raises(ClientError) as exc:
+            table.update_item(Key={'book_id': 'new'}, UpdateExpression='SET steps.#s = :d',
+                              ExpressionAttributeNames={'#s': 'toc'},
+                              ExpressionAttributeValues={':d': {}})
+        assert exc.value.response['Error']['Code'] == 'ValidationException'
+        assert 'Item' not in table.get_item(Key={'book_id': 'new'})
+
+    def test_condition_expressions(self, table):
+        table.put_item(Item={'book_id': 'b1', 'status': 'success'})
+        with pytest.raises(ClientError) as exc:
+            table.put_item(Item={'book_id': 'b1'}, ConditionExpression='attribute_not_exists(book_id)')
+        assert exc.value.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+        table.update_item(Key={'book_id': 'b1'}, UpdateExpression='REMOVE #s',
+                          ConditionExpression='#s = :s',
+                          ExpressionAttributeNames={'#s': 'status'},
+                          ExpressionAttributeValues={':s': 'success'})
+        assert 'status' not in table.get_item(Key={'book_id': 'b1'})['Item']
+
+    def test_query_and_scan_paginate(self, table):
+        seed(table)
+        query = dict(IndexName='status-index', KeyConditionExpression='#status = :status',
+                     ExpressionAttributeNames={'#status': 'status'},
+                     ExpressionAttributeValues={':status': 'failed'}, Limit=1)
+
+        assert [i['book_id'] for i in paginate(table.query, **query)] == ['b0', 'b2', 'b4']
+        assert sorted(i['book_id'] for i in parallel_scan(table, segments=3, page_size=1)) == \
+            ['b0', 'b1', 'b2', 'b3', 'b4']
+        recent = table.scan(FilterExpression='updated_at >= :since',
+                            ExpressionAttributeValues={':since': '2026-01-04'})
+        assert (recent['Count'], recent['ScannedCount']) == (2, 5)
+
+    def test_backup_round_trip(self, table, tmp_path):
+        backup = {'Items': [{'book_id': {'S': 'b1'}, 'status': {'S': 'success'},
+                             'songs_extracted': {'N': '14'},
+                             'steps': {'M': {'toc': {'M': {'duration_sec': {'N': '84.5'}}}}}}],
+                  'Count': 1, 'ScannedCount': 1, 'ConsumedCapacity': None}
+        (tmp_path / 'in.json').write_text(json.dumps(backup))
+
+        assert table.import_backup(tmp_path / 'in.json') == 1
+        assert table.get_item(Key={'book_id': 'b1'})['Item']['songs_extracted'] == 14
+        table.export_backup(tmp_path / 'out.json')
+        assert json.loads((tmp_path / 'out.json').read_text()) == backup
+
+    def test_ledger_interface_on_sqlite(self, tmp_path):
+        path = tmp_path / 'ledger.sqlite'
+        ledger = DynamoDBLedger(sqlite_path=str(path))
+        book_id = ledger.record_processing_start('s3://in/v3/A/A - B.pdf', 'A', 'B')
+        ledger.update_step(book_id, 'toc_discovery', {'status': 'success'}, current_step='toc_parser')
+        ledger.record_processing_complete(book_id, 'success', songs_extracted=3, total_duration_sec=12.5)
+        ledger.close()
+
+        reopened = DynamoDBLedger(sqlite_path=str(path))
+        entry = reopened.get_entry(book_id)
+        assert entry['steps'] == {'toc_discovery': {'status': 'success'}}
+        assert (entry['current_step'], entry['total_duration_sec']) == ('toc_parser', Decimal('12.5'))
+        assert reopened.check_already_processed(book_id)
+        assert [e['book_id'] for e in reopened.query_by_status('success')] == [book_id]
+        reopened.close()
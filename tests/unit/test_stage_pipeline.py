@@ -0,0 +1,96 @@
+"""
+Unit tests for the staged pipeline.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.utils.stage_pipeline import Stage, StagedPipeline
+
+
+class TestStagedPipeline:
+    """Test flow between stage pools, failures and admission."""
+
+    def test_items_pass_every_stage_in_order(self):
+        seen = []
+        lock = threading.Lock()
+
+        def step(name):
+            def fn(item):
+                with lock:
+                    seen.append((item, name))
+                return f'{name}:{item}'
+            return fn
+
+        pipeline = StagedPipeline([Stage('a', step('a'), 2), Stage('b', step('b'), 1),
+                                   Stage('c', step('c'), 3)])
+        results = pipeline.run(range(10))
+
+        assert sorted(r.item for r in results) == list(range(10))
+        assert all(r.ok and r.value == f'c:{r.item}' for r in results)
+        for item in range(10):
+            assert [n for i, n in seen if i == item] == ['a', 'b', 'c']
+        assert pipeline.summary(1.0)['b']['items'] == 10
+
+    def test_cheap_stages_overlap_the_slow_stage(self):
+        # One slow worker; the fast stages never wait for it to finish a whole item
+        started = {}
+
+        def slow(item):
+            time.sleep(0.03)
+
+        def fast(item):
+            started[item] = time.time()
+
+        t0 = time.time()
+        StagedPipeline([Stage('fast', fast, 1), Stage('slow', slow, 1)], max_in_flight=10).run(range(5))
+        assert max(started.values()) - t0 < 0.03
+
+    def test_failure_stops_the_item_only(self):
+        done = []
+
+        def flaky(item):
+            if item == 2:
+                raise ValueError('bad page')
+            return item
+
+        pipeline = StagedPipeline([Stage('first', flaky, 2), Stage('second', lambda i: i * 10)],
+                                  on_done=done.append)
+        results = {r.item: r for r in pipeline.run(range(4))}
+
+        assert (results[2].failed_stage, str(results[2].error)) == ('first', 'bad page')
+        assert 'second' not in results[2].stage_sec
+        assert [results[i].value for i in (0, 1, 3)] == [0, 10, 30]
+        assert len(done) == 4
+        assert pipeline.stats['first'].failed == 1
+
+    def test_stop_skips_remaining_stages(self):
+        pipeline = StagedPipeline([Stage('gate', lambda i: StagedPipeline.STOP if i % 2 else i),
+                                   Stage('rest', lambda i: 'ran')])
+        values = {r.item: r.value for r in pipeline.run(range(4))}
+        assert values == {0: 'ran', 1: None, 2: 'ran', 3: None}
+
+    def test_admission_is_bounded(self):
+        active = [0]
+        peak = [0]
+        lock = threading.Lock()
+
+        def enter(item):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+
+        def leave(item):
+            time.sleep(0.005)
+            with lock:
+                active[0] -= 1
+
+        StagedPipeline([Stage('enter', enter, 4), Stage('leave', leave, 4)],
+                       max_in_flight=3).run(range(20))
+        assert peak[0] <= 3
+
+    def test_requires_a_stage(self):
+        with pytest.raises(ValueError):
+            StagedPipeline([])
@@ -0,0 +1,74 @@
+"""
+Unit tests for virtual (on-demand) song PDFs.
+"""
+
+import pytest
+import fitz
+
+from app.services.virtual_songs import VirtualSongStore
+from tests.unit.helpers import make_pdf
+
+
+@pytest.fixture
+def source_pdf(tmp_path):
+    path = tmp_path / 'book.pdf'
+    make_pdf(path, 10)
+    return path
+
+
+class TestVirtualSongStore:
+    """Test building and caching song PDFs from source ranges."""
+
+    def test_builds_requested_range(self, source_pdf):
+        store = VirtualSongStore()
+        with store.open_song(source_pdf, 3, 6) as doc:
+            assert len(doc) == 3
+            assert doc[0].get_text().strip() == 'Page 4'
+            assert doc[2].get_text().strip() == 'Page 6'
+
+    def test_repeat_request_is_cached(self, source_pdf):
+        store = VirtualSongStore()
+        first = store.song_pdf(source_pdf, 0, 2)
+        second = store.song_pdf(source_pdf, 0, 2)
+
+        assert first is second
+        assert (store.hits, store.misses) == (1, 1)
+
+    def test_edited_range_is_a_new_entry(self, source_pdf):
+        store = VirtualSongStore()
+        store.song_pdf(source_pdf, 0, 4)
+        data = store.song_pdf(source_pdf, 0, 3)
+
+        assert store.misses == 2
+        with fitz.open(stream=data, filetype='pdf') as doc:
+            assert len(doc) == 3
+
+    def test_changed_source_is_rebuilt(self, tmp_path, source_pdf):
+        store = VirtualSongStore()
+        store.song_pdf(source_pdf, 0, 1)
+        make_pdf(source_pdf, 10, label='Rescan')
+
+        with store.open_song(source_pdf, 0, 1) as doc:
+            assert doc[0].get_text().strip() == 'Rescan 1'
+
+    def test_disk_cache_is_shared(self, tmp_path, source_pdf):
+        cache_dir = tmp_path / 'cache'
+        data = VirtualSongStore(cache_dir=cache_dir).song_pdf(source_pdf, 2, 5)
+
+        assert len(list(cache_dir.glob('*/2-5.pdf'))) == 1
+        assert VirtualSongStore(cache_dir=cache_dir).song_pdf(source_pdf, 2, 5) == data
+
+    def test_memory_budget_evicts_oldest(self, source_pdf):
+        store = VirtualSongStore()
+        size = len(store.song_pdf(source_pdf, 0, 1))
+        store = VirtualSongStore(max_cache_bytes=int(size * 2.5))
+
+        for start in range(4):
+            store.song_pdf(source_pdf, start, start + 1)
+        store.song_pdf(source_pdf, 0, 1)
+
+        assert store.misses == 5
+
+    def test_empty_range(self, source_pdf):
+        with pytest.raises(ValueError):
+            VirtualSongStore().song_pdf(source_pdf, 10, 12)
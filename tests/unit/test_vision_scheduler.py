@@ -0,0 +1,86 @@
+"""
+Unit tests for the global vision scheduler.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.utils.log_context import current_label, log_label
+from app.utils.vision_scheduler import PRIORITY_PROBE, PRIORITY_SCAN, VisionScheduler
+
+
+class Gate:
+    """Holds the single worker busy until opened, so the queue can be filled first."""
+
+    def __init__(self, scheduler):
+        self.event = threading.Event()
+        self.future = scheduler.submit('gate', self.event.wait)
+        while scheduler.stats()['busy'] == 0:
+            time.sleep(0.001)
+
+    def open(self):
+        self.event.set()
+        self.future.result()
+
+
+class TestVisionScheduler:
+    """Test ordering rules and result routing."""
+
+    def test_results_route_to_each_book(self):
+        with VisionScheduler(workers=4) as scheduler:
+            futures = {book: scheduler.map(book, lambda n, b=book: (b, n * n), list(range(20)))
+                       for book in ('a', 'b', 'c')}
+            for book, fs in futures.items():
+                assert [f.result() for f in fs] == [(book, n * n) for n in range(20)]
+            assert scheduler.stats()['books']['b']['completed'] == 20
+
+    def test_fair_share_and_priority_order(self):
+        order = []
+        with VisionScheduler(workers=1) as scheduler:
+            gate = Gate(scheduler)
+            scheduler.map('big', lambda n: order.append(('big', n)), list(range(3)))
+            scheduler.map('small', lambda n: order.append(('small', n)), list(range(2)))
+            scheduler.submit('small', lambda: order.append(('small', 'probe')), priority=PRIORITY_PROBE)
+            gate.open()
+
+        # Probe first; then the books take turns, big (earlier arrival) leading
+        assert order == [('small', 'probe'), ('big', 0), ('small', 0), ('big', 1),
+                         ('small', 1), ('big', 2)]
+
+    def test_idle_workers_go_to_the_remaining_book(self):
+        running = []
+        peak = [0]
+        lock = threading.Lock()
+
+        def task(book):
+            with lock:
+                running.append(book)
+                peak[0] = max(peak[0], running.count('big'))
+            time.sleep(0.01)
+            with lock:
+                running.remove(book)
+
+        with VisionScheduler(workers=6) as scheduler:
+            small = scheduler.map('small', task, ['small'] * 2)
+            big = scheduler.map('big', task, ['big'] * 30)
+            for f in small + big:
+                f.result()
+        assert peak[0] == 6
+
+    def test_nested_call_runs_inline_and_errors_propagate(self):
+        with VisionScheduler(workers=1) as scheduler:
+            nested = scheduler.submit('a', lambda: scheduler.call('a', lambda: 'inner'))
+            assert nested.result(timeout=5) == 'inner'
+
+            def fail():
+                raise ValueError('boom')
+            with pytest.raises(ValueError):
+                scheduler.call('a', fail)
+
+    def test_tasks_run_in_submitter_context(self):
+        with VisionScheduler(workers=2) as scheduler:
+            with log_label('[3/9]'):
+                future = scheduler.submit('a', current_label, priority=PRIORITY_SCAN)
+            assert future.result() == '[3/9]'